@@ -5,23 +5,31 @@
 -- ----------
 -- SQLite setup
 -- ----------
+PRAGMA auto_vacuum=INCREMENTAL;   -- before any table; lets `pixarr_db.py maintain` return free pages online
 PRAGMA journal_mode=WAL;
 PRAGMA synchronous=NORMAL;
 PRAGMA foreign_keys=ON;
 PRAGMA case_sensitive_like=OFF;
-PRAGMA user_version=1;
+PRAGMA user_version=2;   -- v1 DBs: scripts/migrate_v2.py
 
 -- ----------
 -- Core: one row per unique binary
+-- Schema v2: digests are 32-byte BLOBs and row timestamps integer epoch seconds (UTC);
+-- the v1 text forms (hash_sha256, content_sha256, added_at, updated_at) are VIRTUAL
+-- generated columns, so readers keep working. Look up by the BLOB columns (indexed).
 -- ----------
 CREATE TABLE IF NOT EXISTS media (
-  id               TEXT PRIMARY KEY,              -- UUID (string)
-  hash_sha256      TEXT UNIQUE NOT NULL,          -- dedup anchor (byte-for-byte file)
+  rid              INTEGER PRIMARY KEY,           -- compact row key (sightings_v2.media_rid)
+  id               TEXT UNIQUE NOT NULL,          -- UUID (string; API/CLI identifier)
+  sha256           BLOB UNIQUE NOT NULL CHECK (length(sha256) = 32),  -- dedup anchor (byte-for-byte file)
+  hash_sha256      TEXT GENERATED ALWAYS AS (lower(hex(sha256))) VIRTUAL,
   phash            TEXT,                          -- optional perceptual hash
-  content_sha256   TEXT,                          -- [ADDED 2025-08-20] pixel-level digest (decoded content; stable across EXIF/XMP rewrites; NOT UNIQUE)
+  content_bin      BLOB,                          -- pixel-level digest (decoded content; stable across EXIF/XMP rewrites; NOT UNIQUE)
+  content_sha256   TEXT GENERATED ALWAYS AS (lower(hex(content_bin))) VIRTUAL,
   ext              TEXT NOT NULL,                 -- .jpg .heic .mp4 ...
   bytes            INTEGER NOT NULL,
-  taken_at         TEXT,                          -- ISO8601 (UTC or naive)
+  taken_at         TEXT,                          -- ISO8601 (UTC or naive), as resolved
+  taken_ts         INTEGER,                       -- taken_at as epoch seconds (naive read as UTC); sort/range key
   tz_offset        TEXT,                          -- optional original TZ offset
   gps_lat          REAL,
   gps_lon          REAL,
@@ -30,39 +38,141 @@ CREATE TABLE IF NOT EXISTS media (
   camera_model     TEXT,                          -- optional
   state            TEXT NOT NULL,                 -- 'staging'|'review'|'library'|'quarantine'|'deleted'
   canonical_path   TEXT,                          -- path in Review/Library
-  added_at         TEXT NOT NULL,                 -- first-seen timestamp (UTC ISO8601)
-  updated_at       TEXT NOT NULL,                 -- last update timestamp (UTC ISO8601)
+  added_ts         INTEGER NOT NULL,              -- first-seen (epoch seconds, UTC)
+  updated_ts       INTEGER NOT NULL,              -- last update (epoch seconds, UTC)
+  added_at         TEXT GENERATED ALWAYS AS (strftime('%Y-%m-%dT%H:%M:%S', added_ts, 'unixepoch')) VIRTUAL,
+  updated_at       TEXT GENERATED ALWAYS AS (strftime('%Y-%m-%dT%H:%M:%S', updated_ts, 'unixepoch')) VIRTUAL,
   xmp_written      INTEGER DEFAULT 0,             -- 0/1 flag (written after library)
   -- quarantine metadata
   quarantine_reason TEXT,                         -- why quarantined (e.g. 'missing_datetime','unsupported_ext','duplicate_content') [NOTE: added reason label support]
   -- deletion/verification (for reconcile scripts & audits)
   deleted_at       TEXT,                          -- when we marked it deleted
   last_verified_at TEXT,                          -- last time we saw the file on disk
+  -- optional parallel tree hash for big files (scripts/pixarr_treehash.py; chunk digests in media_chunks)
+  tree_sha256      TEXT,                          -- root over per-chunk sha256 digests (NULL below --tree-hash-min-mb)
+  tree_chunk_bytes INTEGER,                       -- chunk size the root was computed with
   -- keep states constrained since we rebuild from file
   CHECK (state IN ('staging','review','library','quarantine','deleted'))
 );
-CREATE INDEX IF NOT EXISTS idx_media_taken_at       ON media(taken_at);
-CREATE INDEX IF NOT EXISTS idx_media_state          ON media(state);
-CREATE INDEX IF NOT EXISTS idx_media_content_sha256 ON media(content_sha256) WHERE content_sha256 IS NOT NULL; -- [ADDED 2025-08-20] fast content-dupe lookup
+CREATE INDEX IF NOT EXISTS idx_media_state_taken ON media(state, taken_ts);
+CREATE INDEX IF NOT EXISTS idx_media_taken_ts    ON media(taken_ts);
+CREATE INDEX IF NOT EXISTS idx_media_content_bin ON media(content_bin) WHERE content_bin IS NOT NULL; -- fast content-dupe lookup
+CREATE INDEX IF NOT EXISTS idx_media_tree        ON media(tree_sha256) WHERE tree_sha256 IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_media_added       ON media(added_ts);     -- last_media.py (newest first)
+-- hash prefixes (show_media.py --hash-prefix) are range scans on the UNIQUE sha256 index:
+--   sha256 >= X'2420' AND sha256 < X'2421'
+
+-- ----------
+-- Counts by state / quarantine reason / ext (+ bytes), kept exact by triggers on media
+-- so stats never GROUP BY the whole table. Mirrors scripts/pixarr_counters.py (DDL,
+-- ensure/rebuild for older DBs: scripts/pixarr_db.py rebuild-counters).
+--   dim 'state' -> media.state, 'reason' -> quarantine_reason of quarantined rows ('' = NULL),
+--   dim 'ext' -> media.ext
+-- ----------
+CREATE TABLE IF NOT EXISTS media_counters (
+  dim    TEXT NOT NULL,
+  key    TEXT NOT NULL,
+  n      INTEGER NOT NULL DEFAULT 0,
+  bytes  INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY(dim, key)
+) WITHOUT ROWID;
+DROP TRIGGER IF EXISTS media_counters_ai;
+CREATE TRIGGER media_counters_ai AFTER INSERT ON media BEGIN
+  INSERT INTO media_counters (dim, key, n, bytes)
+    VALUES ('state', NEW.state, 1, NEW.bytes), ('ext', NEW.ext, 1, NEW.bytes)
+    ON CONFLICT(dim, key) DO UPDATE SET n = n + excluded.n, bytes = bytes + excluded.bytes;
+  INSERT INTO media_counters (dim, key, n, bytes)
+    SELECT 'reason', COALESCE(NEW.quarantine_reason, ''), 1, NEW.bytes WHERE NEW.state = 'quarantine'
+    ON CONFLICT(dim, key) DO UPDATE SET n = n + excluded.n, bytes = bytes + excluded.bytes;
+END;
+DROP TRIGGER IF EXISTS media_counters_ad;
+CREATE TRIGGER media_counters_ad AFTER DELETE ON media BEGIN
+  INSERT INTO media_counters (dim, key, n, bytes)
+    VALUES ('state', OLD.state, -1, -OLD.bytes), ('ext', OLD.ext, -1, -OLD.bytes)
+    ON CONFLICT(dim, key) DO UPDATE SET n = n + excluded.n, bytes = bytes + excluded.bytes;
+  INSERT INTO media_counters (dim, key, n, bytes)
+    SELECT 'reason', COALESCE(OLD.quarantine_reason, ''), -1, -OLD.bytes WHERE OLD.state = 'quarantine'
+    ON CONFLICT(dim, key) DO UPDATE SET n = n + excluded.n, bytes = bytes + excluded.bytes;
+END;
+DROP TRIGGER IF EXISTS media_counters_au;
+CREATE TRIGGER media_counters_au AFTER UPDATE OF state, quarantine_reason, ext, bytes ON media
+WHEN OLD.state IS NOT NEW.state OR OLD.quarantine_reason IS NOT NEW.quarantine_reason
+  OR OLD.ext IS NOT NEW.ext OR OLD.bytes IS NOT NEW.bytes
+BEGIN
+  INSERT INTO media_counters (dim, key, n, bytes)
+    VALUES ('state', OLD.state, -1, -OLD.bytes), ('ext', OLD.ext, -1, -OLD.bytes)
+    ON CONFLICT(dim, key) DO UPDATE SET n = n + excluded.n, bytes = bytes + excluded.bytes;
+  INSERT INTO media_counters (dim, key, n, bytes)
+    SELECT 'reason', COALESCE(OLD.quarantine_reason, ''), -1, -OLD.bytes WHERE OLD.state = 'quarantine'
+    ON CONFLICT(dim, key) DO UPDATE SET n = n + excluded.n, bytes = bytes + excluded.bytes;
+  INSERT INTO media_counters (dim, key, n, bytes)
+    VALUES ('state', NEW.state, 1, NEW.bytes), ('ext', NEW.ext, 1, NEW.bytes)
+    ON CONFLICT(dim, key) DO UPDATE SET n = n + excluded.n, bytes = bytes + excluded.bytes;
+  INSERT INTO media_counters (dim, key, n, bytes)
+    SELECT 'reason', COALESCE(NEW.quarantine_reason, ''), 1, NEW.bytes WHERE NEW.state = 'quarantine'
+    ON CONFLICT(dim, key) DO UPDATE SET n = n + excluded.n, bytes = bytes + excluded.bytes;
+END;
+
+-- ----------
+-- Tree-hash chunk digests: sha256 of bytes [idx*tree_chunk_bytes, (idx+1)*tree_chunk_bytes)
+-- lets scripts/scrub_media.py verify a byte range without rehashing the whole file
+-- ----------
+CREATE TABLE IF NOT EXISTS media_chunks (
+  media_id     TEXT NOT NULL,
+  idx          INTEGER NOT NULL,
+  digest       BLOB NOT NULL,       -- 32-byte sha256
+  PRIMARY KEY(media_id, idx),
+  FOREIGN KEY(media_id) REFERENCES media(id) ON DELETE CASCADE
+) WITHOUT ROWID;
 
 -- ----------
 -- Provenance: every path/name we've ever seen
+-- sightings_v2 stores media_rid (integer) and seen_ts; the `sightings` view below keeps
+-- the v1 shape (media_id UUID, seen_at text) for readers and plain INSERTs.
+-- Compaction mode (scripts/pixarr_sightings.py, `pixarr_db.py compact-sightings`) adds the
+-- unique index idx_sightings_v2_media_path(media_rid, full_path); from then on a re-seen path
+-- updates its row (seen_ts, first_seen_ts, seen_count, ingest_id) instead of adding one. The
+-- index is not created here: existing history has duplicates until the compaction job merges them.
 -- ----------
-CREATE TABLE IF NOT EXISTS sightings (
+CREATE TABLE IF NOT EXISTS sightings_v2 (
   id           INTEGER PRIMARY KEY,
-  media_id     TEXT NOT NULL,
+  media_rid    INTEGER NOT NULL,
   source_root  TEXT NOT NULL,       -- e.g. 'Staging/pc', 'Staging/icloud'
   full_path    TEXT NOT NULL,       -- exact path when seen
   filename     TEXT NOT NULL,       -- basename at the time
   folder_hint  TEXT,                -- last human-looking folder (optional)
   ingest_id    TEXT,                -- batch id
-  seen_at      TEXT NOT NULL,
-  FOREIGN KEY(media_id) REFERENCES media(id)   ON DELETE CASCADE,
+  seen_ts      INTEGER NOT NULL,    -- epoch seconds (UTC)
+  seen_at      TEXT GENERATED ALWAYS AS (strftime('%Y-%m-%dT%H:%M:%S', seen_ts, 'unixepoch')) VIRTUAL,
+  first_seen_ts INTEGER,            -- compaction: first time seen (NULL = seen once, i.e. seen_ts)
+  seen_count   INTEGER NOT NULL DEFAULT 1,  -- compaction: times seen; seen_ts is the latest
+  FOREIGN KEY(media_rid) REFERENCES media(rid)  ON DELETE CASCADE,
   FOREIGN KEY(ingest_id) REFERENCES ingests(id) ON DELETE SET NULL
 );
-CREATE INDEX IF NOT EXISTS idx_sightings_media   ON sightings(media_id);
-CREATE INDEX IF NOT EXISTS idx_sightings_seen_at ON sightings(seen_at);
-CREATE INDEX IF NOT EXISTS idx_sightings_ingest  ON sightings(ingest_id);
+CREATE INDEX IF NOT EXISTS idx_sightings_v2_media  ON sightings_v2(media_rid);
+CREATE INDEX IF NOT EXISTS idx_sightings_v2_seen   ON sightings_v2(seen_ts);
+CREATE INDEX IF NOT EXISTS idx_sightings_v2_ingest_seen ON sightings_v2(ingest_id, seen_ts);  -- per-batch, newest first
+CREATE INDEX IF NOT EXISTS idx_sightings_v2_path   ON sightings_v2(full_path);          -- show_media.py --path
+DROP INDEX IF EXISTS idx_sightings_v2_ingest;    -- superseded by idx_sightings_v2_ingest_seen
+
+DROP VIEW IF EXISTS sightings;
+CREATE VIEW sightings AS
+SELECT s.id, m.id AS media_id, s.media_rid, s.source_root, s.full_path, s.filename,
+       s.folder_hint, s.ingest_id, s.seen_at, s.seen_ts,
+       COALESCE(s.first_seen_ts, s.seen_ts) AS first_seen_ts,
+       strftime('%Y-%m-%dT%H:%M:%S', COALESCE(s.first_seen_ts, s.seen_ts), 'unixepoch') AS first_seen_at,
+       s.seen_count
+FROM sightings_v2 s JOIN media m ON m.rid = s.media_rid;
+
+-- pixarr_sightings.ensure() swaps in the upsert version of this trigger in compaction mode
+DROP TRIGGER IF EXISTS sightings_insert;
+CREATE TRIGGER sightings_insert INSTEAD OF INSERT ON sightings
+BEGIN
+  INSERT INTO sightings_v2 (media_rid, source_root, full_path, filename, folder_hint, ingest_id, seen_ts)
+  VALUES ((SELECT rid FROM media WHERE id = NEW.media_id), NEW.source_root, NEW.full_path, NEW.filename,
+          NEW.folder_hint, NEW.ingest_id,
+          COALESCE(NEW.seen_ts, CAST(strftime('%s', NEW.seen_at) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER)));
+END;
 
 -- ----------
 -- Hints: machine suggestions (not final tags)
@@ -118,6 +228,121 @@ CREATE TABLE IF NOT EXISTS ingests (
   finished_at TEXT,
   notes       TEXT
 );
+CREATE INDEX IF NOT EXISTS idx_ingests_started ON ingests(started_at);
+
+-- ----------
+-- Per-batch summary, written by finish_ingest in the same commit as ingests.finished_at
+-- (counters are cumulative across --resume runs). last_ingests.py / GET /api/stats/ingests
+-- read it instead of aggregating sightings per batch. Mirrors ingest_pass.ensure_ingest_stats.
+-- ----------
+CREATE TABLE IF NOT EXISTS ingest_stats (
+  ingest_id     TEXT PRIMARY KEY,
+  source_path   TEXT,
+  dry_run       INTEGER NOT NULL,
+  scan_level    TEXT,
+  scanned       INTEGER NOT NULL,
+  moved         INTEGER,              -- planned in dry-run; NULL = not computed at this scan level
+  updated       INTEGER,
+  skipped_dupe  INTEGER,
+  quarantined   INTEGER NOT NULL,
+  q_counts      TEXT NOT NULL,        -- JSON {reason: count}
+  bytes_total   INTEGER,              -- candidate media bytes (NULL when the scan level doesn't stat)
+  bytes_hashed  INTEGER,
+  sightings     INTEGER NOT NULL,     -- sightings_v2 rows of this batch
+  duration_s    REAL NOT NULL,        -- processing time (all runs of the batch)
+  stages        TEXT,                 -- JSON {stage: {count, total_s}} if stages were timed (--profile/metrics)
+  FOREIGN KEY(ingest_id) REFERENCES ingests(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- ----------
+-- Quarantine events (indexed from Quarantine/_manifests/<ingest_id>.jsonl)
+-- ----------
+CREATE TABLE IF NOT EXISTS quarantine_events (
+  id             INTEGER PRIMARY KEY,
+  ingest_id      TEXT,
+  reason         TEXT NOT NULL,
+  original_path  TEXT NOT NULL,
+  quarantined_to TEXT,              -- NULL when the move failed
+  extra          TEXT,
+  ts             TEXT NOT NULL,
+  manifest       TEXT,              -- JSONL file the event came from
+  UNIQUE(original_path, ts)
+);
+CREATE INDEX IF NOT EXISTS idx_qevents_ingest ON quarantine_events(ingest_id);
+CREATE INDEX IF NOT EXISTS idx_qevents_reason ON quarantine_events(reason);
+CREATE INDEX IF NOT EXISTS idx_qevents_dest   ON quarantine_events(quarantined_to);
+
+-- ----------
+-- Ingest checkpoints (--resume <ingest_id>)
+-- walk order is sorted, so every directory up to last_dir is done; ingest_files_done
+-- marks files of the directory in progress (cleared when it completes)
+-- ----------
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+  ingest_id    TEXT PRIMARY KEY,
+  source_path  TEXT NOT NULL,       -- staging root the batch walks
+  dry_run      INTEGER NOT NULL,    -- 0/1; resume must use the same mode
+  last_dir     TEXT,                -- last fully processed dir, relative ('' = root; NULL = none yet)
+  stats_json   TEXT NOT NULL,       -- cumulative per-source stats at the last commit
+  updated_at   TEXT NOT NULL,
+  FOREIGN KEY(ingest_id) REFERENCES ingests(id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS ingest_files_done (
+  ingest_id    TEXT NOT NULL,
+  rel_path     TEXT NOT NULL,
+  PRIMARY KEY(ingest_id, rel_path)
+) WITHOUT ROWID;
+
+-- ----------
+-- Review re-shard journal (scripts/reshard_review.py)
+-- planned -> done|failed; 'planned' rows are replayed on the next run
+-- ----------
+CREATE TABLE IF NOT EXISTS review_moves (
+  id           INTEGER PRIMARY KEY,
+  batch_id     TEXT NOT NULL,
+  media_id     TEXT NOT NULL,
+  old_path     TEXT NOT NULL,
+  new_path     TEXT NOT NULL,
+  status       TEXT NOT NULL,       -- 'planned'|'done'|'failed'
+  created_at   TEXT NOT NULL,
+  finished_at  TEXT,
+  CHECK (status IN ('planned','done','failed'))
+);
+CREATE INDEX IF NOT EXISTS idx_review_moves_status ON review_moves(status);
+
+-- ----------
+-- Sharded ingest (scripts/pixarr_shards.py). A node ingests into a local delta DB
+-- (ingest_pass.py --delta-db); delta_info (one row) says which shard it is. The master
+-- records each merged delta in shard_merges (last_rid = resume point of an interrupted
+-- merge) and which shard ran each copied batch in shard_batches (the ingest ids are
+-- kept, so sightings/quarantine_events of a batch trace back to the node).
+-- Mirrors ingest_pass.ensure_shard_tables.
+-- ----------
+CREATE TABLE IF NOT EXISTS delta_info (
+  shard_id    TEXT PRIMARY KEY,     -- UUID, one per delta file
+  shard       TEXT NOT NULL,        -- node name (--shard)
+  host        TEXT,
+  data_dir    TEXT NOT NULL,        -- the node's data dir (Review/Quarantine paths are under it)
+  created_at  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shard_merges (
+  shard_id    TEXT PRIMARY KEY,     -- delta_info.shard_id
+  shard       TEXT NOT NULL,
+  host        TEXT,
+  data_dir    TEXT,                 -- node data dir as seen from the master (after --map)
+  delta_path  TEXT NOT NULL,
+  ingest_id   TEXT,                 -- the merge's own batch (cross-shard duplicate quarantines)
+  status      TEXT NOT NULL,        -- 'running'|'done'
+  last_rid    INTEGER NOT NULL DEFAULT 0,
+  counts      TEXT,                 -- JSON {new, merged, dupes, ...}
+  started_at  TEXT NOT NULL,
+  finished_at TEXT,
+  CHECK (status IN ('running','done'))
+);
+CREATE TABLE IF NOT EXISTS shard_batches (
+  ingest_id   TEXT PRIMARY KEY,
+  shard_id    TEXT NOT NULL,
+  FOREIGN KEY(ingest_id) REFERENCES ingests(id) ON DELETE CASCADE
+) WITHOUT ROWID;
 
 -- ----------
 -- Flexible EXIF K/V for extras (optional)
@@ -126,10 +351,9 @@ CREATE TABLE IF NOT EXISTS exif_kv (
   media_id TEXT NOT NULL,
   tag      TEXT NOT NULL,
   value    TEXT,
-  PRIMARY KEY(media_id, tag),
+  PRIMARY KEY(media_id, tag),      -- clustered: per-media reads are one range scan
   FOREIGN KEY(media_id) REFERENCES media(id) ON DELETE CASCADE
-);
-CREATE INDEX IF NOT EXISTS idx_exif_media ON exif_kv(media_id);
+) WITHOUT ROWID;
 
 -- ----------
 -- Convenience views
@@ -139,7 +363,7 @@ CREATE VIEW v_review_queue AS
 SELECT id, canonical_path, taken_at
 FROM media
 WHERE state='review'
-ORDER BY (taken_at IS NULL), taken_at;  -- SQLite-friendly NULLs last
+ORDER BY (taken_ts IS NULL), taken_ts;  -- SQLite-friendly NULLs last
 
 DROP VIEW IF EXISTS v_needs_xmp;
 CREATE VIEW v_needs_xmp AS
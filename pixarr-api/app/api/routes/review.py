@@ -16,12 +16,14 @@ from app.core.config import REVIEW_DIR
 from app.repositories.db import get_conn
 from app.schemas.media import MediaItem
 from app.utils.http import abs_url, safe_rel_under
+from app.utils.review_layout import resolve_review_file
 from app.utils.thumbs import serve_or_build_thumb
 
 api_router = APIRouter(tags=["review"])     # mounted under /api in main
 public_router = APIRouter()                 # mounted without prefix in main
 
 def _row_to_media_item(request: Request, row: sqlite3.Row) -> Optional[MediaItem]:
+    # rel may include a shard folder (hash2 / year_month layouts); URLs keep the slash.
     canonical = Path(row["canonical_path"])
     rel = safe_rel_under(REVIEW_DIR, canonical)
     if rel is None:
@@ -56,7 +58,8 @@ def list_review(request: Request, limit: int = 200, offset: int = 0, q: Optional
     if q:
         sql += " AND (id LIKE ? OR canonical_path LIKE ?)"
         like = f"%{q}%"; params += [like, like]
-    sql += " ORDER BY taken_at IS NULL, taken_at DESC, id ASC LIMIT ? OFFSET ?"
+    # taken_ts DESC walks idx_media_state_taken backwards (NULLs sort last); no full sort
+    sql += " ORDER BY taken_ts DESC, id ASC LIMIT ? OFFSET ?"
     params += [limit, offset]
 
     with get_conn() as con:
@@ -69,20 +72,20 @@ def list_review(request: Request, limit: int = 200, offset: int = 0, q: Optional
             out.append(item)
     return out
 
-@public_router.get("/media/{path:path}")
-def get_review_media(path: str):
-    abs_path = (REVIEW_DIR / path).resolve()
-    if safe_rel_under(REVIEW_DIR, abs_path) is None:
+def _review_file_or_404(path: str) -> Path:
+    """Resolve a Review-relative path under any layout (flat or sharded)."""
+    try:
+        abs_path = resolve_review_file(path)
+    except ValueError:
         raise HTTPException(403, "forbidden path")
-    if not abs_path.is_file():
+    if abs_path is None:
         raise HTTPException(404, "file not found")
-    return FileResponse(abs_path)
+    return abs_path
+
+@public_router.get("/media/{path:path}")
+def get_review_media(path: str):
+    return FileResponse(_review_file_or_404(path))
 
 @public_router.get("/thumb/review/{path:path}")
 def get_review_thumb(path: str, h: int = 220):
-    abs_path = (REVIEW_DIR / path).resolve()
-    if safe_rel_under(REVIEW_DIR, abs_path) is None:
-        raise HTTPException(403, "forbidden path")
-    if not abs_path.is_file():
-        raise HTTPException(404, "file not found")
-    return serve_or_build_thumb(abs_path, h)
+    return serve_or_build_thumb(_review_file_or_404(path), h)
@@ -0,0 +1,75 @@
+# app/api/routes/stats.py
+# Library-wide numbers for dashboards:
+# - GET /api/stats/media     counts + bytes by state, quarantine reason, extension
+# - GET /api/stats/ingests   recent ingest batches with their stored summary
+# - GET /api/stats/sql       per-statement timings of this API process (PIXARR_SQL_TRACE=1)
+# Both read precomputed rows (media_counters, kept exact by triggers on media — see
+# scripts/pixarr_counters.py; ingest_stats, written when a batch finishes), so they
+# cost a few row reads however big the library and its history get.
+import json
+from typing import List
+
+from fastapi import APIRouter, HTTPException
+
+from app.repositories import db
+from app.repositories.db import get_conn, pixarr_counters
+from app.schemas.media import CountBytes, IngestSummary, MediaStats, SqlTraceReport
+
+api_router = APIRouter(prefix="/stats", tags=["stats"])    # mounted under /api in main
+
+@api_router.get("/media", response_model=MediaStats)
+def media_stats():
+    with get_conn() as con:
+        if not pixarr_counters.available(con):
+            # older DB: the next ingest (or pixarr_db.py rebuild-counters) creates them
+            raise HTTPException(503, "media_counters missing; run scripts/pixarr_db.py rebuild-counters")
+        snap = pixarr_counters.snapshot(con)
+
+    def group(dim: str) -> dict:
+        return {k: CountBytes(count=n, bytes=b) for k, (n, b) in snap[dim].items()}
+
+    return MediaStats(
+        total=sum(n for n, _b in snap["state"].values()),
+        bytes=sum(b for _n, b in snap["state"].values()),
+        by_state=group("state"),
+        by_reason=group("reason"),
+        by_ext=group("ext"),
+    )
+
+@api_router.get("/ingests", response_model=List[IngestSummary])
+def ingest_history(limit: int = 20):
+    if not (1 <= limit <= 500):
+        raise HTTPException(400, "limit must be 1..500")
+    with get_conn() as con:
+        if not con.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='ingest_stats'").fetchone():
+            raise HTTPException(503, "ingest_stats missing; it is created by the next ingest run")
+        rows = con.execute(
+            """
+            SELECT i.id, i.source, i.started_at, i.finished_at, st.dry_run, st.scan_level, st.scanned,
+                   st.moved, st.updated, st.skipped_dupe, st.quarantined, st.q_counts, st.bytes_total,
+                   st.bytes_hashed, st.sightings, st.duration_s, st.stages
+            FROM ingests i
+            LEFT JOIN ingest_stats st ON st.ingest_id = i.id
+            ORDER BY i.started_at DESC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+
+    out: list[IngestSummary] = []
+    for r in rows:
+        d = dict(r)
+        d["dry_run"] = None if d["dry_run"] is None else bool(d["dry_run"])
+        d["q_counts"] = json.loads(d["q_counts"]) if d["q_counts"] else {}
+        d["stages"] = json.loads(d["stages"]) if d["stages"] else None
+        out.append(IngestSummary(**d))
+    return out
+
+@api_router.get("/sql", response_model=SqlTraceReport)
+def sql_stats(top: int = 25, slow: int = 20):
+    """Statements by total time since the process started, plus the latest slow ones."""
+    if db.TRACER is None:
+        raise HTTPException(404, "SQL tracing is off; start the API with PIXARR_SQL_TRACE=1")
+    if not (1 <= top <= 500) or not (0 <= slow <= 200):
+        raise HTTPException(400, "top must be 1..500, slow 0..200")
+    return SqlTraceReport(**db.TRACER.snapshot(top, slow))
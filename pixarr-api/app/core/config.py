@@ -18,6 +18,10 @@ _DEFAULTS = {
         "staging_subdir": "media/Staging",
         "thumb_subdir": "thumb-cache",
     },
+    "review": {
+        # flat | hash2 | year_month (same values as scripts/ingest_pass.py --review-layout)
+        "layout": "flat",
+    },
     "staging": {
         "roots": {
             "pc": "pc",
@@ -74,6 +78,10 @@ STAGING_DIR = (DATA_DIR / paths["staging_subdir"]).resolve()
 THUMB_DIR   = (DATA_DIR / paths["thumb_subdir"]).resolve()
 THUMB_DIR.mkdir(parents=True, exist_ok=True)
 
+# Review layout: where new files land. The API resolves any layout on read
+# (see app/utils/review_layout.py), so a half-migrated Review folder still works.
+REVIEW_LAYOUT = str({**_DEFAULTS["review"], **_cfg.get("review", {})}["layout"])
+
 # ---------------- Database path --------------------
 # Supports either:
 #   [paths] db_path   = "/absolute/or/relative/to/DATA_DIR/app.sqlite3"
@@ -94,6 +102,16 @@ else:
 DB_PATH = DB_PATH.resolve()
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+# ---------------- SQL tracing (off unless PIXARR_SQL_TRACE=1) --------------------
+# Times every statement per normalized SQL (GET /api/stats/sql); statements over
+# PIXARR_SQL_SLOW_MS go to <data_dir>/logs/api-slow-sql.log with their query plan.
+# PIXARR_SQL_TRACE=starts also counts the statements SQLite starts (trace callback).
+_sql_trace  = os.getenv("PIXARR_SQL_TRACE", "").strip().lower()
+SQL_TRACE   = _sql_trace not in ("", "0", "false", "no", "off")
+SQL_TRACE_STARTS = _sql_trace == "starts"
+SQL_SLOW_MS = float(os.getenv("PIXARR_SQL_SLOW_MS", "100"))
+SQL_SLOW_LOG = DATA_DIR / "logs" / "api-slow-sql.log"
+
 # -------------------- Staging roots --------------------
 # Values in TOML can be absolute or relative to STAGING_DIR.
 roots_cfg: dict = _cfg.get("staging", {}).get("roots", {})
@@ -3,7 +3,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 # import routers
-from app.api.routes import review, staging
+from app.api.routes import review, staging, stats
 
 app = FastAPI(title="Pixarr API", version="0.3")
 
@@ -19,6 +19,7 @@ app.add_middleware(
 # API routers
 app.include_router(review.api_router, prefix="/api")
 app.include_router(staging.api_router, prefix="/api")
+app.include_router(stats.api_router, prefix="/api")
 
 # public (non-API) routers for serving files/thumbs
 app.include_router(review.public_router)   # /media/* and /thumb/review/*
@@ -1,12 +1,38 @@
 # app/repositories/db.py
+# Read connections come from the shared factory in scripts/pixarr_sqlite.py
+# ("read" profile: query_only, large mmap + page cache, temp_store=MEMORY),
+# so the API and the CLI tools tune SQLite in one place. Each worker thread
+# keeps its connection open across requests (opening one costs more than a query).
+# With PIXARR_SQL_TRACE=1 those connections time each statement into TRACER
+# (scripts/pixarr_trace.py), read by GET /api/stats/sql.
 import sqlite3
-from app.core.config import DB_PATH
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
 
-def get_conn() -> sqlite3.Connection:
+from app.core.config import DB_PATH, SQL_SLOW_LOG, SQL_SLOW_MS, SQL_TRACE, SQL_TRACE_STARTS
+
+_SCRIPTS = Path(__file__).resolve().parents[3] / "scripts"   # repo/scripts (pixarr-api sits next to it)
+if str(_SCRIPTS) not in sys.path:
+    sys.path.append(str(_SCRIPTS))
+import pixarr_counters  # noqa: E402  (media_counters readers, for app/api/routes/stats.py)
+import pixarr_sqlite  # noqa: E402
+import pixarr_trace  # noqa: E402
+
+TRACER: Optional[pixarr_trace.SqlTracer] = (
+    pixarr_trace.SqlTracer(slow_ms=SQL_SLOW_MS, slow_log=SQL_SLOW_LOG, count_starts=SQL_TRACE_STARTS)
+    if SQL_TRACE else None)
+
+@contextmanager
+def get_conn() -> Iterator[sqlite3.Connection]:
     """
-    Create a connection with row access by column name.
-    Caller is responsible for closing (use 'with get_conn() as con').
+    This thread's read-only connection, with row access by column name
+    (use 'with get_conn() as con'; it stays open for the next request).
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    conn = pixarr_sqlite.thread_connection(DB_PATH, "read", row_factory=sqlite3.Row, tracer=TRACER)
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
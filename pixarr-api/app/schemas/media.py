@@ -1,6 +1,6 @@
 # app/schemas/media.py
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 class MediaItem(BaseModel):
     id: str
@@ -26,4 +26,61 @@ class StagingStats(BaseModel):
     raw: int
     other: int
     dirs: int
-    total_files: int
\ No newline at end of file
+    total_files: int
+class CountBytes(BaseModel):
+    count: int
+    bytes: int
+
+class MediaStats(BaseModel):
+    total: int
+    bytes: int
+    by_state: Dict[str, CountBytes]
+    by_reason: Dict[str, CountBytes]    # quarantined rows; "" = no reason recorded
+    by_ext: Dict[str, CountBytes]
+
+class StageTotal(BaseModel):
+    count: int
+    total_s: float
+
+class IngestSummary(BaseModel):
+    id: str
+    source: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    # from ingest_stats; None for unfinished batches (and ones from before it existed)
+    dry_run: Optional[bool] = None
+    scan_level: Optional[str] = None
+    scanned: Optional[int] = None
+    moved: Optional[int] = None
+    updated: Optional[int] = None
+    skipped_dupe: Optional[int] = None
+    quarantined: Optional[int] = None
+    q_counts: Dict[str, int] = {}
+    bytes_total: Optional[int] = None
+    bytes_hashed: Optional[int] = None
+    sightings: Optional[int] = None
+    duration_s: Optional[float] = None
+    stages: Optional[Dict[str, StageTotal]] = None
+
+class SqlStatementStats(BaseModel):
+    sql: str                     # normalized: literals -> ?, IN lists collapsed
+    count: int
+    total_ms: float
+    mean_ms: float
+    p95_ms: float
+    max_ms: float
+    rows: int
+
+class SqlSlowQuery(BaseModel):
+    at: str
+    ms: float
+    rows: int
+    sql: str
+    params: List[str] = []
+    plan: Optional[List[str]] = None   # EXPLAIN QUERY PLAN, on the first slow run of a statement
+
+class SqlTraceReport(BaseModel):
+    slow_ms: Optional[float] = None
+    statements: List[SqlStatementStats]
+    starts: Dict[str, int] = {}        # statements SQLite started by verb (incl. trigger programs)
+    slow: List[SqlSlowQuery] = []
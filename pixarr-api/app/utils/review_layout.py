@@ -0,0 +1,39 @@
+# app/utils/review_layout.py
+# Resolve Review/ files regardless of layout (flat | hash2 | year_month).
+# Canonical names carry their own shard key (YYYY-MM-DD_HH-MM-SS_<hash8>.<ext>),
+# so a path can be found without a DB lookup — useful while reshard_review.py
+# is moving files and for old /media/<name> links.
+import re
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import REVIEW_DIR, REVIEW_LAYOUT
+from app.utils.http import safe_rel_under
+
+_NAME_RE = re.compile(r"^(?P<ym>\d{4}-\d{2})-\d{2}_\d{2}-\d{2}-\d{2}_(?P<h2>[0-9a-f]{2})")
+
+def shard_candidates(name: str) -> list[str]:
+    """Possible shard folders for a canonical filename, configured layout first."""
+    m = _NAME_RE.match(name)
+    if not m:
+        return [""]
+    by_layout = {"flat": "", "hash2": m.group("h2"), "year_month": m.group("ym")}
+    first = by_layout.get(REVIEW_LAYOUT, "")
+    return [first] + [s for s in by_layout.values() if s != first]
+
+def resolve_review_file(rel: str) -> Optional[Path]:
+    """
+    Map a Review-relative path to an existing file, trying the path as given
+    and then the same filename under every known layout. Returns None if not
+    found; raises ValueError if `rel` escapes REVIEW_DIR.
+    """
+    abs_path = (REVIEW_DIR / rel).resolve()
+    if safe_rel_under(REVIEW_DIR, abs_path) is None:
+        raise ValueError("forbidden path")
+    if abs_path.is_file():
+        return abs_path
+    for shard in shard_candidates(abs_path.name):
+        cand = (REVIEW_DIR / shard / abs_path.name) if shard else (REVIEW_DIR / abs_path.name)
+        if cand.is_file():
+            return cand
+    return None
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+bench_db.py — microbenchmarks for ingest's per-file DB writes (no files, no exiftool).
+
+bench_ingest.py measures whole runs; this isolates the SQL ingest issues per
+file against a throw-away DB built from db/schema.sql, so a change to one
+statement shows up without disk and metadata noise.
+
+Usage (from repo root):
+  # upsert + sighting per file: legacy INSERT/UPDATE/SELECT + per-row sighting
+  # vs INSERT … ON CONFLICT … RETURNING + buffered executemany sightings
+  python scripts/bench_db.py upsert --rows 20000
+  python scripts/bench_db.py upsert --rows 20000 --group 100     # rows per commit
+
+  # pixarr_sqlite profiles vs plain sqlite3.connect(): API-style reads, ingest-style writes
+  python scripts/bench_db.py pragmas --media 20000
+
+  # states/reasons: GROUP BY over media vs media_counters; upsert cost of the counter triggers
+  python scripts/bench_db.py counters --media 1000000
+
+  # re-scans of the same files: append-only sightings vs compaction mode (upsert per path)
+  python scripts/bench_db.py sightings --files 20000 --rescans 10
+
+  # ingest write latency while `pixarr_db.py maintain` (backup, checkpoint, ...) runs
+  python scripts/bench_db.py maintain --media 200000
+
+  # cost of SQL tracing (ingest --profile / PIXARR_SQL_TRACE) on ingest's per-file statements
+  python scripts/bench_db.py trace --rows 20000
+
+Notes:
+  - "new" inserts fresh rows; "reseen" upserts the same rows again (the
+    conflict/merge path, e.g. re-ingesting a drive).
+  - --group 1 matches ingest today (one commit per file, with its checkpoint).
+  - The legacy path is what runs on SQLite < 3.35 (ingest_pass.UPSERT_RETURNING).
+  - pragmas: reads run the API's review-list and media-detail queries on a
+    connection per request (what get_conn did) and on a kept-open one (what
+    get_conn does now, via pixarr_sqlite.thread_connection); writes are upsert +
+    sighting + commit per file, --writes of them so WAL checkpoints are included.
+    "before" is what open_db/get_conn set before pixarr_sqlite (writer: WAL,
+    NORMAL, FK, 5 s timeout; reader: nothing).
+  - counters: --media rows are bulk-inserted with SQL (no Python per row); the
+    upsert rows (--rows) go through ingest's upsert + sighting + commit per file,
+    with the counter triggers dropped vs in place.
+  - sightings: --files media rows seen --rescans times each (ingest's buffered
+    flush, one commit per --group files); reports the flush cost per sighting,
+    final table rows/size and the media-detail sightings read (API_SIGHTINGS).
+  - maintain: a writer thread does ingest's upsert + sighting + commit per file
+    for the whole run; latency is compared with no maintenance, the old way
+    (one-step backup + unthrottled optimize/checkpoint) and pixarr_maintain.run
+    at the given --budget-ms / --duty.
+  - trace: dupe lookups (file + content hash) + upsert + sighting + commit per
+    file on a plain connection vs one with a pixarr_trace.SqlTracer; prints
+    the overhead and the tracer's own top statements.
+"""
+
+import argparse
+import hashlib
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import ingest_pass as ip
+import pixarr_counters
+import pixarr_maintain
+import pixarr_sightings
+import pixarr_sqlite
+import pixarr_trace
+
+
+def media_rows(n: int, seed: int = 0) -> list:
+    rows = []
+    for i in range(n):
+        h = hashlib.sha256(f"{seed}:{i}".encode()).hexdigest()
+        rows.append({
+            "id": ip.uuid_from_hash(h), "hash_sha256": h, "phash": None,
+            "content_sha256": hashlib.sha256(h.encode()).hexdigest(), "ext": ".jpg", "bytes": 1000 + i,
+            "taken_at": f"2023-{1 + i % 12:02d}-01T12:00:00", "tz_offset": None,
+            "gps_lat": None, "gps_lon": None, "state": "review", "canonical_path": None,
+            "xmp_written": 0, "quarantine_reason": None,
+        })
+    return rows
+
+
+def run_upserts(conn, rows: list, group: int, returning: bool, ingest_id: str) -> float:
+    """Seconds for upsert + sighting per row, committing every `group` rows."""
+    ip.UPSERT_RETURNING = returning
+    t0 = time.perf_counter()
+    for i, row in enumerate(rows, 1):
+        mid, _state, _canon = ip.upsert_media(conn, row)
+        ip.insert_sighting(conn, mid, Path(f"/staging/pc/{row['id']}.jpg"), f"{row['id']}.jpg",
+                           "Staging/pc", "pc", ingest_id)
+        if not returning:
+            ip.flush_sightings(conn)          # legacy: one INSERT per sighting, as it happens
+        if i % group == 0:
+            ip.timed_commit(conn)
+    ip.timed_commit(conn)
+    return time.perf_counter() - t0
+
+
+def cmd_upsert(args) -> None:
+    rows = media_rows(args.rows)
+    best = {}
+    for _ in range(args.repeat):                 # alternate modes; keep each one's best run
+        for label, returning in (("legacy", False), ("returning", True)):
+            with tempfile.TemporaryDirectory(prefix="pixarr-benchdb-") as tmp:
+                ip.pathize(Path(tmp))
+                ip.ensure_db()
+                conn = ip.open_db()
+                iid = ip.begin_ingest(conn, "bench")
+                new = run_upserts(conn, rows, args.group, returning, iid)
+                again = run_upserts(conn, rows, args.group, returning, iid)
+                n = conn.execute("SELECT COUNT(*) FROM sightings_v2").fetchone()[0]
+                assert n == 2 * len(rows), n
+                conn.close()
+            prev = best.get(label, (new, again))
+            best[label] = (min(prev[0], new), min(prev[1], again))
+    ip.UPSERT_RETURNING = ip.sqlite3.sqlite_version_info >= (3, 35, 0)
+
+    print(f"SQLite {ip.sqlite3.sqlite_version}, {args.rows} rows, commit every {args.group}, best of {args.repeat}")
+    print(f"{'':10s} {'new µs/row':>12s} {'reseen µs/row':>14s}")
+    for label, (new, again) in best.items():
+        print(f"{label:10s} {new / args.rows * 1e6:12.1f} {again / args.rows * 1e6:14.1f}")
+    (ln, la), (rn, ra) = best["legacy"], best["returning"]
+    print(f"{'speedup':10s} {ln / rn:11.2f}x {la / ra:13.2f}x")
+
+
+API_LIST = ("SELECT id, canonical_path, taken_at, gps_lat, gps_lon FROM media WHERE state='review' "
+            "ORDER BY taken_at IS NULL, taken_at DESC, id ASC LIMIT 100 OFFSET ?")
+API_DETAIL = "SELECT * FROM media WHERE id = ?"
+API_SIGHTINGS = "SELECT full_path, seen_at FROM sightings WHERE media_id = ? ORDER BY seen_ts DESC"
+
+
+def _before_writer(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    for pragma in ("journal_mode=WAL", "synchronous=NORMAL", "foreign_keys=ON", "busy_timeout=5000"):
+        conn.execute(f"PRAGMA {pragma}")
+    return conn
+
+
+def _pcts(samples: list) -> str:
+    q = statistics.quantiles(samples, n=100)
+    return f"{statistics.median(samples) * 1e6:9.1f} {q[94] * 1e6:9.1f} {q[98] * 1e6:9.1f}"
+
+
+def time_reads(opener, query: str, ids: list, n_pages: int, reps: int, per_request: bool) -> list:
+    rnd = random.Random(7)
+    out = []
+    conn = None if per_request else opener()
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        c = opener() if per_request else conn
+        if query == "list":
+            c.execute(API_LIST, (rnd.randrange(n_pages) * 100,)).fetchall()
+        else:
+            mid = rnd.choice(ids)
+            c.execute(API_DETAIL, (mid,)).fetchall()
+            c.execute(API_SIGHTINGS, (mid,)).fetchall()
+        if per_request:
+            c.close()
+        out.append(time.perf_counter() - t0)
+    if conn is not None:
+        conn.close()
+    return out
+
+
+def time_writes(conn, rows: list, ingest_id: str) -> list:
+    out = []
+    for row in rows:
+        t0 = time.perf_counter()
+        mid, _s, _c = ip.upsert_media(conn, row)
+        ip.insert_sighting(conn, mid, Path(f"/staging/other/{mid}.jpg"), f"{mid}.jpg", "Staging/other", None, ingest_id)
+        ip.timed_commit(conn)
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def cmd_pragmas(args) -> None:
+    with tempfile.TemporaryDirectory(prefix="pixarr-benchdb-") as tmp:
+        ip.pathize(Path(tmp))
+        ip.ensure_db()
+        conn = ip.open_db()
+        iid = ip.begin_ingest(conn, "bench")
+        run_upserts(conn, media_rows(args.media), 1000, True, iid)
+        ids = [r[0] for r in conn.execute("SELECT id FROM media")]
+        n_pages = max(1, conn.execute("SELECT COUNT(*) FROM media WHERE state='review'").fetchone()[0] // 100)
+        conn.close()
+        db = ip.DB_PATH
+        mb = db.stat().st_size / 1e6
+        print(f"SQLite {sqlite3.sqlite_version}, {args.media} media ({mb:.0f} MB), {args.reps} reads per row (list: 1/10), {args.writes} writes\n")
+        print(f"{'':34s} {'p50 µs':>9s} {'p95 µs':>9s} {'p99 µs':>9s}")
+
+        readers = (("before", lambda: sqlite3.connect(db)),
+                   ("read profile", lambda: pixarr_sqlite.connect(db, "read")))
+        for query, reps in (("detail", args.reps), ("list", max(20, args.reps // 10))):
+            for per_request in (True, False):
+                for label, opener in readers:
+                    time_reads(opener, query, ids, n_pages, reps // 4 + 1, per_request)   # warm caches
+                    samples = time_reads(opener, query, ids, n_pages, reps, per_request)
+                    kind = f"{query}/{'request' if per_request else 'kept-open'}"
+                    print(f"{kind + ': ' + label:34s} {_pcts(samples)}")
+
+        writers = (("before", _before_writer),
+                   ("write profile", lambda p: pixarr_sqlite.connect(p, "write")))
+        for i, (label, opener) in enumerate(writers):
+            conn = opener(db)
+            samples = time_writes(conn, media_rows(args.writes, seed=100 + i), iid)
+            conn.close()
+            print(f"{'write/file: ' + label:34s} {_pcts(samples)}")
+
+
+STATES_GROUP_BY = "SELECT state, COUNT(*), SUM(bytes) FROM media GROUP BY state"
+REASONS_GROUP_BY = "SELECT quarantine_reason, COUNT(*) FROM media WHERE state='quarantine' GROUP BY quarantine_reason"
+
+
+def _best_ms(fn, reps: int) -> float:
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+def cmd_counters(args) -> None:
+    with tempfile.TemporaryDirectory(prefix="pixarr-benchdb-") as tmp:
+        ip.pathize(Path(tmp))
+        ip.ensure_db()
+        conn = ip.open_db()
+        t0 = time.perf_counter()
+        conn.execute("""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+            INSERT INTO media (id, sha256, ext, bytes, taken_ts, state, quarantine_reason, added_ts, updated_ts)
+            SELECT 'bench-' || i, randomblob(32), CASE i % 5 WHEN 0 THEN '.mp4' WHEN 1 THEN '.heic' ELSE '.jpg' END,
+                   1000 + i % 5000000, 1500000000 + i,
+                   CASE WHEN i % 10 < 6 THEN 'library' WHEN i % 10 < 9 THEN 'review' ELSE 'quarantine' END,
+                   CASE WHEN i % 10 = 9 THEN CASE i % 3 WHEN 0 THEN 'missing_datetime' WHEN 1 THEN 'unsupported_ext'
+                                                  ELSE 'duplicate_content' END END,
+                   1700000000, 1700000000
+            FROM n""", (args.media,))
+        conn.commit()
+        fill = time.perf_counter() - t0
+        assert pixarr_counters.drift(conn) == []
+        print(f"SQLite {sqlite3.sqlite_version}, {args.media} media (bulk insert through the triggers: {fill:.1f} s)\n")
+
+        rd = pixarr_sqlite.connect(ip.DB_PATH, "read")
+        print(f"{'':22s} {'GROUP BY ms':>12s} {'counters ms':>12s}")
+        for label, sql, dim in (("states", STATES_GROUP_BY, "state"), ("reasons", REASONS_GROUP_BY, "reason")):
+            scan = _best_ms(lambda: rd.execute(sql).fetchall(), args.reps)
+            fast = _best_ms(lambda: pixarr_counters.counts(rd, dim), args.reps)
+            print(f"{label:22s} {scan:12.2f} {fast:12.3f}")
+        rd.close()
+
+        rows = media_rows(args.rows, seed=9)
+        iid = ip.begin_ingest(conn, "bench")
+        per_row = {}
+        for label in ("no triggers", "triggers"):
+            if label == "no triggers":
+                for name in ("media_counters_ai", "media_counters_ad", "media_counters_au"):
+                    conn.execute(f"DROP TRIGGER {name}")
+            else:
+                conn.execute("DROP TABLE media_counters")
+                pixarr_counters.ensure(conn)
+            conn.commit()
+            batch = [dict(r, hash_sha256=hashlib.sha256(f"{label}{r['hash_sha256']}".encode()).hexdigest())
+                     for r in rows]
+            for r in batch:
+                r["id"] = ip.uuid_from_hash(r["hash_sha256"])
+            new = run_upserts(conn, batch, 1, True, iid)
+            again = run_upserts(conn, [dict(r, state="library") for r in batch], 1, True, iid)   # state changes
+            per_row[label] = (new / len(batch) * 1e6, again / len(batch) * 1e6)
+        assert pixarr_counters.drift(conn) == []
+        conn.close()
+        print(f"\n{'upsert+commit µs/row':22s} {'new':>12s} {'state change':>12s}")
+        for label, (new, again) in per_row.items():
+            print(f"{label:22s} {new:12.1f} {again:12.1f}")
+
+
+def cmd_sightings(args) -> None:
+    rows = media_rows(args.files, seed=5)
+    print(f"SQLite {sqlite3.sqlite_version}, {args.files} files x {args.rescans} scans, commit every {args.group}\n")
+    print(f"{'':12s} {'flush µs/row':>13s} {'last scan':>10s} {'rows':>10s} {'MB':>7s} {'detail µs':>10s}")
+    for label in ("append", "compact"):
+        with tempfile.TemporaryDirectory(prefix="pixarr-benchdb-") as tmp:
+            ip.pathize(Path(tmp))
+            ip.ensure_db()
+            conn = ip.open_db()
+            for r in rows:
+                ip.upsert_media(conn, r)
+            conn.commit()
+            if label == "compact":
+                pixarr_sightings.compact(conn)
+            per_scan = []
+            for scan in range(args.rescans):
+                iid = ip.begin_ingest(conn, "bench")
+                spent = 0.0
+                for i, r in enumerate(rows, 1):
+                    ip.insert_sighting(conn, r["id"], Path(f"/staging/icloud/{r['id']}.jpg"), f"{r['id']}.jpg",
+                                       "Staging/icloud", None, iid)
+                    if i % args.group == 0 or i == len(rows):
+                        t0 = time.perf_counter()
+                        ip.flush_sightings(conn)
+                        spent += time.perf_counter() - t0
+                        conn.commit()
+                per_scan.append(spent / len(rows) * 1e6)
+            n = conn.execute("SELECT COUNT(*) FROM sightings_v2").fetchone()[0]
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            mb = Path(ip.DB_PATH).stat().st_size / 1e6
+            conn.close()
+            rd = pixarr_sqlite.connect(ip.DB_PATH, "read")
+            ids = [r["id"] for r in random.Random(1).sample(rows, min(500, len(rows)))]
+            detail = _best_ms(lambda: [rd.execute(API_SIGHTINGS, (m,)).fetchall() for m in ids], 3) / len(ids) * 1e3
+            rd.close()
+        print(f"{label:12s} {statistics.mean(per_scan):13.1f} {per_scan[-1]:10.1f} {n:10d} {mb:7.1f} {detail:10.1f}")
+
+
+def cmd_maintain(args) -> None:
+    with tempfile.TemporaryDirectory(prefix="pixarr-benchdb-") as tmp:
+        ip.pathize(Path(tmp) / "data")
+        ip.ensure_db()
+        conn = ip.open_db()
+        conn.execute("""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+            INSERT INTO media (id, sha256, ext, bytes, state, canonical_path, added_ts, updated_ts)
+            SELECT 'bench-' || i, randomblob(32), '.jpg', i, 'review', hex(randomblob(200)), 1700000000, 1700000000
+            FROM n""", (args.media,))
+        conn.commit()
+        conn.execute("DELETE FROM media WHERE rid % 4 = 0")          # some free pages for the vacuum task
+        conn.commit()
+        mb = Path(ip.DB_PATH).stat().st_size / 1e6
+        print(f"SQLite {sqlite3.sqlite_version}, {args.media} media ({mb:.0f} MB), writer: upsert + sighting + commit")
+        print(f"{'':26s} {'p50 ms':>8s} {'p99 ms':>8s} {'max ms':>8s} {'writes':>7s} {'maint s':>8s}")
+        rows = media_rows(args.rows * 3, seed=11)
+
+        def one_step(c):                         # what a "stop-less" backup would otherwise look like
+            dst = sqlite3.connect(Path(tmp) / "plain.sqlite3")
+            pixarr_sqlite.connect(ip.DB_PATH, "read").backup(dst)
+            dst.close()
+            c.execute("PRAGMA optimize")
+            c.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        for k, (label, job) in enumerate((
+                ("no maintenance", None),
+                ("one-step backup + ckpt", one_step),
+                (f"maintain {args.budget_ms:g} ms / {args.duty:g}",
+                 lambda c: pixarr_maintain.run(c, ip.DB_PATH, Path(tmp) / "backups", force=True,
+                                               throttle=pixarr_maintain.Throttle(args.budget_ms, args.duty))))):
+            lat, done = [], threading.Event()
+            batch = rows[k * args.rows:(k + 1) * args.rows]
+
+            def writer():
+                w = ip.open_db()
+                iid = ip.begin_ingest(w, "bench")
+                for i, r in enumerate(batch):
+                    if done.is_set() and i >= args.rows // 4:
+                        break
+                    t0 = time.perf_counter()
+                    mid, _s, _c = ip.upsert_media(w, r)
+                    ip.insert_sighting(w, mid, Path(f"/s/{mid}.jpg"), f"{mid}.jpg", "Staging/pc", None, iid)
+                    ip.timed_commit(w)
+                    lat.append(time.perf_counter() - t0)
+                    time.sleep(args.gap_ms / 1000)
+                w.close()
+
+            th = threading.Thread(target=writer)
+            th.start()
+            t0 = time.perf_counter()
+            mc = ip.open_db()
+            if job:
+                job(mc)
+            else:
+                time.sleep(1.0)
+            spent = time.perf_counter() - t0
+            mc.close()
+            done.set()
+            th.join()
+            lat.sort()
+            p = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] * 1e3
+            print(f"{label:26s} {p(0.5):8.2f} {p(0.99):8.2f} {lat[-1] * 1e3:8.1f} {len(lat):7d} {spent:8.1f}")
+        conn.close()
+
+
+def cmd_trace(args) -> None:
+    best = {}
+    tracer = None
+    for _ in range(args.repeat):
+        for label in ("off", "traced"):
+            with tempfile.TemporaryDirectory(prefix="pixarr-benchdb-") as tmp:
+                ip.pathize(Path(tmp))
+                ip.ensure_db()
+                ip.SQL_TRACER = pixarr_trace.SqlTracer(slow_ms=None) if label == "traced" else None
+                conn = ip.open_db()
+                iid = ip.begin_ingest(conn, "bench")
+                rows = media_rows(args.rows, seed=7)
+                t0 = time.perf_counter()
+                for row in rows:
+                    ip._find_canonical_by_filehash(conn, row["hash_sha256"])
+                    ip._find_canonical_by_contenthash(conn, row["content_sha256"])
+                    mid, _state, _canon = ip.upsert_media(conn, row)
+                    ip.insert_sighting(conn, mid, Path(f"/staging/pc/{row['id']}.jpg"), f"{row['id']}.jpg",
+                                       "Staging/pc", "pc", iid)
+                    ip.timed_commit(conn)
+                spent = time.perf_counter() - t0
+                conn.close()
+                best[label] = min(best.get(label, spent), spent)
+                tracer = ip.SQL_TRACER or tracer
+    ip.SQL_TRACER = None
+
+    print(f"SQLite {sqlite3.sqlite_version}, {args.rows} files (2 lookups + upsert + sighting + commit), "
+          f"best of {args.repeat}")
+    off, on = best["off"] / args.rows * 1e6, best["traced"] / args.rows * 1e6
+    print(f"  off {off:.1f} µs/file, traced {on:.1f} µs/file ({100 * (on - off) / off:+.1f}%)\n")
+    for line in tracer.format_table(top=6):
+        print(line)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Microbenchmarks for ingest's DB writes")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("upsert", help="media upsert + sighting per file: legacy vs RETURNING/batched")
+    sp.add_argument("--rows", type=int, default=20000)
+    sp.add_argument("--group", type=int, default=1, help="Rows per commit (default 1, like ingest)")
+    sp.add_argument("--repeat", type=int, default=3, help="Runs per mode; best is reported (default 3)")
+    sp.set_defaults(func=cmd_upsert)
+
+    sp = sub.add_parser("pragmas", help="pixarr_sqlite profiles vs plain connect: read and write latency")
+    sp.add_argument("--media", type=int, default=20000, help="Rows in the test DB (default 20000)")
+    sp.add_argument("--reps", type=int, default=1000, help="Read operations per measurement (default 1000)")
+    sp.add_argument("--writes", type=int, default=10000, help="Files per write measurement (default 10000)")
+    sp.set_defaults(func=cmd_pragmas)
+
+    sp = sub.add_parser("counters", help="states/reasons: GROUP BY vs media_counters; trigger cost per upsert")
+    sp.add_argument("--media", type=int, default=1000000, help="Rows in the test DB (default 1000000)")
+    sp.add_argument("--rows", type=int, default=10000, help="Upserts per trigger mode (default 10000)")
+    sp.add_argument("--reps", type=int, default=5, help="Runs per read query; best is reported (default 5)")
+    sp.set_defaults(func=cmd_counters)
+
+    sp = sub.add_parser("sightings", help="repeated scans: append-only sightings vs compaction mode")
+    sp.add_argument("--files", type=int, default=20000, help="Files per scan (default 20000)")
+    sp.add_argument("--rescans", type=int, default=10, help="Times each file is seen (default 10)")
+    sp.add_argument("--group", type=int, default=100, help="Files per commit (default 100)")
+    sp.set_defaults(func=cmd_sightings)
+
+    sp = sub.add_parser("maintain", help="ingest write latency while pixarr_maintain runs (vs one-step backup)")
+    sp.add_argument("--media", type=int, default=200000, help="Rows in the test DB (default 200000)")
+    sp.add_argument("--rows", type=int, default=20000, help="Max writes per mode (default 20000)")
+    sp.add_argument("--gap-ms", type=float, default=1.0, help="Writer pause between files (default 1)")
+    sp.add_argument("--budget-ms", type=float, default=50)
+    sp.add_argument("--duty", type=float, default=0.25)
+    sp.set_defaults(func=cmd_maintain)
+
+    sp = sub.add_parser("trace", help="ingest's per-file statements with and without pixarr_trace")
+    sp.add_argument("--rows", type=int, default=20000, help="Files per run (default 20000)")
+    sp.add_argument("--repeat", type=int, default=3, help="Runs per mode; best is reported (default 3)")
+    sp.set_defaults(func=cmd_trace)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
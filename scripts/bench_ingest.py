@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+bench_ingest.py — reproducible synthetic corpus + end-to-end ingest benchmark.
+
+make_test_zoo.sh covers edge cases (a dozen files); this builds staging trees
+of any size/mix from a seed, runs ingest_pass.py (dry-run, then write) against
+a throw-away data dir, and records throughput, peak RSS and the per-stage
+timings from --profile into one results JSON you can diff across commits.
+
+Usage (from repo root):
+  # generate + run both modes, results -> bench_results/<ts>_<commit>.json
+  python scripts/bench_ingest.py run --files 2000
+  python scripts/bench_ingest.py run --files 500 --mix jpeg_exif=50,png=20,dupe=20,junk=10 --layout deep
+  python scripts/bench_ingest.py run --files 1000 --modes write --keep /tmp/pixarr-bench
+
+  # only build a corpus (e.g. to profile by hand)
+  python scripts/bench_ingest.py gen /tmp/corpus --files 300 --seed 7
+
+  # compare two result files (ratios per metric and per stage)
+  python scripts/bench_ingest.py compare bench_results/a.json bench_results/b.json
+
+Corpus kinds (--mix weights, defaults in DEFAULT_MIX):
+  jpeg_exif  JPEG with DateTimeOriginal/CreateDate
+  jpeg       JPEG without EXIF, filename-dated (PHOTO-YYYY-MM-DD-HH-MM-SS.jpg)
+  png        PNG (no date -> missing_datetime quarantine, by design)
+  heic       HEIC via pillow_heif (skipped with a note if unavailable)
+  mp4        tiny MP4 via imageio-ffmpeg (skipped if unavailable)
+  dupe       byte-identical copy of an earlier media file
+  junk       .DS_Store / ._AppleDouble / Thumbs.db
+  unsupported  .pdf/.txt
+
+Notes:
+  - ingest_pass.py still needs an `exiftool` on PATH (that is part of what we measure).
+  - Images get random noise pixels so JPEG/PNG sizes and decode costs are realistic;
+    --image-size sets the long edge.
+  - Peak RSS is the ingest child process's ru_maxrss (via os.wait4).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parents[1]
+INGEST = REPO / "scripts" / "ingest_pass.py"
+SOURCE = "other"   # staging source the corpus is written under
+
+DEFAULT_MIX = {
+    "jpeg_exif": 45, "jpeg": 15, "png": 10, "heic": 5, "mp4": 2,
+    "dupe": 10, "junk": 8, "unsupported": 5,
+}
+RESULTS_SCHEMA = 1
+
+
+# ---------- corpus ----------
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        k, _, v = part.partition("=")
+        if k not in DEFAULT_MIX:
+            raise SystemExit(f"unknown kind in --mix: {k!r} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[k] = float(v or 1)
+    return mix
+
+
+def _optional_backends() -> dict:
+    have = {}
+    try:
+        import pillow_heif  # noqa: F401
+        have["heic"] = True
+    except Exception:
+        have["heic"] = False
+    try:
+        import imageio_ffmpeg
+        have["ffmpeg"] = imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        have["ffmpeg"] = None
+    return have
+
+
+def _subdir(rng: random.Random, layout: str, depth: int) -> Path:
+    if layout == "flat":
+        return Path()
+    if layout == "mixed" and rng.random() < 0.5:
+        return Path()
+    parts = [f"d{rng.randrange(8)}" for _ in range(rng.randint(1, depth))]
+    return Path(*parts)
+
+
+def _noise_image(rng: random.Random, size: int, mode: str = "RGB"):
+    from PIL import Image
+    w = size
+    h = max(8, int(size * rng.choice((0.56, 0.66, 0.75, 1.0))))
+    # a small noise tile scaled up: cheap to make, still costs real JPEG/PNG work
+    tile = Image.frombytes(mode, (16, 16), rng.randbytes(16 * 16 * len(mode)))
+    return tile.resize((w, h), Image.BILINEAR)
+
+
+def generate_corpus(root: Path, *, files: int, mix: dict, seed: int, layout: str,
+                    depth: int, image_size: int) -> dict:
+    """Write `files` entries under root; returns a manifest (counts, bytes, skipped kinds)."""
+    from PIL import Image
+    rng = random.Random(seed)
+    have = _optional_backends()
+    kinds = [k for k, w in mix.items() if w > 0]
+    weights = [mix[k] for k in kinds]
+    base_ts = datetime(2015, 1, 1)
+    made: list[Path] = []
+    counts: Counter = Counter()
+    skipped: Counter = Counter()
+    root.mkdir(parents=True, exist_ok=True)
+
+    for i in range(files):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "heic" and not have["heic"]:
+            skipped[kind] += 1
+            kind = "jpeg_exif"
+        if kind == "mp4" and not have["ffmpeg"]:
+            skipped[kind] += 1
+            kind = "jpeg_exif"
+        if kind == "dupe" and not made:
+            kind = "jpeg_exif"
+
+        d = root / _subdir(rng, layout, depth)
+        d.mkdir(parents=True, exist_ok=True)
+        ts = base_ts + timedelta(seconds=rng.randrange(10 * 365 * 86400))
+
+        if kind == "jpeg_exif":
+            exif = Image.Exif()
+            exif[36867] = exif[36868] = ts.strftime("%Y:%m:%d %H:%M:%S")
+            out = d / f"IMG_{i:06d}.jpg"
+            _noise_image(rng, image_size).save(out, "JPEG", quality=rng.choice((75, 85, 92)), exif=exif)
+        elif kind == "jpeg":
+            out = d / f"PHOTO-{ts:%Y-%m-%d-%H-%M-%S}-{i}.jpg"
+            _noise_image(rng, image_size).save(out, "JPEG", quality=85)
+        elif kind == "png":
+            out = d / f"Screenshot_{i:06d}.png"
+            _noise_image(rng, max(8, image_size // 2), "RGBA").save(out, "PNG")
+        elif kind == "heic":
+            import pillow_heif
+            pillow_heif.register_heif_opener()
+            out = d / f"IMG_{i:06d}.heic"
+            _noise_image(rng, image_size).save(out, "HEIF", quality=80)
+        elif kind == "mp4":
+            out = d / f"VID_{i:06d}.mp4"
+            subprocess.run(
+                [have["ffmpeg"], "-loglevel", "error", "-f", "lavfi",
+                 "-i", "testsrc=size=64x64:rate=10:duration=1",
+                 "-metadata", f"creation_time={ts:%Y-%m-%dT%H:%M:%SZ}",
+                 "-pix_fmt", "yuv420p", "-y", str(out)],
+                check=True,
+            )
+        elif kind == "dupe":
+            src = rng.choice(made)
+            out = d / f"copy_{i:06d}{src.suffix}"
+            shutil.copyfile(src, out)
+        elif kind == "junk":
+            out = d / rng.choice((".DS_Store", f"._IMG_{i:06d}.jpg", "Thumbs.db"))
+            out.write_bytes(rng.randbytes(rng.randint(0, 4096)))
+        else:  # unsupported
+            out = d / f"notes_{i:06d}{rng.choice(('.pdf', '.txt'))}"
+            out.write_bytes(rng.randbytes(rng.randint(100, 20000)))
+
+        counts[kind] += 1
+        if kind not in ("junk", "unsupported"):
+            made.append(out)
+
+    # junk names (.DS_Store, Thumbs.db) can repeat within a folder, so count what is on disk
+    on_disk = [p for p in root.rglob("*") if p.is_file()]
+    return {"files": len(on_disk), "bytes": sum(p.stat().st_size for p in on_disk), "by_kind": dict(counts),
+            "substituted": dict(skipped), "seed": seed, "layout": layout}
+
+
+# ---------- running ingest ----------
+
+def run_ingest(data_dir: Path, logs_dir: Path, *, write: bool, extra: list[str]) -> dict:
+    """Run ingest_pass.py once with --profile; returns timings, RSS and the profile payload."""
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    before = set(logs_dir.glob("*.profile.json"))
+    cmd = [sys.executable, str(INGEST), SOURCE, "--data-dir", str(data_dir),
+           "--logs-dir", str(logs_dir), "--profile", "-q", "--allow-filename-dates", *extra]
+    if write:
+        cmd.append("--write")
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=str(REPO))
+    _pid, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - t0
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise SystemExit(f"ingest failed (exit {proc.returncode}): {' '.join(cmd)}")
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    new = sorted(set(logs_dir.glob("*.profile.json")) - before)
+    profile = json.loads(new[-1].read_text(encoding="utf-8")) if new else {}
+    return {"wall_s": round(elapsed, 3), "peak_rss_bytes": rss, "profile": profile}
+
+
+def summarize(run: dict, corpus: dict) -> dict:
+    prof = run["profile"]
+    wall = run["wall_s"] or 1e-9
+    stages = prof.get("stages", {})
+    hashed = stages.get("sha256", {}).get("bytes", 0)
+    return {
+        "wall_s": run["wall_s"],
+        "ingest_elapsed_s": prof.get("elapsed_s"),
+        "files_per_sec": round(corpus["files"] / wall, 2),
+        "bytes_per_sec": round(corpus["bytes"] / wall, 1),
+        "hashed_bytes_per_sec": stages.get("sha256", {}).get("bytes_per_sec"),
+        "hashed_bytes": hashed,
+        "peak_rss_mb": round(run["peak_rss_bytes"] / 2**20, 1),
+        "totals": prof.get("totals", {}),
+        "stages": stages,
+    }
+
+
+def git_rev() -> dict:
+    def _git(*a):
+        try:
+            return subprocess.run(["git", *a], cwd=REPO, capture_output=True, text=True, check=True).stdout.strip()
+        except Exception:
+            return None
+    return {"commit": _git("rev-parse", "--short", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def cmd_gen(args) -> None:
+    man = generate_corpus(Path(args.dest), files=args.files, mix=args.mix, seed=args.seed,
+                          layout=args.layout, depth=args.depth, image_size=args.image_size)
+    print(json.dumps(man, indent=2))
+
+
+def cmd_run(args) -> None:
+    work = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="pixarr-bench-"))
+    corpus_dir = work / "corpus"
+    if corpus_dir.exists():
+        shutil.rmtree(corpus_dir)
+
+    t0 = time.perf_counter()
+    corpus = generate_corpus(corpus_dir, files=args.files, mix=args.mix, seed=args.seed,
+                             layout=args.layout, depth=args.depth, image_size=args.image_size)
+    corpus["generate_s"] = round(time.perf_counter() - t0, 2)
+    print(f"corpus: {corpus['files']} files, {corpus['bytes'] / 2**20:.1f} MiB in {corpus['generate_s']}s -> {corpus_dir}")
+
+    results = {
+        "schema": RESULTS_SCHEMA,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        **git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"files": args.files, "mix": args.mix, "seed": args.seed, "layout": args.layout,
+                   "depth": args.depth, "image_size": args.image_size, "ingest_args": args.ingest_args},
+        "corpus": corpus,
+        "runs": {},
+    }
+    extra = args.ingest_args.split() if args.ingest_args else []
+    try:
+        # each mode gets a fresh data dir + copy of the corpus (dry-run still records
+        # media rows, which would turn the write run into an all-duplicates run)
+        for mode in args.modes:
+            data_dir = work / mode / "data"
+            if data_dir.exists():
+                shutil.rmtree(data_dir)
+            shutil.copytree(corpus_dir, data_dir / "media" / "Staging" / SOURCE)
+            run = run_ingest(data_dir, work / mode / "logs", write=(mode == "write"), extra=extra)
+            results["runs"][mode] = s = summarize(run, corpus)
+            print(f"{mode:8s} {s['wall_s']:8.2f}s  {s['files_per_sec']:8.1f} files/s  "
+                  f"{s['bytes_per_sec'] / 2**20:7.1f} MiB/s  peak RSS {s['peak_rss_mb']} MiB")
+    finally:
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    out = Path(args.out) if args.out else (
+        REPO / "bench_results" / f"{datetime.now():%Y%m%d_%H%M%S}_{results['commit'] or 'nogit'}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"results -> {out}")
+
+
+def cmd_compare(args) -> None:
+    a = json.loads(Path(args.a).read_text(encoding="utf-8"))
+    b = json.loads(Path(args.b).read_text(encoding="utf-8"))
+    print(f"A: {a.get('commit')}{'+' if a.get('dirty') else ''}  ({args.a})")
+    print(f"B: {b.get('commit')}{'+' if b.get('dirty') else ''}  ({args.b})")
+    if a.get("params") != b.get("params"):
+        print("warning: corpus/ingest params differ; ratios may not be comparable")
+
+    def ratio(x, y):
+        return f"{y / x:6.2f}x" if x and y is not None else "     -"
+
+    for mode in sorted(set(a["runs"]) & set(b["runs"])):
+        ra, rb = a["runs"][mode], b["runs"][mode]
+        print(f"\n[{mode}]  {'metric':<22}{'A':>12}{'B':>12}{'B/A':>9}")
+        for k in ("wall_s", "files_per_sec", "bytes_per_sec", "peak_rss_mb"):
+            print(f"   {k:<22}{ra.get(k) or 0:>12.1f}{rb.get(k) or 0:>12.1f}{ratio(ra.get(k), rb.get(k)):>9}")
+        print(f"   {'stage total_s':<22}")
+        for st in sorted(set(ra["stages"]) | set(rb["stages"]),
+                         key=lambda n: -ra["stages"].get(n, {}).get("total_s", 0)):
+            xa = ra["stages"].get(st, {}).get("total_s")
+            xb = rb["stages"].get(st, {}).get("total_s")
+            print(f"     {st:<20}{xa or 0:>12.3f}{xb or 0:>12.3f}{ratio(xa, xb):>9}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Synthetic staging corpus + ingest benchmark")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def corpus_args(p):
+        p.add_argument("--files", type=int, default=1000, help="Number of staging entries (default 1000)")
+        p.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX),
+                       help="Weights, e.g. jpeg_exif=50,png=20,dupe=10 (default: %s)"
+                            % ",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()))
+        p.add_argument("--seed", type=int, default=1234, help="RNG seed (same seed -> same corpus)")
+        p.add_argument("--layout", choices=["flat", "deep", "mixed"], default="mixed",
+                       help="Directory shape under the staging source (default mixed)")
+        p.add_argument("--depth", type=int, default=4, help="Max nesting for deep/mixed layouts")
+        p.add_argument("--image-size", type=int, default=1024, help="Long edge of generated images in px")
+
+    sp = sub.add_parser("gen", help="Only generate a corpus")
+    sp.add_argument("dest", help="Directory to write the corpus into")
+    corpus_args(sp)
+    sp.set_defaults(func=cmd_gen)
+
+    sp = sub.add_parser("run", help="Generate a corpus in a temp data dir and benchmark ingest")
+    corpus_args(sp)
+    sp.add_argument("--modes", nargs="+", choices=["dry-run", "write"], default=["dry-run", "write"],
+                    help="Which ingest modes to run, in order (default: dry-run write)")
+    sp.add_argument("--ingest-args", default="",
+                    help="Extra ingest_pass.py args, quoted (e.g. \"--review-layout hash2\")")
+    sp.add_argument("--keep", metavar="DIR", help="Work in DIR and keep it (default: temp dir, removed)")
+    sp.add_argument("--out", help="Results JSON path (default: bench_results/<ts>_<commit>.json)")
+    sp.set_defaults(func=cmd_run)
+
+    sp = sub.add_parser("compare", help="Compare two results JSON files")
+    sp.add_argument("a")
+    sp.add_argument("b")
+    sp.set_defaults(func=cmd_compare)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+estimate_ingest.py — how long will ingest take on this drive? (sampling estimator)
+
+Walks the sources once with stat only (exact file/byte counts, junk/unsupported/
+zero-byte findings), then runs the real per-file pipeline functions from
+ingest_pass.py (sha256_file, read_metadata, compute_image_content_sha256, the
+dupe lookups, resolve_taken_at) on a random sample of media candidates and
+extrapolates each stage to the whole tree with confidence intervals.
+Read-only: no moves, no DB writes.
+
+Usage (from repo root):
+  python scripts/estimate_ingest.py /Volumes/NewDrive/DCIM
+  python scripts/estimate_ingest.py other --sample 500 --seed 7
+  python scripts/estimate_ingest.py sdcard --sample 1000 --time-budget 120 --json /tmp/estimate.json
+
+Output:
+  - per-stage projected time (stage names as in `ingest_pass.py --profile`), with CI
+  - projected outcomes: review / missing_datetime / duplicate_in_library|review (file, content)
+  - exact walk findings (junk, unsupported_ext, zero_bytes, stat_error) and an upper bound
+    on in-drive duplicates (files that share their size with another file)
+
+Notes:
+  - Byte-bound stages (sha256, content_hash) are extrapolated per byte (ratio estimator on
+    total candidate bytes); the rest per file. Intervals assume a simple random sample and
+    apply the finite-population correction.
+  - The sample is processed in walk order (friendlier to spinning disks, like ingest), but
+    it is still random I/O: on an HDD the estimate includes seeks a sequential run may not pay.
+  - Not sampled: DB writes (upsert, sighting, exif_kv, commit) and moves, which only
+    happen with --write; see a `--profile` run for their per-file cost on this machine.
+  - Dupes within the drive itself are only seen when both copies land in the sample,
+    hence the size-collision bound.
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from statistics import NormalDist
+
+import ingest_pass as ip
+import pixarr_sqlite
+
+# per-byte extrapolation for these; everything else per file
+BYTE_STAGES = ("sha256", "content_hash")
+OUTCOMES = ("review", "missing_datetime", "duplicate_in_library", "duplicate_in_review")
+
+
+class SampleTimer(ip.StageTimer):
+    """StageTimer that also keeps per-file stage sums for the file being sampled."""
+
+    def __init__(self):
+        super().__init__(enabled=True)
+        self.current: dict = defaultdict(float)
+
+    def observe(self, name: str, seconds: float, nbytes: int = 0) -> None:
+        super().observe(name, seconds, nbytes)
+        self.current[name] += seconds
+
+    def take(self) -> dict:
+        cur, self.current = dict(self.current), defaultdict(float)
+        return cur
+
+
+# ---------- stat walk ----------
+
+def stat_walk(sources: list) -> dict:
+    """One os.walk + stat per file, mirroring ingest_one_source's early checks."""
+    inv = {
+        "candidates": [],            # (path, size) in walk order
+        "bytes": 0,
+        "findings": Counter(),       # junk / unsupported_ext / zero_bytes / stat_error
+        "by_ext": Counter(),
+        "per_source": {},
+        "sizes": Counter(),
+        "walk_s": 0.0,
+    }
+    t0 = time.perf_counter()
+    for label, root in sources:
+        if not root.exists():
+            ip.log(f"SKIP {label}: path not found -> {root}")
+            continue
+        n0, b0 = len(inv["candidates"]), inv["bytes"]
+        for dirpath, dirs, files in ip.timed_walk(root):
+            dirs[:] = [d for d in dirs if d not in ip.DIR_IGNORE and not d.startswith("._")]
+            for name in files:
+                p = Path(dirpath) / name
+                if name in ip.JUNK_FILES or any(name.startswith(pref) for pref in ip.JUNK_PREFIXES):
+                    inv["findings"]["junk"] += 1
+                    continue
+                if not ip.is_media_candidate(p):
+                    inv["findings"]["unsupported_ext"] += 1
+                    continue
+                try:
+                    size = p.stat().st_size
+                except Exception:
+                    inv["findings"]["stat_error"] += 1
+                    continue
+                if size == 0:
+                    inv["findings"]["zero_bytes"] += 1
+                    continue
+                inv["candidates"].append((p, size))
+                inv["bytes"] += size
+                inv["by_ext"][p.suffix.lower()] += 1
+                inv["sizes"][size] += 1
+        inv["per_source"][label] = (len(inv["candidates"]) - n0, inv["bytes"] - b0)
+    inv["walk_s"] = time.perf_counter() - t0
+    return inv
+
+
+# ---------- per-file sample ----------
+
+def classify(conn, p: Path, size: int) -> str:
+    """Run the ingest per-file pipeline (read-only) and return the outcome it would have."""
+    with ip.TIMER.stage("sha256", nbytes=size):
+        h = ip.sha256_file(p)
+    meta = ip.read_metadata(p)
+    content = None
+    if p.suffix.lower() in ip.IMAGE_EXT:
+        with ip.TIMER.stage("content_hash", nbytes=size):
+            content = ip.compute_image_content_sha256(p)
+    if conn is not None:
+        canonical = ip._find_canonical_by_filehash(conn, h)
+        if canonical is None and content:
+            canonical = ip._find_canonical_by_contenthash(conn, content)
+        if canonical:
+            if canonical[1] == "library":
+                return "duplicate_in_library"
+            # --on-review-dupe decides what happens to it; it's a dupe either way
+            return "duplicate_in_review"
+    if not ip.resolve_taken_at(meta, p.name, ip.ALLOW_FILENAME_DATES):
+        return "missing_datetime"
+    return "review"
+
+
+def run_sample(conn, sample: list, time_budget: float) -> list:
+    """[(size, {stage: seconds}, outcome)] for each sampled file (stops early at the budget)."""
+    rows = []
+    t0 = time.perf_counter()
+    for i, (p, size) in enumerate(sample, 1):
+        try:
+            outcome = classify(conn, p, size)
+        except Exception as e:
+            ip.log(f"  sample error on {p}: {e}")
+            ip.TIMER.take()
+            continue
+        rows.append((size, ip.TIMER.take(), outcome))
+        if i % 100 == 0:
+            ip.log(f"… sampled {i}/{len(sample)}")
+        if time_budget and time.perf_counter() - t0 > time_budget:
+            ip.log(f"Time budget reached after {len(rows)} file(s)")
+            break
+    return rows
+
+
+# ---------- extrapolation ----------
+
+def ratio_estimate(ys: list, xs: list, x_total: float, n_pop: int, z: float) -> tuple:
+    """
+    Ratio estimator of sum(y) over the population: x_total * sum(ys)/sum(xs), with a
+    z-interval from the residual variance and the finite-population correction.
+    With xs all 1 and x_total = n_pop this is the plain mean-per-file estimate.
+    """
+    n = len(ys)
+    sx = sum(xs)
+    if not n or not sx:
+        return 0.0, 0.0, 0.0
+    r = sum(ys) / sx
+    est = x_total * r
+    if n < 2:
+        return est, est, est
+    s2 = sum((y - r * x) ** 2 for y, x in zip(ys, xs)) / (n - 1)
+    fpc = max(0.0, 1 - n / n_pop) if n_pop else 0.0
+    half = z * n_pop * math.sqrt(fpc * s2 / n)
+    return est, max(0.0, est - half), est + half
+
+
+def wilson(k: int, n: int, z: float) -> tuple:
+    """Wilson score interval for a proportion."""
+    if not n:
+        return 0.0, 0.0, 0.0
+    p = k / n
+    den = 1 + z * z / n
+    mid = (p + z * z / (2 * n)) / den
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / den
+    return p, max(0.0, mid - half), min(1.0, mid + half)
+
+
+def estimate(inv: dict, rows: list, z: float) -> dict:
+    n_pop, b_pop = len(inv["candidates"]), inv["bytes"]
+    sizes = [r[0] for r in rows]
+    ones = [1] * len(rows)
+    stage_names = sorted({s for _size, st, _o in rows for s in st})
+
+    stages = {}
+    for name in stage_names:
+        ys = [st.get(name, 0.0) for _size, st, _o in rows]
+        per_byte = name in BYTE_STAGES
+        est, lo, hi = ratio_estimate(ys, sizes if per_byte else ones, b_pop if per_byte else n_pop, n_pop, z)
+        stages[name] = {
+            "basis": "bytes" if per_byte else "files",
+            "sampled": sum(1 for y in ys if y),
+            "mean_ms": round(1000 * sum(ys) / len(ys), 3) if ys else 0.0,
+            "est_s": round(est, 1), "lo_s": round(lo, 1), "hi_s": round(hi, 1),
+        }
+    # the total gets its own interval (stage times are correlated per file)
+    ys = [sum(st.values()) for _size, st, _o in rows]
+    est, lo, hi = ratio_estimate(ys, ones, n_pop, n_pop, z)
+
+    outcomes = {}
+    counts = Counter(o for _size, _st, o in rows)
+    for o in OUTCOMES:
+        p, plo, phi = wilson(counts[o], len(rows), z)
+        outcomes[o] = {
+            "sampled": counts[o], "rate": round(p, 4), "rate_lo": round(plo, 4), "rate_hi": round(phi, 4),
+            "est_files": round(p * n_pop), "lo_files": round(plo * n_pop), "hi_files": round(phi * n_pop),
+        }
+
+    same_size = sum(c for c in inv["sizes"].values() if c > 1)
+    return {
+        "candidates": n_pop,
+        "bytes": b_pop,
+        "sampled": len(rows),
+        "sampled_bytes": sum(sizes),
+        "walk_s": round(inv["walk_s"], 2),
+        "stages": dict(sorted(stages.items(), key=lambda kv: -kv[1]["est_s"])),
+        "total": {"est_s": round(est + inv["walk_s"], 1), "lo_s": round(lo + inv["walk_s"], 1),
+                  "hi_s": round(hi + inv["walk_s"], 1)},
+        "outcomes": outcomes,
+        "walk_findings": dict(inv["findings"]),
+        "same_size_files": same_size,
+        "by_ext": dict(inv["by_ext"].most_common()),
+        "per_source": {k: {"files": f, "bytes": b} for k, (f, b) in inv["per_source"].items()},
+    }
+
+
+def _dur(s: float) -> str:
+    s = int(round(s))
+    h, rem = divmod(s, 3600)
+    m, sec = divmod(rem, 60)
+    return f"{h}h{m:02d}m" if h else (f"{m}m{sec:02d}s" if m else f"{sec}s")
+
+
+def print_report(r: dict, confidence: float) -> None:
+    pct = f"{100 * confidence:.0f}%"
+    print(f"Candidates: {r['candidates']} file(s), {r['bytes'] / 1e9:.2f} GB "
+          f"(stat walk {_dur(r['walk_s'])}); sampled {r['sampled']} ({r['sampled_bytes'] / 1e6:.1f} MB)")
+    for label, v in r["per_source"].items():
+        print(f"  {label}: {v['files']} file(s), {v['bytes'] / 1e9:.2f} GB")
+    if r["by_ext"]:
+        print("  types: " + ", ".join(f"{e or '(none)'}={n}" for e, n in list(r["by_ext"].items())[:12]))
+    if not r["sampled"]:
+        return
+
+    print(f"\nProjected time budget ({pct} CI):")
+    print(f"  {'stage':<14}{'basis':>6}{'sampled':>9}{'mean ms':>10}{'estimate':>11}{'range':>20}")
+    print(f"  {'walk+stat':<14}{'exact':>6}{'-':>9}{'-':>10}{_dur(r['walk_s']):>11}{'':>20}")
+    for name, st in r["stages"].items():
+        rng = f"{_dur(st['lo_s'])} – {_dur(st['hi_s'])}"
+        print(f"  {name:<14}{st['basis']:>6}{st['sampled']:>9}{st['mean_ms']:>10.1f}"
+              f"{_dur(st['est_s']):>11}{rng:>20}")
+    t = r["total"]
+    print(f"  {'TOTAL':<14}{'':>6}{'':>9}{'':>10}{_dur(t['est_s']):>11}"
+          f"{_dur(t['lo_s']) + ' – ' + _dur(t['hi_s']):>20}")
+    print("  (dry-run cost; --write adds DB writes/commits and moves per file)")
+
+    print(f"\nProjected outcomes ({pct} CI):")
+    for o, v in r["outcomes"].items():
+        print(f"  {o:<22}{100 * v['rate']:>6.1f}%  ~{v['est_files']} file(s) "
+              f"[{v['lo_files']} – {v['hi_files']}]")
+    dupes = sum(r["outcomes"][o]["sampled"] for o in ("duplicate_in_library", "duplicate_in_review"))
+    print(f"  dupe rate vs DB: {100 * dupes / r['sampled']:.1f}%; in-drive exact dupes ≤ "
+          f"{r['same_size_files']} file(s) (share a size with another file)")
+    if r["walk_findings"]:
+        print("\nWalk findings (exact): " + ", ".join(f"{k}={v}" for k, v in sorted(r["walk_findings"].items())))
+
+
+def main():
+    cfg = ip.load_config(ip.repo_root() / "pixarr.toml")
+    cfg_paths = cfg.get("paths", {})
+    cfg_ingest = cfg.get("ingest", {})
+
+    # same extension sets as ingest (see ingest_pass.main)
+    images, raw, videos = ip._formats_from_cfg_dict(cfg)
+    ip.IMAGE_EXT, ip.RAW_EXT, ip.VIDEO_EXT = images - raw, raw, videos
+    ip.SUPPORTED_EXT = ip.IMAGE_EXT | ip.RAW_EXT | ip.VIDEO_EXT
+
+    ap = argparse.ArgumentParser(description="Estimate ingest runtime, dupe rate and quarantines from a sample")
+    ap.add_argument("sources", nargs="*", help="Sources as for ingest_pass.py (pc, other/trip1, /abs/path …)")
+    ap.add_argument("--data-dir",
+                    default=str(Path(cfg_paths.get("data_dir", str(ip.repo_root() / "data")))),
+                    help="Root data directory (default: ./data under repo)")
+    ap.add_argument("--sample", type=int, default=300, help="Files to sample (default 300)")
+    ap.add_argument("--seed", type=int, default=None, help="Random seed (repeatable samples)")
+    ap.add_argument("--confidence", type=float, default=0.95, help="Interval confidence (default 0.95)")
+    ap.add_argument("--time-budget", type=float, default=0,
+                    help="Stop sampling after this many seconds (0 = sample everything requested)")
+    ap.add_argument("--allow-file-dates", action="store_true",
+                    default=bool(cfg_ingest.get("allow_file_dates", False)),
+                    help="Allow ModifyDate/FileModifyDate as capture time fallback")
+    ap.add_argument("--allow-filename-dates", action="store_true",
+                    default=bool(cfg_ingest.get("allow_filename_dates", False)),
+                    help="Allow filename-derived timestamps as fallback")
+    ap.add_argument("--no-fast-meta", action="store_true", default=not cfg_ingest.get("fast_meta", True),
+                    help="Estimate with exiftool only (as ingest --no-fast-meta)")
+    ap.add_argument("--exiftool-mode", choices=["selective", "full"],
+                    default=cfg_ingest.get("exiftool_mode", "selective"),
+                    help="As ingest --exiftool-mode (default from config: selective)")
+    ap.add_argument("--json", help="Also write the estimate as JSON here")
+    ap.add_argument("-v", "--verbose", action="count", default=0)
+    args = ap.parse_args()
+    if not 0 < args.confidence < 1:
+        ap.error("--confidence must be between 0 and 1")
+
+    ip.LOGGER = ip.setup_logging(
+        data_dir=Path(args.data_dir).resolve(), logs_dir_arg=None,
+        verbose=args.verbose, quiet=False, log_level_arg=None, json_logs=False,
+    )
+    ip.pathize(Path(args.data_dir).resolve())
+    ip._DATE_KEYS = ip.date_keys_for(args.allow_file_dates)
+    ip.ALLOW_FILENAME_DATES = args.allow_filename_dates
+    ip.FAST_META = not args.no_fast_meta
+    ip.EXIFTOOL_MODE = args.exiftool_mode
+    ip.ensure_exiftool()
+
+    sources = ip.resolve_source_tokens(args.sources)
+    ip.log("Stat walk: " + ", ".join(str(p) for _label, p in sources))
+    inv = stat_walk(sources)
+    cands = inv["candidates"]
+    if not cands:
+        print("No media candidates found.")
+        ip.stop_logging()
+        return
+
+    rng = random.Random(args.seed)
+    idx = sorted(rng.sample(range(len(cands)), min(args.sample, len(cands))))
+    sample = [cands[i] for i in idx]
+
+    conn = None
+    if ip.DB_PATH.exists():
+        conn = pixarr_sqlite.connect(f"file:{ip.DB_PATH}?mode=ro", "read", uri=True)
+    else:
+        ip.log(f"No DB at {ip.DB_PATH}: dupes vs library/review not estimated")
+
+    ip.TIMER = SampleTimer()
+    ip.log(f"Sampling {len(sample)} of {len(cands)} candidate(s) …")
+    try:
+        rows = run_sample(conn, sample, args.time_budget)
+    finally:
+        if conn is not None:
+            conn.close()
+
+    z = NormalDist().inv_cdf(0.5 + args.confidence / 2)
+    report = estimate(inv, rows, z)
+    report["confidence"] = args.confidence
+    report["policy"] = {
+        "date_keys": ip._DATE_KEYS, "allow_filename_dates": args.allow_filename_dates,
+        "fast_meta": ip.FAST_META, "exiftool_mode": ip.EXIFTOOL_MODE, "db": conn is not None,
+    }
+    print()
+    print_report(report, args.confidence)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nJSON: {args.json}")
+    ip.stop_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+exif_kv.py — work with the exiftool tags ingest persists into exif_kv.
+
+Ingest stores each media item's (filtered) exiftool output in exif_kv, so date
+policy changes can be answered from the DB instead of re-reading every file.
+
+Usage (from repo root):
+  # what would change if we enabled file dates / filename dates?
+  python scripts/exif_kv.py reeval --allow-file-dates
+  python scripts/exif_kv.py reeval --allow-filename-dates --state quarantine --csv /tmp/rescued.csv
+
+  # fill exif_kv for rows ingested before it was populated (batched exiftool calls)
+  python scripts/exif_kv.py backfill               # dry-run: count candidates
+  python scripts/exif_kv.py backfill --write --batch 200
+
+  # what's in there
+  python scripts/exif_kv.py stats
+
+Notes:
+  - reeval is read-only; it reports changed / gained / lost taken_at per state.
+    "gained" under state=quarantine is what a policy change would rescue from
+    missing_datetime. Rows with no exif_kv tags are counted as "no_tags",
+    rows holding only the tags a fast/selective read returned as "partial"
+    (run backfill first for both).
+  - backfill runs exiftool on canonical_path (Review/Library/Quarantine) for rows
+    with no tags or a partial set; files no longer on disk are skipped.
+"""
+
+import argparse
+import csv
+import json
+import subprocess
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import ingest_pass as ip
+
+STATES = ("review", "library", "quarantine")
+
+
+def cmd_reeval(conn, args) -> None:
+    keys = ip.date_keys_for(args.allow_file_dates)
+    states = args.state or list(STATES)
+
+    # only the date tags matter here; one pass, grouped in Python
+    metas = defaultdict(dict)
+    q = f"SELECT media_id, tag, value FROM exif_kv WHERE tag IN ({','.join('?' * len(keys))})"
+    for mid, tag, value in conn.execute(q, keys):
+        metas[mid][tag] = ip.exif_kv_value(value)
+    has_tags = {mid for (mid,) in conn.execute("SELECT DISTINCT media_id FROM exif_kv")}
+    partial = {mid for (mid,) in conn.execute("SELECT media_id FROM exif_kv WHERE tag=?",
+                                               (ip.EXIF_KV_PARTIAL_TAG,))}
+
+    names = {}
+    if args.allow_filename_dates:
+        names = dict(conn.execute("SELECT media_id, MIN(filename) FROM sightings GROUP BY media_id"))
+
+    counts = Counter()
+    samples = defaultdict(list)
+    writer = None
+    fh = None
+    if args.csv:
+        fh = open(args.csv, "w", newline="", encoding="utf-8")
+        writer = csv.writer(fh)
+        writer.writerow(["id", "state", "quarantine_reason", "taken_at_old", "taken_at_new", "outcome"])
+
+    try:
+        q = (f"SELECT id, state, taken_at, quarantine_reason FROM media "
+             f"WHERE state IN ({','.join('?' * len(states))})")
+        for mid, state, old, qreason in conn.execute(q, states):
+            if mid not in has_tags and not (args.allow_filename_dates and names.get(mid)):
+                counts[(state, "no_tags")] += 1
+                continue
+            if mid in partial:
+                counts[(state, "partial")] += 1   # tags outside what was read were never stored
+                continue
+            new = ip.resolve_taken_at(metas.get(mid, {}), names.get(mid) or "", args.allow_filename_dates, keys)
+            if new == old:
+                outcome = "unchanged"
+            elif old is None:
+                outcome = "gained"
+            elif new is None:
+                outcome = "lost"
+            else:
+                outcome = "changed"
+            counts[(state, outcome)] += 1
+            if outcome != "unchanged":
+                if len(samples[(state, outcome)]) < args.samples:
+                    samples[(state, outcome)].append((mid, old, new))
+                if writer:
+                    writer.writerow([mid, state, qreason or "", old or "", new or "", outcome])
+    finally:
+        if fh:
+            fh.close()
+
+    print(f"Policy: date keys={keys}, filename dates={args.allow_filename_dates}")
+    print(f"  {'state':<12}{'unchanged':>10}{'changed':>9}{'gained':>8}{'lost':>6}{'no_tags':>9}{'partial':>9}")
+    for st in states:
+        print(f"  {st:<12}" + "".join(
+            f"{counts[(st, o)]:>{w}}" for o, w in
+            (("unchanged", 10), ("changed", 9), ("gained", 8), ("lost", 6), ("no_tags", 9), ("partial", 9))))
+    for (st, outcome), rows in sorted(samples.items()):
+        print(f"\n  {st}/{outcome} (first {len(rows)}):")
+        for mid, old, new in rows:
+            print(f"    {mid}  {old or '-'} -> {new or '-'}")
+    if args.csv:
+        print(f"\nCSV: {args.csv}")
+
+
+def _exiftool_many(paths: list) -> dict:
+    """One exiftool call for many files; returns {path: meta}."""
+    try:
+        out = subprocess.check_output(
+            [ip.EXIFTOOL_PATH, "-j", "-n", "-api", "largefilesupport=1", *map(str, paths)],
+            stderr=subprocess.DEVNULL, timeout=60 + 2 * len(paths),
+        )
+    except subprocess.CalledProcessError as e:
+        out = e.output or b"[]"   # exiftool exits 1 if any file failed; JSON is still there
+    except Exception:
+        return {}
+    try:
+        arr = json.loads(out.decode("utf-8", errors="ignore") or "[]")
+    except ValueError:
+        return {}
+    return {m.get("SourceFile"): m for m in arr if isinstance(m, dict)}
+
+
+def cmd_backfill(conn, args) -> None:
+    rows = conn.execute(
+        """
+        SELECT m.id, m.canonical_path
+        FROM media m
+        WHERE m.canonical_path IS NOT NULL
+          AND (NOT EXISTS (SELECT 1 FROM exif_kv k WHERE k.media_id = m.id)
+               OR EXISTS (SELECT 1 FROM exif_kv k WHERE k.media_id = m.id AND k.tag = ?))
+        """,
+        (ip.EXIF_KV_PARTIAL_TAG,),
+    ).fetchall()
+    todo = [(mid, Path(cp)) for mid, cp in rows if Path(cp).exists()]
+    print(f"{len(rows)} media row(s) without exif_kv or with a partial tag set; {len(todo)} still on disk")
+    if not args.write:
+        print("[DRY] re-run with --write to read tags with exiftool and store them")
+        return
+    if not ip.EXIFTOOL_PATH:
+        sys.exit("exiftool not found on PATH")
+
+    stored = tags = 0
+    for i in range(0, len(todo), args.batch):
+        chunk = todo[i:i + args.batch]
+        metas = _exiftool_many([p for _mid, p in chunk])
+        for mid, p in chunk:
+            meta = metas.get(str(p))
+            if meta:
+                tags += ip.store_exif_kv(conn, mid, meta, allow=args.kv_allow, deny=args.kv_deny)
+                stored += 1
+        conn.commit()
+        print(f"  … {min(i + args.batch, len(todo))}/{len(todo)}")
+    print(f"Stored {tags} tag(s) for {stored} media row(s)")
+
+
+def cmd_stats(conn, args) -> None:
+    n_media, n_rows = conn.execute("SELECT COUNT(DISTINCT media_id), COUNT(*) FROM exif_kv").fetchone()
+    total = conn.execute("SELECT COUNT(*) FROM media").fetchone()[0]
+    n_partial = conn.execute("SELECT COUNT(*) FROM exif_kv WHERE tag=?", (ip.EXIF_KV_PARTIAL_TAG,)).fetchone()[0]
+    print(f"exif_kv: {n_rows} row(s) for {n_media}/{total} media ({n_partial} with a partial tag set)")
+    for tag, cnt in conn.execute(
+        "SELECT tag, COUNT(*) FROM exif_kv WHERE tag != ? GROUP BY tag ORDER BY 2 DESC LIMIT ?",
+        (ip.EXIF_KV_PARTIAL_TAG, args.top),
+    ):
+        print(f"  {tag:32s} {cnt}")
+
+
+def main():
+    cfg = ip.load_config(ip.repo_root() / "pixarr.toml")
+    cfg_paths = cfg.get("paths", {})
+    cfg_exif = cfg.get("exif", {})
+
+    ap = argparse.ArgumentParser(description="Re-evaluate date policy from exif_kv, backfill, inspect")
+    ap.add_argument("--data-dir",
+                    default=str(Path(cfg_paths.get("data_dir", str(ip.repo_root() / "data")))),
+                    help="Root data directory (default: ./data under repo)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("reeval", help="Recompute taken_at from stored tags under a different policy")
+    sp.add_argument("--allow-file-dates", action="store_true", help="Include ModifyDate/FileModifyDate")
+    sp.add_argument("--allow-filename-dates", action="store_true",
+                    help="Fall back to dates in the original filename (from sightings)")
+    sp.add_argument("--state", action="append", choices=STATES, help="Limit to state (repeatable)")
+    sp.add_argument("--samples", type=int, default=5, help="Example rows to print per outcome")
+    sp.add_argument("--csv", help="Write every non-unchanged row to this CSV")
+    sp.set_defaults(func=cmd_reeval)
+
+    sp = sub.add_parser("backfill", help="Full exiftool read for media with no or partial exif_kv tags")
+    sp.add_argument("--write", action="store_true", help="Actually run exiftool + store (default dry-run)")
+    sp.add_argument("--batch", type=int, default=200, help="Files per exiftool invocation")
+    sp.set_defaults(func=cmd_backfill)
+
+    sp = sub.add_parser("stats", help="Row counts and most common tags")
+    sp.add_argument("--top", type=int, default=25)
+    sp.set_defaults(func=cmd_stats)
+
+    args = ap.parse_args()
+    args.kv_allow = tuple(cfg_exif.get("allow", ip.EXIF_KV_ALLOW))
+    args.kv_deny = tuple(cfg_exif.get("deny", ip.EXIF_KV_DENY))
+    ip.pathize(Path(args.data_dir).resolve())
+    if not ip.DB_PATH.exists():
+        sys.exit(f"DB not found: {ip.DB_PATH}")
+
+    conn = ip.open_db()
+    try:
+        args.func(conn, args)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
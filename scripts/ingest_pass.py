@@ -9,6 +9,9 @@ Highlights:
 - Optional file-date fallback (--allow-file-dates) if you really want ModifyDate/FileModifyDate
 - Quarantine policy is driven by pixarr.toml ([quarantine] section)
 - Dry-run by default; use --write to actually move files to Review/
+- ZIP/TAR archives (e.g. Google Takeout) as sources: streamed, only non-dupes extracted
+- Optional parallel tree hash for very large files (--tree-hash-min-mb)
+- Sharded ingest: --delta-db writes a per-node delta DB, merged by scripts/pixarr_shards.py
 - DB auto-initializes from db/schema.sql the first time
 
 Requirements:
@@ -31,11 +34,25 @@ import shutil
 import re
 import logging
 import logging.handlers
-from datetime import datetime
-from pathlib import Path
-from typing import Optional, Tuple, Dict
+import queue
+import atexit
+import contextlib
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from typing import Optional, Tuple, Dict, List, Sequence
 from collections import defaultdict, Counter
 
+import pixarr_fastmeta   # sibling module: in-process date/GPS/orientation reader
+import pixarr_archive    # sibling module: ZIP/TAR member streaming + Takeout sidecars
+import pixarr_treehash   # sibling module: parallel chunked tree hash for big files
+import pixarr_sqlite     # sibling module: shared connection factory + pragma profiles
+import pixarr_counters   # sibling module: trigger-maintained media counts (state/reason/ext)
+import pixarr_sightings  # sibling module: sightings compaction mode + retention
+import pixarr_trace      # sibling module: per-statement SQL timing + slow-query log (--profile)
+
 # --- optional image decoders for content hashing ---------------------------------------  # [CONTENT HASH]
 try:
     from PIL import Image, ImageOps  # Pillow
@@ -53,6 +70,15 @@ except Exception:
 # ---------- Global toggles ----------
 DRY_RUN = True  # overridden by --write
 
+# How much work each file gets (--scan-level; lower levels are dry-run only):
+#   inventory -> walk + stat (counts, bytes, types)
+#   hash      -> + sha256 and file-level dupe lookups (DB + within this run)
+#   full      -> + metadata, pixel hash, date resolution, DB writes, moves
+SCAN_LEVELS = ("inventory", "hash", "full")
+SCAN_LEVEL = "full"
+# Summary fields a level does not compute (left as None, printed as n/a)
+SCAN_NOT_COMPUTED = {"inventory": ("moved", "updated", "skipped_dupe"), "hash": ("moved", "updated"), "full": ()}
+
 # Defaults used only if a list is missing in config
 DEFAULT_IMAGES = [
     "jpg", "jpeg", "png", "tif", "tiff", "gif", "webp", "heic", "heif", "avif"
@@ -131,6 +157,13 @@ DIR_IGNORE = {".Spotlight-V100", ".fseventsd", ".Trashes", ".TemporaryItems"}
 # Fallback toggle set by CLI
 ALLOW_FILENAME_DATES = False
 
+# Review folder layout ([review].layout in pixarr.toml or --review-layout)
+#   flat       -> Review/<name>
+#   hash2      -> Review/<first 2 hex chars of sha256>/<name>
+#   year_month -> Review/<YYYY-MM>/<name>
+REVIEW_LAYOUTS = ("flat", "hash2", "year_month")
+REVIEW_LAYOUT = "flat"
+
 # Paths configured at runtime
 DATA_DIR: Path
 DB_PATH: Path
@@ -142,9 +175,53 @@ SCHEMA_PATH: Path
 # Runtime quarantine policy (from pixarr.toml)
 QUAR: Dict[str, bool] = {}
 
+# Quarantine metadata outputs ([quarantine] manifest / sidecars / manifest_batch)
+#   manifest -> one JSONL per ingest under Quarantine/_manifests/, indexed in quarantine_events
+#   sidecars -> legacy <name>.quarantine.json next to each file (compat)
+QUAR_MANIFEST = True
+QUAR_SIDECARS = False
+QUAR_MANIFEST_BATCH = 500
+MANIFEST_SUBDIR = "_manifests"
+
+# Persist exiftool output per media into exif_kv ([exif] store / allow / deny), so date
+# policy changes can be re-evaluated from the DB (scripts/exif_kv.py reeval).
+# Dated files never get a full exiftool read (fast reader / selective -fast2), so their
+# tag set is partial: read_metadata marks it under EXIF_KV_PARTIAL_TAG (value = which
+# reader), stored with the tags; `exif_kv.py backfill` replaces partial sets with a full read.
+EXIF_KV_STORE = True
+EXIF_KV_PARTIAL_TAG = "_partial"
+EXIF_KV_ALLOW: Tuple[str, ...] = ()   # non-empty -> only these tags (exact names)
+EXIF_KV_DENY: Tuple[str, ...] = (
+    # path/run-specific or volatile
+    "SourceFile", "Directory", "FileName", "FilePermissions", "FileAccessDate",
+    "FileInodeChangeDate", "ExifToolVersion",
+    # embedded binaries (exiftool reports "(Binary data N bytes …)" placeholders)
+    "ThumbnailImage", "PreviewImage", "JpgFromRaw", "OtherImage", "ICC_Profile",
+)
+
 # exiftool (checked at runtime)
 EXIFTOOL_PATH = shutil.which("exiftool")
 
+# Try pixarr_fastmeta before exiftool ([ingest] fast_meta / --no-fast-meta)
+FAST_META = True
+
+# exiftool read mode ([ingest] exiftool_mode / --exiftool-mode):
+#   selective -> `-fast2` + only the tags ingest uses; a full read follows only when that
+#                leaves the file undated (i.e. it would be quarantined as missing_datetime)
+#   full      -> every tag of every file (old behavior)
+EXIFTOOL_MODE = "selective"
+EXIFTOOL_EXTRA_TAGS = ("GPSLatitude", "GPSLongitude", "GPSAltitude", "Orientation", "Make", "Model")
+
+# Archive sources: use Google Takeout JSON sidecars (photoTakenTime, geoData) when EXIF has
+# no capture date ([ingest] takeout_json / --takeout-json). Order: EXIF > Takeout > filename.
+TAKEOUT_JSON = False
+
+# Files at least this big also get a parallel chunked tree hash (pixarr_treehash) next to
+# sha256 ([ingest] tree_hash_min_mb / --tree-hash-min-mb; 0 = off). Both run at once; a
+# tree-hash hit on a known media row (same root + bytes) supplies the sha256 and stops that pass.
+TREE_HASH_MIN = 0
+TREE_HASH_WORKERS = pixarr_treehash.DEFAULT_WORKERS
+
 # --- Duplicate quarantine subdir mapping ------------------------------------------------  # [DUPES]
 # We keep DB reasons distinct (in_library vs in_review) but use ONE folder on disk.
 REASON_TO_SUBDIR = {
@@ -153,6 +230,316 @@ REASON_TO_SUBDIR = {
     # everything else maps to its own reason name
 }
 
+# ---------- Stage timing (--profile) ----------
+
+class StageHistogram(pixarr_trace.Histogram):
+    """Running stats for one pipeline stage (pixarr_trace.Histogram); the amount is bytes processed."""
+
+    __slots__ = ()
+
+    @property
+    def bytes(self) -> int:
+        return self.amount
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 6),
+            "mean_ms": round(1000 * self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(1000 * self.percentile(0.50), 3),
+            "p95_ms": round(1000 * self.percentile(0.95), 3),
+            "p99_ms": round(1000 * self.percentile(0.99), 3),
+            "max_ms": round(1000 * self.max, 3),
+            "bytes": self.bytes,
+            "bytes_per_sec": round(self.bytes / self.total, 1) if self.total and self.bytes else None,
+        }
+
+
+class _StageSpan:
+    __slots__ = ("timer", "name", "nbytes", "t0")
+
+    def __init__(self, timer: "StageTimer", name: str, nbytes: int):
+        self.timer, self.name, self.nbytes = timer, name, nbytes
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.observe(self.name, time.perf_counter() - self.t0, self.nbytes)
+        return False
+
+
+_NOOP_SPAN = contextlib.nullcontext()
+
+
+class StageTimer:
+    """
+    `with TIMER.stage("sha256", nbytes=size): ...` — aggregates into a
+    StageHistogram per stage. Disabled (the default) it hands back a shared
+    nullcontext, so the hot loop pays one attribute check per stage.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.stages: Dict[str, StageHistogram] = {}
+
+    def stage(self, name: str, nbytes: int = 0):
+        return _StageSpan(self, name, nbytes) if self.enabled else _NOOP_SPAN
+
+    def observe(self, name: str, seconds: float, nbytes: int = 0) -> None:
+        hist = self.stages.get(name)
+        if hist is None:
+            hist = self.stages[name] = StageHistogram()
+        hist.observe(seconds, nbytes)
+
+    def report(self) -> dict:
+        return {name: h.as_dict() for name, h in self.stages.items()}
+
+    def totals(self) -> Dict[str, Tuple[int, float]]:
+        """(count, total seconds) per stage so far; diff two of these for one batch's share."""
+        return {name: (h.count, h.total) for name, h in self.stages.items()}
+
+
+# Stages: walk, stat, sha256, fast_meta, exiftool, content_hash, dupe_lookup, upsert, exif_kv,
+#         sighting, move, quarantine, commit
+TIMER = StageTimer(enabled=False)
+
+def timed_walk(top: Path):
+    """os.walk, timing each directory listing as the 'walk' stage (dirs[:] pruning still works)."""
+    it = os.walk(top)
+    if not TIMER.enabled:
+        yield from it
+        return
+    while True:
+        t0 = time.perf_counter()
+        try:
+            entry = next(it)
+        except StopIteration:
+            return
+        TIMER.observe("walk", time.perf_counter() - t0)
+        yield entry
+
+def timed_commit(conn: sqlite3.Connection) -> None:
+    flush_sightings(conn)
+    with TIMER.stage("commit"):
+        conn.commit()
+
+def log_batches(all_stats: list) -> None:
+    """End-of-run summary: each batch's ingests/ingest_stats row and a few examples seen in it."""
+    conn = open_db("read")
+    try:
+        log("\nBatches created:")
+        for s in all_stats:
+            if not s["ingest_id"]:
+                continue
+            iid = s["ingest_id"]
+            row = conn.execute(
+                "SELECT i.source, i.started_at, i.finished_at, i.notes, st.sightings "
+                "FROM ingests i LEFT JOIN ingest_stats st ON st.ingest_id = i.id WHERE i.id=?",
+                (iid,)
+            ).fetchone()
+            if not row:
+                continue
+            src, started, finished, notes, items = row   # items: ingest_stats (NULL if interrupted)
+            log(f"  {iid[:8]}…  {src}  items={'-' if items is None else items}  started={started or '-'}  "
+                f"finished={finished or '-'}  note={notes or ''}")
+
+            # last few examples seen in this batch
+            examples = conn.execute(
+                """
+                SELECT s.filename, m.taken_at, m.canonical_path
+                FROM sightings_v2 s
+                JOIN media m ON m.rid = s.media_rid
+                WHERE s.ingest_id=?
+                ORDER BY s.seen_ts DESC, s.id DESC
+                LIMIT 3
+                """,
+                (iid,)
+            ).fetchall()
+            for fn, t, cpath in examples:
+                log(f"    - {fn} | taken_at={t} | path={cpath}")
+    finally:
+        conn.close()
+
+def log_exiftool_split(all_stats: list) -> None:
+    """Summary line for selective exiftool mode: fast/deep counts and estimated time saved."""
+    n_sel = sum(s.get("exif_fast", 0) for s in all_stats)
+    n_deep = sum(s.get("exif_deep", 0) for s in all_stats)
+    if not n_sel:
+        return
+    t_sel = sum(s.get("t_exif_fast", 0.0) for s in all_stats)
+    t_deep = sum(s.get("t_exif_deep", 0.0) for s in all_stats)
+    line = (f"exiftool selective={n_sel} ({t_sel:.1f}s), deep re-reads={n_deep} ({t_deep:.1f}s), "
+            f"{100 * (n_sel - n_deep) / n_sel:.0f}% answered by the selective read")
+    if n_deep:
+        # files that stopped at the selective read would each have cost ~one deep read;
+        # every selective read (incl. the ones that needed a re-read) is the price
+        saved = (n_sel - n_deep) * (t_deep / n_deep) - t_sel
+        line += f"; est. time saved {saved:+.1f}s vs full reads"
+    log(line)
+
+def profile_paths() -> Tuple[Path, Path]:
+    """(<log stem>.profile.json, <log stem>.pstats) next to this run's log file."""
+    base = LOG_PATH if LOG_PATH else (DATA_DIR / "logs" / "pixarr-profile.log")
+    return base.with_suffix(".profile.json"), base.with_suffix(".pstats")
+
+def sql_trace_paths() -> Tuple[Path, Path]:
+    """(<log stem>.sql.json, <log stem>.slow-sql.log) next to this run's log file."""
+    base = LOG_PATH if LOG_PATH else (DATA_DIR / "logs" / "pixarr-profile.log")
+    return base.with_suffix(".sql.json"), base.with_suffix(".slow-sql.log")
+
+def write_profile_report(path: Path, *, mode: str, elapsed: float, totals: dict) -> dict:
+    """Dump the per-stage report (+ run totals) as JSON; returns the payload."""
+    report = TIMER.report()
+    payload = {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "mode": mode,
+        "elapsed_s": round(elapsed, 3),
+        "files_per_sec": round(totals.get("scanned", 0) / elapsed, 2) if elapsed else None,
+        "totals": totals,
+        "stages": dict(sorted(report.items(), key=lambda kv: -kv[1]["total_s"])),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return payload
+
+def format_stage_table(stages: dict, elapsed: float) -> List[str]:
+    """Human-readable lines for the end-of-run summary (slowest stage first)."""
+    lines = [f"  {'stage':<13}{'count':>8}{'total s':>10}{'%run':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'MB/s':>9}"]
+    for name, st in stages.items():
+        pct = 100 * st["total_s"] / elapsed if elapsed else 0.0
+        mbps = f"{st['bytes_per_sec'] / 1e6:.1f}" if st["bytes_per_sec"] else "-"
+        lines.append(f"  {name:<13}{st['count']:>8}{st['total_s']:>10.2f}{pct:>6.1f}%"
+                     f"{st['p50_ms']:>10.2f}{st['p95_ms']:>10.2f}{st['p99_ms']:>10.2f}{mbps:>9}")
+    return lines
+
+# ---------- Metrics (Prometheus text format) ----------
+
+class IngestMetrics:
+    """
+    Prometheus exposition for ingest runs. Nothing is incremented per file here:
+    we keep references to each batch's live `stats` dict (plain int bumps the
+    loop already does) and to TIMER's stage histograms, and render on demand —
+    to a textfile-collector path after each batch, and/or over HTTP (/metrics).
+    """
+    # Coarse `le` bounds (seconds) folded from StageHistogram's fine buckets.
+    LE = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    COUNTERS = (
+        ("scanned", "Media candidates examined"),
+        ("moved", "Files moved to Review (planned, in dry-run)"),
+        ("updated", "Already-tracked files re-verified"),
+        ("skipped_dupe", "Duplicates skipped"),
+        ("bytes_hashed", "Bytes read by the file sha256"),
+    )
+
+    def __init__(self):
+        self.batches: list = []          # live stats dicts, one per ingest_one_source call
+        self.textfile: Optional[Path] = None
+        self.started = time.time()
+        self._server = None
+
+    def track(self, stats: dict) -> None:
+        self.batches.append(stats)
+
+    @staticmethod
+    def _esc(v: str) -> str:
+        return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    def render(self) -> str:
+        out = []
+        add = out.append
+        batches = list(self.batches)
+
+        for key, help_ in self.COUNTERS:
+            name = f"pixarr_ingest_{key}_total"
+            add(f"# HELP {name} {help_}")
+            add(f"# TYPE {name} counter")
+            for st in batches:
+                if st.get(key) is not None:   # None = not computed at this --scan-level
+                    add(f'{name}{{source="{self._esc(st["label"])}"}} {st[key]}')
+
+        name = "pixarr_ingest_quarantined_total"
+        add(f"# HELP {name} Files quarantined, by reason")
+        add(f"# TYPE {name} counter")
+        for st in batches:
+            for reason, n in sorted(dict(st["q_counts"]).items()):
+                add(f'{name}{{source="{self._esc(st["label"])}",reason="{self._esc(reason)}"}} {n}')
+
+        add("# HELP pixarr_ingest_batch_finished Whether the source's batch has finished (1) or is running (0)")
+        add("# TYPE pixarr_ingest_batch_finished gauge")
+        for st in batches:
+            add(f'pixarr_ingest_batch_finished{{source="{self._esc(st["label"])}"}} {int(bool(st.get("finished_at")))}')
+
+        add("# HELP pixarr_ingest_dry_run 1 if this run is a dry-run")
+        add("# TYPE pixarr_ingest_dry_run gauge")
+        add(f"pixarr_ingest_dry_run {int(DRY_RUN)}")
+        add("# HELP pixarr_ingest_start_time_seconds Unix time the run started")
+        add("# TYPE pixarr_ingest_start_time_seconds gauge")
+        add(f"pixarr_ingest_start_time_seconds {self.started:.3f}")
+
+        if TIMER.enabled:
+            name = "pixarr_ingest_stage_seconds"
+            add(f"# HELP {name} Per-file latency of each ingest stage")
+            add(f"# TYPE {name} histogram")
+            bounds = StageHistogram.BOUNDS
+            for stage, h in sorted(TIMER.stages.items()):
+                buckets = list(h.buckets)
+                cum, i = 0, 0
+                for le in self.LE:
+                    while i < len(bounds) and bounds[i] <= le:
+                        cum += buckets[i]
+                        i += 1
+                    add(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cum}')
+                add(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                add(f'{name}_sum{{stage="{stage}"}} {h.total:.6f}')
+                add(f'{name}_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self) -> None:
+        """Atomic write for node_exporter's textfile collector (tmp + rename)."""
+        if not self.textfile:
+            return
+        try:
+            self.textfile.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.textfile.with_name(self.textfile.name + f".{os.getpid()}.tmp")
+            tmp.write_text(self.render(), encoding="utf-8")
+            os.replace(tmp, self.textfile)
+        except Exception as e:
+            LOGGER.warning(f"metrics textfile write failed ({self.textfile}): {e}")
+
+    def serve(self, port: int, addr: str = "127.0.0.1") -> None:
+        """Serve /metrics from a daemon thread for the life of the process."""
+        import http.server
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *a):   # keep scrapes out of the ingest log
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((addr, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="pixarr-metrics", daemon=True).start()
+
+    def shutdown(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+METRICS = IngestMetrics()
+
 # ---------- Utilities ----------
 
 def ensure_exiftool() -> None:
@@ -166,9 +553,16 @@ def repo_root() -> Path:
 
 LOGGER = logging.getLogger("pixarr")
 
+class _BatchAdapter(logging.LoggerAdapter):
+    """LoggerAdapter that keeps per-call extras (file_token) next to the batch's own."""
+
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **(kwargs.get("extra") or {})}
+        return msg, kwargs
+
 def batch_logger(ingest_id: str, source: str) -> logging.LoggerAdapter:
     """Attach ingest_id + source to every log record in this batch."""
-    return logging.LoggerAdapter(LOGGER, {"ingest_id": ingest_id, "source": source})
+    return _BatchAdapter(LOGGER, {"ingest_id": ingest_id, "source": source})
 
 def log(msg: str, level: int = logging.INFO) -> None:
     LOGGER.log(level, msg)
@@ -188,24 +582,16 @@ def ensure_db() -> None:
     ensure_dirs()
     if not DB_PATH.exists():
         log(f"Initializing database at {DB_PATH} …")
-        conn = sqlite3.connect(DB_PATH)
+        conn = pixarr_sqlite.connect(DB_PATH, "write", journal_mode=None)   # schema.sql: auto_vacuum, then WAL
         conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
-        conn.executescript("""
-            PRAGMA journal_mode=WAL;
-            PRAGMA synchronous=NORMAL;
-            PRAGMA foreign_keys=ON;
-            PRAGMA busy_timeout=5000;
-            PRAGMA temp_store=MEMORY;
-        """)
         conn.close()
 
-def open_db() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA journal_mode=WAL;")
-    conn.execute("PRAGMA synchronous=NORMAL;")
-    conn.execute("PRAGMA foreign_keys=ON;")
-    conn.execute("PRAGMA busy_timeout=5000;")
-    return conn
+# Set by --profile: every connection open_db() hands out times its statements here
+SQL_TRACER: Optional[pixarr_trace.SqlTracer] = None
+
+def open_db(profile: str = "write") -> sqlite3.Connection:
+    """Connection to DB_PATH with a pixarr_sqlite profile ('write' for ingest/maintenance, 'read' for reports)."""
+    return pixarr_sqlite.connect(DB_PATH, profile, tracer=SQL_TRACER)
 
 def pathize(base: Path) -> None:
     """Derive all runtime paths from DATA_DIR and set globals."""
@@ -292,21 +678,28 @@ def build_quarantine_cfg(cfg_quar: dict) -> Dict[str, bool]:
 
 # ---------- File helpers ----------
 
-def sha256_file(p: Path, bufsize: int = 1024*1024) -> str:
+def sha256_file(p: Path, bufsize: int = 1024*1024, stop: Optional[threading.Event] = None) -> Optional[str]:
+    """Hex sha256 of p; None if `stop` gets set before the read finishes."""
     h = hashlib.sha256()
     with p.open("rb", buffering=0) as f:
         while True:
+            if stop is not None and stop.is_set():
+                return None
             chunk = f.read(bufsize)
             if not chunk:
                 break
             h.update(chunk)
     return h.hexdigest()
 
-def exiftool_json(p: Path) -> dict:
-    """Return metadata dict from exiftool -j (or {})."""
+def exiftool_json(p: Path, tags: Optional[List[str]] = None) -> dict:
+    """
+    Return metadata dict from exiftool -j (or {}).
+    With `tags`, ask only for those (plus -fast2: stop before image data/trailers).
+    """
+    sel = ["-fast2", *(f"-{t}" for t in tags)] if tags else []
     try:
         out = subprocess.check_output(
-            [EXIFTOOL_PATH, "-j", "-n", "-api", "largefilesupport=1", str(p)],
+            [EXIFTOOL_PATH, "-j", "-n", *sel, "-api", "largefilesupport=1", str(p)],
             stderr=subprocess.DEVNULL,
             timeout=20,
         )
@@ -315,14 +708,97 @@ def exiftool_json(p: Path) -> dict:
     except Exception:
         return {}
 
+def exiftool_json_stream(f, tags: Optional[List[str]] = None) -> dict:
+    """exiftool_json for a stream (archive member) piped to `exiftool -`; {} on any failure."""
+    sel = ["-fast2", *(f"-{t}" for t in tags)] if tags else []
+    try:
+        proc = subprocess.Popen(
+            [EXIFTOOL_PATH, "-j", "-n", *sel, "-api", "largefilesupport=1", "-"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+    except Exception:
+        return {}
+    try:
+        try:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                proc.stdin.write(chunk)
+        except BrokenPipeError:
+            pass   # -fast2: exiftool stopped reading once it had what it needed
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        out = proc.stdout.read()
+        proc.wait(timeout=20)
+        arr = json.loads(out.decode("utf-8", errors="ignore"))
+        return arr[0] if arr else {}
+    except Exception:
+        proc.kill()
+        return {}
+
+def exiftool_selected_tags() -> List[str]:
+    """Tags the ingest reads: current _DATE_KEYS + GPS/orientation/make/model."""
+    return list(dict.fromkeys([*_DATE_KEYS, *EXIFTOOL_EXTRA_TAGS]))
+
+def read_metadata(p: Path, stats: Optional[dict] = None, *, opener=None, has_date: bool = False) -> dict:
+    """
+    Capture metadata for one file, cheapest answer first:
+      1) pixarr_fastmeta (in-process) if it yields a capture date under _DATE_KEYS
+      2) exiftool, selective (-fast2 + needed tags) in EXIFTOOL_MODE='selective'
+      3) exiftool, full read — only if (2) leaves the file undated under the
+         current policy (filename dates included), i.e. it would be quarantined
+    Archive members pass `opener` (fresh binary stream of the member; `p` is then
+    just its name) and `has_date` when a Takeout sidecar already dates them.
+    (1) and (2) return only the tags they read, marked with EXIF_KV_PARTIAL_TAG.
+    """
+    st = stats if stats is not None else defaultdict(float)
+    if FAST_META:
+        with TIMER.stage("fast_meta"):
+            if opener is None:
+                meta = pixarr_fastmeta.read_meta(p)
+            elif p.suffix.lower() in pixarr_fastmeta.SUPPORTED_EXT:
+                with opener() as f:
+                    meta = pixarr_fastmeta.read_meta(f, p.suffix)
+            else:
+                meta = None
+        if meta and extract_taken_at_exif_only(meta):
+            st["meta_fast"] += 1
+            meta[EXIF_KV_PARTIAL_TAG] = "fastmeta"
+            return meta
+    st["meta_exiftool"] += 1
+
+    def exiftool(tags=None):
+        if opener is None:
+            return exiftool_json(p, tags)
+        with opener() as f:
+            return exiftool_json_stream(f, tags)
+
+    if EXIFTOOL_MODE == "selective":
+        t0 = time.perf_counter()
+        with TIMER.stage("exiftool_fast"):
+            meta = exiftool(exiftool_selected_tags())
+        st["t_exif_fast"] += time.perf_counter() - t0
+        st["exif_fast"] += 1
+        if has_date or resolve_taken_at(meta, p.name, ALLOW_FILENAME_DATES):
+            meta[EXIF_KV_PARTIAL_TAG] = "selective"
+            return meta
+
+    t0 = time.perf_counter()
+    with TIMER.stage("exiftool"):
+        meta = exiftool()
+    st["t_exif_deep"] += time.perf_counter() - t0
+    st["exif_deep"] += 1
+    return meta
+
 def is_media_candidate(p: Path) -> bool:
     # only look at extension here; let stat() decide file health
     return p.suffix.lower() in SUPPORTED_EXT
 
 # --- Content hash (decoded pixels, stable across EXIF/XMP edits) ------------------------  # [CONTENT HASH]
-def compute_image_content_sha256(path: Path) -> Optional[str]:
+def compute_image_content_sha256(path) -> Optional[str]:
     """
-    Return a SHA-256 hex digest of the decoded pixels for an image file.
+    Return a SHA-256 hex digest of the decoded pixels for an image file (path or binary stream).
     - Applies EXIF orientation (so rotated vs not-rotated match).
     - Converts everything to RGB deterministically.
     - Flattens alpha on black to avoid ambiguity.
@@ -350,15 +826,23 @@ def compute_image_content_sha256(path: Path) -> Optional[str]:
     except Exception:
         return None
 
-# Only capture/camera-origin dates. (File dates optionally added via flag)
-_DATE_KEYS = [
+# Only capture/camera-origin dates, in priority order. (File dates optionally added via flag)
+_CAPTURE_DATE_KEYS = (
     "DateTimeOriginal",
     "CreateDate",           # EXIF create
     "MediaCreateDate",      # some video containers
     "TrackCreateDate",      # some MP4/MOV tracks
     "QuickTime:CreateDate", # QuickTime atom
     "QuickTime:CreationDate"
-]
+)
+_FILE_DATE_KEYS = ("ModifyDate", "FileModifyDate")
+
+def date_keys_for(allow_file_dates: bool) -> list:
+    """Capture-date tags in priority order; file dates only when explicitly allowed."""
+    return [*_CAPTURE_DATE_KEYS, *(_FILE_DATE_KEYS if allow_file_dates else ())]
+
+# The ingest's policy (main() applies --allow-file-dates); other tools pass their own keys
+_DATE_KEYS = date_keys_for(False)
 
 _dt_re = re.compile(
     r"^(?P<y>\d{4}):(?P<m>\d{2}):(?P<d>\d{2})[ T]"
@@ -405,9 +889,9 @@ def _parse_exif_dt(s: str) -> Optional[datetime]:
         return None
 
 
-def extract_taken_at_exif_only(meta: dict) -> Optional[str]:
-    """Return taken_at only from EXIF/QuickTime tags. Otherwise None."""
-    for k in _DATE_KEYS:
+def extract_taken_at_exif_only(meta: dict, keys: Optional[Sequence[str]] = None) -> Optional[str]:
+    """Return taken_at only from EXIF/QuickTime tags (`keys`, default _DATE_KEYS). Otherwise None."""
+    for k in _DATE_KEYS if keys is None else keys:
         v = meta.get(k)
         if v:
             dt = _parse_exif_dt(str(v))
@@ -428,6 +912,26 @@ def last_meaningful_folder(path: Path) -> Optional[str]:
             return name
     return None
 
+def digest_bytes(hex_digest: Optional[str]) -> Optional[bytes]:
+    """Hex digest -> the 32-byte BLOB schema v2 stores (None passes through)."""
+    return bytes.fromhex(hex_digest) if hex_digest else None
+
+def epoch_now() -> int:
+    """Row timestamp for schema v2 (*_ts columns): integer epoch seconds, UTC."""
+    return int(time.time())
+
+def iso_to_epoch(iso: Optional[str]) -> Optional[int]:
+    """ISO8601 -> epoch seconds (taken_ts); naive values are read as UTC. None if unparsable."""
+    if not iso:
+        return None
+    try:
+        dt = datetime.fromisoformat(iso.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
 def uuid_from_hash(hash_hex: str) -> str:
     """Deterministic UUID from SHA-256 (stable per content)."""
     return str(uuid.uuid5(uuid.NAMESPACE_DNS, hash_hex))
@@ -441,22 +945,183 @@ def file_token_for(p: Path, h: Optional[str] = None) -> str:
         return "-"
 
 
-def canonical_name(taken_at_iso: str, hash_hex: str, ext: str) -> str:
-    """YYYY-MM-DD_HH-MM-SS_hashprefix.ext (hashprefix = first 8 chars)."""
+def review_shard(filename: str, layout: Optional[str] = None) -> str:
+    """
+    Subfolder (relative to Review/) for a canonical filename under `layout`.
+    Derived from the name alone (date prefix / hash8), so tools and the API
+    can locate a file without a DB lookup. Returns "" for the flat layout.
+    """
+    layout = layout or REVIEW_LAYOUT
+    if layout == "hash2":
+        m = re.match(r"^\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}_([0-9a-f]{2})", filename)
+        return m.group(1) if m else "_"
+    if layout == "year_month":
+        m = re.match(r"^(\d{4}-\d{2})-\d{2}_", filename)
+        return m.group(1) if m else "_"
+    return ""
+
+def canonical_name(taken_at_iso: str, hash_hex: str, ext: str, layout: Optional[str] = None) -> str:
+    """
+    YYYY-MM-DD_HH-MM-SS_hashprefix.ext (hashprefix = first 8 chars),
+    prefixed with the Review shard folder when the layout is not flat.
+    """
     dt = datetime.fromisoformat(taken_at_iso.replace("Z", "+00:00"))
     stamp = dt.strftime("%Y-%m-%d_%H-%M-%S")
-    return f"{stamp}_{hash_hex[:8]}{ext.lower()}"
+    name = f"{stamp}_{hash_hex[:8]}{ext.lower()}"
+    shard = review_shard(name, layout)
+    return f"{shard}/{name}" if shard else name
+
+SCHEMA_VERSION = 2   # PRAGMA user_version written by db/schema.sql
+
+def check_schema(conn: sqlite3.Connection) -> None:
+    """Exit with a pointer to the migration if the DB predates schema v2."""
+    v = conn.execute("PRAGMA user_version").fetchone()[0]
+    if v < SCHEMA_VERSION:
+        conn.close()
+        sys.exit(f"{DB_PATH}: schema v{v}, this version needs v{SCHEMA_VERSION}. "
+                 "Run scripts/migrate_v2.py (online, chunked; ingest/API can keep running).")
 
 def ensure_column(conn: sqlite3.Connection, table: str, column: str, definition: str) -> None:
     """Add a column if it doesn't exist. Safe to call every run."""
-    cur = conn.execute(f"PRAGMA table_info({table});")
+    cur = conn.execute(f"PRAGMA table_xinfo({table});")   # xinfo: generated columns count too
     cols = [r[1] for r in cur.fetchall()]
     if column not in cols:
         conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition};")
         conn.commit()
 
+def ensure_quarantine_events(conn: sqlite3.Connection) -> None:
+    """Create the quarantine_events index table if the DB predates it (mirrors db/schema.sql)."""
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS quarantine_events (
+          id             INTEGER PRIMARY KEY,
+          ingest_id      TEXT,
+          reason         TEXT NOT NULL,
+          original_path  TEXT NOT NULL,
+          quarantined_to TEXT,
+          extra          TEXT,
+          ts             TEXT NOT NULL,
+          manifest       TEXT,
+          UNIQUE(original_path, ts)
+        );
+        CREATE INDEX IF NOT EXISTS idx_qevents_ingest ON quarantine_events(ingest_id);
+        CREATE INDEX IF NOT EXISTS idx_qevents_reason ON quarantine_events(reason);
+        CREATE INDEX IF NOT EXISTS idx_qevents_dest   ON quarantine_events(quarantined_to);
+    """)
+
+def ensure_ingest_checkpoints(conn: sqlite3.Connection) -> None:
+    """Create the --resume checkpoint tables if the DB predates them (mirrors db/schema.sql)."""
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+          ingest_id    TEXT PRIMARY KEY,
+          source_path  TEXT NOT NULL,
+          dry_run      INTEGER NOT NULL,
+          last_dir     TEXT,
+          stats_json   TEXT NOT NULL,
+          updated_at   TEXT NOT NULL,
+          FOREIGN KEY(ingest_id) REFERENCES ingests(id) ON DELETE CASCADE
+        );
+        CREATE TABLE IF NOT EXISTS ingest_files_done (
+          ingest_id    TEXT NOT NULL,
+          rel_path     TEXT NOT NULL,
+          PRIMARY KEY(ingest_id, rel_path)
+        ) WITHOUT ROWID;
+    """)
+
+def ensure_ingest_stats(conn: sqlite3.Connection) -> None:
+    """Create the per-batch summary table if the DB predates it (mirrors db/schema.sql)."""
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS ingest_stats (
+          ingest_id     TEXT PRIMARY KEY,
+          source_path   TEXT,
+          dry_run       INTEGER NOT NULL,
+          scan_level    TEXT,
+          scanned       INTEGER NOT NULL,
+          moved         INTEGER,
+          updated       INTEGER,
+          skipped_dupe  INTEGER,
+          quarantined   INTEGER NOT NULL,
+          q_counts      TEXT NOT NULL,
+          bytes_total   INTEGER,
+          bytes_hashed  INTEGER,
+          sightings     INTEGER NOT NULL,
+          duration_s    REAL NOT NULL,
+          stages        TEXT,
+          FOREIGN KEY(ingest_id) REFERENCES ingests(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+    """)
+
+def ensure_shard_tables(conn: sqlite3.Connection) -> None:
+    """Create the sharded-ingest tables if the DB predates them (mirrors db/schema.sql)."""
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS delta_info (
+          shard_id    TEXT PRIMARY KEY,
+          shard       TEXT NOT NULL,
+          host        TEXT,
+          data_dir    TEXT NOT NULL,
+          created_at  TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS shard_merges (
+          shard_id    TEXT PRIMARY KEY,
+          shard       TEXT NOT NULL,
+          host        TEXT,
+          data_dir    TEXT,
+          delta_path  TEXT NOT NULL,
+          ingest_id   TEXT,
+          status      TEXT NOT NULL,
+          last_rid    INTEGER NOT NULL DEFAULT 0,
+          counts      TEXT,
+          started_at  TEXT NOT NULL,
+          finished_at TEXT,
+          CHECK (status IN ('running','done'))
+        );
+        CREATE TABLE IF NOT EXISTS shard_batches (
+          ingest_id   TEXT PRIMARY KEY,
+          shard_id    TEXT NOT NULL,
+          FOREIGN KEY(ingest_id) REFERENCES ingests(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+    """)
+
+def ensure_delta_info(conn: sqlite3.Connection, shard: str) -> str:
+    """
+    Mark DB_PATH as the delta DB of `shard` (first run) and return its shard_id.
+    Exits if the delta already belongs to another shard or data dir: one delta
+    per node, merged into the master by scripts/pixarr_shards.py.
+    """
+    row = conn.execute("SELECT shard_id, shard, data_dir FROM delta_info").fetchone()
+    if row is None:
+        shard_id = str(uuid.uuid4())
+        conn.execute(
+            "INSERT INTO delta_info (shard_id, shard, host, data_dir, created_at) VALUES (?, ?, ?, ?, ?)",
+            (shard_id, shard, socket.gethostname(), str(DATA_DIR), datetime.utcnow().isoformat()),
+        )
+        conn.commit()
+        return shard_id
+    shard_id, have_shard, have_dir = row
+    if (have_shard, have_dir) != (shard, str(DATA_DIR)):
+        conn.close()
+        sys.exit(f"{DB_PATH}: delta of shard {have_shard!r} ({have_dir}); "
+                 f"use another --delta-db for shard {shard!r} ({DATA_DIR})")
+    return shard_id
+
+def ensure_lookup_indexes(conn: sqlite3.Connection) -> None:
+    """Add the provenance/history lookup indexes if the DB predates them (mirrors db/schema.sql)."""
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_sightings_v2_path'").fetchone():
+        return
+    log("Building lookup indexes (sightings path, per-batch history, media added) …")
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_media_added ON media(added_ts);
+        CREATE INDEX IF NOT EXISTS idx_sightings_v2_ingest_seen ON sightings_v2(ingest_id, seen_ts);
+        CREATE INDEX IF NOT EXISTS idx_sightings_v2_path ON sightings_v2(full_path);
+        DROP INDEX IF EXISTS idx_sightings_v2_ingest;
+        CREATE INDEX IF NOT EXISTS idx_ingests_started ON ingests(started_at);
+    """)
+
 def plan_nonclobber(dest_dir: Path, filename: str) -> Path:
-    """Choose a destination path that doesn't overwrite existing files."""
+    """
+    Choose a destination path that doesn't overwrite existing files.
+    `filename` may carry a shard subfolder (see canonical_name); collisions
+    get _2, _3, … inside that same subfolder.
+    """
     base = dest_dir / filename
     if not base.exists():
         return base
@@ -476,8 +1141,72 @@ def _write_quarantine_sidecar(dest: Path, payload: dict) -> None:
     except Exception:
         pass
 
+class QuarantineManifest:
+    """
+    Buffered per-ingest JSONL manifest of quarantine events.
+    Records are appended in batches: one write + one fsync per flush, and the
+    same batch is indexed into quarantine_events with executemany (committed
+    with the ingest's next commit). scripts/quarantine_manifest.py can rebuild
+    the index from the JSONL files if a run dies between the two.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, ingest_id: str, path: Path, batch_size: int = 500):
+        self.conn = conn
+        self.ingest_id = ingest_id
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.buf: list[dict] = []
+
+    def add(self, payload: dict) -> None:
+        self.buf.append(payload)
+        if len(self.buf) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buf:
+            return
+        batch, self.buf = self.buf, []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(p, ensure_ascii=False) + "\n" for p in batch))
+            f.flush()
+            os.fsync(f.fileno())
+        index_quarantine_events(self.conn, batch, self.path)
+
+def index_quarantine_events(conn: sqlite3.Connection, payloads: list, manifest: Optional[Path]) -> None:
+    """Insert manifest/sidecar payloads into quarantine_events (idempotent)."""
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO quarantine_events
+          (ingest_id, reason, original_path, quarantined_to, extra, ts, manifest)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (p.get("ingest_id"), p.get("reason"), p.get("original_path"), p.get("quarantined_to"),
+             p.get("extra"), p.get("timestamp"), str(manifest) if manifest else None)
+            for p in payloads
+        ],
+    )
+
+_MANIFESTS: Dict[str, QuarantineManifest] = {}
+
+def manifest_path_for(ingest_id: str) -> Path:
+    return QUARANTINE_ROOT / MANIFEST_SUBDIR / f"{ingest_id}.jsonl"
+
+def open_quarantine_manifest(conn: sqlite3.Connection, ingest_id: str) -> None:
+    if QUAR_MANIFEST:
+        _MANIFESTS[ingest_id] = QuarantineManifest(conn, ingest_id, manifest_path_for(ingest_id), QUAR_MANIFEST_BATCH)
+
+def close_quarantine_manifest(ingest_id: str) -> None:
+    m = _MANIFESTS.pop(ingest_id, None)
+    if m:
+        m.flush()
+
 def quarantine_file(src: Path, reason: str, ingest_id: str, extra: Optional[str] = None) -> Optional[Path]:
-    """Move/copy the src file to Quarantine/<mapped-subdir>/ and write a tiny sidecar JSON."""
+    """
+    Move/copy the src file to Quarantine/<mapped-subdir>/ and record why:
+    appended to the ingest's JSONL manifest, and/or a sidecar JSON (see QUAR_SIDECARS).
+    """
     # Map duplicate reasons to the unified 'duplicate' subdir; otherwise use the reason.  # [DUPES]
     subdir = REASON_TO_SUBDIR.get(reason, reason)
     dest_dir = QUARANTINE_ROOT / subdir
@@ -497,16 +1226,26 @@ def quarantine_file(src: Path, reason: str, ingest_id: str, extra: Optional[str]
         except Exception:
             moved = False
 
+    record_quarantine(src, dest if moved else None, reason, ingest_id, extra)
+    return dest if moved else None
+
+def record_quarantine(src: Path, dest: Optional[Path], reason: str, ingest_id: str,
+                      extra: Optional[str] = None) -> None:
+    """Manifest event (and/or sidecar) for a file that went — or failed to go (dest=None) — to Quarantine/."""
     payload = {
         "reason": reason,
         "ingest_id": ingest_id,
         "original_path": str(src),
-        "quarantined_to": str(dest) if moved else None,
+        "quarantined_to": str(dest) if dest else None,
         "timestamp": datetime.utcnow().isoformat(),
         "extra": extra,  # include dupe basis / canonical id info when provided        # [DUPES]
     }
-    _write_quarantine_sidecar(dest if moved else dest_dir / (src.name + ".failed"), payload)
-    return dest if moved else None
+    manifest = _MANIFESTS.get(ingest_id)
+    if manifest:
+        manifest.add(payload)
+    if QUAR_SIDECARS or not manifest:
+        dest_dir = QUARANTINE_ROOT / REASON_TO_SUBDIR.get(reason, reason)
+        _write_quarantine_sidecar(dest if dest else dest_dir / (src.name + ".failed"), payload)
 
 def maybe_quarantine(
     src: Path,
@@ -523,7 +1262,8 @@ def maybe_quarantine(
     if DRY_RUN:
         LOGGER.log(level, f"[DRY] {msg}", extra=_extra)
         return None
-    q = quarantine_file(src, reason, ingest_id, extra=extra)
+    with TIMER.stage("quarantine"):
+        q = quarantine_file(src, reason, ingest_id, extra=extra)
     if q:
         LOGGER.log(level, f"{msg} -> {q}", extra=_extra)
         return q
@@ -531,8 +1271,79 @@ def maybe_quarantine(
     return None
 
 
+# Per-file DEBUG events that may be sampled/rate-limited ([logging] sampled_events).
+# Matched against the *unformatted* message prefix, so the check is a cheap startswith.
+DEFAULT_SAMPLED_EVENTS = ["[DRY] MOVE", "MOVED", "= Already tracked", "= DUP in library"]
+
+# Dropped-by-sampling counts (prefix -> n), reported in the run summary.
+LOG_DROPPED: Counter = Counter()
+
+# Background listener that formats + writes records (see setup_logging/stop_logging).
+_LOG_LISTENER: Optional[logging.handlers.QueueListener] = None
+LOG_PATH: Optional[Path] = None   # current run's log file (profile reports land next to it)
+
+
+class SampledEventsFilter(logging.Filter):
+    """
+    Keep 1 of every `every` records per event prefix and at most `max_per_sec`
+    per prefix per second (0 = unlimited). Runs on the hot thread, before the
+    queue, so dropped records cost one startswith + a counter bump.
+    Only DEBUG records are considered; INFO+ always pass.
+    """
+    def __init__(self, prefixes, every: int = 1, max_per_sec: float = 0):
+        super().__init__()
+        self.prefixes = tuple(prefixes or ())
+        self.every = max(1, int(every))
+        self.max_per_sec = float(max_per_sec or 0)
+        self._seen: Counter = Counter()
+        self._window: Dict[str, Tuple[int, int]] = {}   # prefix -> (second, count)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or not self.prefixes:
+            return True
+        msg = record.msg if isinstance(record.msg, str) else ""
+        key = next((p for p in self.prefixes if msg.startswith(p)), None)
+        if key is None:
+            return True
+        self._seen[key] += 1
+        if (self._seen[key] - 1) % self.every:
+            LOG_DROPPED[key] += 1
+            return False
+        if self.max_per_sec:
+            sec = int(record.created)
+            w_sec, w_cnt = self._window.get(key, (sec, 0))
+            if w_sec != sec:
+                w_sec, w_cnt = sec, 0
+            if w_cnt >= self.max_per_sec:
+                LOG_DROPPED[key] += 1
+                self._window[key] = (w_sec, w_cnt)
+                return False
+            self._window[key] = (w_sec, w_cnt + 1)
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues the record untouched. The stock prepare() merges
+    args into msg (i.e. formats on the hot thread) so records can be pickled;
+    we stay in-process, so formatting is left to the listener thread.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def stop_logging() -> None:
+    """Drain the log queue and stop the listener thread (safe to call twice)."""
+    global _LOG_LISTENER
+    if _LOG_LISTENER is not None:
+        _LOG_LISTENER.stop()
+        _LOG_LISTENER = None
+
+
 def setup_logging(data_dir: Path, logs_dir_arg: Optional[str], verbose: int,
-                  quiet: bool, log_level_arg: Optional[str], json_logs: bool) -> logging.Logger:
+                  quiet: bool, log_level_arg: Optional[str], json_logs: bool,
+                  *, async_logs: bool = True, sample_every: int = 1,
+                  max_per_sec: float = 0, sampled_events=None) -> logging.Logger:
     """
     Console/File matrix:
       - -q:   console = silent;        file = INFO only (drop WARNING+)
@@ -540,6 +1351,10 @@ def setup_logging(data_dir: Path, logs_dir_arg: Optional[str], verbose: int,
       - -v:   console = INFO+;         file = INFO+ (INFO & WARNING)
       - -vv:  console = DEBUG;         file = DEBUG
       - --log-level=X: both console & file use X (no special filters)
+
+    Pipeline (async_logs=True): logger -> SampledEventsFilter -> queue -> listener
+    thread -> console/file handlers. Formatting (incl. JSON) and disk writes happen
+    off the ingest thread; call stop_logging() at exit to flush.
     """
 
     class EnsureContext(logging.Filter):
@@ -555,10 +1370,11 @@ def setup_logging(data_dir: Path, logs_dir_arg: Optional[str], verbose: int,
         def __init__(self, levelno: int): super().__init__(); self.levelno = levelno
         def filter(self, record: logging.LogRecord) -> bool: return record.levelno <= self.levelno
 
+    stop_logging()
     logger = logging.getLogger("pixarr")
-    logger.setLevel(logging.DEBUG)
     logger.propagate = False
     for h in list(logger.handlers): logger.removeHandler(h)
+    for f in list(logger.filters): logger.removeFilter(f)
 
     # Decide levels & max-filters
     if log_level_arg:
@@ -589,19 +1405,23 @@ def setup_logging(data_dir: Path, logs_dir_arg: Optional[str], verbose: int,
             console_max   = MaxLevelFilter(logging.INFO)
             file_max      = None
 
+    # Records below every handler's level are never built (cheap isEnabledFor() check).
+    logger.setLevel(min(console_level, file_level))
+
     # Console handler (human format)
     ch = logging.StreamHandler()
     ch.setLevel(console_level)
     ch.addFilter(EnsureContext())
     if console_max: ch.addFilter(console_max)
     ch.setFormatter(logging.Formatter("%(message)s"))
-    logger.addHandler(ch)
 
     # File handler (rotating)
     logs_dir = Path(logs_dir_arg) if logs_dir_arg else (data_dir / "logs")
     logs_dir.mkdir(parents=True, exist_ok=True)
     ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     log_path = logs_dir / f"pixarr-{ts}.log"
+    global LOG_PATH
+    LOG_PATH = log_path
 
     fh = logging.handlers.TimedRotatingFileHandler(
         log_path, when="midnight", backupCount=14, encoding="utf-8"
@@ -631,11 +1451,29 @@ def setup_logging(data_dir: Path, logs_dir_arg: Optional[str], verbose: int,
             "%(asctime)sZ [%(levelname)s] [%(source)s:%(file_token)s] %(message)s",
             datefmt="%Y-%m-%dT%H:%M:%S"
         ))
-    logger.addHandler(fh)
+
+    sampler = SampledEventsFilter(
+        DEFAULT_SAMPLED_EVENTS if sampled_events is None else sampled_events,
+        every=sample_every, max_per_sec=max_per_sec,
+    )
+    if async_logs:
+        global _LOG_LISTENER
+        q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        qh = _DeferredQueueHandler(q)
+        qh.addFilter(sampler)
+        logger.addHandler(qh)
+        _LOG_LISTENER = logging.handlers.QueueListener(q, ch, fh, respect_handler_level=True)
+        _LOG_LISTENER.start()
+    else:
+        logger.addFilter(sampler)
+        logger.addHandler(ch)
+        logger.addHandler(fh)
 
     logger.debug(f"Log file: {log_path}")
     return logger
 
+atexit.register(stop_logging)
+
 
 # ---------- DB ops ----------
 
@@ -649,107 +1487,313 @@ def begin_ingest(conn: sqlite3.Connection, source: str, note: Optional[str] = No
     conn.commit()
     return ingest_id
 
-def finish_ingest(conn: sqlite3.Connection, ingest_id: str) -> None:
+def finish_ingest(conn: sqlite3.Connection, ingest_id: str, stats: Optional[dict] = None) -> None:
+    """Mark the batch finished; with `stats`, store its ingest_stats row in the same commit."""
+    flush_sightings(conn)
     conn.execute(
         "UPDATE ingests SET finished_at = ? WHERE id = ?",
         (datetime.utcnow().isoformat(), ingest_id),
     )
+    if stats is not None:
+        write_ingest_stats(conn, ingest_id, stats)
     conn.commit()
 
+def batch_elapsed(stats: dict) -> float:
+    """Processing seconds of a batch: earlier (checkpointed) runs + this one so far."""
+    return stats["elapsed_s"] + (time.perf_counter() - stats["t_start"])
+
+def write_ingest_stats(conn: sqlite3.Connection, ingest_id: str, stats: dict) -> None:
+    """
+    Persist a batch's counters as its ingest_stats row, so reports don't aggregate
+    sightings later. Stage timings are this run's share of TIMER (None when off).
+    """
+    stages = None
+    if TIMER.enabled:
+        base = stats["stage_base"]
+        stages = {}
+        for name, (n, total) in TIMER.totals().items():
+            n0, t0 = base.get(name, (0, 0.0))
+            if n > n0:
+                stages[name] = {"count": n - n0, "total_s": round(total - t0, 6)}
+    sightings = conn.execute("SELECT COUNT(*) FROM sightings_v2 WHERE ingest_id = ?", (ingest_id,)).fetchone()[0]
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO ingest_stats (
+          ingest_id, source_path, dry_run, scan_level, scanned, moved, updated, skipped_dupe,
+          quarantined, q_counts, bytes_total, bytes_hashed, sightings, duration_s, stages
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (ingest_id, stats["path"], int(DRY_RUN), stats["scan_level"], stats["scanned"], stats["moved"],
+         stats["updated"], stats["skipped_dupe"], stats["quarantined"],
+         json.dumps(dict(stats["q_counts"]), sort_keys=True), stats["bytes_total"], stats["bytes_hashed"],
+         sightings, round(batch_elapsed(stats), 3), json.dumps(stages, sort_keys=True) if stages is not None else None),
+    )
+
+# Stats that are per-batch identity/runtime, not cumulative counters
+_CKPT_SKIP_STATS = ("label", "path", "ingest_id", "finished_at", "scan_level", "resumed", "t_start", "stage_base")
+
+class IngestCheckpoint:
+    """
+    Resume state for one ingest batch (--resume <ingest_id>).
+
+    The walk is sorted, i.e. directories come in lexicographic order of their
+    relative path parts, so "last fully processed directory" covers everything
+    before it. Files of the directory in progress get a marker each. Markers and
+    the cumulative stats are written in the same transaction as the file's own
+    DB changes (see ingest_one_source), so a crash or Ctrl-C loses at most the
+    file being processed.
+    """
+
+    def __init__(self, ingest_id: str, root: Path, last_dir: Optional[str] = None, done=()):
+        self.ingest_id = ingest_id
+        self.root = root
+        self.last = None if last_dir is None else PurePosixPath(last_dir).parts
+        self.done = set(done)
+
+    @classmethod
+    def start(cls, conn: sqlite3.Connection, ingest_id: str, root: Path) -> "IngestCheckpoint":
+        conn.execute(
+            "INSERT INTO ingest_checkpoints (ingest_id, source_path, dry_run, last_dir, stats_json, updated_at) "
+            "VALUES (?, ?, ?, NULL, '{}', ?)",
+            (ingest_id, str(root), int(DRY_RUN), datetime.utcnow().isoformat()),
+        )
+        conn.commit()
+        return cls(ingest_id, root)
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection, ingest_id: str) -> Tuple["IngestCheckpoint", dict]:
+        """(checkpoint, saved stats) for an interrupted batch; ValueError if it can't be resumed."""
+        row = conn.execute(
+            "SELECT c.source_path, c.dry_run, c.last_dir, c.stats_json, i.finished_at "
+            "FROM ingest_checkpoints c JOIN ingests i ON i.id = c.ingest_id WHERE c.ingest_id = ?",
+            (ingest_id,),
+        ).fetchone()
+        if not row:
+            raise ValueError(f"no checkpoint for ingest {ingest_id}")
+        source_path, dry_run, last_dir, stats_json, finished_at = row
+        if finished_at:
+            raise ValueError(f"ingest {ingest_id} already finished at {finished_at}")
+        if bool(dry_run) != DRY_RUN:
+            raise ValueError(f"ingest {ingest_id} was a {'dry' if dry_run else 'write'} run; "
+                             f"resume it {'without' if dry_run else 'with'} --write")
+        done = [r for (r,) in conn.execute(
+            "SELECT rel_path FROM ingest_files_done WHERE ingest_id = ?", (ingest_id,))]
+        return cls(ingest_id, Path(source_path), last_dir, done), json.loads(stats_json)
+
+    def rel(self, p: Path) -> str:
+        return Path(p).relative_to(self.root).as_posix()
+
+    def dir_done_before(self, rel_dir: str) -> bool:
+        """True if the checkpoint says this directory's files were all handled."""
+        return self.last is not None and PurePosixPath(rel_dir).parts <= self.last
+
+    def file_done_before(self, rel_file: str) -> bool:
+        return rel_file in self.done
+
+    def file_done(self, conn: sqlite3.Connection, rel_file: str, stats: dict) -> None:
+        """Marker + cumulative stats; committed by the caller with the file's changes."""
+        conn.execute("INSERT OR IGNORE INTO ingest_files_done (ingest_id, rel_path) VALUES (?, ?)",
+                     (self.ingest_id, rel_file))
+        self._save_stats(conn, stats)
+
+    def dir_done(self, conn: sqlite3.Connection, rel_dir: str, stats: dict) -> None:
+        """Directory finished: advance last_dir, drop its file markers."""
+        rel_dir = "" if rel_dir == "." else rel_dir
+        conn.execute("DELETE FROM ingest_files_done WHERE ingest_id = ?", (self.ingest_id,))
+        conn.execute("UPDATE ingest_checkpoints SET last_dir = ? WHERE ingest_id = ?",
+                     (rel_dir, self.ingest_id))
+        self._save_stats(conn, stats)
+        self.last = PurePosixPath(rel_dir).parts
+        self.done.clear()
+
+    def _save_stats(self, conn: sqlite3.Connection, stats: dict) -> None:
+        payload = {k: v for k, v in stats.items() if k not in _CKPT_SKIP_STATS}
+        payload["elapsed_s"] = batch_elapsed(stats)
+        conn.execute("UPDATE ingest_checkpoints SET stats_json = ?, updated_at = ? WHERE ingest_id = ?",
+                     (json.dumps(payload), datetime.utcnow().isoformat(), self.ingest_id))
+
+def restore_stats(stats: dict, saved: dict) -> None:
+    """Fold checkpointed counters into a fresh stats dict (None = not computed at this scan level)."""
+    for k, v in saved.items():
+        cur = stats.get(k)
+        if k in ("q_counts", "by_ext"):
+            for key, n in v.items():
+                cur[key] += n
+        elif isinstance(v, (int, float)) and isinstance(cur, (int, float)):
+            stats[k] = cur + v
+
+# INSERT … ON CONFLICT … RETURNING needs SQLite 3.35; older builds use INSERT / UPDATE / SELECT
+UPSERT_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+_MEDIA_INSERT = """
+    INSERT INTO media (
+      id, sha256, phash, content_bin, ext, bytes, taken_at, taken_ts, tz_offset,
+      gps_lat, gps_lon, state, canonical_path,
+      added_ts, updated_ts, xmp_written, quarantine_reason
+    ) VALUES (
+      :id, :sha256, :phash, :content_bin, :ext, :bytes, :taken_at, :taken_ts, :tz_offset,
+      :gps_lat, :gps_lon, :state, :canonical_path,
+      :added_ts, :updated_ts, :xmp_written, :quarantine_reason
+    )
+"""
+
+# re-seen file: fill gaps, never demote library/quarantine/deleted, reason only while quarantined
+_MEDIA_MERGE = """
+    taken_ts       = CASE WHEN media.taken_at IS NULL THEN :taken_ts ELSE media.taken_ts END,
+    taken_at       = COALESCE(media.taken_at, :taken_at),
+    gps_lat        = COALESCE(media.gps_lat,  :gps_lat),
+    gps_lon        = COALESCE(media.gps_lon,  :gps_lon),
+    content_bin    = COALESCE(:content_bin, media.content_bin),
+    state          = CASE
+                        WHEN media.state IN ('library','quarantine','deleted')
+                             THEN media.state
+                        ELSE :state
+                     END,
+    canonical_path = COALESCE(:canonical_path, media.canonical_path),
+    quarantine_reason = CASE
+                          WHEN :state='quarantine' THEN :quarantine_reason
+                          ELSE NULL
+                        END,
+    updated_ts     = :updated_ts
+"""
+
+_MEDIA_UPSERT = (_MEDIA_INSERT + "ON CONFLICT(sha256) DO UPDATE SET" + _MEDIA_MERGE
+                 + "RETURNING id, state, canonical_path")
+
 def upsert_media(conn: sqlite3.Connection, row: dict) -> Tuple[str, str, Optional[str]]:
     """
     Insert a media row or update existing by hash.
     Return (id, state, canonical_path).
     NOTE: now includes content_sha256 column.                                   # [CONTENT HASH]
     """
-    now = datetime.utcnow().isoformat()
-    row.setdefault("added_at", now)
-    row["updated_at"] = now
+    with TIMER.stage("upsert"):
+        return _upsert_media(conn, row)
+
+def _media_params(row: dict) -> dict:
+    # callers pass v1-style text fields; schema v2 stores digests as BLOBs, times as epochs
+    now = epoch_now()
+    return {
+        **row,
+        "sha256": digest_bytes(row["hash_sha256"]),
+        "content_bin": digest_bytes(row.get("content_sha256")),
+        "taken_ts": iso_to_epoch(row.get("taken_at")),
+        "added_ts": now,
+        "updated_ts": now,
+    }
+
+def _upsert_media(conn: sqlite3.Connection, row: dict) -> Tuple[str, str, Optional[str]]:
+    params = _media_params(row)
+    if not UPSERT_RETURNING:
+        return _upsert_media_legacy(conn, params)
+    # one statement: the row as stored after insert-or-merge
+    return conn.execute(_MEDIA_UPSERT, params).fetchone()
 
+def _upsert_media_legacy(conn: sqlite3.Connection, params: dict) -> Tuple[str, str, Optional[str]]:
     try:
-        conn.execute(
-            """
-            INSERT INTO media (
-              id, hash_sha256, phash, content_sha256, ext, bytes, taken_at, tz_offset,
-              gps_lat, gps_lon, state, canonical_path,
-              added_at, updated_at, xmp_written, quarantine_reason
-            ) VALUES (
-              :id, :hash_sha256, :phash, :content_sha256, :ext, :bytes, :taken_at, :tz_offset,
-              :gps_lat, :gps_lon, :state, :canonical_path,
-              :added_at, :updated_at, :xmp_written, :quarantine_reason
-            )
-            """,
-            row,
-        )
+        conn.execute(_MEDIA_INSERT, params)
     except sqlite3.IntegrityError:
-        conn.execute(
-            """
-            UPDATE media
-            SET taken_at       = COALESCE(media.taken_at, :taken_at),
-                gps_lat        = COALESCE(media.gps_lat,  :gps_lat),
-                gps_lon        = COALESCE(media.gps_lon,  :gps_lon),
-                content_sha256 = COALESCE(:content_sha256, media.content_sha256),
-                state          = CASE
-                                    WHEN media.state IN ('library','quarantine','deleted')
-                                         THEN media.state
-                                    ELSE :state
-                                 END,
-                canonical_path = COALESCE(:canonical_path, media.canonical_path),
-                quarantine_reason = CASE
-                                      WHEN :state='quarantine' THEN :quarantine_reason
-                                      ELSE NULL
-                                    END,
-                updated_at     = :updated_at
-            WHERE hash_sha256 = :hash_sha256
-            """,
-            {**row, "updated_at": now},
-        )
+        conn.execute("UPDATE media SET" + _MEDIA_MERGE + "WHERE sha256 = :sha256", params)
 
     cur = conn.execute(
-        "SELECT id, state, canonical_path FROM media WHERE hash_sha256=?",
-        (row["hash_sha256"],),
+        "SELECT id, state, canonical_path FROM media WHERE sha256=?",
+        (params["sha256"],),
     )
     mid, st, cpath = cur.fetchone()
     return mid, st, cpath
 
 
+# Sightings are buffered and written with one executemany per commit (flush_sightings,
+# called by timed_commit); rollback paths call drop_sightings. In compaction mode a
+# re-seen path updates its row instead (checked per flush, inside the write
+# transaction, so a compact-sightings run that finishes mid-batch is picked up).
+_SIGHTINGS: list = []
+
 def insert_sighting(conn: sqlite3.Connection, media_id: str, full_path: Path,
                     filename: str, source_root: str, folder_hint: Optional[str],
                     ingest_id: str) -> None:
-    conn.execute(
-        """
-        INSERT INTO sightings
-          (media_id, source_root, full_path, filename, folder_hint, seen_at, ingest_id)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (media_id, source_root, str(full_path), filename, folder_hint,
-         datetime.utcnow().isoformat(), ingest_id),
-    )
+    _SIGHTINGS.append((source_root, str(full_path), filename, folder_hint, epoch_now(), ingest_id, media_id))
+
+def flush_sightings(conn: sqlite3.Connection) -> None:
+    if not _SIGHTINGS:
+        return
+    with TIMER.stage("sighting"):
+        sql = pixarr_sightings.UPSERT_SQL if pixarr_sightings.enabled(conn) else pixarr_sightings.INSERT_SQL
+        conn.executemany(sql, _SIGHTINGS)
+    _SIGHTINGS.clear()
+
+def drop_sightings() -> None:
+    _SIGHTINGS.clear()
 
 def already_finalized(conn: sqlite3.Connection, hash_hex: str) -> bool:
     cur = conn.execute(
-        "SELECT 1 FROM media WHERE hash_sha256=? AND state='library' LIMIT 1",
-        (hash_hex,),
+        "SELECT 1 FROM media WHERE sha256=? AND state='library' LIMIT 1",
+        (digest_bytes(hash_hex),),
     )
     return cur.fetchone() is not None
 
+def exif_kv_rows(media_id: str, meta: dict, allow: Optional[Sequence[str]] = None,
+                 deny: Optional[Sequence[str]] = None) -> list:
+    """
+    (media_id, tag, value) rows for exif_kv after the allow/deny filter
+    (default EXIF_KV_ALLOW / EXIF_KV_DENY). Strings are stored as-is;
+    numbers/lists/bools as JSON (see exif_kv_value). The partial-set marker is
+    kept whatever the filter says.
+    """
+    allow = EXIF_KV_ALLOW if allow is None else allow
+    deny = EXIF_KV_DENY if deny is None else deny
+    rows = []
+    for tag, v in meta.items():
+        if tag == EXIF_KV_PARTIAL_TAG:
+            rows.append((media_id, tag, str(v)))
+            continue
+        if v is None or tag in deny or (allow and tag not in allow):
+            continue
+        if isinstance(v, str):
+            if v.startswith("(Binary data"):
+                continue
+            rows.append((media_id, tag, v))
+        else:
+            rows.append((media_id, tag, json.dumps(v, ensure_ascii=False, separators=(",", ":"))))
+    return rows
+
+def exif_kv_value(value: Optional[str]):
+    """Inverse of exif_kv_rows for one value: JSON scalars/lists back to Python, else the string."""
+    if value is None or not value or value[0] not in "-0123456789[{tfn":
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+def store_exif_kv(conn: sqlite3.Connection, media_id: str, meta: dict, *,
+                  allow: Optional[Sequence[str]] = None, deny: Optional[Sequence[str]] = None) -> int:
+    """Replace a media item's exif_kv tags in one executemany. Returns rows written."""
+    if not EXIF_KV_STORE or not meta:
+        return 0
+    rows = exif_kv_rows(media_id, meta, allow, deny)
+    with TIMER.stage("exif_kv"):
+        conn.execute("DELETE FROM exif_kv WHERE media_id=?", (media_id,))
+        conn.executemany("INSERT INTO exif_kv (media_id, tag, value) VALUES (?, ?, ?)", rows)
+    return len(rows)
+
 # [DUPES] helper: prefer library over review when matching by file or content hash
 def _find_canonical_by_filehash(conn: sqlite3.Connection, h: str) -> Optional[Tuple[str, str, Optional[str]]]:
     """
     Return (id, state, canonical_path) for the best match by exact file hash,
     preferring 'library' over 'review'. None if not found.
     """
-    row = conn.execute(
-        """
-        SELECT id, state, canonical_path
-        FROM media
-        WHERE hash_sha256 = ?
-          AND state IN ('library','review')
-        ORDER BY CASE state WHEN 'library' THEN 0 ELSE 1 END
-        LIMIT 1
-        """,
-        (h,),
-    ).fetchone()
+    with TIMER.stage("dupe_lookup"):
+        row = conn.execute(
+            """
+            SELECT id, state, canonical_path
+            FROM media
+            WHERE sha256 = ?
+              AND state IN ('library','review')
+            ORDER BY CASE state WHEN 'library' THEN 0 ELSE 1 END
+            LIMIT 1
+            """,
+            (digest_bytes(h),),
+        ).fetchone()
     return tuple(row) if row else None
 
 def _find_canonical_by_contenthash(conn: sqlite3.Connection, c: str) -> Optional[Tuple[str, str, Optional[str]]]:
@@ -759,17 +1803,18 @@ def _find_canonical_by_contenthash(conn: sqlite3.Connection, c: str) -> Optional
     """
     if not c:
         return None
-    row = conn.execute(
-        """
-        SELECT id, state, canonical_path
-        FROM media
-        WHERE content_sha256 = ?
-          AND state IN ('library','review')
-        ORDER BY CASE state WHEN 'library' THEN 0 ELSE 1 END
-        LIMIT 1
-        """,
-        (c,),
-    ).fetchone()
+    with TIMER.stage("dupe_lookup"):
+        row = conn.execute(
+            """
+            SELECT id, state, canonical_path
+            FROM media
+            WHERE content_bin = ?
+              AND state IN ('library','review')
+            ORDER BY CASE state WHEN 'library' THEN 0 ELSE 1 END
+            LIMIT 1
+            """,
+            (digest_bytes(c),),
+        ).fetchone()
     return tuple(row) if row else None
 
 # ---------- Date from filename + resolver ----------
@@ -818,15 +1863,16 @@ def _taken_from_filename(name: str) -> Optional[datetime]:
 
     return None
 
-def resolve_taken_at(meta: dict, filename: str, allow_filename_dates: bool) -> Optional[str]:
+def resolve_taken_at(meta: dict, filename: str, allow_filename_dates: bool,
+                     keys: Optional[Sequence[str]] = None) -> Optional[str]:
     """
     Decide the capture time:
-      1) EXIF/QuickTime tags (strict)
+      1) EXIF/QuickTime tags (strict; `keys` in order, default _DATE_KEYS)
       2) filename-derived (only if allow_filename_dates=True)
       -> return ISO8601 string or None
     """
     # 1) strict EXIF/QuickTime
-    t = extract_taken_at_exif_only(meta)
+    t = extract_taken_at_exif_only(meta, keys)
     if t:
         return t
     # 2) optional filename fallback
@@ -837,11 +1883,11 @@ def resolve_taken_at(meta: dict, filename: str, allow_filename_dates: bool) -> O
     return None
 
 # ---------- Ingest core ----------
-def ingest_one_source(conn, source_label, staging_root, *, on_review_dupe: str, note=None, heartbeat=500):
-    """Run a full ingest pass for one staging root and return stats for end-of-run summary."""
+def new_source_stats(source_label: str, root: Path, *, resumed: bool = False) -> dict:
+    """Per-source counters for the run summary, metrics and checkpoints."""
     stats = {
         "label": source_label,
-        "path": str(staging_root),
+        "path": str(root),
         "ingest_id": None,
         "scanned": 0,
         "moved": 0,           # planned in dry-run, actual in write mode
@@ -849,351 +1895,640 @@ def ingest_one_source(conn, source_label, staging_root, *, on_review_dupe: str,
         "skipped_dupe": 0,
         "quarantined": 0,
         "q_counts": defaultdict(int),  # reason -> count
+        "bytes_hashed": 0,
+        "tree_hashed": 0,     # files >= TREE_HASH_MIN that got a tree hash
+        "tree_hits": 0,       # ... whose tree hash matched a media row (sha256 pass skipped)
+        "meta_fast": 0,       # capture date answered by pixarr_fastmeta
+        "meta_exiftool": 0,   # needed exiftool (selective and/or full read)
+        "exif_fast": 0,       # selective -fast2 reads
+        "exif_deep": 0,       # full reads
+        "t_exif_fast": 0.0,
+        "t_exif_deep": 0.0,
+        "finished_at": None,
+        "scan_level": SCAN_LEVEL,
+        "bytes_total": 0,             # candidate media bytes (all levels)
+        "by_ext": Counter(),          # candidate media by extension (all levels)
+        "dupes_in_run": 0,            # hash level: same sha256 seen earlier in this run
+        "resumed": resumed,
+        "elapsed_s": 0.0,             # earlier runs of this batch (restored on --resume); see batch_elapsed
+        "t_start": time.perf_counter(),
+        "stage_base": TIMER.totals(),  # TIMER before this batch (ingest_stats.stages = the difference)
     }
+    for field in SCAN_NOT_COMPUTED[SCAN_LEVEL]:
+        stats[field] = None
+    return stats
+
+def hash_file(conn: sqlite3.Connection, p: Path, size: int, stats: Optional[dict] = None
+              ) -> Tuple[str, Optional[pixarr_treehash.TreeHash]]:
+    """
+    (sha256, tree) for a staged file. Below TREE_HASH_MIN tree is None. At or above it
+    the sha256 pass runs on a worker while the tree hash runs (one read each, side by
+    side); if a media row has the same root and size, its sha256 is reused and the
+    sha256 pass is stopped (counted as tree_hits).
+    """
+    tree = None
+    if TREE_HASH_MIN and size >= TREE_HASH_MIN:
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            sha = pool.submit(sha256_file, p, stop=stop)
+            with TIMER.stage("tree_hash", nbytes=size):
+                tree = pixarr_treehash.tree_hash(p, workers=TREE_HASH_WORKERS)
+            if stats is not None:
+                stats["tree_hashed"] += 1
+            with TIMER.stage("dupe_lookup"):
+                row = conn.execute(
+                    "SELECT hash_sha256 FROM media WHERE tree_sha256=? AND bytes=? LIMIT 1",
+                    (tree.root, size),
+                ).fetchone()
+            if row:
+                stop.set()
+                if stats is not None:
+                    stats["tree_hits"] += 1
+                return row[0], tree
+            with TIMER.stage("sha256", nbytes=size):        # only the wait past the tree hash
+                return sha.result(), tree
+    with TIMER.stage("sha256", nbytes=size):
+        return sha256_file(p), tree
+
+def store_tree_hash(conn: sqlite3.Connection, media_id: str, tree: Optional[pixarr_treehash.TreeHash]) -> None:
+    """Record the tree root on the media row and its chunk digests in media_chunks."""
+    if tree is None:
+        return
+    conn.execute("UPDATE media SET tree_sha256=?, tree_chunk_bytes=? WHERE id=?",
+                 (tree.root, tree.chunk_bytes, media_id))
+    conn.execute("DELETE FROM media_chunks WHERE media_id=?", (media_id,))
+    conn.executemany("INSERT INTO media_chunks (media_id, idx, digest) VALUES (?, ?, ?)",
+                     ((media_id, i, d) for i, d in enumerate(tree.chunks)))
+
+def load_tree_hash(conn: sqlite3.Connection, media_id: str) -> Optional[pixarr_treehash.TreeHash]:
+    """The stored TreeHash for a media row, or None if it has none (or its chunks are incomplete)."""
+    row = conn.execute("SELECT tree_sha256, tree_chunk_bytes, bytes FROM media WHERE id=?",
+                       (media_id,)).fetchone()
+    if not row or not row[0]:
+        return None
+    chunks = [bytes(r[0]) for r in conn.execute(
+        "SELECT digest FROM media_chunks WHERE media_id=? ORDER BY idx", (media_id,))]
+    if len(chunks) != len(pixarr_treehash.chunk_ranges(row[2], row[1])):
+        return None
+    return pixarr_treehash.TreeHash(row[0], row[1], row[2], chunks)
+
+def member_path(archive: Path, name: str) -> Path:
+    """Provenance path for an archive member (sightings.full_path): <archive>!/<member>."""
+    return Path(f"{archive}!/{name}")
+
+def extract_member(opener, dest: Path, expect_sha256: str, mtime: Optional[float] = None) -> None:
+    """Write an archive member to dest (via <dest>.part + rename), re-checking its sha256."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".part")
+    h = hashlib.sha256()
+    try:
+        with opener() as src, tmp.open("wb") as out:
+            for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                h.update(chunk)
+                out.write(chunk)
+        if h.hexdigest() != expect_sha256:
+            raise OSError(f"sha256 changed while extracting ({h.hexdigest()[:8]} != {expect_sha256[:8]})")
+        if mtime:
+            os.utime(tmp, (mtime, mtime))
+        tmp.rename(dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+class StagedFile:
+    """A file under a staging root, for ingest_item: quarantined, deleted or moved in place."""
+    is_sidecar = False
+    deletable = True
+    sidecar = None          # Takeout sidecar payload (archives only)
+    date_sources = ""       # extra date sources named in the missing_datetime reason
+
+    def __init__(self, p: Path):
+        self.path = self.src = p
+        self.name = p.name
+        self.opener = None  # read straight from the path
+
+    def token(self, h: Optional[str] = None) -> str:
+        return file_token_for(self.path, h)
+
+    def size(self) -> int:
+        with TIMER.stage("stat"):
+            return self.path.stat().st_size
+
+    def hash(self, conn: sqlite3.Connection, size: int, stats: dict):
+        h, tree = hash_file(conn, self.path, size, stats)
+        return h, size, tree
+
+    def quarantine(self, reason: str, ingest_id: str, *, extra: Optional[str] = None, source: str,
+                   file_token: Optional[str] = None) -> Optional[Path]:
+        return maybe_quarantine(self.path, reason, ingest_id, extra=extra, source=source, file_token=file_token)
+
+    def delete(self) -> None:
+        self.path.unlink()
+
+    def place(self, dest: Path, size: int) -> Optional[str]:
+        """Move to dest (rename, else copy + unlink). None on success, else the error."""
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        with TIMER.stage("move", nbytes=size):
+            try:
+                self.path.rename(dest)
+                return None
+            except Exception as e1:
+                try:
+                    shutil.copy2(self.path, dest)
+                except Exception as e2:
+                    return f"{e1} | {e2}"
+                try:
+                    self.path.unlink()
+                except Exception:
+                    pass
+                return None
+
+    def release(self) -> None:
+        pass
+
+class ArchiveItem:
+    """
+    A ZIP/TAR member, for ingest_item: hashed and read from the archive stream,
+    extracted only to Review/ or Quarantine/missing_datetime/. Other quarantine
+    reasons (and dupes under --on-review-dupe delete) leave it in the archive.
+    """
+    deletable = False
+
+    def __init__(self, ar: pixarr_archive.ArchiveReader, m: pixarr_archive.Member, archive: Path,
+                 takeout: Optional[pixarr_archive.TakeoutIndex], ctx: logging.LoggerAdapter):
+        self.ar, self.m, self.ctx = ar, m, ctx
+        self.name = PurePosixPath(m.name).name
+        self.path = Path(self.name)        # read_metadata/fast reader only look at the suffix
+        self.src = member_path(archive, m.name)
+        self.is_sidecar = takeout is not None and pixarr_archive.is_sidecar(m.name)
+        self.sidecar = takeout.lookup(m.name) if takeout is not None and not self.is_sidecar else None
+        self.date_sources = "/takeout" if takeout is not None else ""
+        self.opener = None
+        self.h = None
+
+    def token(self, h: Optional[str] = None) -> str:
+        return file_token_for(self.src, h)
+
+    def size(self) -> int:
+        return self.m.size
+
+    def hash(self, conn: sqlite3.Connection, size: int, stats: dict):
+        with TIMER.stage("sha256", nbytes=size):
+            self.h, n, self.opener = self.ar.load(self.m)
+        return self.h, n, None
+
+    def quarantine(self, reason: str, ingest_id: str, *, extra: Optional[str] = None, source: str,
+                   file_token: Optional[str] = None) -> Optional[Path]:
+        log_extra = {"file_token": file_token or self.token()}
+        if reason != "missing_datetime":
+            self.ctx.debug("= %s: %s left in archive (%s)", reason, self.src, extra or "", extra=log_extra)
+            return None
+        if DRY_RUN:
+            self.ctx.warning("[DRY] QUARANTINE %s -> %s (%s)", self.src, reason, extra or "", extra=log_extra)
+            return None
+        dest = plan_nonclobber(QUARANTINE_ROOT / REASON_TO_SUBDIR.get(reason, reason), self.name)
+        try:
+            with TIMER.stage("quarantine", nbytes=self.m.size):
+                extract_member(self.opener, dest, self.h, self.m.mtime)
+            self.ctx.warning("QUARANTINE %s -> %s (%s) -> %s", self.src, reason, extra or "", dest, extra=log_extra)
+        except Exception as e:
+            self.ctx.error("QUARANTINE FAILED for %s (%s): %s", self.src, reason, e, extra=log_extra)
+            dest = None
+        record_quarantine(self.src, dest, reason, ingest_id, extra)
+        return dest
+
+    def delete(self) -> None:
+        raise OSError("archive members are never deleted")
+
+    def place(self, dest: Path, size: int) -> Optional[str]:
+        try:
+            with TIMER.stage("move", nbytes=size):
+                extract_member(self.opener, dest, self.h, self.m.mtime)
+        except Exception as e:
+            self.ctx.error("Extract failed %s -> %s: %s", self.src, dest, e, extra={"file_token": self.token(self.h)})
+            return str(e)
+        return None
+
+    def release(self) -> None:
+        pixarr_archive.release(self.opener)
+
+def ingest_item(conn, item, stats: dict, ctx: logging.LoggerAdapter, seen_hashes: set, *,
+                ingest_id: str, source_label: str, on_review_dupe: str, heartbeat: int) -> None:
+    """
+    Per-file ingest shared by ingest_one_source (StagedFile) and ingest_one_archive
+    (ArchiveItem): name filters -> size -> hash -> metadata -> dupes -> upsert -> Review
+    (or Quarantine). The item decides what quarantining, deleting and placing mean
+    for its bytes; everything else (counters, DB rows, logging) happens here.
+    """
+    name = item.name
+    if item.is_sidecar:
+        stats["sidecars"] += 1
+        return
+
+    def quarantine(reason: str, extra: Optional[str] = None, tok: Optional[str] = None) -> Optional[Path]:
+        stats["q_counts"][reason] += 1
+        stats["quarantined"] += 1
+        return item.quarantine(reason, ingest_id, extra=extra, source=source_label, file_token=tok or item.token())
+
+    def delete_dupe(what: str, tok: str) -> None:
+        if DRY_RUN:
+            ctx.info("[DRY] DELETE duplicate (%s): %s", what, item.src, extra={"file_token": tok})
+            return
+        try:
+            item.delete()
+        except Exception:
+            quarantine("move_failed", "delete_failed", tok)
+
+    def touch(media_id: str) -> None:
+        stats["updated"] += 1
+        now = datetime.utcnow().isoformat()
+        conn.execute("UPDATE media SET last_verified_at=?, updated_ts=? WHERE id=?", (now, epoch_now(), media_id))
+
+    # junk files and AppleDouble resource forks
+    if name in JUNK_FILES or any(name.startswith(pref) for pref in JUNK_PREFIXES):
+        if QUAR.get("junk", True):
+            quarantine("junk", "appledouble" if name.startswith("._") else "system_file")
+        return
+
+    # unsupported extensions (driven by config-overridden SUPPORTED_EXT)
+    ext = Path(name).suffix.lower()
+    if not is_media_candidate(Path(name)):
+        if QUAR.get("unsupported_ext", True):
+            quarantine("unsupported_ext", ext)
+        return
+
+    stats["scanned"] += 1
+
+    # heartbeat (env overrides arg)
+    hb = int(os.environ.get("PIXARR_HEARTBEAT", heartbeat))
+    if hb > 0 and stats["scanned"] % hb == 0:
+        ctx.info("… scanned=%d moved=%d quarantined=%d dupes=%d",
+                 stats["scanned"], stats["moved"], stats["quarantined"], stats["skipped_dupe"])
+
+    try:
+        size = item.size()
+    except Exception as e:
+        if QUAR.get("stat_error", True):
+            quarantine("stat_error", str(e))
+        return
+    if size == 0:
+        if QUAR.get("zero_bytes", True):
+            quarantine("zero_bytes")
+        return
+
+    stats["bytes_total"] += size
+    stats["by_ext"][ext] += 1
+    if SCAN_LEVEL == "inventory":
+        return
+
+    h, size, tree = item.hash(conn, size, stats)
+    stats["bytes_hashed"] += size
+
+    if SCAN_LEVEL == "hash":
+        if h in seen_hashes:
+            stats["dupes_in_run"] += 1
+            stats["skipped_dupe"] += 1
+        elif _find_canonical_by_filehash(conn, h):
+            stats["skipped_dupe"] += 1
+        seen_hashes.add(h)
+        return
+
+    tok = item.token(h)
+    side_taken = pixarr_archive.takeout_taken_at(item.sidecar)
+    meta = read_metadata(item.path, stats, opener=item.opener, has_date=bool(side_taken))
+    hint = last_meaningful_folder(item.src.parent)
+
+    # -------- [CONTENT HASH] compute pixel-level digest for images (if possible) -----
+    content_sha256: Optional[str] = None
+    if ext in IMAGE_EXT:  # RAWs are NOT in IMAGE_EXT (we subtract RAW from images)
+        with TIMER.stage("content_hash", nbytes=size):
+            if item.opener is None:
+                content_sha256 = compute_image_content_sha256(item.path)
+            else:
+                with item.opener() as f:
+                    content_sha256 = compute_image_content_sha256(f)
+    # ---------------------------------------------------------------------------------
+
+    # -------- [DUPES] Early duplicate resolution: exact file, then content ----------
+    # prefer library over review; for duplicates in review honor on_review_dupe,
+    # library dupes are always quarantined (if enabled)
+    canonical, basis = _find_canonical_by_filehash(conn, h), "file"
+    if not canonical and content_sha256:
+        canonical, basis = _find_canonical_by_contenthash(conn, content_sha256), "content"
+    if canonical:
+        canon_id, canon_state, _canon_path = canonical
+        reason = "duplicate_in_library" if canon_state == "library" else "duplicate_in_review"
+        stats["skipped_dupe"] += 1
+        insert_sighting(conn, canon_id, item.src, name, source_label, hint, ingest_id)
+        if reason == "duplicate_in_review" and on_review_dupe == "ignore":
+            touch(canon_id)
+            ctx.debug("= Already tracked (review, basis=%s): %s", basis, item.src, extra={"file_token": tok})
+        elif reason == "duplicate_in_review" and on_review_dupe == "delete" and item.deletable:
+            delete_dupe(f"review, basis={basis}", tok)
+        elif QUAR.get("dupes", True):
+            quarantine(reason, f"basis={basis} dupe_of={canon_id}", tok)
+        return
+    # ---------------------------------------------------------------------------------
+
+    # -------- capture time: EXIF/QuickTime, then Takeout sidecar, then filename (if allowed) --------
+    taken_at = extract_taken_at_exif_only(meta)
+    if not taken_at and side_taken:
+        taken_at = side_taken
+        stats["takeout_dates"] += 1
+    if not taken_at:
+        taken_at = resolve_taken_at(meta, name, ALLOW_FILENAME_DATES)
+    lat, lon = meta.get("GPSLatitude"), meta.get("GPSLongitude")
+    if (lat is None or lon is None) and item.sidecar:
+        lat, lon = pixarr_archive.takeout_gps(item.sidecar)
+
+    now = datetime.utcnow().isoformat()
+    media_row = {
+        "id": uuid_from_hash(h),
+        "hash_sha256": h,
+        "phash": None,
+        "content_sha256": content_sha256,  # [CONTENT HASH]
+        "ext": ext,
+        "bytes": size,
+        "taken_at": taken_at,
+        "tz_offset": "+00:00" if taken_at and taken_at == side_taken else None,
+        "gps_lat": lat,
+        "gps_lon": lon,
+        "state": "review" if taken_at else "quarantine",
+        "canonical_path": None,
+        "added_at": now,
+        "updated_at": now,
+        "xmp_written": 0,
+        "quarantine_reason": None if taken_at else "missing_datetime",  # UPDATE clears any previous reason
+    }
+
+    if not taken_at:
+        # track in DB as quarantined (only for *media-like* files where we have a hash)
+        reason_msg = "no capture date (exif/qt" + item.date_sources \
+            + ("/filename" if ALLOW_FILENAME_DATES else "") + ")"
+        q_dest = None
+        if QUAR.get("missing_datetime", True):
+            q_dest = item.quarantine("missing_datetime", ingest_id, extra=reason_msg, source=source_label,
+                                     file_token=tok)
+        media_row["canonical_path"] = str(q_dest) if q_dest and not DRY_RUN else None
+        mid, _, _ = upsert_media(conn, media_row)
+        insert_sighting(conn, mid, item.src, name, source_label, hint, ingest_id)
+        store_exif_kv(conn, mid, meta)   # lets a later policy rescue it from the DB
+        store_tree_hash(conn, mid, tree)
+        stats["q_counts"]["missing_datetime"] += 1
+        stats["quarantined"] += 1
+        return
+    # -----------------------------------------
+
+    mid, current_state, current_canon = upsert_media(conn, media_row)
+    insert_sighting(conn, mid, item.src, name, source_label, hint, ingest_id)
+    store_exif_kv(conn, mid, meta)
+    store_tree_hash(conn, mid, tree)
+
+    # (legacy safety) exact-file dupes detected *after* upsert (should be rare now)
+    if already_finalized(conn, h):
+        stats["skipped_dupe"] += 1
+        ctx.debug("= DUP in library (late): %s (%s)", item.src, h[:8], extra={"file_token": tok})
+        if QUAR.get("dupes", True):
+            quarantine("duplicate_in_library", "basis=file (late)", tok)
+        return
+
+    # the row was already placed: a dupe, unless its file has vanished (then repopulate it)
+    if current_state in ("review", "library") and current_canon:
+        try:
+            canon_missing = not Path(current_canon).exists()
+        except Exception:
+            canon_missing = True
+
+        if not canon_missing:
+            if current_state == "library":
+                stats["skipped_dupe"] += 1
+                if QUAR.get("dupes", True):
+                    quarantine("duplicate_in_library", "basis=file (late-state)", tok)
+                return
+
+            # current_state == "review"
+            if on_review_dupe == "ignore":
+                touch(mid)
+                ctx.debug("= Already tracked (review, late): %s", current_canon, extra={"file_token": tok})
+            elif on_review_dupe == "delete" and item.deletable:
+                delete_dupe("review, late", tok)
+                stats["skipped_dupe"] += 1
+            elif QUAR.get("dupes", True):
+                quarantine("duplicate_in_review", "basis=file (late-state)", tok)
+            else:
+                touch(mid)
+            return
+
+    fname = canonical_name(taken_at, h, ext)  # may include a shard subdir
+    dest = plan_nonclobber(REVIEW_ROOT, fname)
+
+    if DRY_RUN:
+        ctx.debug("[DRY] MOVE %s -> %s", item.src, dest, extra={"file_token": tok})
+        stats["moved"] += 1
+        return
+
+    move_err = item.place(dest, size)
+    if move_err is not None:
+        if QUAR.get("move_failed", True):
+            q_path = quarantine("move_failed", move_err, tok)
+            # Flip the row to quarantined since the move didn't succeed
+            conn.execute(
+                """
+                UPDATE media
+                SET state='quarantine',
+                    canonical_path=?,
+                    quarantine_reason='move_failed',
+                    updated_ts=?
+                WHERE id=?
+                """,
+                (str(q_path) if q_path else None, epoch_now(), mid),
+            )
+        return
+
+    now = datetime.utcnow().isoformat()
+    conn.execute(
+        "UPDATE media SET state='review', canonical_path=?, updated_ts=?, last_verified_at=? WHERE id=?",
+        (str(dest), epoch_now(), now, mid),
+    )
+    ctx.debug("MOVED %s -> %s", item.src, dest, extra={"file_token": tok})
+    stats["moved"] += 1
+
+def ingest_step(conn, item, rel: str, ckpt: Optional[IngestCheckpoint], stats: dict,
+                ctx: logging.LoggerAdapter, **kw) -> None:
+    """
+    ingest_item for one file in its own transaction: its DB changes, checkpoint marker
+    (`rel`) and stats are committed together. Errors are logged and the batch goes on;
+    on Ctrl-C nothing is committed (the caller rolls back).
+    """
+    aborted = False
+    try:
+        ingest_item(conn, item, stats, ctx, **kw)
+    except Exception:
+        # Catch-all so one bad file doesn't kill the batch
+        ctx.exception("Unhandled error while processing %s", item.src, extra={"file_token": item.token()})
+    except BaseException:
+        aborted = True   # Ctrl-C mid-file: not done; its changes are rolled back by the caller
+        raise
+    finally:
+        item.release()
+        if not aborted:
+            if ckpt:
+                ckpt.file_done(conn, rel, stats)
+            timed_commit(conn)
+
+def ingest_one_source(conn, source_label, staging_root, *, on_review_dupe: str, note=None, heartbeat=500,
+                      resume: Optional[Tuple[IngestCheckpoint, dict]] = None):
+    """
+    Run a full ingest pass for one staging root and return stats for end-of-run summary.
+    With `resume` (IngestCheckpoint.load), continue that batch: skip what its checkpoint
+    says is done and start from its saved stats.
+    """
+    stats = new_source_stats(source_label, staging_root, resumed=resume is not None)
+    seen_hashes: set = set()
+    METRICS.track(stats)
 
     if not staging_root.exists():
         log(f"SKIP {source_label}: path not found -> {staging_root}")
+        stats["finished_at"] = time.time()
         return stats
 
-    ingest_id = begin_ingest(conn, source_label, note)
+    # checkpoints only for full scans (lower levels are cheap dry runs; just re-run them)
+    if resume:
+        ckpt, saved = resume
+        ingest_id = ckpt.ingest_id
+        restore_stats(stats, saved)
+    else:
+        ingest_id = begin_ingest(conn, source_label, note)
+        ckpt = IngestCheckpoint.start(conn, ingest_id, staging_root) if SCAN_LEVEL == "full" else None
     stats["ingest_id"] = ingest_id
     ctx = batch_logger(ingest_id, source_label)
+    if not DRY_RUN:
+        open_quarantine_manifest(conn, ingest_id)
 
     log(f"\n=== {source_label} ===")
-    ctx.info("Started ingest batch: %s (%s)", ingest_id, staging_root)
+    if resume:
+        ctx.info("Resuming ingest batch: %s (%s) after dir %r, %d file(s) already done there; scanned so far=%d",
+                 ingest_id, staging_root, "/".join(ckpt.last) if ckpt.last is not None else None,
+                 len(ckpt.done), stats["scanned"])
+    else:
+        ctx.info("Started ingest batch: %s (%s)", ingest_id, staging_root)
 
+    completed = False
     try:
-        for root, dirs, files in os.walk(staging_root):
-            # prune system dirs and AppleDouble dir entries
-            dirs[:] = [d for d in dirs if d not in DIR_IGNORE and not d.startswith("._")]
-
-            for name in files:
-                p = Path(root) / name
-                try:
-                    # junk files and AppleDouble resource forks
-                    if name in JUNK_FILES or any(name.startswith(pref) for pref in JUNK_PREFIXES):
-                        if QUAR.get("junk", True):
-                            stats["q_counts"]["junk"] += 1
-                            maybe_quarantine(p, "junk", ingest_id, extra=("appledouble" if name.startswith("._") else "system_file"), source=source_label, file_token=file_token_for(p))
-                            stats["quarantined"] += 1
-                        continue
-
-                    # unsupported extensions (driven by config-overridden SUPPORTED_EXT)
-                    if not is_media_candidate(p):
-                        if QUAR.get("unsupported_ext", True):
-                            stats["q_counts"]["unsupported_ext"] += 1
-                            maybe_quarantine(p, "unsupported_ext", ingest_id, extra=p.suffix.lower(), source=source_label, file_token=file_token_for(p))
-                            stats["quarantined"] += 1
-                        continue
-
-                    stats["scanned"] += 1
-
-                    # heartbeat (env overrides arg)
-                    hb = int(os.environ.get("PIXARR_HEARTBEAT", heartbeat))
-                    if hb > 0 and stats["scanned"] % hb == 0:
-                        ctx.info("… scanned=%d moved=%d quarantined=%d dupes=%d",
-                                 stats["scanned"], stats["moved"], stats["quarantined"], stats["skipped_dupe"])
-
-                    # per-file logic
-                    try:
-                        size = p.stat().st_size
-                    except Exception as e:
-                        if QUAR.get("stat_error", True):
-                            stats["q_counts"]["stat_error"] += 1
-                            maybe_quarantine(p, "stat_error", ingest_id, extra=str(e), source=source_label, file_token=file_token_for(p))
-                            stats["quarantined"] += 1
-                        continue
-
-                    if size == 0:
-                        if QUAR.get("zero_bytes", True):
-                            stats["q_counts"]["zero_bytes"] += 1
-                            maybe_quarantine(p, "zero_bytes", ingest_id, source=source_label, file_token=file_token_for(p))
-                            stats["quarantined"] += 1
-                        continue
-
-                    h = sha256_file(p)
-                    tok = file_token_for(p, h)
-                    meta = exiftool_json(p)
-                    ext = p.suffix.lower()
-                    hint = last_meaningful_folder(p.parent)
-
-                    # -------- [CONTENT HASH] compute pixel-level digest for images (if possible) -----
-                    content_sha256: Optional[str] = None
-                    if ext in IMAGE_EXT:  # RAWs are NOT in IMAGE_EXT (we subtract RAW from images)
-                        content_sha256 = compute_image_content_sha256(p)
-                    # ---------------------------------------------------------------------------------
-
-                    # -------- [DUPES] Early duplicate resolution: exact file, then content ----------
-                    # 1) By exact file hash (prefer library over review)
-                    canonical = _find_canonical_by_filehash(conn, h)
-                    if canonical:
-                        canon_id, canon_state, _canon_path = canonical
-                        reason = "duplicate_in_library" if canon_state == "library" else "duplicate_in_review"
-                        basis = "file"
-                        # Policy: for duplicates in review, honor on_review_dupe; library always quarantined if enabled
-                        if reason == "duplicate_in_review" and on_review_dupe == "ignore":
-                            stats["updated"] += 1
-                            stats["skipped_dupe"] += 1
-                            now = datetime.utcnow().isoformat()
-                            conn.execute("UPDATE media SET last_verified_at=?, updated_at=? WHERE id=?", (now, now, canon_id))
-                            insert_sighting(conn, canon_id, p, name, source_label, hint, ingest_id)
-                            conn.commit()
-                            ctx.debug("= Already tracked (review, basis=file): %s", p, extra={"file_token": tok})
-                            continue
-                        elif reason == "duplicate_in_review" and on_review_dupe == "delete":
-                            stats["skipped_dupe"] += 1
-                            insert_sighting(conn, canon_id, p, name, source_label, hint, ingest_id)
-                            if DRY_RUN:
-                                ctx.info("[DRY] DELETE duplicate (review, basis=file): %s", p, extra={"file_token": tok})
-                            else:
-                                try:
-                                    p.unlink()
-                                except Exception:
-                                    stats["q_counts"]["move_failed"] += 1
-                                    maybe_quarantine(p, "move_failed", ingest_id, extra="delete_failed", source=source_label, file_token=tok)
-                                    stats["quarantined"] += 1
-                            conn.commit()
-                            continue
-                        else:
-                            if QUAR.get("dupes", True):
-                                stats["q_counts"][reason] += 1
-                                extra = f"basis={basis} dupe_of={canon_id}"
-                                maybe_quarantine(p, reason, ingest_id, extra=extra, source=source_label, file_token=tok)
-                                stats["quarantined"] += 1
-                            stats["skipped_dupe"] += 1
-                            insert_sighting(conn, canon_id, p, name, source_label, hint, ingest_id)
-                            conn.commit()
-                            continue
-
-                    # 2) By content hash (prefer library over review)
-                    canonical = _find_canonical_by_contenthash(conn, content_sha256) if content_sha256 else None
-                    if canonical:
-                        canon_id, canon_state, _canon_path = canonical
-                        reason = "duplicate_in_library" if canon_state == "library" else "duplicate_in_review"
-                        basis = "content"
-                        if reason == "duplicate_in_review" and on_review_dupe == "ignore":
-                            stats["updated"] += 1
-                            stats["skipped_dupe"] += 1
-                            now = datetime.utcnow().isoformat()
-                            conn.execute("UPDATE media SET last_verified_at=?, updated_at=? WHERE id=?", (now, now, canon_id))
-                            insert_sighting(conn, canon_id, p, name, source_label, hint, ingest_id)
-                            conn.commit()
-                            ctx.debug("= Already tracked (review, basis=content): %s", p, extra={"file_token": tok})
-                            continue
-                        elif reason == "duplicate_in_review" and on_review_dupe == "delete":
-                            stats["skipped_dupe"] += 1
-                            insert_sighting(conn, canon_id, p, name, source_label, hint, ingest_id)
-                            if DRY_RUN:
-                                ctx.info("[DRY] DELETE duplicate (review, basis=content): %s", p, extra={"file_token": tok})
-                            else:
-                                try:
-                                    p.unlink()
-                                except Exception:
-                                    stats["q_counts"]["move_failed"] += 1
-                                    maybe_quarantine(p, "move_failed", ingest_id, extra="delete_failed", source=source_label, file_token=tok)
-                                    stats["quarantined"] += 1
-                            conn.commit()
-                            continue
-                        else:
-                            if QUAR.get("dupes", True):
-                                stats["q_counts"][reason] += 1
-                                extra = f"basis={basis} dupe_of={canon_id}"
-                                maybe_quarantine(p, reason, ingest_id, extra=extra, source=source_label, file_token=tok)
-                                stats["quarantined"] += 1
-                            stats["skipped_dupe"] += 1
-                            insert_sighting(conn, canon_id, p, name, source_label, hint, ingest_id)
-                            conn.commit()
-                            continue
-                    # ---------------------------------------------------------------------------------
-
-                    # -------- capture time resolution (only for non-duplicates) --------
-                    taken_at = resolve_taken_at(meta, name, ALLOW_FILENAME_DATES)
-                    if not taken_at:
-                        reason_code = "missing_datetime"
-                        reason_msg  = "no capture date (exif/qt" + ("/filename" if ALLOW_FILENAME_DATES else "") + ")"
-
-                        q_dest = None
-                        if QUAR.get("missing_datetime", True):
-                            q_dest = maybe_quarantine(p, reason_code, ingest_id, extra=reason_msg,  source=source_label, file_token=tok)
-
-                        # track in DB as quarantined (only for *media-like* files where we have a hash)
-                        media_row = {
-                            "id": uuid_from_hash(h),
-                            "hash_sha256": h,
-                            "phash": None,
-                            "content_sha256": content_sha256,  # [CONTENT HASH]
-                            "ext": ext,
-                            "bytes": size,
-                            "taken_at": None,
-                            "tz_offset": None,
-                            "gps_lat": meta.get("GPSLatitude") if meta.get("GPSLatitude") is not None else None,
-                            "gps_lon": meta.get("GPSLongitude") if meta.get("GPSLongitude") is not None else None,
-                            "state": "quarantine",
-                            "canonical_path": str(q_dest) if q_dest and not DRY_RUN else None,
-                            "added_at": datetime.utcnow().isoformat(),
-                            "updated_at": datetime.utcnow().isoformat(),
-                            "xmp_written": 0,
-                            "quarantine_reason": reason_code,
-                        }
-                        mid, _, _ = upsert_media(conn, media_row)
-                        insert_sighting(conn, mid, p, name, source_label, hint, ingest_id)
-                        stats["q_counts"][reason_code] += 1
-                        stats["quarantined"] += 1
-                        conn.commit()
-                        continue
-                    # -----------------------------------------
-
-                    media_row = {
-                        "id": uuid_from_hash(h),
-                        "hash_sha256": h,
-                        "phash": None,
-                        "content_sha256": content_sha256,  # [CONTENT HASH]
-                        "ext": ext,
-                        "bytes": size,
-                        "taken_at": taken_at,
-                        "tz_offset": None,
-                        "gps_lat": meta.get("GPSLatitude") if meta.get("GPSLatitude") is not None else None,
-                        "gps_lon": meta.get("GPSLongitude") if meta.get("GPSLongitude") is not None else None,
-                        "state": "review",
-                        "canonical_path": None,
-                        "added_at": datetime.utcnow().isoformat(),
-                        "updated_at": datetime.utcnow().isoformat(),
-                        "xmp_written": 0,
-                        "quarantine_reason": None,  # ensure UPDATE clears any previous reason
-                    }
-
-                    mid, current_state, current_canon = upsert_media(conn, media_row)
-                    insert_sighting(conn, mid, p, name, source_label, hint, ingest_id)
-
-                    # (legacy safety) exact-file dupes detected *after* upsert (should be rare now)
-                    if already_finalized(conn, h):
-                        stats["skipped_dupe"] += 1
-                        ctx.debug("= DUP in library (late): %s (%s)", p, h[:8], extra={"file_token": tok})
-                        if QUAR.get("dupes", True):
-                            stats["q_counts"]["duplicate_in_library"] += 1
-                            maybe_quarantine(p, "duplicate_in_library", ingest_id, extra="basis=file (late)", source=source_label, file_token=tok)
-                            stats["quarantined"] += 1
-                        conn.commit()
-                        continue
-
-                    if current_state in ("review", "library") and current_canon:
-                        try:
-                            canon_missing = not Path(current_canon).exists()
-                        except Exception:
-                            canon_missing = True
-
-                        if not canon_missing:
-                            if current_state == "library":
-                                stats["skipped_dupe"] += 1
-                                if QUAR.get("dupes", True):
-                                    stats["q_counts"]["duplicate_in_library"] += 1
-                                    maybe_quarantine(p, "duplicate_in_library", ingest_id, extra="basis=file (late-state)", source=source_label, file_token=tok)
-                                    stats["quarantined"] += 1
-                                conn.commit()
-                                continue
-
-                            # current_state == "review"
-                            if on_review_dupe == "ignore":
-                                stats["updated"] += 1
-                                now = datetime.utcnow().isoformat()
-                                conn.execute(
-                                    "UPDATE media SET last_verified_at=?, updated_at=? WHERE id=?",
-                                    (now, now, mid),
-                                )
-                                ctx.debug("= Already tracked (review, late): %s", current_canon, extra={"file_token": tok})
-                                conn.commit()
-                                continue
-                            elif on_review_dupe == "quarantine":
-                                if QUAR.get("dupes", True):
-                                    stats["q_counts"]["duplicate_in_review"] += 1
-                                    maybe_quarantine(p, "duplicate_in_review", ingest_id, extra="basis=file (late-state)", source=source_label, file_token=tok)
-                                    stats["quarantined"] += 1
-                                else:
-                                    stats["updated"] += 1
-                                    now = datetime.utcnow().isoformat()
-                                    conn.execute(
-                                        "UPDATE media SET last_verified_at=?, updated_at=? WHERE id=?",
-                                        (now, now, mid),
-                                    )
-                                conn.commit()
-                                continue
-                            elif on_review_dupe == "delete":
-                                if DRY_RUN:
-                                    ctx.info("[DRY] DELETE duplicate (review, late): %s", p, extra={"file_token": tok})
-                                else:
-                                    try:
-                                        p.unlink()
-                                    except Exception:
-                                        stats["q_counts"]["move_failed"] += 1
-                                        maybe_quarantine(p, "move_failed", ingest_id, extra="delete_failed", source=source_label, file_token=tok)
-                                        stats["quarantined"] += 1
-                                stats["skipped_dupe"] += 1
-                                conn.commit()
-                                continue
-
-                    fname = canonical_name(taken_at, h, ext)
-                    dest = plan_nonclobber(REVIEW_ROOT, fname)
-
-                    if DRY_RUN:
-                        ctx.debug("[DRY] MOVE %s -> %s", p, dest, extra={"file_token": tok})
-                        stats["moved"] += 1
-                    else:
-                        dest.parent.mkdir(parents=True, exist_ok=True)
-                        moved_ok = False
-                        try:
-                            p.rename(dest)
-                            moved_ok = True
-                        except Exception as e1:
-                            try:
-                                shutil.copy2(p, dest)
-                                moved_ok = True
-                                try:
-                                    p.unlink()
-                                except Exception:
-                                    pass
-                            except Exception as e2:
-                                moved_ok = False
-                                if QUAR.get("move_failed", True):
-                                    q_path = maybe_quarantine(p, "move_failed", ingest_id, extra=f"{e1} | {e2}", source=source_label, file_token=tok)
-                                    # Flip the row to quarantined since the move didn't succeed
-                                    now = datetime.utcnow().isoformat()
-                                    conn.execute(
-                                        """
-                                        UPDATE media
-                                        SET state='quarantine',
-                                            canonical_path=?,
-                                            quarantine_reason='move_failed',
-                                            updated_at=?
-                                        WHERE id=?
-                                        """,
-                                        (str(q_path) if q_path and not DRY_RUN else None, now, mid),
-                                    )
-                                    stats["q_counts"]["move_failed"] += 1
-                                    stats["quarantined"] += 1
-
-                        if moved_ok:
-                            now = datetime.utcnow().isoformat()
-                            conn.execute(
-                                "UPDATE media SET state='review', canonical_path=?, updated_at=?, last_verified_at=? WHERE id=?",
-                                (str(dest), now, now, mid),
-                            )
-                            ctx.debug("MOVED %s -> %s", p, dest, extra={"file_token": tok})
-                            stats["moved"] += 1
-
-                    conn.commit()
+        for root, dirs, files in timed_walk(staging_root):
+            # prune system dirs and AppleDouble dir entries; sorted so a checkpoint's
+            # "last completed directory" means the same thing on the next run
+            dirs[:] = sorted(d for d in dirs if d not in DIR_IGNORE and not d.startswith("._"))
+            rel_dir = Path(root).relative_to(staging_root).as_posix()
+            if ckpt and ckpt.dir_done_before(rel_dir):
+                continue
 
-                except Exception:
-                    # Catch-all so one bad file doesn't kill the batch
-                    ctx.exception("Unhandled error while processing %s", p, extra={"file_token": file_token_for(p)})
+            for name in sorted(files):
+                rel = f"{rel_dir}/{name}" if rel_dir != "." else name
+                if ckpt and ckpt.file_done_before(rel):
                     continue
+                ingest_step(conn, StagedFile(Path(root) / name), rel, ckpt, stats, ctx,
+                            seen_hashes=seen_hashes, ingest_id=ingest_id, source_label=source_label,
+                            on_review_dupe=on_review_dupe, heartbeat=heartbeat)
+
+            if ckpt:
+                ckpt.dir_done(conn, rel_dir, stats)
+                timed_commit(conn)
+        completed = True
 
     finally:
-        finish_ingest(conn, ingest_id)
+        if completed:
+            close_quarantine_manifest(ingest_id)
+            finish_ingest(conn, ingest_id, stats)
+        else:
+            drop_sightings()
+            conn.rollback()
+            close_quarantine_manifest(ingest_id)   # quarantine moves already happened; keep their events
+            conn.commit()
+            if ckpt:
+                log(f"Ingest {ingest_id} interrupted; continue it with: "
+                    f"ingest_pass.py --resume {ingest_id}{'' if DRY_RUN else ' --write'}", logging.WARNING)
+        stats["finished_at"] = time.time()
+        METRICS.write_textfile()
 
     # Solidify defaultdict for JSON-like printing
     stats["q_counts"] = dict(stats["q_counts"])
     return stats
 
+def ingest_one_archive(conn, source_label, archive, *, on_review_dupe: str, note=None, heartbeat=500,
+                       resume: Optional[Tuple[IngestCheckpoint, dict]] = None):
+    """
+    ingest_one_source for a ZIP/TAR archive: members are hashed, read and content-hashed
+    from the archive stream; only non-duplicates are extracted (straight to their Review/
+    name, or Quarantine/missing_datetime/). Name-filtered members and dupes are counted as
+    usual but stay in the archive. Checkpoints mark members (no directory order here).
+    """
+    stats = new_source_stats(source_label, archive, resumed=resume is not None)
+    stats["sidecars"] = 0         # Takeout JSON members (not media)
+    stats["takeout_dates"] = 0    # taken_at from a Takeout sidecar
+    seen_hashes: set = set()
+    METRICS.track(stats)
+
+    if resume:
+        ckpt, saved = resume
+        ingest_id = ckpt.ingest_id
+        restore_stats(stats, saved)
+    else:
+        ingest_id = begin_ingest(conn, source_label, note)
+        ckpt = IngestCheckpoint.start(conn, ingest_id, archive) if SCAN_LEVEL == "full" else None
+    stats["ingest_id"] = ingest_id
+    ctx = batch_logger(ingest_id, source_label)
+    if not DRY_RUN:
+        open_quarantine_manifest(conn, ingest_id)
+
+    log(f"\n=== {source_label} (archive) ===")
+    ctx.info("%s ingest batch: %s (%s)", "Resuming" if resume else "Started", ingest_id, archive)
+
+    completed = False
+    try:
+        with pixarr_archive.ArchiveReader(archive) as ar:
+            members = list(ar.members())
+            takeout = None
+            if TAKEOUT_JSON:
+                takeout = pixarr_archive.TakeoutIndex()
+                for m in members:
+                    if pixarr_archive.is_sidecar(m.name) and m.size <= 1024 * 1024:
+                        takeout.add(m.name, ar.read_bytes(m))
+                ctx.info("Takeout sidecars indexed: %d", len(takeout))
+
+            for m in members:
+                if ckpt and ckpt.file_done_before(m.name):
+                    continue
+                ingest_step(conn, ArchiveItem(ar, m, archive, takeout, ctx), m.name, ckpt, stats, ctx,
+                            seen_hashes=seen_hashes, ingest_id=ingest_id, source_label=source_label,
+                            on_review_dupe=on_review_dupe, heartbeat=heartbeat)
+
+        if ckpt:
+            ckpt.dir_done(conn, "", stats)   # whole archive done: drop the member markers
+            timed_commit(conn)
+        completed = True
+    except pixarr_archive.ARCHIVE_ERRORS as e:
+        ctx.error("Unreadable archive %s: %s", archive, e)
+        completed = True
+
+    finally:
+        if completed:
+            close_quarantine_manifest(ingest_id)
+            finish_ingest(conn, ingest_id, stats)
+        else:
+            drop_sightings()
+            conn.rollback()
+            close_quarantine_manifest(ingest_id)
+            conn.commit()
+            if ckpt:
+                log(f"Ingest {ingest_id} interrupted; continue it with: "
+                    f"ingest_pass.py --resume {ingest_id}{'' if DRY_RUN else ' --write'}", logging.WARNING)
+        stats["finished_at"] = time.time()
+        METRICS.write_textfile()
+
+    stats["q_counts"] = dict(stats["q_counts"])
+    return stats
+
 # ---------- Main ----------
 
 def main():
@@ -1219,7 +2554,9 @@ def main():
     SUPPORTED_EXT = IMAGE_EXT | RAW_EXT | VIDEO_EXT   # everything we accept
 
     parser = argparse.ArgumentParser(description="Pixarr: ingest media from staging folders.")
-    parser.add_argument("sources", nargs="*", help="Subset of sources to ingest (pc, other, icloud, sdcard)")
+    parser.add_argument("sources", nargs="*",
+                        help="Subset of sources to ingest (pc, other, icloud, sdcard), subpaths/paths, "
+                             "or .zip/.tar[.gz] archives (streamed; only non-dupes are extracted)")
     parser.add_argument("-n", "--note", help="Optional note to attach to this ingest batch")
     parser.add_argument("--write", action="store_true",
                         default=not cfg_ingest.get("dry_run_default", True),
@@ -1243,12 +2580,71 @@ def main():
                         help="Minimal console output")
     parser.add_argument("--json-logs", action="store_true",
                         help="Write JSON-formatted logs to file handler")
+    cfg_logging = cfg.get("logging", {})
+    parser.add_argument("--log-sample", type=int, default=int(cfg_logging.get("sample_every", 1)),
+                        help="Keep 1 of every N high-volume per-file DEBUG events ([DRY] MOVE, MOVED, …)")
+    parser.add_argument("--log-rate", type=float, default=float(cfg_logging.get("max_per_sec", 0)),
+                        help="Max per-file DEBUG events per second per event type (0 = unlimited)")
+    parser.add_argument("--sync-logs", action="store_true", default=not cfg_logging.get("async", True),
+                        help="Format/write logs on the ingest thread (default: background listener)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each pipeline stage (walk/hash/exif/DB/move…) and each SQL statement; print "
+                             "tables and write <log>.profile.json, <log>.sql.json and <log>.slow-sql.log")
+    parser.add_argument("--slow-sql-ms", type=float, default=50.0,
+                        help="With --profile: log statements slower than this (with EXPLAIN QUERY PLAN) "
+                             "to <log>.slow-sql.log")
+    parser.add_argument("--sql-starts", action="store_true",
+                        help="With --profile: also count every statement SQLite starts, trigger programs "
+                             "included (sqlite3 trace callback; slows the DB side noticeably)")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="Also run the ingest under cProfile and dump <log>.pstats (read with `python -m pstats`)")
+    cfg_metrics = cfg.get("metrics", {})
+    parser.add_argument("--metrics-textfile", default=cfg_metrics.get("textfile") or None,
+                        help="Write Prometheus metrics here after each batch "
+                             "(e.g. node_exporter textfile dir: /var/lib/node_exporter/pixarr.prom)")
+    parser.add_argument("--metrics-port", type=int, default=int(cfg_metrics.get("port", 0)),
+                        help="Serve live Prometheus metrics on this port at /metrics while ingesting (0 = off)")
+    parser.add_argument("--scan-level", choices=list(SCAN_LEVELS), default="full",
+                        help="Dry-run depth: inventory (walk+stat), hash (+sha256 & file dupes), "
+                             "full (everything; required with --write)")
+    parser.add_argument("--no-fast-meta", action="store_true",
+                        default=not cfg_ingest.get("fast_meta", True),
+                        help="Always use exiftool (skip the in-process JPEG/HEIC/MP4 date reader)")
+    parser.add_argument("--exiftool-mode", choices=["selective", "full"],
+                        default=cfg_ingest.get("exiftool_mode", "selective"),
+                        help="selective: -fast2 + only needed tags, full re-read only for undated files; "
+                             "full: every tag (default from config: selective)")
+    parser.add_argument("--takeout-json", action="store_true",
+                        default=bool(cfg_ingest.get("takeout_json", False)),
+                        help="Archive sources: use Google Takeout JSON sidecars (photoTakenTime/geoData) "
+                             "when EXIF has no capture date")
+    parser.add_argument("--tree-hash-min-mb", type=float, default=float(cfg_ingest.get("tree_hash_min_mb", 0)),
+                        help="Also tree-hash files of at least this many MB in parallel chunks, alongside "
+                             "sha256 (stored for dedupe and range scrubs; 0 = off)")
+    parser.add_argument("--no-exif-kv", action="store_true",
+                        help="Don't persist exiftool tags into exif_kv (default from [exif].store)")
+    parser.add_argument("--resume", metavar="INGEST_ID",
+                        help="Continue an interrupted batch (id or unique prefix, see last_ingests.py): "
+                             "skips completed dirs/files and keeps its stats; same --write mode as before")
+    parser.add_argument("--delta-db", metavar="PATH",
+                        help="Sharded ingest: write to this local delta DB instead of <data_dir>/db/app.sqlite3 "
+                             "(created from schema.sql; fold into the master with scripts/pixarr_shards.py merge)")
+    parser.add_argument("--shard", default=socket.gethostname(),
+                        help="With --delta-db: shard name recorded in the delta (default: hostname)")
     parser.add_argument("--heartbeat", type=int, default=500,
                         help="Emit a progress line every N scanned files (default 500)")
 
     parser.add_argument("--on-review-dupe", choices=["ignore", "quarantine", "delete"], 
                         help=f"Policy when a duplicate already exists in Review (default from config: {default_on_review_dupe})")
 
+    cfg_review = cfg.get("review", {})
+    default_layout = cfg_review.get("layout", "flat")
+    if default_layout not in REVIEW_LAYOUTS:
+        default_layout = "flat"
+    parser.add_argument("--review-layout", choices=list(REVIEW_LAYOUTS), default=default_layout,
+                        help=f"Review folder layout for new moves (default from config: {default_layout}). "
+                             "Re-shard existing files with scripts/reshard_review.py")
+
     # ---- after cfg_* are read, before parser.parse_args()
     valid_dupe_policies = {"ignore", "quarantine", "delete"}     # the only allowed values
     default_on_review_dupe = cfg_ingest.get("on_review_dupe", "quarantine")  # read from pixarr.toml (or use 'quarantine')
@@ -1257,6 +2653,10 @@ def main():
 
     args = parser.parse_args()
     on_review_dupe = args.on_review_dupe or default_on_review_dupe
+    if args.write and args.scan_level != "full":
+        parser.error("--scan-level inventory/hash is for dry runs; use --scan-level full with --write")
+    if args.resume and (args.sources or args.scan_level != "full"):
+        parser.error("--resume continues one batch as it was started; drop sources/--scan-level")
 
     # setup logging
     global LOGGER
@@ -1267,63 +2667,137 @@ def main():
         quiet=args.quiet,
         log_level_arg=args.log_level,
         json_logs=args.json_logs,
+        async_logs=not args.sync_logs,
+        sample_every=args.log_sample,
+        max_per_sec=args.log_rate,
+        sampled_events=cfg_logging.get("sampled_events"),
     )
 
     # Build date keys dynamically from the flags
-    base_keys = [
-        "DateTimeOriginal", "CreateDate", "MediaCreateDate", "TrackCreateDate",
-        "QuickTime:CreateDate", "QuickTime:CreationDate"
-    ]
-    if args.allow_file_dates:
-        base_keys += ["ModifyDate", "FileModifyDate"]
-
     global _DATE_KEYS
-    _DATE_KEYS = base_keys
+    _DATE_KEYS = date_keys_for(args.allow_file_dates)
 
     # Expose filename-dates flag to the ingest loop
     global ALLOW_FILENAME_DATES
     ALLOW_FILENAME_DATES = args.allow_filename_dates
 
+    global REVIEW_LAYOUT
+    REVIEW_LAYOUT = args.review_layout
+
+    global FAST_META, EXIFTOOL_MODE, TAKEOUT_JSON
+    FAST_META = not args.no_fast_meta
+    EXIFTOOL_MODE = args.exiftool_mode
+    TAKEOUT_JSON = args.takeout_json
+
+    global TREE_HASH_MIN, TREE_HASH_WORKERS
+    TREE_HASH_MIN = int(args.tree_hash_min_mb * 1024 * 1024)
+    TREE_HASH_WORKERS = max(1, int(cfg_ingest.get("tree_hash_workers", TREE_HASH_WORKERS)))
+
+    global EXIF_KV_STORE, EXIF_KV_ALLOW, EXIF_KV_DENY
+    cfg_exif = cfg.get("exif", {})
+    EXIF_KV_STORE = not args.no_exif_kv and bool(cfg_exif.get("store", True))
+    EXIF_KV_ALLOW = tuple(cfg_exif.get("allow", EXIF_KV_ALLOW))
+    EXIF_KV_DENY = tuple(cfg_exif.get("deny", EXIF_KV_DENY))
+
     # Apply quarantine settings from config
-    global QUAR
+    global QUAR, QUAR_MANIFEST, QUAR_SIDECARS, QUAR_MANIFEST_BATCH
     QUAR = build_quarantine_cfg(cfg_quar)
+    QUAR_MANIFEST = bool(cfg_quar.get("manifest", True))
+    QUAR_SIDECARS = bool(cfg_quar.get("sidecars", False))
+    QUAR_MANIFEST_BATCH = int(cfg_quar.get("manifest_batch", 500))
 
     # Paths / bootstrap
     base = Path(args.data_dir).resolve()
     pathize(base)
-
-    global DRY_RUN
+    if args.delta_db:
+        global DB_PATH
+        if Path(args.delta_db).expanduser().resolve() == DB_PATH:
+            parser.error("--delta-db must not be the data dir's own app.sqlite3")
+        DB_PATH = Path(args.delta_db).expanduser().resolve()
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+    global DRY_RUN, SCAN_LEVEL
     DRY_RUN = not args.write
+    SCAN_LEVEL = args.scan_level
 
     ensure_dirs()
     if not DB_PATH.exists():
         ensure_db()
 
-    # exiftool check
-    ensure_exiftool()
+    # exiftool check (inventory/hash levels never read metadata)
+    if SCAN_LEVEL == "full":
+        ensure_exiftool()
 
     REVIEW_ROOT.mkdir(parents=True, exist_ok=True)
     QUARANTINE_ROOT.mkdir(parents=True, exist_ok=True)
 
     mode = "DRY-RUN" if DRY_RUN else "WRITE"
-    log(f"Mode: {mode}")
+    log(f"Mode: {mode}" + ("" if SCAN_LEVEL == "full" else f" (scan level: {SCAN_LEVEL})"))
     log(f"DATA_DIR = {DATA_DIR}")
     log(f"Effective quarantine: {QUAR}")
+    log(f"Quarantine records: manifest={QUAR_MANIFEST} (batch={QUAR_MANIFEST_BATCH}), sidecars={QUAR_SIDECARS}")
     log(f"allow_filename_dates={ALLOW_FILENAME_DATES}, allow_file_dates={'ModifyDate' in _DATE_KEYS}")
+    log(f"Review layout: {REVIEW_LAYOUT}")
+    log(f"Metadata: fast reader={'on' if FAST_META else 'off'}, exiftool mode={EXIFTOOL_MODE}"
+        + (", takeout sidecars=on" if TAKEOUT_JSON else ""))
+    if TREE_HASH_MIN:
+        log(f"Tree hash: files >= {args.tree_hash_min_mb:g} MB, {TREE_HASH_WORKERS} thread(s), "
+            f"{pixarr_treehash.CHUNK_BYTES // (1024 * 1024)} MB chunks")
+    log(f"exif_kv: store={EXIF_KV_STORE}" + (f", allow={len(EXIF_KV_ALLOW)} tag(s)" if EXIF_KV_ALLOW else "")
+        + f", deny={len(EXIF_KV_DENY)} tag(s)")
     log(f"Formats -> images(non-RAW)={sorted(IMAGE_EXT)}, raw={sorted(RAW_EXT)}, videos={sorted(VIDEO_EXT)}")
 
+    TIMER.enabled = args.profile or args.cprofile or bool(args.metrics_textfile) or args.metrics_port > 0
+    global SQL_TRACER
+    if args.profile:
+        SQL_TRACER = pixarr_trace.SqlTracer(slow_ms=args.slow_sql_ms, slow_log=sql_trace_paths()[1],
+                                            count_starts=args.sql_starts)
+    if args.metrics_textfile:
+        METRICS.textfile = Path(args.metrics_textfile).expanduser()
+        log(f"Metrics textfile: {METRICS.textfile}")
+    if args.metrics_port > 0:
+        addr = cfg_metrics.get("addr", "127.0.0.1")
+        METRICS.serve(args.metrics_port, addr)
+        log(f"Metrics: http://{addr}:{args.metrics_port}/metrics")
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+
     t0 = time.perf_counter()
 
     conn = open_db()
-    # upgrade columns if the DB pre-dates these fields
-    ensure_column(conn, "sightings", "folder_hint", "TEXT")
-    ensure_column(conn, "sightings", "ingest_id", "TEXT")
-    ensure_column(conn, "media", "quarantine_reason", "TEXT")
-    ensure_column(conn, "media", "content_sha256", "TEXT")  # ensure the new column exists          # [CONTENT HASH]
+    check_schema(conn)   # v1 DBs (text digests/timestamps) need scripts/migrate_v2.py first
+    ensure_quarantine_events(conn)
+    ensure_ingest_checkpoints(conn)
+    ensure_ingest_stats(conn)
+    ensure_lookup_indexes(conn)
+    ensure_shard_tables(conn)
+    if args.delta_db:
+        shard_id = ensure_delta_info(conn, args.shard)
+        log(f"Delta DB: {DB_PATH} (shard {args.shard}, id {shard_id[:8]})")
+    if pixarr_counters.ensure(conn):
+        log("Created media_counters (counts by state/reason/ext, kept by triggers) from existing rows.")
+    if pixarr_sightings.ensure(conn):
+        log("Updated sightings for compaction (first_seen_ts/seen_count columns, view + insert trigger).")
+
+    resume = None
+    if args.resume:
+        ids = [r[0] for r in conn.execute(
+            "SELECT id FROM ingests WHERE id LIKE ? || '%'", (args.resume,)).fetchall()]
+        if len(ids) != 1:
+            conn.close()
+            sys.exit(f"--resume {args.resume}: {'no' if not ids else 'ambiguous'} ingest id")
+        try:
+            resume = IngestCheckpoint.load(conn, ids[0])
+        except ValueError as e:
+            conn.close()
+            sys.exit(f"--resume: {e}")
+        label = conn.execute("SELECT source FROM ingests WHERE id=?", (ids[0],)).fetchone()[0]
 
     # pick sources/paths (works with 'pc', 'other/trip1', absolute paths, etc.)
     try:
-        selected = resolve_source_tokens(args.sources)
+        selected = [(label, resume[0].root)] if resume else resolve_source_tokens(args.sources)
     except NameError:
         wanted = set(args.sources)
         selected = []
@@ -1334,43 +2808,74 @@ def main():
             selected.append((label, path))
 
     all_stats = []
-    for label, path in selected:
-        stats = ingest_one_source(
-            conn, label, path,
-            on_review_dupe=on_review_dupe,
-            note=args.note,
-            heartbeat=args.heartbeat
-        )
-        all_stats.append(stats)
+    if profiler:
+        profiler.enable()
+    try:
+        for label, path in selected:
+            ingest_fn = ingest_one_archive if pixarr_archive.is_archive(path) else ingest_one_source
+            stats = ingest_fn(
+                conn, label, path,
+                on_review_dupe=on_review_dupe,
+                note=args.note,
+                heartbeat=args.heartbeat,
+                resume=resume,
+            )
+            all_stats.append(stats)
+    finally:
+        if profiler:
+            profiler.disable()
 
     conn.close()
 
     elapsed = time.perf_counter() - t0
 
     # ---------- END-OF-RUN SUMMARY ----------
-    log("\n=== Run summary (grouped) ===")
+    def na(v):   # fields a --scan-level didn't compute are None
+        return "n/a" if v is None else v
+
+    log(f"\n=== Run summary (grouped) ===" + ("" if SCAN_LEVEL == "full" else f"  [scan level: {SCAN_LEVEL}]"))
     for s in all_stats:
-        moved_field = f"{s['moved']}(dry)" if DRY_RUN else str(s["moved"])
+        moved_field = "n/a" if s["moved"] is None else (f"{s['moved']}(dry)" if DRY_RUN else str(s["moved"]))
         log(
             f"Summary {s['label']}: "
-            f"scanned={s['scanned']}, moved={moved_field}, updated={s['updated']}, "
-            f"skipped_dupe={s['skipped_dupe']}, quarantined={s['quarantined']}"
+            f"scanned={s['scanned']}, moved={moved_field}, updated={na(s['updated'])}, "
+            f"skipped_dupe={na(s['skipped_dupe'])}, quarantined={s['quarantined']}"
+            + (" (resumed batch: totals include the interrupted run)" if s.get("resumed") else "")
         )
+        if s["scanned"]:
+            types = ", ".join(f"{ext or '(none)'}={n}" for ext, n in s["by_ext"].most_common(8))
+            log(f"  bytes={s['bytes_total'] / 1e9:.2f} GB  types: {types}"
+                + (f"  dupes_within_run={s['dupes_in_run']}" if SCAN_LEVEL == "hash" else ""))
+        if s.get("tree_hashed"):
+            log(f"  tree hash: files={s['tree_hashed']}, sha256 skipped on tree match={s['tree_hits']}")
+        if "sidecars" in s:
+            log(f"  archive: takeout sidecars={s['sidecars']}, dated by takeout={s['takeout_dates']}; "
+                "name-filtered members and dupes were left in the archive")
 
     # totals
-    totals = {
-        "scanned": sum(s["scanned"] for s in all_stats),
-        "moved": sum(s["moved"] for s in all_stats),
-        "updated": sum(s["updated"] for s in all_stats),
-        "skipped_dupe": sum(s["skipped_dupe"] for s in all_stats),
-        "quarantined": sum(s["quarantined"] for s in all_stats),
-    }
-    moved_total_field = f"{totals['moved']}(dry)" if DRY_RUN else str(totals["moved"])
+    def total(key):
+        vals = [s[key] for s in all_stats]
+        return None if any(v is None for v in vals) else sum(vals)
+
+    totals = {k: total(k) for k in ("scanned", "moved", "updated", "skipped_dupe", "quarantined")}
+    totals["bytes"] = total("bytes_total")
+    moved_total_field = "n/a" if totals["moved"] is None else (
+        f"{totals['moved']}(dry)" if DRY_RUN else str(totals["moved"]))
     log(
         f"TOTALS: scanned={totals['scanned']}, moved={moved_total_field}, "
-        f"updated={totals['updated']}, skipped_dupe={totals['skipped_dupe']}, "
+        f"updated={na(totals['updated'])}, skipped_dupe={na(totals['skipped_dupe'])}, "
         f"quarantined={totals['quarantined']}"
     )
+    if SCAN_LEVEL != "full":
+        log("  (quarantine counts at this level cover name/stat checks only: "
+            "junk, unsupported_ext, zero_bytes, stat_error)")
+
+    n_fast = sum(s.get("meta_fast", 0) for s in all_stats)
+    n_exif = sum(s.get("meta_exiftool", 0) for s in all_stats)
+    if n_fast or n_exif:
+        log(f"Metadata reads: fast={n_fast}, exiftool={n_exif} "
+            f"({100 * n_fast / (n_fast + n_exif):.0f}% without exiftool)")
+    log_exiftool_split(all_stats)
 
     # aggregate quarantine reasons
     q_agg = Counter()
@@ -1381,45 +2886,34 @@ def main():
         for reason, cnt in q_agg.most_common():
             log(f"  - {reason}: {cnt}")
 
-    # batch info from DB with a few examples per batch
-    conn2 = open_db()
-    try:
-        log("\nBatches created:")
-        for s in all_stats:
-            if not s["ingest_id"]:
-                continue
-            iid = s["ingest_id"]
-            row = conn2.execute(
-                "SELECT source, started_at, finished_at, notes FROM ingests WHERE id=?",
-                (iid,)
-            ).fetchone()
-            if not row:
-                continue
-            src, started, finished, notes = row
-            items = conn2.execute(
-                "SELECT COUNT(*) FROM sightings WHERE ingest_id=?",
-                (iid,)
-            ).fetchone()[0]
-            log(f"  {iid[:8]}…  {src}  items={items}  started={started or '-'}  finished={finished or '-'}  note={notes or ''}")
-
-            # last few examples seen in this batch
-            examples = conn2.execute(
-                """
-                SELECT s.filename, m.taken_at, m.canonical_path
-                FROM sightings s
-                JOIN media m ON s.media_id = m.id
-                WHERE s.ingest_id=?
-                ORDER BY s.seen_at DESC
-                LIMIT 3
-                """,
-                (iid,)
-            ).fetchall()
-            for fn, t, cpath in examples:
-                log(f"    - {fn} | taken_at={t} | path={cpath}")
-    finally:
-        conn2.close()
+    log_batches(all_stats)
+
+    if TIMER.enabled:
+        json_path, pstats_path = profile_paths()
+        payload = write_profile_report(json_path, mode=mode, elapsed=elapsed, totals=totals)
+        log("\nStage timings (--profile):")
+        for line in format_stage_table(payload["stages"], elapsed):
+            log(line)
+        log(f"Profile report: {json_path}")
+        if profiler:
+            profiler.dump_stats(str(pstats_path))
+            log(f"cProfile stats: {pstats_path}  (python -m pstats {pstats_path.name})")
+    if SQL_TRACER:
+        sql_json, slow_log = sql_trace_paths()
+        SQL_TRACER.write_json(sql_json)
+        log("\nSQL statements by total time (--profile):")
+        for line in SQL_TRACER.format_table(top=15):
+            log(line)
+        log(f"SQL report: {sql_json}" + (f"; {len(SQL_TRACER.slow)} slow statement(s) "
+                                          f"(>= {args.slow_sql_ms:g} ms) in {slow_log}" if SQL_TRACER.slow else ""))
+
+    if LOG_DROPPED:
+        dropped = ", ".join(f"{k!r}={v}" for k, v in LOG_DROPPED.most_common())
+        log(f"Log sampling dropped {sum(LOG_DROPPED.values())} per-file event(s): {dropped}")
 
     log(f"\n=== Ingest complete. Total time: {elapsed:.1f} seconds ===")
+    METRICS.shutdown()
+    stop_logging()
 
 if __name__ == "__main__":
     main()
@@ -9,25 +9,33 @@ Usage (from repo root):
   python scripts/last_ingests.py -n 5            # show 5 latest ingests
   python scripts/last_ingests.py --data-dir /path/to/data
   python scripts/last_ingests.py --db /path/to/app.sqlite3
+  python scripts/last_ingests.py -n 10 --stages   # + per-stage seconds (batches run with --profile/metrics)
 
 Options:
   -n, --limit N        How many rows to show (default: 2)
   --data-dir PATH      Pixarr data dir (uses <data-dir>/db/app.sqlite3)
   --db PATH            Direct path to the SQLite DB (overrides everything)
+  --stages             Also print each batch's stage timings, when they were recorded
 
 Notes:
   - No exiftool required; this only reads SQLite.
+  - Counts come from ingest_stats, written once when a batch finishes (no per-batch
+    aggregation over sightings). Unfinished/interrupted batches and ones from before
+    ingest_stats existed show empty counts.
   - If you're on Python < 3.11 and see a TOML import error, install the backport:
       python -m pip install tomli
 """
 
 
 import argparse
+import json
 import sqlite3
 from pathlib import Path
 from typing import Optional
 import tomli as toml
 
+import pixarr_sqlite
+
 def repo_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
@@ -54,11 +62,49 @@ def resolve_db_path(cli_db: Optional[str], cli_data_dir: Optional[str]) -> Path:
 
     return (repo_root() / "data" / "db" / "app.sqlite3").resolve()
 
+BATCHES_SQL = """
+    SELECT i.started_at, i.id, i.source, st.dry_run, st.scanned, st.moved, st.updated,
+           st.skipped_dupe AS dupes, st.quarantined, st.q_counts AS reasons, st.bytes_total,
+           st.sightings, st.duration_s, i.finished_at, st.stages
+    FROM ingests i
+    LEFT JOIN ingest_stats st ON st.ingest_id = i.id
+    ORDER BY i.started_at DESC
+    LIMIT ?
+"""
+
+
+def batch_rows(conn: sqlite3.Connection, limit: int) -> list:
+    """Latest batches with their ingest_stats, formatted for print_rows (dicts; 'stages' kept as JSON)."""
+    has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='ingest_stats'").fetchone()
+    if not has_stats:     # DB not touched by an ingest since ingest_stats was added
+        return [dict(r) for r in conn.execute("SELECT * FROM ingests ORDER BY started_at DESC LIMIT ?", (limit,))]
+    out = []
+    for r in conn.execute(BATCHES_SQL, (limit,)):
+        row = dict(r)
+        if row["reasons"] is not None:
+            row["reasons"] = " ".join(f"{k}={v}" for k, v in sorted(json.loads(row["reasons"]).items())) or "-"
+        if row["bytes_total"] is not None:
+            row["bytes_total"] = f"{row['bytes_total'] / 1e9:.2f} GB"
+        if row["duration_s"] is not None:
+            row["duration_s"] = f"{row['duration_s']:.1f}s"
+        out.append(row)
+    return out
+
+
+def print_stages(rows) -> None:
+    for r in rows:
+        stages = json.loads(r["stages"]) if r.get("stages") else None
+        if not stages:
+            continue
+        parts = sorted(stages.items(), key=lambda kv: -kv[1]["total_s"])
+        print(f"{r['id'][:8]}  " + "  ".join(f"{k}={v['total_s']:.2f}s/{v['count']}" for k, v in parts))
+
+
 def print_rows(rows) -> None:
     if not rows:
         print("No ingests found.")
         return
-    headers = list(rows[0].keys())
+    headers = [h for h in rows[0].keys() if h != "stages"]
     print("\t".join(headers))
     print("-" * 80)
     for r in rows:
@@ -69,6 +115,7 @@ def main():
     ap.add_argument("-n", "--limit", type=int, default=2, help="How many most recent ingests to show (default: 2)")
     ap.add_argument("--db", help="Path to app.sqlite3 (overrides everything)")
     ap.add_argument("--data-dir", help="Pixarr data dir (uses <data-dir>/db/app.sqlite3)")
+    ap.add_argument("--stages", action="store_true", help="Also print per-stage timings (seconds/count) per batch")
     args = ap.parse_args()
 
     db_path = resolve_db_path(args.db, args.data_dir)
@@ -77,15 +124,13 @@ def main():
         print("Tip: run an ingest, or point --data-dir/--db at the correct location.")
         return
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = pixarr_sqlite.connect(db_path, "read", row_factory=sqlite3.Row)
     try:
-        cur = conn.execute(
-            "SELECT * FROM ingests ORDER BY started_at DESC LIMIT ?",
-            (args.limit,),
-        )
-        rows = cur.fetchall()
+        rows = batch_rows(conn, args.limit)
         print_rows(rows)
+        if args.stages and rows:
+            print()
+            print_stages(rows)
     finally:
         conn.close()
 
@@ -22,6 +22,9 @@ import sqlite3
 from pathlib import Path
 from typing import Optional
 import tomli as toml  
+
+import pixarr_sqlite
+
 # ---------- tiny helpers (no exiftool imports) ----------
 
 def repo_root() -> Path:
@@ -135,12 +138,11 @@ def main():
         print("Tip: run an ingest, or point --data-dir/--db at the correct location.")
         return
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = pixarr_sqlite.connect(db_path, "read", row_factory=sqlite3.Row)
     try:
         cur = conn.execute(
             # You can add WHERE state='review' here if you only care about review items
-            "SELECT * FROM media ORDER BY added_at DESC LIMIT ?",
+            "SELECT * FROM media ORDER BY added_ts DESC LIMIT ?",
             (args.limit,),
         )
         rows = cur.fetchall()
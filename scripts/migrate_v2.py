@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+migrate_v2.py — move a schema-v1 DB to the compact v2 layout, online and in chunks.
+
+v2 (db/schema.sql) stores digests as 32-byte BLOBs, row timestamps as integer
+epoch seconds and sightings against an integer media key. This converts a live
+v1 DB without a long exclusive lock, so ingest and the API can keep running:
+
+  1. start     shadow tables media_new / sightings_v2 / exif_kv_new (v2 DDL and
+               indexes), plus plain-SQL triggers on the v1 tables that log every
+               changed key to migrate_v2_log (works for writers in other processes)
+  2. backfill  copy v1 rows by rowid in --chunk sized transactions, --pause between
+               them; progress is kept in migrate_v2_state, so an interrupted run
+               continues where it stopped
+  3. replay    re-copy the keys in the change log until it is drained
+  4. swap      one BEGIN IMMEDIATE transaction: final replay, row-count check,
+               drop the v1 tables, rename the shadows, apply db/schema.sql (views,
+               the `sightings` compatibility view) and set user_version=2
+
+Usage (from repo root):
+  python scripts/migrate_v2.py status                      # version, progress, sizes per table
+  python scripts/migrate_v2.py run                         # migrate ./data (resumable)
+  python scripts/migrate_v2.py run --chunk 2000 --pause 0.05 --vacuum
+  python scripts/migrate_v2.py bench --media 100000        # synthetic v1 DB: size + query timings, v1 vs v2
+
+Notes:
+  - Take a copy of data/db/app.sqlite3 first; the swap is atomic, but it is a one-way change.
+  - Writers only wait for one chunk (or the swap) at a time; readers never block (WAL).
+  - Processes running the old code must be restarted after the swap (they write v1
+    column names); new code refuses to open a v1 DB (ingest_pass.check_schema).
+  - added_at/updated_at/seen_at lose their sub-second part (v2 keeps whole seconds).
+  - The freed v1 pages stay in the file until VACUUM (--vacuum, needs exclusive
+    access for the duration) — the file doesn't shrink before that.
+  - Sightings whose media row no longer exists are not copied (reported).
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+import ingest_pass as ip
+import pixarr_counters
+import pixarr_sqlite
+
+LOG = "migrate_v2_log"
+STATE = "migrate_v2_state"
+SHADOW = {"media": "media_new", "sightings": "sightings_v2", "exif_kv": "exif_kv_new"}
+
+MEDIA_COLS = (
+    "rid", "id", "sha256", "phash", "content_bin", "ext", "bytes", "taken_at", "taken_ts",
+    "tz_offset", "gps_lat", "gps_lon", "orientation", "camera_make", "camera_model", "state",
+    "canonical_path", "added_ts", "updated_ts", "xmp_written", "quarantine_reason", "deleted_at",
+    "last_verified_at", "tree_sha256", "tree_chunk_bytes",
+)
+MEDIA_SELECT = "SELECT rowid AS _rid, * FROM media"
+SIGHTING_COLS = ("id", "media_rid", "source_root", "full_path", "filename", "folder_hint", "ingest_id", "seen_ts")
+
+# The v1 tables this converts (as db/schema.sql had them); bench and tests build from it.
+V1_DDL = """
+CREATE TABLE media (
+  id TEXT PRIMARY KEY, hash_sha256 TEXT UNIQUE NOT NULL, phash TEXT, content_sha256 TEXT,
+  ext TEXT NOT NULL, bytes INTEGER NOT NULL, taken_at TEXT, tz_offset TEXT, gps_lat REAL, gps_lon REAL,
+  orientation INTEGER, camera_make TEXT, camera_model TEXT, state TEXT NOT NULL, canonical_path TEXT,
+  added_at TEXT NOT NULL, updated_at TEXT NOT NULL, xmp_written INTEGER DEFAULT 0, quarantine_reason TEXT,
+  deleted_at TEXT, last_verified_at TEXT, tree_sha256 TEXT, tree_chunk_bytes INTEGER,
+  CHECK (state IN ('staging','review','library','quarantine','deleted'))
+);
+CREATE INDEX idx_media_taken_at ON media(taken_at);
+CREATE INDEX idx_media_state ON media(state);
+CREATE INDEX idx_media_content_sha256 ON media(content_sha256) WHERE content_sha256 IS NOT NULL;
+CREATE TABLE ingests (id TEXT PRIMARY KEY, source TEXT, started_at TEXT, finished_at TEXT, notes TEXT);
+CREATE TABLE sightings (
+  id INTEGER PRIMARY KEY, media_id TEXT NOT NULL, source_root TEXT NOT NULL, full_path TEXT NOT NULL,
+  filename TEXT NOT NULL, folder_hint TEXT, ingest_id TEXT, seen_at TEXT NOT NULL,
+  FOREIGN KEY(media_id) REFERENCES media(id) ON DELETE CASCADE,
+  FOREIGN KEY(ingest_id) REFERENCES ingests(id) ON DELETE SET NULL
+);
+CREATE INDEX idx_sightings_media ON sightings(media_id);
+CREATE INDEX idx_sightings_seen_at ON sightings(seen_at);
+CREATE INDEX idx_sightings_ingest ON sightings(ingest_id);
+CREATE TABLE exif_kv (
+  media_id TEXT NOT NULL, tag TEXT NOT NULL, value TEXT, PRIMARY KEY(media_id, tag),
+  FOREIGN KEY(media_id) REFERENCES media(id) ON DELETE CASCADE
+);
+CREATE INDEX idx_exif_media ON exif_kv(media_id);
+CREATE VIEW v_review_queue AS
+SELECT id, canonical_path, taken_at FROM media WHERE state='review' ORDER BY (taken_at IS NULL), taken_at;
+PRAGMA user_version=1;
+"""
+
+
+# ---------- schema.sql pieces ----------
+
+def schema_statements(path: Optional[Path] = None) -> list:
+    """db/schema.sql split into complete statements (trigger bodies stay whole)."""
+    out, buf = [], ""
+    for line in (path or ip.SCHEMA_PATH).read_text(encoding="utf-8").splitlines(keepends=True):
+        if not buf and (not line.strip() or line.lstrip().startswith("--")):
+            continue
+        buf += line
+        if sqlite3.complete_statement(buf):
+            out.append(buf.strip())
+            buf = ""
+    return out
+
+
+def shadow_ddl() -> list:
+    """v2 CREATE TABLE/INDEX for media, sightings_v2, exif_kv, pointed at the shadow names."""
+    out = []
+    for stmt in schema_statements():
+        head = " ".join(stmt.split("(", 1)[0].split()).lower()
+        if not head.startswith(("create table", "create index")):
+            continue
+        table = head.split(" on ")[-1] if head.startswith("create index") else head.split()[-1]
+        if table not in ("media", "sightings_v2", "exif_kv"):
+            continue
+        # only the table names move; index names are already the final v2 ones
+        stmt = stmt.replace("REFERENCES media(", "REFERENCES media_new(")
+        stmt = stmt.replace(" media (", " media_new (").replace(" media(", " media_new(")
+        stmt = stmt.replace(" exif_kv (", " exif_kv_new (")
+        out.append(stmt)
+    return out
+
+
+def columns(conn: sqlite3.Connection, table: str) -> set:
+    return {r[1] for r in conn.execute(f"PRAGMA table_xinfo({table})")}
+
+
+def in_progress(conn: sqlite3.Connection) -> bool:
+    return bool(conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (STATE,)).fetchone())
+
+
+# ---------- row conversion ----------
+
+def _rows(cur) -> list:
+    names = [d[0] for d in cur.description]
+    return [dict(zip(names, r)) for r in cur.fetchall()]
+
+
+def media_row(r: dict) -> tuple:
+    added = ip.iso_to_epoch(r["added_at"])
+    updated = ip.iso_to_epoch(r["updated_at"]) or added
+    return (
+        r["_rid"], r["id"], bytes.fromhex(r["hash_sha256"]), r.get("phash"),
+        ip.digest_bytes(r.get("content_sha256")), r["ext"], r["bytes"], r["taken_at"],
+        ip.iso_to_epoch(r["taken_at"]), r.get("tz_offset"), r.get("gps_lat"), r.get("gps_lon"),
+        r.get("orientation"), r.get("camera_make"), r.get("camera_model"), r["state"],
+        r.get("canonical_path"), added or 0, updated or 0, r.get("xmp_written"),
+        r.get("quarantine_reason"), r.get("deleted_at"), r.get("last_verified_at"),
+        r.get("tree_sha256"), r.get("tree_chunk_bytes"),
+    )
+
+
+_UPSERT_MEDIA = (
+    f"INSERT INTO media_new ({', '.join(MEDIA_COLS)}) VALUES ({', '.join('?' * len(MEDIA_COLS))}) "
+    f"ON CONFLICT(rid) DO UPDATE SET " + ", ".join(f"{c}=excluded.{c}" for c in MEDIA_COLS[1:])
+)
+_UPSERT_SIGHTING = (
+    f"INSERT INTO sightings_v2 ({', '.join(SIGHTING_COLS)}) VALUES ({', '.join('?' * len(SIGHTING_COLS))}) "
+    f"ON CONFLICT(id) DO UPDATE SET " + ", ".join(f"{c}=excluded.{c}" for c in SIGHTING_COLS[1:])
+)
+
+
+def put_media(conn: sqlite3.Connection, rows: list) -> None:
+    try:
+        conn.executemany(_UPSERT_MEDIA, rows)
+    except sqlite3.IntegrityError:
+        # a v1 row was deleted and re-added under a new rowid before the log caught up:
+        # v1 guarantees id/hash are unique, so any other holder in the shadow is stale
+        for row in rows:
+            conn.execute("DELETE FROM media_new WHERE (id=? OR sha256=?) AND rid<>?", (row[1], row[2], row[0]))
+            conn.execute(_UPSERT_MEDIA, row)
+
+
+def _sightings_select(conn) -> str:
+    have = columns(conn, "sightings")
+    opt = ", ".join(f"s.{c}" if c in have else f"NULL AS {c}" for c in ("folder_hint", "ingest_id"))
+    return (f"SELECT s.id, m.rowid AS media_rid, s.source_root, s.full_path, s.filename, {opt}, s.seen_at "
+            f"FROM sightings s LEFT JOIN media m ON m.id = s.media_id")
+
+
+def copy_sightings(conn, rows: list) -> int:
+    """Upsert converted sightings; returns how many were skipped as orphans."""
+    good = [(r[0], r[1], *r[2:7], ip.iso_to_epoch(r[7]) or 0) for r in rows if r[1] is not None]
+    conn.executemany(_UPSERT_SIGHTING, good)
+    return len(rows) - len(good)
+
+
+# ---------- phases ----------
+
+def start(conn: sqlite3.Connection) -> None:
+    """Create shadow tables, change log + triggers and the progress table (idempotent)."""
+    if in_progress(conn):
+        return
+    if "rid" in columns(conn, "media"):
+        raise SystemExit("media already has the v2 layout (rid column); nothing to migrate")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name='exif_kv'").fetchone():
+            conn.execute("CREATE TABLE exif_kv (media_id TEXT NOT NULL, tag TEXT NOT NULL, value TEXT, "
+                         "PRIMARY KEY(media_id, tag))")
+        for stmt in shadow_ddl():
+            conn.execute(stmt)
+        conn.execute(f"CREATE TABLE {LOG} (seq INTEGER PRIMARY KEY, tbl TEXT NOT NULL, key NOT NULL)")
+        conn.execute(f"CREATE TABLE {STATE} (tbl TEXT PRIMARY KEY, last_key INTEGER NOT NULL, done INTEGER NOT NULL)")
+        conn.executemany(f"INSERT INTO {STATE} VALUES (?, 0, 0)", [(t,) for t in SHADOW])
+        for tbl, key in (("media", "rowid"), ("sightings", "id"), ("exif_kv", "media_id")):
+            for ev, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+                conn.execute(
+                    f"CREATE TRIGGER migrate_v2_{tbl}_{ev.lower()} AFTER {ev} ON {tbl} "
+                    f"BEGIN INSERT INTO {LOG} (tbl, key) VALUES ('{tbl}', {ref}.{key}); END"
+                )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def backfill_chunk(conn: sqlite3.Connection, tbl: str, chunk: int) -> int:
+    """Copy the next `chunk` v1 rows of `tbl` (one transaction); returns rows read (0 = done)."""
+    last = conn.execute(f"SELECT last_key FROM {STATE} WHERE tbl=?", (tbl,)).fetchone()[0]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if tbl == "media":
+            rows = _rows(conn.execute(f"{MEDIA_SELECT} WHERE rowid > ? ORDER BY rowid LIMIT ?", (last, chunk)))
+            put_media(conn, [media_row(r) for r in rows])
+            keys = [r["_rid"] for r in rows]
+        elif tbl == "sightings":
+            rows = conn.execute(f"{_sightings_select(conn)} WHERE s.id > ? ORDER BY s.id LIMIT ?", (last, chunk)).fetchall()
+            copy_sightings(conn, rows)
+            keys = [r[0] for r in rows]
+        else:
+            rows = conn.execute("SELECT rowid, media_id, tag, value FROM exif_kv WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                                (last, chunk)).fetchall()
+            conn.executemany("INSERT INTO exif_kv_new (media_id, tag, value) VALUES (?, ?, ?) "
+                             "ON CONFLICT(media_id, tag) DO UPDATE SET value=excluded.value", [r[1:] for r in rows])
+            keys = [r[0] for r in rows]
+        if keys:
+            conn.execute(f"UPDATE {STATE} SET last_key=? WHERE tbl=?", (keys[-1], tbl))
+        else:
+            conn.execute(f"UPDATE {STATE} SET done=1 WHERE tbl=?", (tbl,))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return len(keys)
+
+
+def replay(conn: sqlite3.Connection, batch: int = 1000) -> int:
+    """
+    Re-copy up to `batch` logged keys from the v1 tables (current state wins;
+    deleted rows are deleted). Caller owns the transaction. Returns entries consumed.
+    """
+    log = conn.execute(f"SELECT seq, tbl, key FROM {LOG} ORDER BY seq LIMIT ?", (batch,)).fetchall()
+    if not log:
+        return 0
+    todo = {}
+    for _seq, tbl, key in log:          # last occurrence wins, in log order
+        todo.pop((tbl, key), None)
+        todo[(tbl, key)] = True
+    for tbl, key in todo:
+        if tbl == "media":
+            rows = _rows(conn.execute(f"{MEDIA_SELECT} WHERE rowid = ?", (key,)))
+            if rows:
+                put_media(conn, [media_row(rows[0])])
+            else:
+                conn.execute("DELETE FROM media_new WHERE rid = ?", (key,))
+        elif tbl == "sightings":
+            rows = conn.execute(f"{_sightings_select(conn)} WHERE s.id = ?", (key,)).fetchall()
+            if not rows or copy_sightings(conn, rows):
+                conn.execute("DELETE FROM sightings_v2 WHERE id = ?", (key,))
+        else:
+            conn.execute("DELETE FROM exif_kv_new WHERE media_id = ?", (key,))
+            conn.execute("INSERT INTO exif_kv_new (media_id, tag, value) "
+                         "SELECT media_id, tag, value FROM exif_kv WHERE media_id = ?", (key,))
+    conn.execute(f"DELETE FROM {LOG} WHERE seq <= ?", (log[-1][0],))
+    return len(log)
+
+
+def expected_counts(conn: sqlite3.Connection) -> dict:
+    orphans = conn.execute("SELECT COUNT(*) FROM sightings s LEFT JOIN media m ON m.id = s.media_id "
+                           "WHERE m.rowid IS NULL").fetchone()[0]
+    return {
+        "media": (conn.execute("SELECT COUNT(*) FROM media").fetchone()[0],
+                  conn.execute("SELECT COUNT(*) FROM media_new").fetchone()[0]),
+        "sightings": (conn.execute("SELECT COUNT(*) FROM sightings").fetchone()[0] - orphans,
+                      conn.execute("SELECT COUNT(*) FROM sightings_v2").fetchone()[0]),
+        "exif_kv": (conn.execute("SELECT COUNT(*) FROM exif_kv").fetchone()[0],
+                    conn.execute("SELECT COUNT(*) FROM exif_kv_new").fetchone()[0]),
+        "orphan_sightings": orphans,
+    }
+
+
+def swap(conn: sqlite3.Connection) -> dict:
+    """Final replay + replace the v1 tables in one transaction. Returns the row counts checked."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        while replay(conn, 5000):
+            pass
+        counts = expected_counts(conn)
+        bad = {t: c for t, c in counts.items() if t != "orphan_sightings" and c[0] != c[1]}
+        if bad:
+            raise RuntimeError(f"row counts differ after replay (v1, v2): {bad}")
+        views = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='view'").fetchall()
+        for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='trigger' AND name LIKE 'migrate_v2_%'").fetchall():
+            conn.execute(f"DROP TRIGGER {name}")
+        for name, _sql in views:
+            conn.execute(f"DROP VIEW {name}")
+        for t in ("sightings", "exif_kv", "media", LOG, STATE):
+            conn.execute(f"DROP TABLE {t}")
+        conn.execute("ALTER TABLE media_new RENAME TO media")
+        conn.execute("ALTER TABLE exif_kv_new RENAME TO exif_kv")
+        for stmt in schema_statements():
+            if not stmt.upper().startswith("PRAGMA"):
+                conn.execute(stmt)
+        pixarr_counters.rebuild(conn)      # counter triggers start on the swapped-in media
+        have = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='view'")}
+        for name, sql in views:        # local views not in schema.sql (v1 column names still resolve)
+            if name not in have:
+                try:
+                    conn.execute(sql)
+                except sqlite3.Error as e:
+                    ip.log(f"  view {name} not recreated ({e}); its SQL was: {sql}")
+        conn.execute(f"PRAGMA user_version={ip.SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return counts
+
+
+def migrate(conn: sqlite3.Connection, chunk: int = 5000, pause: float = 0.0,
+            on_chunk: Optional[Callable[[str, int], None]] = None) -> dict:
+    """
+    Full online migration on an autocommit connection (isolation_level=None,
+    foreign_keys=OFF). `on_chunk(table, rows)` runs after every committed chunk.
+    """
+    start(conn)
+    for tbl in SHADOW:
+        if conn.execute(f"SELECT done FROM {STATE} WHERE tbl=?", (tbl,)).fetchone()[0]:
+            continue
+        while True:
+            n = backfill_chunk(conn, tbl, chunk)
+            if on_chunk:
+                on_chunk(tbl, n)
+            if not n:
+                break
+            if pause:
+                time.sleep(pause)
+    while True:                         # drain the log in small transactions before the swap
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            n = replay(conn, chunk)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if n < chunk:
+            break
+    return swap(conn)
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    # autocommit: every phase manages its own BEGIN IMMEDIATE; dropping v1 media must not cascade
+    return pixarr_sqlite.connect(db_path, "write", isolation_level=None, foreign_keys=0)
+
+
+# ---------- sizes / status ----------
+
+def sizes(conn: sqlite3.Connection) -> dict:
+    """{table: (table bytes, index bytes)} via dbstat (indexes counted with their table)."""
+    owner = dict(conn.execute("SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table','index')"))
+    out = {}
+    for name, typ, nbytes in conn.execute(
+        "SELECT d.name, m.type, SUM(d.pgsize) FROM dbstat d LEFT JOIN sqlite_master m ON m.name = d.name GROUP BY d.name"
+    ):
+        t = owner.get(name, name)
+        tb, ib = out.get(t, (0, 0))
+        out[t] = (tb + nbytes, ib) if typ == "table" or name == t else (tb, ib + nbytes)
+    return out
+
+
+def cmd_status(conn, args) -> None:
+    v = conn.execute("PRAGMA user_version").fetchone()[0]
+    print(f"{ip.DB_PATH}: schema v{v}")
+    if in_progress(conn):
+        for tbl, last, done in conn.execute(f"SELECT tbl, last_key, done FROM {STATE}"):
+            print(f"  backfill {tbl:10s} {'done' if done else f'at key {last}'}")
+        print(f"  change log: {conn.execute(f'SELECT COUNT(*) FROM {LOG}').fetchone()[0]} pending")
+    page = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages, free = (conn.execute(f"PRAGMA {p}").fetchone()[0] for p in ("page_count", "freelist_count"))
+    print(f"  file {pages * page / 1e6:.1f} MB ({free * page / 1e6:.1f} MB free pages)")
+    try:
+        per_table = sizes(conn)
+    except sqlite3.OperationalError:
+        print("  (per-table sizes need SQLite built with dbstat)")
+        return
+    for t, (tb, ib) in sorted(per_table.items(), key=lambda kv: -sum(kv[1])):
+        if tb + ib >= 64 * 1024:
+            print(f"  {t:22s} table {tb / 1e6:8.2f} MB  indexes {ib / 1e6:8.2f} MB")
+
+
+def cmd_run(conn, args) -> None:
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= ip.SCHEMA_VERSION:
+        print("Already on schema v2.")
+        return
+    t0 = time.perf_counter()
+    done = {t: 0 for t in SHADOW}
+
+    def progress(tbl, n):
+        done[tbl] += n
+        if n and done[tbl] % (args.chunk * 20) < args.chunk:
+            ip.log(f"  {tbl}: {done[tbl]} rows copied")
+
+    counts = migrate(conn, chunk=args.chunk, pause=args.pause, on_chunk=progress)
+    ip.log(f"Swapped to schema v2 in {time.perf_counter() - t0:.1f}s: media={counts['media'][1]} "
+           f"sightings={counts['sightings'][1]} exif_kv={counts['exif_kv'][1]} "
+           f"(orphan sightings dropped: {counts['orphan_sightings']})")
+    if args.vacuum:
+        t1 = time.perf_counter()
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")   # takes effect with this VACUUM (pixarr_db.py maintain)
+        conn.execute("VACUUM")
+        ip.log(f"VACUUM done in {time.perf_counter() - t1:.1f}s")
+    else:
+        ip.log("Freed v1 pages are reused by new rows; run with --vacuum (or VACUUM) to shrink the file.")
+
+
+# ---------- bench ----------
+
+def synth_v1(path: Path, n_media: int, seed: int = 0) -> None:
+    """A v1 DB with n_media rows, ~1.5 sightings and 8 exif tags each."""
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript("PRAGMA journal_mode=WAL;" + V1_DDL)
+    base = datetime(2015, 1, 1)
+    conn.execute("INSERT INTO ingests (id, source, started_at) VALUES ('bench', 'bench', ?)", (base.isoformat(),))
+    states = ["review"] * 5 + ["library"] * 3 + ["quarantine", "deleted"]
+    for lo in range(0, n_media, 5000):
+        media, sights, tags = [], [], []
+        for i in range(lo, min(lo + 5000, n_media)):
+            h = rnd.getrandbits(256).to_bytes(32, "big").hex()
+            mid = str(uuid.uuid5(uuid.NAMESPACE_DNS, h))
+            taken = (base + timedelta(seconds=rnd.randrange(300_000_000))).isoformat()
+            added = (base + timedelta(seconds=300_000_000 + i * 7, microseconds=rnd.randrange(10 ** 6))).isoformat()
+            media.append((mid, h, rnd.getrandbits(256).to_bytes(32, "big").hex(), ".jpg", rnd.randrange(10 ** 7),
+                          taken, rnd.choice(states), f"/data/media/Review/{taken[:10]}_{h[:8]}.jpg", added, added))
+            for k in range(1 + (i % 2)):
+                sights.append((mid, "Staging/pc", f"/data/media/Staging/pc/trip{i % 300}/IMG_{i}_{k}.JPG",
+                               f"IMG_{i}_{k}.JPG", f"trip{i % 300}", "bench", added))
+            tags += [(mid, f"EXIF:Tag{t}", f"value {rnd.randrange(1000)}") for t in range(8)]
+        conn.executemany("INSERT INTO media (id, hash_sha256, content_sha256, ext, bytes, taken_at, state, "
+                         "canonical_path, added_at, updated_at) VALUES (?,?,?,?,?,?,?,?,?,?)", media)
+        conn.executemany("INSERT INTO sightings (media_id, source_root, full_path, filename, folder_hint, "
+                         "ingest_id, seen_at) VALUES (?,?,?,?,?,?,?)", sights)
+        conn.executemany("INSERT INTO exif_kv VALUES (?,?,?)", tags)
+        conn.commit()
+    conn.close()
+
+
+BENCH_QUERIES = {
+    # name: (v1 sql, v2 sql); params come from sample rows
+    "hash lookup": ("SELECT id FROM media WHERE hash_sha256 = ?", "SELECT id FROM media WHERE sha256 = ?"),
+    "sightings of media": ("SELECT full_path FROM sightings WHERE media_id = ?",
+                           "SELECT full_path FROM sightings WHERE media_id = ?"),
+    "recent sightings": ("SELECT media_id, full_path FROM sightings WHERE seen_at >= ? ORDER BY seen_at DESC LIMIT 50",
+                         "SELECT media_id, full_path FROM sightings WHERE seen_ts >= ? ORDER BY seen_ts DESC LIMIT 50"),
+    "review page": ("SELECT id, canonical_path, taken_at FROM media WHERE state='review' "
+                    "ORDER BY taken_at LIMIT 100 OFFSET ?",
+                    "SELECT id, canonical_path, taken_at FROM media WHERE state='review' "
+                    "ORDER BY taken_ts LIMIT 100 OFFSET ?"),
+    "exif of media": ("SELECT tag, value FROM exif_kv WHERE media_id = ?",
+                      "SELECT tag, value FROM exif_kv WHERE media_id = ?"),
+}
+
+
+def time_queries(conn, version: int, samples: list, reps: int, rounds: int = 3) -> dict:
+    """Mean µs per execution, best of `rounds` (the first round also warms the page cache)."""
+    out = {}
+    for name, sqls in BENCH_QUERIES.items():
+        sql = sqls[version - 1]
+        params = []
+        for i in range(reps):
+            mid, h, seen, off = samples[i % len(samples)]
+            if name == "hash lookup":
+                params.append((h if version == 1 else bytes.fromhex(h),))
+            elif name == "recent sightings":
+                params.append((seen if version == 1 else ip.iso_to_epoch(seen),))
+            else:
+                params.append((off,) if name == "review page" else (mid,))
+        best = float("inf")
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            for p in params:
+                conn.execute(sql, p).fetchall()
+            best = min(best, time.perf_counter() - t0)
+        out[name] = best / reps * 1e6
+    return out
+
+
+def cmd_bench(_conn, args) -> None:
+    with tempfile.TemporaryDirectory(prefix="pixarr-migrate-") as tmp:
+        db = Path(args.keep or tmp) / "v1.sqlite3"
+        db.parent.mkdir(parents=True, exist_ok=True)
+        db.unlink(missing_ok=True)
+        t0 = time.perf_counter()
+        synth_v1(db, args.media)
+        print(f"Synthetic v1 DB: {args.media} media ({time.perf_counter() - t0:.1f}s)")
+        conn = connect(db)
+        rnd = random.Random(1)
+        n_review = conn.execute("SELECT COUNT(*) FROM media WHERE state='review'").fetchone()[0]
+        rows = conn.execute("SELECT m.id, m.hash_sha256, s.seen_at FROM media m JOIN sightings s ON s.media_id = m.id "
+                            "ORDER BY random() LIMIT 500").fetchall()
+        samples = [(m, h, s, rnd.randrange(max(1, n_review - 100))) for m, h, s in rows]
+
+        report = {}
+        for version in (1, 2):
+            if version == 2:
+                t1 = time.perf_counter()
+                migrate(conn, chunk=args.chunk)
+                print(f"Migrated in {time.perf_counter() - t1:.1f}s (chunk={args.chunk})")
+            conn.execute("VACUUM")
+            conn.execute("ANALYZE")
+            page = conn.execute("PRAGMA page_size").fetchone()[0]
+            report[version] = {
+                "file": conn.execute("PRAGMA page_count").fetchone()[0] * page,
+                "sizes": sizes(conn),
+                "queries": time_queries(conn, version, samples, args.reps),
+            }
+        conn.close()
+
+    v1, v2 = report[1], report[2]
+    print(f"\n{'':24s} {'v1':>10s} {'v2':>10s} {'v2/v1':>7s}")
+    print(f"{'file (MB)':24s} {v1['file'] / 1e6:10.2f} {v2['file'] / 1e6:10.2f} {v2['file'] / v1['file']:7.2f}")
+    for t in ("media", "sightings", "exif_kv"):
+        a, b = sum(v1["sizes"].get(t, (0, 0))), sum(v2["sizes"].get("sightings_v2" if t == "sightings" else t, (0, 0)))
+        print(f"{t + ' +idx (MB)':24s} {a / 1e6:10.2f} {b / 1e6:10.2f} {b / a if a else 0:7.2f}")
+    for name in BENCH_QUERIES:
+        a, b = v1["queries"][name], v2["queries"][name]
+        print(f"{name + ' (us)':24s} {a:10.1f} {b:10.1f} {b / a if a else 0:7.2f}")
+
+
+def main():
+    cfg = ip.load_config(ip.repo_root() / "pixarr.toml")
+    ap = argparse.ArgumentParser(description="Migrate a schema-v1 DB to v2 online (chunked, resumable)")
+    ap.add_argument("--data-dir",
+                    default=str(Path(cfg.get("paths", {}).get("data_dir", str(ip.repo_root() / "data")))),
+                    help="Root data directory (default: ./data under repo)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("status", help="Schema version, migration progress, per-table sizes")
+    sp.set_defaults(func=cmd_status)
+
+    sp = sub.add_parser("run", help="Migrate (resumes an interrupted run)")
+    sp.add_argument("--chunk", type=int, default=5000, help="Rows per backfill transaction (default 5000)")
+    sp.add_argument("--pause", type=float, default=0.01, help="Seconds to sleep between chunks (default 0.01)")
+    sp.add_argument("--vacuum", action="store_true", help="VACUUM after the swap (exclusive; shrinks the file)")
+    sp.set_defaults(func=cmd_run)
+
+    sp = sub.add_parser("bench", help="Synthetic v1 DB: sizes and query timings before/after migrating")
+    sp.add_argument("--media", type=int, default=50000, help="Media rows to generate (default 50000)")
+    sp.add_argument("--chunk", type=int, default=5000)
+    sp.add_argument("--reps", type=int, default=2000, help="Executions per query (default 2000)")
+    sp.add_argument("--keep", help="Directory to build the DB in (kept afterwards)")
+    sp.set_defaults(func=cmd_bench)
+
+    args = ap.parse_args()
+    ip.pathize(Path(args.data_dir).resolve())
+    if args.cmd == "bench":
+        args.func(None, args)
+        return
+    ip.LOGGER = ip.setup_logging(
+        data_dir=Path(args.data_dir).resolve(), logs_dir_arg=None,
+        verbose=0, quiet=False, log_level_arg=None, json_logs=False,
+    )
+    if not ip.DB_PATH.exists():
+        sys.exit(f"DB not found: {ip.DB_PATH}")
+    conn = connect(ip.DB_PATH)
+    try:
+        args.func(conn, args)
+    finally:
+        conn.close()
+        ip.stop_logging()
+
+
+if __name__ == "__main__":
+    main()
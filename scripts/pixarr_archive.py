@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pixarr_archive.py — read media straight out of ZIP/TAR archives (e.g. Google Takeout).
+
+ingest_pass.py treats an archive path as a source: members are hashed, read for
+metadata and content-hashed from the archive stream, and only what survives
+dedupe is extracted (directly to its Review/ or Quarantine/ destination).
+
+  ArchiveReader(path)   .zip, .tar, .tar.gz/.tgz, .tar.bz2, .tar.xz
+    .members()          regular-file members in archive order
+    .load(member)       one sequential read: (sha256, size, opener); opener() returns a
+                        fresh seekable stream of the member for the later stages
+  TakeoutIndex          Google Takeout per-file JSON sidecars, keyed by the media
+                        member they describe (photoTakenTime, geoData)
+
+Member bytes are read once for the hash. Members up to SPOOL_MAX are kept in
+memory for the later stages; bigger ones are re-opened in the archive when it
+allows cheap random access (ZIP, uncompressed TAR) and otherwise spilled to one
+temp file while hashing, since seeking backwards in a compressed tar means
+decompressing from the start.
+"""
+
+import hashlib
+import io
+import json
+import re
+import tarfile
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+SPOOL_MAX = 32 * 1024 * 1024     # members up to this size are kept in memory after hashing
+BUFSIZE = 1024 * 1024
+ARCHIVE_ERRORS = (zipfile.BadZipFile, tarfile.TarError, EOFError)
+
+
+def is_archive(path: Path) -> bool:
+    """True for an existing file with an archive suffix we can stream."""
+    return path.is_file() and path.name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+class Member:
+    __slots__ = ("name", "size", "mtime", "_ref")
+
+    def __init__(self, name: str, size: int, mtime: Optional[float], ref):
+        self.name = name      # posix path inside the archive
+        self.size = size
+        self.mtime = mtime
+        self._ref = ref       # ZipInfo / TarInfo
+
+    def __repr__(self):
+        return f"Member({self.name!r}, {self.size})"
+
+
+class ArchiveReader:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.kind = "zip" if self.path.name.lower().endswith(".zip") else "tar"
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._tar: Optional[tarfile.TarFile] = None
+        # random access is cheap for zip members and plain tar; not for compressed tar
+        self.random_access = self.kind == "zip" or self.path.name.lower().endswith(".tar")
+
+    def __enter__(self):
+        if self.kind == "zip":
+            self._zip = zipfile.ZipFile(self.path)
+        else:
+            self._tar = tarfile.open(self.path, "r:*")
+        return self
+
+    def __exit__(self, *exc):
+        if self._zip:
+            self._zip.close()
+        if self._tar:
+            self._tar.close()
+        return False
+
+    def members(self) -> Iterator[Member]:
+        if self._zip:
+            for zi in self._zip.infolist():
+                if zi.is_dir():
+                    continue
+                try:
+                    mtime = datetime(*zi.date_time).timestamp()
+                except ValueError:
+                    mtime = None
+                yield Member(zi.filename, zi.file_size, mtime, zi)
+        else:
+            # getmembers() scans every header once (for compressed tars that is a full decompress)
+            for ti in self._tar.getmembers():
+                if ti.isfile():
+                    yield Member(ti.name, ti.size, float(ti.mtime), ti)
+
+    def open(self, member: Member) -> BinaryIO:
+        """Stream of the member's bytes (seekable for zip/plain tar)."""
+        if self._zip:
+            return self._zip.open(member._ref)
+        return self._tar.extractfile(member._ref)
+
+    def read_bytes(self, member: Member) -> bytes:
+        with self.open(member) as f:
+            return f.read()
+
+    def load(self, member: Member) -> Tuple[str, int, Callable[[], BinaryIO]]:
+        """Hash the member in one pass; return (sha256, size, opener) for the later stages."""
+        h = hashlib.sha256()
+        n = 0
+        keep = member.size <= SPOOL_MAX or not self.random_access
+        buf = io.BytesIO() if keep else None
+        with self.open(member) as f:
+            while True:
+                chunk = f.read(BUFSIZE)
+                if not chunk:
+                    break
+                h.update(chunk)
+                n += len(chunk)
+                if buf is None:
+                    continue
+                if isinstance(buf, io.BytesIO) and buf.tell() + len(chunk) > SPOOL_MAX:
+                    spill = tempfile.NamedTemporaryFile(prefix="pixarr-member-")
+                    spill.write(buf.getvalue())
+                    buf = spill
+                buf.write(chunk)
+        if buf is None:
+            return h.hexdigest(), n, lambda: self.open(member)
+        if isinstance(buf, io.BytesIO):
+            data = buf.getvalue()
+            return h.hexdigest(), n, lambda: io.BytesIO(data)
+        buf.flush()
+        return h.hexdigest(), n, _SpillOpener(buf)
+
+
+class _SpillOpener:
+    """opener() for a member spilled to a temp file; release() deletes it."""
+
+    def __init__(self, tmp):
+        self.tmp = tmp
+
+    def __call__(self) -> BinaryIO:
+        return open(self.tmp.name, "rb")
+
+    def close(self) -> None:
+        self.tmp.close()
+
+
+def release(opener) -> None:
+    """Delete a spilled member's temp file (no-op for the other openers)."""
+    if isinstance(opener, _SpillOpener):
+        opener.close()
+
+
+# ---------- Google Takeout sidecars ----------
+
+_NUMBERED = re.compile(r"\((\d+)\)\.json$", re.IGNORECASE)
+# edited copies share the original's sidecar (English default; other locales use their own word)
+_EDITED = re.compile(r"-(edited|bearbeitet|modifié|editado|modificato)(?=\.[^.]+$)", re.IGNORECASE)
+
+
+def is_sidecar(name: str) -> bool:
+    return name.lower().endswith(".json")
+
+
+def sidecar_key(json_name: str, payload: dict) -> Optional[str]:
+    """
+    Media member a Takeout JSON describes, from its "title" (the full original
+    filename, so truncated sidecar names don't matter). "IMG_1.jpg(1).json" with
+    title "IMG_1.jpg" belongs to the numbered copy "IMG_1(1).jpg".
+    """
+    title = payload.get("title")
+    if not isinstance(title, str) or not title or "photoTakenTime" not in payload:
+        return None
+    m = _NUMBERED.search(json_name)
+    if m:
+        t = PurePosixPath(title)
+        title = f"{t.stem}({m.group(1)}){t.suffix}"
+    parent = PurePosixPath(json_name).parent
+    return str(parent / title) if str(parent) != "." else title
+
+
+class TakeoutIndex:
+    """Sidecar payloads keyed by the archive path of the media they describe."""
+
+    def __init__(self):
+        self.by_member: Dict[str, dict] = {}
+
+    def add(self, json_name: str, raw: bytes) -> bool:
+        try:
+            payload = json.loads(raw.decode("utf-8", errors="ignore"))
+        except ValueError:
+            return False
+        if not isinstance(payload, dict):
+            return False
+        key = sidecar_key(json_name, payload)
+        if key:
+            self.by_member[key] = payload
+        return bool(key)
+
+    def lookup(self, member_name: str) -> Optional[dict]:
+        hit = self.by_member.get(member_name)
+        if hit is None:
+            hit = self.by_member.get(_EDITED.sub("", member_name))
+        return hit
+
+    def __len__(self):
+        return len(self.by_member)
+
+
+def takeout_taken_at(payload: Optional[dict]) -> Optional[str]:
+    """photoTakenTime (epoch seconds, UTC) as an ISO string with +00:00, or None."""
+    try:
+        ts = int(payload["photoTakenTime"]["timestamp"])
+    except (TypeError, KeyError, ValueError):
+        return None
+    if ts <= 0:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def takeout_gps(payload: Optional[dict]) -> Tuple[Optional[float], Optional[float]]:
+    """(lat, lon) from geoData (Takeout writes 0.0/0.0 when unknown)."""
+    geo = (payload or {}).get("geoData") or {}
+    lat, lon = geo.get("latitude"), geo.get("longitude")
+    if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)) or (lat == 0 and lon == 0):
+        return None, None
+    return float(lat), float(lon)
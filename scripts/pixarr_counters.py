@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pixarr_counters.py — media counts by state / quarantine reason / extension without
+a GROUP BY over media.
+
+media_counters holds one row per (dim, key) with a row count and total bytes:
+
+  dim      key
+  state    media.state
+  reason   media.quarantine_reason of state='quarantine' rows ('' when NULL)
+  ext      media.ext
+
+AFTER INSERT / UPDATE / DELETE triggers on media keep it exact in the same
+transaction as the change (an UPDATE that touches none of state, reason, ext,
+bytes doesn't fire), so readers (pixarr_query.py / pixarr_db.py states + reasons,
+GET /api/stats/media) read a handful of rows instead of scanning media. Keys
+whose count drops to 0 stay in the table; counts() skips them.
+
+The DDL mirrors db/schema.sql; ensure() adds it to DBs that predate it and
+rebuild() recomputes everything from media (pixarr_db.py rebuild-counters).
+Stdlib only; the API imports it from scripts/ like pixarr_sqlite.
+"""
+
+import sqlite3
+from typing import Dict, List, Tuple
+
+DIMS = ("state", "reason", "ext")
+
+_BUMP = "ON CONFLICT(dim, key) DO UPDATE SET n = n + excluded.n, bytes = bytes + excluded.bytes"
+
+
+def _apply(sign: str, row: str) -> str:
+    """Trigger body adding ('') or removing ('-') one media row (NEW / OLD) from the counters."""
+    return f"""
+  INSERT INTO media_counters (dim, key, n, bytes)
+    VALUES ('state', {row}.state, {sign}1, {sign}{row}.bytes), ('ext', {row}.ext, {sign}1, {sign}{row}.bytes)
+    {_BUMP};
+  INSERT INTO media_counters (dim, key, n, bytes)
+    SELECT 'reason', COALESCE({row}.quarantine_reason, ''), {sign}1, {sign}{row}.bytes WHERE {row}.state = 'quarantine'
+    {_BUMP};"""
+
+
+DDL = [
+    """CREATE TABLE IF NOT EXISTS media_counters (
+  dim    TEXT NOT NULL,
+  key    TEXT NOT NULL,
+  n      INTEGER NOT NULL DEFAULT 0,
+  bytes  INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY(dim, key)
+) WITHOUT ROWID""",
+    "DROP TRIGGER IF EXISTS media_counters_ai",
+    f"CREATE TRIGGER media_counters_ai AFTER INSERT ON media BEGIN{_apply('', 'NEW')}\nEND",
+    "DROP TRIGGER IF EXISTS media_counters_ad",
+    f"CREATE TRIGGER media_counters_ad AFTER DELETE ON media BEGIN{_apply('-', 'OLD')}\nEND",
+    "DROP TRIGGER IF EXISTS media_counters_au",
+    "CREATE TRIGGER media_counters_au AFTER UPDATE OF state, quarantine_reason, ext, bytes ON media\n"
+    "WHEN OLD.state IS NOT NEW.state OR OLD.quarantine_reason IS NOT NEW.quarantine_reason\n"
+    "  OR OLD.ext IS NOT NEW.ext OR OLD.bytes IS NOT NEW.bytes\n"
+    f"BEGIN{_apply('-', 'OLD')}{_apply('', 'NEW')}\nEND",
+]
+
+_RECOUNT = """
+  SELECT 'state', state, COUNT(*), COALESCE(SUM(bytes), 0) FROM media GROUP BY state
+  UNION ALL
+  SELECT 'reason', COALESCE(quarantine_reason, ''), COUNT(*), COALESCE(SUM(bytes), 0)
+    FROM media WHERE state = 'quarantine' GROUP BY 2
+  UNION ALL
+  SELECT 'ext', ext, COUNT(*), COALESCE(SUM(bytes), 0) FROM media GROUP BY ext
+"""
+
+
+def available(conn: sqlite3.Connection) -> bool:
+    """True if the DB has media_counters and its triggers (older DBs: fall back to GROUP BY)."""
+    n = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name IN "
+                     "('media_counters', 'media_counters_ai', 'media_counters_ad', 'media_counters_au')").fetchone()[0]
+    return n == 4
+
+
+def rebuild(conn: sqlite3.Connection) -> int:
+    """Recompute every counter from media in the caller's transaction; returns the rows written."""
+    conn.execute("DELETE FROM media_counters")
+    return conn.execute(f"INSERT INTO media_counters (dim, key, n, bytes) {_RECOUNT}").rowcount
+
+
+def ensure(conn: sqlite3.Connection) -> bool:
+    """Create table + triggers and fill them if missing (one write transaction). True if it did."""
+    if available(conn):
+        return False
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")        # no media writes between trigger creation and the recount
+    try:
+        for stmt in DDL:
+            conn.execute(stmt)
+        rebuild(conn)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return True
+
+
+def counts(conn: sqlite3.Connection, dim: str) -> List[Tuple[str, int, int]]:
+    """(key, count, bytes) for one dim, largest first; keys at 0 are skipped."""
+    if dim not in DIMS:
+        raise ValueError(f"unknown counter dim {dim!r} (expected one of {', '.join(DIMS)})")
+    return [tuple(r) for r in conn.execute(
+        "SELECT key, n, bytes FROM media_counters WHERE dim = ? AND n > 0 ORDER BY n DESC, key", (dim,))]
+
+
+def snapshot(conn: sqlite3.Connection) -> Dict[str, Dict[str, Tuple[int, int]]]:
+    """{dim: {key: (count, bytes)}} for every non-zero counter."""
+    out: Dict[str, Dict[str, Tuple[int, int]]] = {d: {} for d in DIMS}
+    for dim, key, n, b in conn.execute("SELECT dim, key, n, bytes FROM media_counters WHERE n > 0"):
+        out[dim][key] = (n, b)
+    return out
+
+
+def drift(conn: sqlite3.Connection) -> List[Tuple[str, str, Tuple[int, int], Tuple[int, int]]]:
+    """(dim, key, stored, actual) wherever the counters disagree with a full recount of media."""
+    stored = snapshot(conn)
+    actual: Dict[str, Dict[str, Tuple[int, int]]] = {d: {} for d in DIMS}
+    for dim, key, n, b in conn.execute(_RECOUNT):
+        actual[dim][key] = (n, b)
+    return [(d, k, stored[d].get(k, (0, 0)), actual[d].get(k, (0, 0)))
+            for d in DIMS for k in sorted(set(stored[d]) | set(actual[d]))
+            if stored[d].get(k, (0, 0)) != actual[d].get(k, (0, 0))]
@@ -10,6 +10,19 @@ Examples:
   ./scripts/pixarr_db.py reasons
   ./scripts/pixarr_db.py quarantined --limit 20
 
+  # recompute media_counters (what states/reasons read) from media
+  ./scripts/pixarr_db.py rebuild-counters
+
+  # merge repeated sightings of the same path and switch to compaction mode;
+  # trim sightings of media deleted > 90 days ago to the latest one
+  ./scripts/pixarr_db.py compact-sightings
+  ./scripts/pixarr_db.py prune-sightings --deleted-days 90
+
+  # online backup + housekeeping while ingest runs (cron-friendly: only due tasks run)
+  ./scripts/pixarr_db.py maintain
+  ./scripts/pixarr_db.py maintain --force --budget-ms 20 --duty 0.1
+  ./scripts/pixarr_db.py maintain --tasks checkpoint --loop 300
+
   # unique values / value counts
   ./scripts/pixarr_db.py unique media ext
   ./scripts/pixarr_db.py value-counts media quarantine_reason --where "state='quarantine'"
@@ -50,9 +63,15 @@ Examples:
 import argparse
 import os
 import sqlite3
+import time
 from pathlib import Path
 from typing import List, Sequence, Tuple, Optional
 
+import pixarr_counters
+import pixarr_maintain
+import pixarr_sightings
+import pixarr_sqlite
+
 def repo_root() -> Path:
     # same approach as ingest script: scripts/ is one level under repo root
     return Path(__file__).resolve().parents[1]
@@ -94,11 +113,10 @@ def print_table(headers: Sequence[str], rows: Sequence[Sequence[object]]) -> Non
 
 # ------- db helpers -------
 
-def connect(db_path: Path) -> sqlite3.Connection:
+def connect(db_path: Path, profile: str = "read") -> sqlite3.Connection:
     if not db_path.exists():
         raise SystemExit(f"DB not found: {db_path}")
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row
+    conn = pixarr_sqlite.connect(db_path, profile, row_factory=sqlite3.Row)
     return conn
 
 def fetch_all(conn: sqlite3.Connection, sql: str, params: Tuple = ()) -> Tuple[List[str], List[Tuple]]:
@@ -110,11 +128,18 @@ def fetch_all(conn: sqlite3.Connection, sql: str, params: Tuple = ()) -> Tuple[L
 # ------- commands -------
 
 def cmd_states(conn, args):
-    sql = "SELECT state, COUNT(*) AS cnt FROM media GROUP BY state ORDER BY cnt DESC"
+    if pixarr_counters.available(conn):
+        print_table(["state", "cnt", "bytes"], pixarr_counters.counts(conn, "state"))
+        return
+    sql = "SELECT state, COUNT(*) AS cnt, SUM(bytes) AS bytes FROM media GROUP BY state ORDER BY cnt DESC"
     headers, rows = fetch_all(conn, sql)
     print_table(headers, rows)
 
 def cmd_reasons(conn, args):
+    if pixarr_counters.available(conn):
+        rows = [(k or None, n) for k, n, _b in pixarr_counters.counts(conn, "reason")]
+        print_table(["quarantine_reason", "cnt"], rows)
+        return
     sql = """
       SELECT quarantine_reason, COUNT(*) AS cnt
       FROM media
@@ -125,12 +150,67 @@ def cmd_reasons(conn, args):
     headers, rows = fetch_all(conn, sql)
     print_table(headers, rows)
 
+def cmd_rebuild_counters(conn, args):
+    if pixarr_counters.ensure(conn):
+        print("Created media_counters + triggers from existing rows.")
+    else:
+        with conn:
+            pixarr_counters.rebuild(conn)
+    print_table(["state", "cnt", "bytes"], pixarr_counters.counts(conn, "state"))
+
+def cmd_compact_sightings(conn, args):
+    was = pixarr_sightings.enabled(conn)
+    def progress(done, total, removed):
+        print(f"  media_rid {done}/{total}: {removed} duplicate rows merged", flush=True)
+    res = pixarr_sightings.compact(conn, chunk=args.chunk, progress=progress if args.verbose else None)
+    print(f"sightings: {res['rows_before']} -> {res['rows_after']} rows ({res['removed']} merged)")
+    if not was:
+        print("Compaction mode on: re-seen paths now update their row (seen_count, first/last seen).")
+
+def cmd_prune_sightings(conn, args):
+    res = pixarr_sightings.prune(conn, args.deleted_days, keep=args.keep)
+    print(f"Removed {res['deleted_media']} sightings of media deleted > {args.deleted_days:g} days ago "
+          f"(kept latest {args.keep} each), {res['orphans']} without a media row.")
+
+def _parse_every(items: Sequence[str]) -> dict:
+    every = {}
+    for item in items or []:
+        task, _, hours = item.partition("=")
+        if task not in pixarr_maintain.TASKS or not hours:
+            raise SystemExit(f"--every {item!r}: expected TASK=HOURS with TASK in {', '.join(pixarr_maintain.TASKS)}")
+        every[task] = float(hours) * 3600
+    return every
+
+def cmd_maintain(conn, args):
+    tasks = [t.strip() for t in args.tasks.split(",") if t.strip()]
+    unknown = set(tasks) - set(pixarr_maintain.TASKS)
+    if unknown:
+        raise SystemExit(f"--tasks: unknown {', '.join(sorted(unknown))} (expected {', '.join(pixarr_maintain.TASKS)})")
+    db_path = Path(args.db).expanduser().resolve()
+    out_dir = Path(args.out).expanduser() if args.out else db_path.parent.parent / "backups"
+    throttle = pixarr_maintain.Throttle(args.budget_ms, args.duty)
+
+    def show(task, res):
+        print(f"- {task}: " + ", ".join(f"{k}={v}" for k, v in res.items()), flush=True)
+
+    failed = False
+    while True:
+        res = pixarr_maintain.run(conn, db_path, out_dir, tasks=tasks, every=_parse_every(args.every),
+                                  throttle=throttle, force=args.force, analyze=args.analyze, pages=args.pages,
+                                  keep=args.keep, min_free_pct=args.min_free_pct, log=show)
+        failed = res.get("backup", {}).get("integrity", "ok") != "ok"
+        if not args.loop:
+            break
+        time.sleep(args.loop)
+    if failed:
+        raise SystemExit("Snapshot failed integrity_check (kept as .corrupt); the live DB was not checked.")
+
 def cmd_quarantined(conn, args):
     sql = """
       SELECT id, ext, bytes, quarantine_reason, updated_at, canonical_path
       FROM media
       WHERE state='quarantine'
-      ORDER BY updated_at DESC
+      ORDER BY updated_ts DESC
       LIMIT ?
     """
     headers, rows = fetch_all(conn, sql, (args.limit,))
@@ -148,7 +228,7 @@ def cmd_review(conn, args):
           SELECT id, canonical_path, taken_at
           FROM media
           WHERE state='review'
-          ORDER BY (taken_at IS NULL), taken_at
+          ORDER BY (taken_ts IS NULL), taken_ts
           LIMIT ?
         """
         headers, rows = fetch_all(conn, sql, (args.limit,))
@@ -158,7 +238,7 @@ def cmd_batches(conn, args):
     sql = """
       SELECT id, source, started_at, finished_at, notes
       FROM ingests
-      ORDER BY IFNULL(finished_at, started_at) DESC
+      ORDER BY started_at DESC
       LIMIT ?
     """
     headers, rows = fetch_all(conn, sql, (args.limit,))
@@ -173,7 +253,7 @@ def cmd_batch_items(conn, args):
       FROM sightings s
       JOIN media m ON m.id = s.media_id
       WHERE s.ingest_id = ?
-      ORDER BY s.seen_at DESC
+      ORDER BY s.seen_ts DESC, s.id DESC
       LIMIT ?
     """
     headers, rows = fetch_all(conn, sql, (args.id, args.limit))
@@ -227,21 +307,30 @@ def cmd_check(conn, args):
         ("Reason present outside quarantine (should be 0)",
          "SELECT COUNT(*) FROM media WHERE state!='quarantine' AND quarantine_reason IS NOT NULL"),
         ("Duplicate content hashes (>1 rows with same hash)",
-         "SELECT COUNT(*) FROM (SELECT hash_sha256 FROM media GROUP BY hash_sha256 HAVING COUNT(*)>1)"),
+         "SELECT COUNT(*) FROM (SELECT sha256 FROM media GROUP BY sha256 HAVING COUNT(*)>1)"),
     ]
     for title, sql in checks:
         h, r = fetch_all(conn, sql)
         val = r[0][0] if r else "0"
         print(f"- {title}: {val}")
+    if not pixarr_sightings.enabled(conn):
+        h, r = fetch_all(conn, "SELECT COALESCE(SUM(n - 1), 0) FROM (SELECT COUNT(*) AS n FROM sightings_v2 "
+                               "GROUP BY media_rid, full_path HAVING n > 1)")
+        print(f"- Repeated sightings of the same path (compact-sightings merges them): {r[0][0]}")
+    if pixarr_counters.available(conn):
+        bad = pixarr_counters.drift(conn)
+        print(f"- media_counters off from a recount (should be 0; fix: rebuild-counters): {len(bad)}")
+        if bad:
+            print_table(["dim", "key", "stored (n, bytes)", "actual (n, bytes)"], bad)
     # optionally list duplicates
     if args.list_duplicates:
         print("\nDuplicate hashes:")
         h, r = fetch_all(conn, """
           SELECT hash_sha256, COUNT(*) AS cnt
           FROM media
-          GROUP BY hash_sha256
+          GROUP BY sha256
           HAVING cnt>1
-          ORDER BY cnt DESC, hash_sha256
+          ORDER BY cnt DESC, sha256
           LIMIT 100
         """)
         print_table(h, r)
@@ -296,12 +385,46 @@ def main():
     sps.add_argument("--table", help="Optional table name to show columns")
     sps.set_defaults(func=cmd_schema)
 
-    spc = sub.add_parser("check", help="Quick consistency checks (reasons, duplicates)")
+    sub.add_parser("rebuild-counters", help="Recompute media_counters from media (creates them on older DBs)"
+                   ).set_defaults(func=cmd_rebuild_counters, profile="write")
+
+    spcs = sub.add_parser("compact-sightings",
+                          help="Merge repeated (media, path) sightings and turn on compaction mode")
+    spcs.add_argument("--chunk", type=int, default=5000, help="media rids per transaction (default 5000)")
+    spcs.add_argument("-v", "--verbose", action="store_true", help="Print progress per chunk")
+    spcs.set_defaults(func=cmd_compact_sightings, profile="write")
+
+    spps = sub.add_parser("prune-sightings", help="Retention: trim sightings of long-deleted media, drop orphans")
+    spps.add_argument("--deleted-days", type=float, default=90,
+                      help="Only media deleted longer ago than this (default 90)")
+    spps.add_argument("--keep", type=int, default=1, help="Latest sightings kept per such media (default 1)")
+    spps.set_defaults(func=cmd_prune_sightings, profile="write")
+
+    spm = sub.add_parser("maintain", help="Online backup (backup API) + checkpoint/optimize/vacuum, rate-limited")
+    spm.add_argument("--tasks", default=",".join(pixarr_maintain.TASKS),
+                     help="Comma list of checkpoint,optimize,vacuum,backup (default: all)")
+    spm.add_argument("--force", action="store_true", help="Run the tasks even if not due (see --every)")
+    spm.add_argument("--every", action="append", metavar="TASK=HOURS",
+                     help="Interval per task (defaults: checkpoint every run, others 24h); repeatable")
+    spm.add_argument("--out", help="Backup dir (default: <data-dir>/backups); also holds maintain.json")
+    spm.add_argument("--keep", type=int, default=7, help="Snapshots kept (default 7; 0 keeps all)")
+    spm.add_argument("--pages", type=int, default=256, help="Pages copied per backup step (default 256)")
+    spm.add_argument("--budget-ms", type=float, default=50,
+                     help="Longest a step may hold up ingest: checkpoint wait, vacuum chunk (default 50)")
+    spm.add_argument("--duty", type=float, default=0.25,
+                     help="Max share of wall time spent in steps; sleeps in between (default 0.25)")
+    spm.add_argument("--analyze", action="store_true", help="ANALYZE each table instead of PRAGMA optimize")
+    spm.add_argument("--min-free-pct", type=float, default=10,
+                     help="Incremental vacuum only above this freelist share (default 10)")
+    spm.add_argument("--loop", type=float, metavar="SECONDS", help="Keep running; check what's due every SECONDS")
+    spm.set_defaults(func=cmd_maintain, profile="write")
+
+    spc = sub.add_parser("check", help="Quick consistency checks (reasons, duplicates, counters)")
     spc.add_argument("--list-duplicates", action="store_true")
     spc.set_defaults(func=cmd_check)
 
     args = ap.parse_args()
-    conn = connect(Path(args.db).expanduser().resolve())
+    conn = connect(Path(args.db).expanduser().resolve(), getattr(args, "profile", "read"))
     try:
         args.func(conn, args)
     finally:
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pixarr_fastmeta.py — in-process reader for the few tags ingest actually needs.
+
+Parses just enough of each container to pull capture dates, GPS, orientation
+and make/model, reading headers and the metadata block only (a few KB for
+typical files; MP4s with moov at the end cost a handful of seeks):
+
+  JPEG              APP1 "Exif" -> TIFF IFD0 / ExifIFD / GPS IFD
+  TIFF-based RAW    .tif/.tiff/.dng/.nef/.arw/.cr2: same IFDs, from the file head
+  HEIC/HEIF/AVIF    meta/iinf + iloc -> the 'Exif' item -> TIFF
+  MP4/MOV/M4V       moov/mvhd, first trak tkhd + mdhd, udta ©xyz/©mak/©mod,
+                    Apple mdta keys (creationdate, location, make, model)
+
+Output keys/values follow `exiftool -j -n` (e.g. "DateTimeOriginal":
+"2024:01:16 15:57:40", "Orientation": 1, signed decimal GPSLatitude), so the
+dict drops straight into resolve_taken_at / upsert. Returns None whenever the
+format is not handled or the structure is not what we expect — callers fall
+back to exiftool in that case.
+"""
+
+import struct
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+JPEG_EXT = {".jpg", ".jpeg"}
+TIFF_EXT = {".tif", ".tiff", ".dng", ".nef", ".arw", ".cr2"}
+HEIF_EXT = {".heic", ".heif", ".avif"}
+QT_EXT = {".mp4", ".mov", ".m4v"}
+SUPPORTED_EXT = JPEG_EXT | TIFF_EXT | HEIF_EXT | QT_EXT
+
+TIFF_HEAD_BYTES = 256 * 1024     # TIFF/RAW: IFDs must live in this window or we bail
+MAX_META_BOX = 4 * 1024 * 1024   # never slurp a bigger metadata box than this
+
+_QT_EPOCH = datetime(1904, 1, 1)
+
+# IFD tag -> exiftool name
+_IFD0 = {0x010F: "Make", 0x0110: "Model", 0x0112: "Orientation", 0x0132: "ModifyDate"}
+_EXIF = {0x9003: "DateTimeOriginal", 0x9004: "CreateDate", 0x9010: "OffsetTime",
+         0x9011: "OffsetTimeOriginal", 0x9012: "OffsetTimeDigitized"}
+_EXIF_PTR, _GPS_PTR = 0x8769, 0x8825
+_TYPE_SIZE = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+
+class _Bad(Exception):
+    """Structure isn't what we expect; caller returns None (-> exiftool)."""
+
+
+# ---------- TIFF / EXIF ----------
+
+def parse_tiff(buf: bytes) -> dict:
+    """Parse a TIFF block (from 'II*\\0'/'MM\\0*') into exiftool-named tags."""
+    if len(buf) < 8 or buf[:2] not in (b"II", b"MM"):
+        raise _Bad("no TIFF header")
+    e = "<" if buf[:2] == b"II" else ">"
+    if struct.unpack_from(e + "H", buf, 2)[0] != 42:
+        raise _Bad("bad TIFF magic")
+
+    def ifd(off: int) -> dict:
+        if off <= 0 or off + 2 > len(buf):
+            raise _Bad("IFD outside buffer")
+        n = struct.unpack_from(e + "H", buf, off)[0]
+        if off + 2 + 12 * n > len(buf):
+            raise _Bad("IFD truncated")
+        out = {}
+        for i in range(n):
+            tag, typ, cnt = struct.unpack_from(e + "HHI", buf, off + 2 + 12 * i)
+            size = _TYPE_SIZE.get(typ)
+            if size is None:
+                continue
+            vpos = off + 2 + 12 * i + 8
+            if size * cnt > 4:
+                vpos = struct.unpack_from(e + "I", buf, vpos)[0]
+                if vpos + size * cnt > len(buf):
+                    continue   # value outside our window; not one we can trust
+            out[tag] = (typ, cnt, vpos)
+        return out
+
+    def value(entry):
+        typ, cnt, pos = entry
+        if typ == 2:
+            return buf[pos:pos + cnt].split(b"\0", 1)[0].decode("latin-1").strip()
+        if typ == 3:
+            vals = struct.unpack_from(e + "H" * cnt, buf, pos)
+        elif typ in (4, 9):
+            vals = struct.unpack_from(e + ("I" if typ == 4 else "i") * cnt, buf, pos)
+        elif typ in (5, 10):
+            raw = struct.unpack_from(e + ("I" if typ == 5 else "i") * 2 * cnt, buf, pos)
+            vals = tuple(raw[i] / raw[i + 1] if raw[i + 1] else 0.0 for i in range(0, len(raw), 2))
+        elif typ in (1, 7):
+            vals = tuple(buf[pos:pos + cnt])
+        else:
+            return None
+        return vals[0] if cnt == 1 else vals
+
+    def pointer(entry) -> int:
+        v = value(entry)
+        if not isinstance(v, int):
+            raise _Bad("IFD pointer is not a single LONG")
+        return v
+
+    meta = {}
+    ifd0 = ifd(struct.unpack_from(e + "I", buf, 4)[0])
+    for tag, name in _IFD0.items():
+        if tag in ifd0:
+            v = value(ifd0[tag])
+            if v not in (None, ""):
+                meta[name] = v
+    if _EXIF_PTR in ifd0:
+        ex = ifd(pointer(ifd0[_EXIF_PTR]))
+        for tag, name in _EXIF.items():
+            if tag in ex:
+                v = value(ex[tag])
+                if v not in (None, ""):
+                    meta[name] = v
+    if _GPS_PTR in ifd0:
+        try:
+            gps = ifd(pointer(ifd0[_GPS_PTR]))
+            lat, lon = gps.get(2), gps.get(4)
+            if lat and lon:
+                lat_v, lon_v = value(lat), value(lon)
+                la = lat_v[0] + lat_v[1] / 60 + lat_v[2] / 3600
+                lo = lon_v[0] + lon_v[1] / 60 + lon_v[2] / 3600
+                if gps.get(1) and value(gps[1]).upper().startswith("S"):
+                    la = -la
+                if gps.get(3) and value(gps[3]).upper().startswith("W"):
+                    lo = -lo
+                meta["GPSLatitude"], meta["GPSLongitude"] = round(la, 8), round(lo, 8)
+            if gps.get(6):
+                alt = value(gps[6])
+                if gps.get(5) and value(gps[5]) == 1:
+                    alt = -alt
+                meta["GPSAltitude"] = round(alt, 4)
+        except (_Bad, struct.error, TypeError, IndexError):
+            pass   # a broken GPS IFD shouldn't cost us the dates
+    return meta
+
+
+def _read_jpeg(f: BinaryIO) -> dict:
+    if f.read(2) != b"\xff\xd8":
+        raise _Bad("not a JPEG")
+    while True:
+        hdr = f.read(4)
+        if len(hdr) < 4 or hdr[0] != 0xFF:
+            raise _Bad("bad marker")
+        marker, length = hdr[1], struct.unpack(">H", hdr[2:])[0]
+        if marker in (0xDA, 0xD9):          # start of scan / EOI: no Exif before the image data
+            return {}
+        if marker == 0xE1:
+            seg = f.read(length - 2)
+            if seg[:6] == b"Exif\0\0":
+                return parse_tiff(seg[6:])
+        else:
+            f.seek(length - 2, 1)
+
+
+def _read_tiff_file(f: BinaryIO) -> dict:
+    return parse_tiff(f.read(TIFF_HEAD_BYTES))
+
+
+# ---------- ISO BMFF (HEIF + QuickTime/MP4) ----------
+
+def _boxes(f: BinaryIO, start: int, end: int):
+    """Yield (type, payload_start, payload_end) for boxes in [start, end)."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        hdr = f.read(8)
+        if len(hdr) < 8:
+            return
+        size, typ = struct.unpack(">I4s", hdr)
+        hlen = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            hlen = 16
+        elif size == 0:
+            size = end - pos
+        if size < hlen or pos + size > end:
+            raise _Bad(f"bad box size for {typ!r}")
+        yield typ, pos + hlen, pos + size
+        pos += size
+
+
+def _read_box(f: BinaryIO, start: int, end: int) -> bytes:
+    if end - start > MAX_META_BOX:
+        raise _Bad("metadata box too large")
+    f.seek(start)
+    return f.read(end - start)
+
+
+def _uint(buf: bytes, pos: int, size: int) -> int:
+    return int.from_bytes(buf[pos:pos + size], "big") if size else 0
+
+
+def _read_heif(f: BinaryIO, file_size: int) -> dict:
+    meta_box = None
+    for typ, s, e in _boxes(f, 0, file_size):
+        if typ == b"meta":
+            meta_box = (s + 4, e)   # FullBox
+            break
+    if not meta_box:
+        raise _Bad("no meta box")
+
+    exif_id = None
+    iloc = idat = None
+    for typ, s, e in _boxes(f, *meta_box):
+        if typ == b"iinf":
+            buf = _read_box(f, s, e)
+            ver = buf[0]
+            pos = 4 + (2 if ver == 0 else 4)
+            while pos + 8 <= len(buf):
+                size, btyp = struct.unpack_from(">I4s", buf, pos)
+                if btyp == b"infe" and buf[pos + 8] >= 2:
+                    v = buf[pos + 8]
+                    id_size = 2 if v == 2 else 4
+                    item_id = _uint(buf, pos + 12, id_size)
+                    item_type = buf[pos + 12 + id_size + 2: pos + 12 + id_size + 6]
+                    if item_type == b"Exif":
+                        exif_id = item_id
+                if size < 8:
+                    break
+                pos += size
+        elif typ == b"iloc":
+            iloc = _read_box(f, s, e)
+        elif typ == b"idat":
+            idat = (s, e)
+    if exif_id is None:
+        return {}
+    if iloc is None:
+        raise _Bad("no iloc")
+
+    ver = iloc[0]
+    off_size, len_size = iloc[4] >> 4, iloc[4] & 0xF
+    base_size, idx_size = iloc[5] >> 4, (iloc[5] & 0xF) if ver in (1, 2) else 0
+    pos = 6
+    count = _uint(iloc, pos, 2 if ver < 2 else 4)
+    pos += 2 if ver < 2 else 4
+    for _ in range(count):
+        item_id = _uint(iloc, pos, 2 if ver < 2 else 4)
+        pos += 2 if ver < 2 else 4
+        method = 0
+        if ver in (1, 2):
+            method = _uint(iloc, pos, 2) & 0xF
+            pos += 2
+        pos += 2   # data_reference_index
+        base = _uint(iloc, pos, base_size)
+        pos += base_size
+        n_ext = _uint(iloc, pos, 2)
+        pos += 2
+        extents = []
+        for _e in range(n_ext):
+            pos += idx_size
+            ext_off = _uint(iloc, pos, off_size)
+            pos += off_size
+            ext_len = _uint(iloc, pos, len_size)
+            pos += len_size
+            extents.append((ext_off, ext_len))
+        if item_id != exif_id:
+            continue
+        if method not in (0, 1) or not extents:
+            raise _Bad("unsupported iloc construction")
+        origin = idat[0] if method == 1 and idat else 0
+        data = b"".join(_read_box(f, origin + base + o, origin + base + o + n) for o, n in extents)
+        if len(data) < 4:
+            raise _Bad("short Exif item")
+        skip = 4 + struct.unpack(">I", data[:4])[0]   # exif_tiff_header_offset
+        return parse_tiff(data[skip:])
+    raise _Bad("Exif item not in iloc")
+
+
+def _qt_date(secs: int) -> str:
+    # exiftool (without -api QuickTimeUTC) prints the raw value; zero stays zero
+    if not secs:
+        return "0000:00:00 00:00:00"
+    return (_QT_EPOCH + timedelta(seconds=secs)).strftime("%Y:%m:%d %H:%M:%S")
+
+
+def _qt_times(buf: bytes) -> tuple:
+    """(creation, modification) from an mvhd/tkhd/mdhd payload (FullBox)."""
+    if buf[0] == 1:
+        return struct.unpack_from(">QQ", buf, 4)
+    return struct.unpack_from(">II", buf, 4)
+
+
+def _iso6709(s: str) -> Optional[tuple]:
+    """'+37.7749-122.4194+010.000/' -> (lat, lon, alt|None)."""
+    nums, cur = [], ""
+    for ch in s.strip().rstrip("/"):
+        if ch in "+-" and cur:
+            nums.append(cur)
+            cur = ch
+        else:
+            cur += ch
+    if cur:
+        nums.append(cur)
+    try:
+        vals = [float(n) for n in nums]
+    except ValueError:
+        return None
+    if len(vals) < 2:
+        return None
+    return vals[0], vals[1], (vals[2] if len(vals) > 2 else None)
+
+
+def _set_gps(meta: dict, s: str) -> None:
+    g = _iso6709(s)
+    if g:
+        meta["GPSLatitude"], meta["GPSLongitude"] = g[0], g[1]
+        if g[2] is not None:
+            meta["GPSAltitude"] = g[2]
+
+
+def _apple_date(s: str) -> str:
+    """'2024-07-10T20:08:42-0700' -> '2024:07:10 20:08:42-07:00' (exiftool style)."""
+    s = s.strip()
+    try:
+        dt = datetime.strptime(s.replace("Z", "+0000"), "%Y-%m-%dT%H:%M:%S%z")
+    except ValueError:
+        return s
+    tz = dt.strftime("%z")
+    return dt.strftime("%Y:%m:%d %H:%M:%S") + f"{tz[:3]}:{tz[3:]}"
+
+
+def _qt_udta(f: BinaryIO, s: int, e: int, meta: dict) -> None:
+    for typ, bs, be in _boxes(f, s, e):
+        if typ in (b"\xa9xyz", b"\xa9mak", b"\xa9mod", b"\xa9day"):
+            buf = _read_box(f, bs, be)
+            n = struct.unpack_from(">H", buf, 0)[0] if len(buf) >= 4 else 0
+            text = buf[4:4 + n].decode("utf-8", "replace").strip("\0 ")
+            if not text:
+                continue
+            if typ == b"\xa9xyz":
+                _set_gps(meta, text)
+            elif typ == b"\xa9mak":
+                meta.setdefault("Make", text)
+            elif typ == b"\xa9mod":
+                meta.setdefault("Model", text)
+            else:
+                meta.setdefault("ContentCreateDate", _apple_date(text))
+        elif typ == b"meta":
+            _qt_meta(f, bs, be, meta)
+
+
+def _qt_meta(f: BinaryIO, s: int, e: int, meta: dict) -> None:
+    """Apple 'mdta' keys + ilst (QuickTime meta is a plain box; MP4's is a FullBox)."""
+    f.seek(s)
+    if f.read(4) == b"\0\0\0\0":
+        s += 4
+    keys = []
+    ilst = None
+    for typ, bs, be in _boxes(f, s, e):
+        if typ == b"keys":
+            buf = _read_box(f, bs, be)
+            n = struct.unpack_from(">I", buf, 4)[0]
+            pos = 8
+            for _ in range(n):
+                size = struct.unpack_from(">I", buf, pos)[0]
+                keys.append(buf[pos + 8:pos + size].decode("utf-8", "replace"))
+                pos += size
+        elif typ == b"ilst":
+            ilst = (bs, be)
+    if not keys or not ilst:
+        return
+    wanted = {
+        "com.apple.quicktime.creationdate": "CreationDate",
+        "com.apple.quicktime.location.ISO6709": "GPSCoordinates",
+        "com.apple.quicktime.make": "Make",
+        "com.apple.quicktime.model": "Model",
+    }
+    for typ, bs, be in _boxes(f, *ilst):
+        idx = struct.unpack(">I", typ)[0]
+        if not 1 <= idx <= len(keys) or keys[idx - 1] not in wanted:
+            continue
+        for dtyp, ds, de in _boxes(f, bs, be):
+            if dtyp != b"data":
+                continue
+            text = _read_box(f, ds + 8, de).decode("utf-8", "replace").strip("\0 ")
+            name = wanted[keys[idx - 1]]
+            if name == "GPSCoordinates":
+                _set_gps(meta, text)
+            elif name == "CreationDate":
+                meta["CreationDate"] = _apple_date(text)
+            else:
+                meta[name] = text
+            break
+
+
+def _read_quicktime(f: BinaryIO, file_size: int) -> dict:
+    moov = None
+    for typ, s, e in _boxes(f, 0, file_size):
+        if typ == b"moov":
+            moov = (s, e)
+            break
+    if not moov:
+        raise _Bad("no moov")
+    meta = {}
+    track_done = False
+    for typ, s, e in _boxes(f, *moov):
+        if typ == b"mvhd":
+            c, m = _qt_times(_read_box(f, s, min(e, s + 64)))
+            meta["CreateDate"], meta["ModifyDate"] = _qt_date(c), _qt_date(m)
+        elif typ == b"trak" and not track_done:
+            for ttyp, ts, te in _boxes(f, s, e):
+                if ttyp == b"tkhd":
+                    c, m = _qt_times(_read_box(f, ts, min(te, ts + 64)))
+                    meta["TrackCreateDate"], meta["TrackModifyDate"] = _qt_date(c), _qt_date(m)
+                elif ttyp == b"mdia":
+                    for mtyp, ms, me in _boxes(f, ts, te):
+                        if mtyp == b"mdhd":
+                            c, m = _qt_times(_read_box(f, ms, min(me, ms + 64)))
+                            meta["MediaCreateDate"], meta["MediaModifyDate"] = _qt_date(c), _qt_date(m)
+            track_done = True
+        elif typ == b"udta":
+            _qt_udta(f, s, e, meta)
+        elif typ == b"meta":
+            _qt_meta(f, s, e, meta)
+    if "CreateDate" not in meta:
+        raise _Bad("no mvhd")
+    return meta
+
+
+# ---------- entry point ----------
+
+def read_meta(src: Union[str, Path, BinaryIO], ext: Optional[str] = None) -> Optional[dict]:
+    """
+    exiftool-style tag dict for a supported file (path or seekable binary file
+    object; pass `ext` for file objects), or None if unsupported/unparseable.
+    An empty dict means "parsed fine, no tags of interest".
+    """
+    if isinstance(src, (str, Path)):
+        p = Path(src)
+        ext = (ext or p.suffix).lower()
+        if ext not in SUPPORTED_EXT:
+            return None
+        try:
+            with open(p, "rb") as f:
+                return read_meta(f, ext)
+        except OSError:
+            return None
+
+    f = src
+    ext = (ext or "").lower()
+    try:
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(0)
+        if ext in JPEG_EXT:
+            return _read_jpeg(f)
+        if ext in TIFF_EXT:
+            return _read_tiff_file(f)
+        if ext in HEIF_EXT:
+            return _read_heif(f, size)
+        if ext in QT_EXT:
+            return _read_quicktime(f, size)
+    except (_Bad, struct.error, IndexError, ValueError, TypeError, OSError, OverflowError):
+        return None
+    return None
+
+
+if __name__ == "__main__":   # quick look: python scripts/pixarr_fastmeta.py FILE...
+    import json
+    import sys
+    for a in sys.argv[1:]:
+        print(json.dumps({"SourceFile": a, **(read_meta(a) or {"_fastmeta": None})}, default=str))
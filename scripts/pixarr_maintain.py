@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pixarr_maintain.py — backup and housekeeping for a live app.sqlite3 (ingest may be writing).
+
+Tasks (pixarr_db.py maintain runs the ones that are due):
+
+  checkpoint  PRAGMA wal_checkpoint(PASSIVE), then TRUNCATE with busy_timeout = budget:
+              the passive pass copies the WAL without blocking anyone, so the
+              truncating pass (which blocks writers while it runs) has little left.
+              If ingest holds the lock past the budget it's skipped until next time.
+  optimize    PRAGMA optimize with analysis_limit (ANALYZE only where plans would
+              change, sampled), or --analyze: ANALYZE one table at a time.
+  vacuum      PRAGMA incremental_vacuum in chunks sized to the budget, when the
+              freelist is over the threshold. Needs auto_vacuum=INCREMENTAL (DBs
+              created from db/schema.sql since it was added; older ones report
+              the freelist and need one offline VACUUM to switch).
+  backup      sqlite3 backup API, `pages` per step, copying one read snapshot
+              (a held read transaction: in WAL mode writers carry on and the copy
+              doesn't restart when they commit). Then PRAGMA integrity_check on the
+              snapshot, not the live DB; only a clean snapshot is kept as
+              <backups>/app-YYYYmmdd-HHMMSS.sqlite3 (newest `keep` retained).
+
+Rate limits: a step that can block ingest (checkpoint, vacuum chunk, ANALYZE)
+is kept near `budget_ms` of holding the write lock; write steps start with
+BEGIN IMMEDIATE, so they queue behind ingest's commits instead of failing a
+read-to-write upgrade. After every step the Throttle sleeps so maintenance
+uses at most `duty` of wall time (backup I/O included). Last-run times live in
+<backups>/maintain.json, so cron can call it often and each task runs at its
+own interval (EVERY; --force runs all).
+
+Stdlib only, like pixarr_counters / pixarr_sightings.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import pixarr_sqlite
+
+TASKS = ("checkpoint", "optimize", "vacuum", "backup")
+
+# Default seconds between runs of each task (0 = every run)
+EVERY = {"checkpoint": 0, "optimize": 24 * 3600, "vacuum": 24 * 3600, "backup": 24 * 3600}
+
+STATE_FILE = "maintain.json"
+
+
+class Throttle:
+    """Sleeps after each step so steps take at most `duty` of wall time; `budget_s` sizes blocking steps."""
+
+    def __init__(self, budget_ms: float = 50, duty: float = 0.25):
+        if not 0 < duty <= 1:
+            raise ValueError("duty must be in (0, 1]")
+        self.budget_s = budget_ms / 1000
+        self.duty = duty
+        self.slept = 0.0
+
+    def pause(self, step_s: float) -> None:
+        gap = step_s * (1 - self.duty) / self.duty
+        if gap > 0:
+            time.sleep(gap)
+            self.slept += gap
+
+
+def write_step(conn: sqlite3.Connection, sql: str) -> float:
+    """
+    Run one write step in BEGIN IMMEDIATE (waits for ingest's lock via busy_timeout
+    instead of failing a read-to-write upgrade) and return the seconds the lock was held.
+    """
+    def run() -> float:
+        t0 = time.perf_counter()
+        conn.execute(sql).fetchall()
+        return t0
+
+    return time.perf_counter() - pixarr_sqlite.immediate(conn, run)
+
+
+def wal_bytes(db_path: Union[str, Path]) -> int:
+    wal = Path(f"{db_path}-wal")
+    return wal.stat().st_size if wal.exists() else 0
+
+
+def checkpoint(conn: sqlite3.Connection, db_path: Union[str, Path], throttle: Throttle) -> Dict:
+    """PASSIVE then TRUNCATE (waiting at most the budget); busy=1 means ingest held on and it's retried next run."""
+    before = wal_bytes(db_path)
+    t0 = time.perf_counter()
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    throttle.pause(time.perf_counter() - t0)
+    old = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+    conn.execute(f"PRAGMA busy_timeout={max(1, int(throttle.budget_s * 1000))}")
+    try:
+        t1 = time.perf_counter()
+        busy, _log, _done = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        blocked = time.perf_counter() - t1
+    finally:
+        conn.execute(f"PRAGMA busy_timeout={old}")
+    return {"busy": busy, "wal_before": before, "wal_after": wal_bytes(db_path),
+            "truncate_ms": round(blocked * 1000, 1)}
+
+
+def optimize(conn: sqlite3.Connection, throttle: Throttle, analyze: bool = False,
+             analysis_limit: int = 1000) -> Dict:
+    """PRAGMA optimize (or ANALYZE per table with --analyze), sampling at most analysis_limit rows per index."""
+    conn.execute(f"PRAGMA analysis_limit={analysis_limit}")
+    tables: List[str] = []
+    if analyze:
+        tables = [r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    slowest = 0.0
+    for stmt in ([f'ANALYZE "{t}"' for t in tables] or ["PRAGMA optimize"]):
+        step = write_step(conn, stmt)
+        slowest = max(slowest, step)
+        throttle.pause(step)
+    return {"analyzed": len(tables) if analyze else "optimize", "slowest_ms": round(slowest * 1000, 1)}
+
+
+def vacuum(conn: sqlite3.Connection, throttle: Throttle, min_free_pct: float = 10.0) -> Dict:
+    """Incremental vacuum in budget-sized chunks while the freelist is over min_free_pct of the file."""
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    out = {"auto_vacuum": {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}[mode], "free_before": free, "pages": pages}
+    if not pages or free * 100 < min_free_pct * pages:
+        return {**out, "skipped": f"freelist under {min_free_pct:g}%"}
+    if mode != 2:
+        return {**out, "skipped": "auto_vacuum is not INCREMENTAL (one offline VACUUM after "
+                                  "PRAGMA auto_vacuum=INCREMENTAL switches it)"}
+    chunk, steps, slowest = 256, 0, 0.0
+    while free > 0:
+        step = write_step(conn, f"PRAGMA incremental_vacuum({chunk})")
+        steps, slowest = steps + 1, max(slowest, step)
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # next chunk: aim at the budget (halve when over, grow while well under)
+        chunk = max(16, chunk // 2) if step > throttle.budget_s else (chunk * 2 if step < throttle.budget_s / 2 else chunk)
+        throttle.pause(step)
+    return {**out, "free_after": free, "steps": steps, "slowest_ms": round(slowest * 1000, 1)}
+
+
+def backup(db_path: Union[str, Path], out_dir: Union[str, Path], throttle: Throttle, pages: int = 256,
+           keep: int = 7, now: Optional[datetime] = None) -> Dict:
+    """
+    Copy one snapshot of the live DB with the backup API, then integrity_check the copy.
+    Returns the snapshot path (or the failing check) and prunes all but the newest `keep`.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    final = out_dir / f"app-{(now or datetime.now()).strftime('%Y%m%d-%H%M%S')}.sqlite3"
+    tmp = final.with_suffix(".partial")
+    tmp.unlink(missing_ok=True)
+
+    src = pixarr_sqlite.connect(db_path, "read")
+    dst = sqlite3.connect(tmp)
+    steps, slowest, last = 0, 0.0, time.perf_counter()
+
+    def progress(status, remaining, total):
+        nonlocal steps, slowest, last
+        step = time.perf_counter() - last
+        steps, slowest = steps + 1, max(slowest, step)
+        throttle.pause(step)
+        last = time.perf_counter()
+
+    t0 = time.perf_counter()
+    try:
+        src.execute("BEGIN")
+        src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()   # pin the read snapshot
+        src.backup(dst, pages=pages, progress=progress)
+        src.rollback()
+        dst.execute("PRAGMA journal_mode=DELETE")                       # one self-contained file
+    finally:
+        dst.close()
+        src.close()
+    elapsed = time.perf_counter() - t0
+
+    chk = sqlite3.connect(f"file:{tmp}?mode=ro", uri=True)
+    try:
+        problems = [r[0] for r in chk.execute("PRAGMA integrity_check")]
+    finally:
+        chk.close()
+    out = {"steps": steps, "bytes": tmp.stat().st_size, "seconds": round(elapsed, 2),
+           "slowest_step_ms": round(slowest * 1000, 1)}
+    if problems != ["ok"]:
+        bad = final.with_suffix(".corrupt")
+        os.replace(tmp, bad)
+        return {**out, "path": str(bad), "integrity": problems[:20]}
+    os.replace(tmp, final)
+    snaps = sorted(out_dir.glob("app-*.sqlite3"))
+    for old in snaps[:-keep] if keep > 0 else []:
+        old.unlink()
+    return {**out, "path": str(final), "integrity": "ok", "pruned": max(0, len(snaps) - keep) if keep > 0 else 0}
+
+
+def load_state(out_dir: Union[str, Path]) -> Dict[str, float]:
+    p = Path(out_dir) / STATE_FILE
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(out_dir: Union[str, Path], state: Dict[str, float]) -> None:
+    p = Path(out_dir) / STATE_FILE
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def run(conn: sqlite3.Connection, db_path: Union[str, Path], out_dir: Union[str, Path],
+        tasks=TASKS, every: Optional[Dict[str, float]] = None, throttle: Optional[Throttle] = None,
+        force: bool = False, analyze: bool = False, pages: int = 256, keep: int = 7,
+        min_free_pct: float = 10.0, log: Callable[[str, Dict], None] = lambda task, res: None) -> Dict[str, Dict]:
+    """
+    Run the due `tasks` in TASKS order on `conn` (a write connection to db_path) and
+    record their times in <out_dir>/maintain.json. Returns {task: result}; tasks that
+    weren't due map to {"skipped": "not due"}.
+    """
+    every = {**EVERY, **(every or {})}
+    throttle = throttle or Throttle()
+    state = load_state(out_dir)
+    results: Dict[str, Dict] = {}
+    for task in TASKS:
+        if task not in tasks:
+            continue
+        now = time.time()
+        if not force and now - state.get(task, 0) < every[task]:
+            results[task] = {"skipped": "not due"}
+        else:
+            if task == "checkpoint":
+                res = checkpoint(conn, db_path, throttle)
+            elif task == "optimize":
+                res = optimize(conn, throttle, analyze=analyze)
+            elif task == "vacuum":
+                res = vacuum(conn, throttle, min_free_pct=min_free_pct)
+            else:
+                res = backup(db_path, out_dir, throttle, pages=pages, keep=keep)
+            if not res.get("busy") and res.get("integrity", "ok") == "ok":
+                state[task] = now          # failed/busy runs stay due
+            results[task] = res
+        log(task, results[task])
+    save_state(out_dir, state)
+    return results
@@ -27,7 +27,11 @@ Examples:
 import argparse
 import sqlite3
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+
+import pixarr_counters
+import pixarr_sightings
+import pixarr_sqlite
 
 # --- path helpers (match ingest script defaults) ---
 def repo_root() -> Path:
@@ -38,11 +42,16 @@ def db_path_for(data_dir: Path) -> Path:
 
 # --- connect ---
 def connect(db_path: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys=ON;")
+    conn = pixarr_sqlite.connect(db_path, "read", row_factory=sqlite3.Row)
     return conn
 
+def since_epoch(args) -> int:
+    """--hours / --since (ISO8601; naive = UTC) as the epoch seconds sightings.seen_ts uses."""
+    if args.hours is not None:
+        return int((datetime.now(timezone.utc) - timedelta(hours=args.hours)).timestamp())
+    dt = datetime.fromisoformat(args.since.replace("Z", "+00:00"))
+    return int((dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp())
+
 # --- pretty printing ---
 def print_rows(rows, columns=None, limit=None):
     n = 0
@@ -71,13 +80,9 @@ def cmd_quarantine(args):
         where.append("m.quarantine_reason = ?")
         params.append(args.reason)
 
-    if args.hours is not None:
-        since = (datetime.utcnow() - timedelta(hours=args.hours)).isoformat()
-        where.append("s.seen_at >= ?")
-        params.append(since)
-    elif args.since:
-        where.append("s.seen_at >= ?")
-        params.append(args.since)
+    if args.hours is not None or args.since:
+        where.append("s.seen_ts >= ?")
+        params.append(since_epoch(args))
 
     where_sql = " WHERE " + " AND ".join(where) if where else ""
     sql = f"""
@@ -93,7 +98,7 @@ def cmd_quarantine(args):
         FROM media m
         JOIN sightings s ON s.media_id = m.id
         {where_sql}
-        ORDER BY s.seen_at DESC
+        ORDER BY s.seen_ts DESC, s.id DESC
         LIMIT ?
     """
     params.append(args.limit)
@@ -120,42 +125,44 @@ def cmd_sightings(args):
         where.append("s.ingest_id = ?")
         params.append(args.ingest_id)
 
-    if args.hours is not None:
-        since = (datetime.utcnow() - timedelta(hours=args.hours)).isoformat()
-        where.append("s.seen_at >= ?")
-        params.append(since)
-    elif args.since:
-        where.append("s.seen_at >= ?")
-        params.append(args.since)
+    if args.hours is not None or args.since:
+        where.append("s.seen_ts >= ?")
+        params.append(since_epoch(args))
 
     where_sql = " WHERE " + " AND ".join(where) if where else ""
+    seen = ", s.seen_count, s.first_seen_at" if pixarr_sightings.has_columns(conn) else ""
     sql = f"""
         SELECT
-          s.seen_at, s.filename, s.full_path, s.ingest_id,
+          s.seen_at, s.filename, s.full_path, s.ingest_id{seen},
           m.id AS media_id, m.state, m.quarantine_reason, m.canonical_path
         FROM sightings s
         JOIN media m ON m.id = s.media_id
         {where_sql}
-        ORDER BY s.seen_at DESC
+        ORDER BY s.seen_ts DESC, s.id DESC
         LIMIT ?
     """
     params.append(args.limit)
     rows = conn.execute(sql, params).fetchall()
     print_rows(rows, columns=[
-        "seen_at","filename","full_path","state","quarantine_reason","canonical_path","media_id","ingest_id"
+        "seen_at","seen_count","first_seen_at","filename","full_path","state","quarantine_reason",
+        "canonical_path","media_id","ingest_id"
     ])
     conn.close()
 
 def cmd_reasons(args):
     conn = connect(db_path_for(Path(args.data_dir)))
-    sql = """
-      SELECT quarantine_reason, COUNT(*) AS cnt
-      FROM media
-      WHERE state='quarantine'
-      GROUP BY quarantine_reason
-      ORDER BY cnt DESC;
-    """
-    rows = conn.execute(sql).fetchall()
+    if pixarr_counters.available(conn):
+        rows = [{"quarantine_reason": k or None, "cnt": n}
+                for k, n, _b in pixarr_counters.counts(conn, "reason")]
+    else:
+        sql = """
+          SELECT quarantine_reason, COUNT(*) AS cnt
+          FROM media
+          WHERE state='quarantine'
+          GROUP BY quarantine_reason
+          ORDER BY cnt DESC;
+        """
+        rows = conn.execute(sql).fetchall()
     print_rows(rows)
     conn.close()
 
@@ -173,13 +180,18 @@ def cmd_batches(args):
 
 def cmd_states(args):
     conn = connect(db_path_for(Path(args.data_dir)))
-    base = "FROM media"
-    where_sql = f" WHERE {args.where}" if args.where else ""
-    rows = conn.execute(
-        f"SELECT state, COUNT(*) AS n {base}{where_sql} "
-        "GROUP BY state ORDER BY n DESC"
-    ).fetchall()
-    total = conn.execute(f"SELECT COUNT(*) {base}{where_sql}").fetchone()[0]
+    if not args.where and pixarr_counters.available(conn):
+        # trigger-maintained counters: no scan of media
+        rows = [{"state": k, "n": n} for k, n, _b in pixarr_counters.counts(conn, "state")]
+        total = sum(r["n"] for r in rows)
+    else:
+        base = "FROM media"
+        where_sql = f" WHERE {args.where}" if args.where else ""
+        rows = conn.execute(
+            f"SELECT state, COUNT(*) AS n {base}{where_sql} "
+            "GROUP BY state ORDER BY n DESC"
+        ).fetchall()
+        total = conn.execute(f"SELECT COUNT(*) {base}{where_sql}").fetchone()[0]
 
     print("State counts:")
     for r in rows:
@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pixarr_shards.py — sharded ingest: merge per-node delta DBs into the master.
+
+SQLite must not be shared over NFS, so each node ingests its own staging roots
+into a local delta DB (same schema, plus a delta_info row naming the shard):
+
+  node1$ python scripts/ingest_pass.py --data-dir /tank/pixarr --write \\
+             --delta-db /tank/pixarr/db/delta-2026-10-18.sqlite3 --shard node1
+  hub$   python scripts/pixarr_shards.py info /mnt/node1/pixarr/db/delta-2026-10-18.sqlite3
+  hub$   python scripts/pixarr_shards.py merge /mnt/node1/pixarr/db/delta-2026-10-18.sqlite3 \\
+             --map /tank/pixarr=/mnt/node1/pixarr                       # dry-run: what would happen
+  hub$   python scripts/pixarr_shards.py merge ... --write
+
+merge resolves each delta media row against the master, in delta rid order:
+
+  sha256 matches a library/review row    duplicate (basis=file): the delta's Review file goes to
+                                         Quarantine/duplicate as duplicate_in_library or _in_review
+                                         (library preferred, as in _find_canonical_by_filehash);
+                                         its sightings and tags move to that row
+  sha256 matches a quarantine/deleted/   merged like a re-seen file (_MEDIA_MERGE); a Review copy
+  staging row                            from the delta brings the row back to review
+  content matches a library/review row   duplicate (basis=content), as above
+  otherwise                              new row, with sightings, exif_kv, chunks, tags and hints
+
+Review files of new/revived rows move into the master's Review/ under the same
+relative path (never clobbering). Delta rows in quarantine keep their file on the
+node; their paths, like every node path, are rewritten by --map FROM=TO.
+
+The delta's batches (ingests, ingest_stats, quarantine_events) are copied with their
+ids; shard_batches records which shard ran them. The merge itself is a batch too
+(source 'shard-merge:<shard>': its quarantines are in its manifest, its counts in
+ingest_stats). --chunk delta rows are merged per BEGIN IMMEDIATE transaction, so
+ingest and the API keep working on the master; shard_merges.last_rid is committed
+with each chunk and an interrupted merge resumes there. A delta is merged once:
+ship a new delta file (new --delta-db path) for later ingests on the node.
+Dry-run by default: classifies against the master as it is now, writes nothing.
+"""
+
+import argparse
+import json
+import logging
+import shutil
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import ingest_pass as ip
+import pixarr_counters
+import pixarr_sightings
+import pixarr_sqlite
+
+COUNT_KEYS = ("rows", "new", "merged", "dupes", "quarantined", "files_moved", "files_missing", "bytes")
+
+
+def parse_maps(items: Optional[Sequence[str]]) -> List[Tuple[str, str]]:
+    """--map FROM=TO prefixes, longest first."""
+    maps = []
+    for item in items or []:
+        src, sep, dst = item.partition("=")
+        if not sep or not src or not dst:
+            raise SystemExit(f"--map {item!r}: expected FROM=TO")
+        maps.append((src.rstrip("/"), dst.rstrip("/")))
+    return sorted(maps, key=lambda m: -len(m[0]))
+
+
+def map_path(path: Optional[str], maps: Sequence[Tuple[str, str]]) -> Optional[str]:
+    """A node path as the master sees it (first matching --map prefix)."""
+    if path is None:
+        return None
+    for src, dst in maps:
+        if path == src or path.startswith(src + "/"):
+            return dst + path[len(src):]
+    return path
+
+
+def read_delta_info(delta: sqlite3.Connection, path: Path) -> dict:
+    try:
+        row = delta.execute("SELECT shard_id, shard, host, data_dir, created_at FROM delta_info").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    if row is None:
+        raise ValueError(f"{path}: not a shard delta (no delta_info); write one with ingest_pass.py --delta-db")
+    return dict(zip(("shard_id", "shard", "host", "data_dir", "created_at"), row))
+
+
+def open_delta(path: Path) -> sqlite3.Connection:
+    if not path.is_file():
+        raise ValueError(f"delta DB not found: {path}")
+    return pixarr_sqlite.connect(path, "read")
+
+
+def media_columns(conn: sqlite3.Connection) -> List[str]:
+    """Stored media columns except rid (generated ones are recomputed by the master)."""
+    return [r[1] for r in conn.execute("PRAGMA table_xinfo(media)") if r[6] == 0 and r[1] != "rid"]
+
+
+class DeltaMerge:
+    """
+    One delta DB folded into the master connection. Follows ip.DRY_RUN like
+    ingest_one_source: in dry-run nothing is written or moved, only counted.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, delta_path: Path, maps: Sequence[Tuple[str, str]] = (),
+                 *, chunk: int = 500, allow_unfinished: bool = False):
+        self.conn = conn
+        self.delta_path = delta_path.resolve()
+        if self.delta_path == ip.DB_PATH.resolve():
+            raise ValueError(f"{delta_path} is the master DB")
+        self.delta = open_delta(self.delta_path)
+        self.info = read_delta_info(self.delta, self.delta_path)
+        self.maps = maps
+        self.chunk = max(1, chunk)
+        self.allow_unfinished = allow_unfinished
+        self.write = not ip.DRY_RUN
+        self.shard = self.info["shard"]
+        self.label = f"shard-merge:{self.shard}"
+        self.node_review = Path(map_path(self.info["data_dir"], maps)) / "media" / "Review"
+        have = set(media_columns(conn))
+        self.cols = [c for c in media_columns(self.delta) if c in have]
+        self.counts: dict = {k: 0 for k in COUNT_KEYS}
+        self.counts["q_counts"] = {}
+        self.ingest_id: Optional[str] = None
+        self.stats = ip.new_source_stats(self.label, self.delta_path)
+
+    def close(self) -> None:
+        self.delta.close()
+
+    # --- transactions ---
+
+    def _tx(self, fn: Callable[[], object]) -> object:
+        """fn in its own BEGIN IMMEDIATE transaction (dry-run: fn only reads)."""
+        if not self.write:
+            return fn()
+        return pixarr_sqlite.immediate(self.conn, fn)
+
+    # --- preflight ---
+
+    def _check(self) -> Optional[tuple]:
+        """Refuse merged/unfinished deltas; the shard_merges row of an interrupted merge, if any."""
+        sid = self.info["shard_id"]
+        prior = self.conn.execute(
+            "SELECT status, last_rid, ingest_id, counts, finished_at, delta_path FROM shard_merges WHERE shard_id = ?",
+            (sid,)).fetchone()
+        if prior and prior[0] == "done":
+            raise ValueError(f"shard {self.shard} ({sid[:8]}) was already merged at {prior[4]} from {prior[5]}; "
+                             "start a new delta file (--delta-db) for later ingests on that node")
+        unfinished = [r[0] for r in self.delta.execute("SELECT id FROM ingests WHERE finished_at IS NULL")]
+        if unfinished and not self.allow_unfinished:
+            raise ValueError(f"{self.delta_path}: {len(unfinished)} unfinished batch(es) "
+                             f"({', '.join(i[:8] for i in unfinished[:5])}); finish them with ingest_pass.py "
+                             "--resume on the node, or merge anyway with --allow-unfinished")
+        return prior
+
+    # --- batches and provenance ---
+
+    def _copy_batches(self) -> None:
+        """Delta ingests/ingest_stats/quarantine_events under their own ids, each batch tagged with the shard."""
+        batches = self.delta.execute("SELECT id, source, started_at, finished_at, notes FROM ingests").fetchall()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO ingests (id, source, started_at, finished_at, notes) VALUES (?, ?, ?, ?, ?)",
+            batches)
+        self.conn.executemany("INSERT OR IGNORE INTO shard_batches (ingest_id, shard_id) VALUES (?, ?)",
+                              [(b[0], self.info["shard_id"]) for b in batches])
+        cols = [r[1] for r in self.delta.execute("PRAGMA table_info(ingest_stats)")]
+        cols = [c for c in cols if c in {r[1] for r in self.conn.execute("PRAGMA table_info(ingest_stats)")}]
+        self.conn.executemany(
+            f"INSERT OR IGNORE INTO ingest_stats ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+            self.delta.execute(f"SELECT {', '.join(cols)} FROM ingest_stats").fetchall())
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO quarantine_events "
+            "(ingest_id, reason, original_path, quarantined_to, extra, ts, manifest) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(iid, reason, orig, map_path(dest, self.maps), extra, ts, map_path(manifest, self.maps))
+             for iid, reason, orig, dest, extra, ts, manifest in self.delta.execute(
+                "SELECT ingest_id, reason, original_path, quarantined_to, extra, ts, manifest "
+                "FROM quarantine_events ORDER BY id")])
+
+    def _start(self) -> None:
+        self.conn.execute(
+            "INSERT INTO shard_merges (shard_id, shard, host, data_dir, delta_path, ingest_id, status, "
+            "last_rid, counts, started_at) VALUES (?, ?, ?, ?, ?, ?, 'running', 0, ?, ?)",
+            (self.info["shard_id"], self.shard, self.info["host"], map_path(self.info["data_dir"], self.maps),
+             str(self.delta_path), self.ingest_id, json.dumps(self.counts), datetime.utcnow().isoformat()))
+        self._copy_batches()
+
+    # --- files ---
+
+    def _bring_file(self, cpath: Optional[str]) -> Optional[str]:
+        """
+        Move a delta Review file into the master's Review/ (same relative path, no
+        clobbering). Returns the path the master row should carry: the new one, the
+        node path if it can't be moved, None if the delta row had no file.
+        """
+        if not cpath:
+            return None
+        src = Path(map_path(cpath, self.maps))
+        try:
+            rel = src.relative_to(self.node_review)
+        except ValueError:
+            return str(src)                      # not under the node's Review/: leave it where it is
+        if self.node_review.resolve() == ip.REVIEW_ROOT.resolve():
+            return str(src)                      # delta written against the master's own data dir
+        if not src.exists():
+            if (ip.REVIEW_ROOT / rel).exists():  # moved by an interrupted run of this merge
+                return str(ip.REVIEW_ROOT / rel)
+            self.counts["files_missing"] += 1
+            ip.log(f"  file missing on the node (not mounted? see --map): {src}", logging.WARNING)
+            return str(src)
+        dest = ip.plan_nonclobber(ip.REVIEW_ROOT, str(rel))
+        if not self.write:
+            ip.log(f"[DRY] MOVE {src} -> {dest}", logging.DEBUG)
+            self.counts["files_moved"] += 1
+            return str(dest)
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(src), str(dest))     # rename, or copy + delete across filesystems
+        except OSError as e:
+            self.counts["files_missing"] += 1
+            ip.log(f"  move failed {src} -> {dest}: {e}", logging.ERROR)
+            return str(src)
+        self.counts["files_moved"] += 1
+        return str(dest)
+
+    # --- rows ---
+
+    def _dupe(self, d: dict, canon: Tuple[str, str, Optional[str]], basis: str) -> Tuple[Optional[int], str]:
+        cid, cstate, _cpath = canon
+        self.counts["dupes"] += 1
+        if d["state"] in ("review", "library") and d["canonical_path"] and ip.QUAR.get("dupes", True):
+            reason = "duplicate_in_library" if cstate == "library" else "duplicate_in_review"
+            ip.maybe_quarantine(Path(map_path(d["canonical_path"], self.maps)), reason,
+                                self.ingest_id, extra=f"basis={basis} shard={self.shard} dupe_of={cid}",
+                                source=self.label)
+            self.counts["quarantined"] += 1
+            self.counts["q_counts"][reason] = self.counts["q_counts"].get(reason, 0) + 1
+        rid = self.conn.execute("SELECT rid FROM media WHERE id = ?", (cid,)).fetchone()[0]
+        return rid, cid
+
+    def _merge_into(self, d: dict, rid: int, mid: str) -> Tuple[Optional[int], str]:
+        """Same file known to the master outside library/review: fill gaps, revive with the delta's Review copy."""
+        self.counts["merged"] += 1
+        if self.write:
+            self.conn.execute("UPDATE media SET" + ip._MEDIA_MERGE + "WHERE sha256 = :sha256",
+                              {**d, "canonical_path": None, "updated_ts": ip.epoch_now()})
+        if d["state"] in ("review", "library"):
+            path = self._bring_file(d["canonical_path"])
+            if path and self.write:
+                self.conn.execute(
+                    "UPDATE media SET state=?, canonical_path=?, quarantine_reason=NULL, updated_ts=?, "
+                    "last_verified_at=? WHERE rid=?",
+                    (d["state"], path, ip.epoch_now(), datetime.utcnow().isoformat(), rid))
+        return rid, mid
+
+    def _insert(self, d: dict) -> Tuple[Optional[int], str]:
+        self.counts["new"] += 1
+        row = dict(d)
+        if d["state"] in ("review", "library"):
+            row["canonical_path"] = self._bring_file(d["canonical_path"])
+        else:
+            row["canonical_path"] = map_path(d["canonical_path"], self.maps)
+        if not self.write:
+            return None, d["id"]
+        cur = self.conn.execute(
+            f"INSERT INTO media ({', '.join(self.cols)}) VALUES ({', '.join('?' * len(self.cols))})",
+            [row[c] for c in self.cols])
+        return cur.lastrowid, d["id"]
+
+    def _merge_row(self, d: dict) -> Tuple[Optional[int], str, bool]:
+        """(master rid, master id, copy exif_kv/chunks/hints too) for one delta media row."""
+        self.counts["rows"] += 1
+        self.counts["bytes"] += d["bytes"] or 0
+        canon = ip._find_canonical_by_filehash(self.conn, d["sha256"].hex())
+        if canon:
+            return (*self._dupe(d, canon, "file"), False)
+        known = self.conn.execute("SELECT rid, id FROM media WHERE sha256 = ?", (d["sha256"],)).fetchone()
+        if known:
+            return (*self._merge_into(d, *known), True)
+        if d["state"] in ("review", "library") and d["content_bin"]:
+            canon = ip._find_canonical_by_contenthash(self.conn, d["content_bin"].hex())
+            if canon:
+                return (*self._dupe(d, canon, "content"), False)
+        return (*self._insert(d), True)
+
+    def _copy_children(self, lo: int, hi: int, rid_map: Dict[int, int], id_map: Dict[str, str],
+                       full: List[str]) -> None:
+        """Sightings (upserted in compaction mode), tags, and for new/merged rows exif_kv, chunks, hints."""
+        sql = pixarr_sightings.COPY_UPSERT_SQL if pixarr_sightings.enabled(self.conn) else pixarr_sightings.COPY_SQL
+        self.conn.executemany(sql, [
+            (rid_map[r[0]], *r[1:]) for r in self.delta.execute(
+                "SELECT media_rid, source_root, full_path, filename, folder_hint, ingest_id, seen_ts, "
+                "first_seen_ts, seen_count FROM sightings_v2 WHERE media_rid BETWEEN ? AND ? ORDER BY id",
+                (lo, hi))
+            if r[0] in rid_map])
+        ids = list(id_map)
+        marks = ",".join("?" * len(ids))
+        self.conn.executemany("INSERT OR IGNORE INTO media_tags (media_id, tag, namespace) VALUES (?, ?, ?)", [
+            (id_map[m], tag, ns) for m, tag, ns in self.delta.execute(
+                f"SELECT media_id, tag, namespace FROM media_tags WHERE media_id IN ({marks})", ids)])
+        if not full:
+            return
+        marks = ",".join("?" * len(full))
+        for table, cols in (("exif_kv", "media_id, tag, value"), ("media_chunks", "media_id, idx, digest")):
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({cols}) VALUES (?, ?, ?)",
+                [(id_map[r[0]], *r[1:]) for r in self.delta.execute(
+                    f"SELECT {cols} FROM {table} WHERE media_id IN ({marks})", full)])
+        self.conn.executemany(
+            "INSERT INTO album_hints (media_id, kind, value, confidence, source_text, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(id_map[r[0]], *r[1:]) for r in self.delta.execute(
+                "SELECT media_id, kind, value, confidence, source_text, created_at FROM album_hints "
+                f"WHERE media_id IN ({marks}) ORDER BY id", full)])
+
+    def _merge_chunk(self, rows: list) -> None:
+        rid_map: Dict[int, int] = {}
+        id_map: Dict[str, str] = {}
+        full: List[str] = []
+        for row in rows:
+            d = dict(zip(["rid"] + self.cols, row))
+            rid, mid, copy_all = self._merge_row(d)
+            if rid is None:
+                continue
+            rid_map[d["rid"]] = rid
+            id_map[d["id"]] = mid
+            if copy_all:
+                full.append(d["id"])
+        if not self.write:
+            return
+        if rid_map:
+            self._copy_children(rows[0][0], rows[-1][0], rid_map, id_map, full)
+        self.counts["elapsed_s"] = round(ip.batch_elapsed(self.stats), 3)
+        self.conn.execute("UPDATE shard_merges SET last_rid = ?, counts = ? WHERE shard_id = ?",
+                          (rows[-1][0], json.dumps(self.counts), self.info["shard_id"]))
+
+    # --- driver ---
+
+    def _finish(self) -> None:
+        st = self.stats
+        st["ingest_id"] = self.ingest_id
+        st["scanned"] = self.counts["rows"]
+        st["moved"] = self.counts["files_moved"]
+        st["updated"] = self.counts["merged"]
+        st["skipped_dupe"] = self.counts["dupes"]
+        st["quarantined"] = self.counts["quarantined"]
+        st["q_counts"].update(self.counts["q_counts"])
+        st["bytes_total"] = self.counts["bytes"]
+        if not self.write:
+            return
+
+        def done() -> None:
+            ip.close_quarantine_manifest(self.ingest_id)
+            self.conn.execute("UPDATE shard_merges SET status='done', counts=?, finished_at=? WHERE shard_id=?",
+                              (json.dumps(self.counts), datetime.utcnow().isoformat(), self.info["shard_id"]))
+            ip.finish_ingest(self.conn, self.ingest_id, st)
+
+        self._tx(done)
+
+    def run(self, progress: Optional[Callable[[dict], None]] = None) -> dict:
+        """Merge the delta; returns the counts (also stored in shard_merges.counts)."""
+        prior = self._check()
+        last_rid = 0
+        if prior:                                # interrupted merge of this shard: resume
+            _status, last_rid, self.ingest_id, counts, _f, _p = prior
+            self.counts.update(json.loads(counts or "{}"))
+            self.stats["elapsed_s"] = self.counts.get("elapsed_s", 0.0)
+            ip.log(f"Resuming merge of shard {self.shard} after delta rid {last_rid} (batch {self.ingest_id[:8]})")
+        elif self.write:
+            self.ingest_id = ip.begin_ingest(self.conn, self.label,
+                                             note=f"delta {self.delta_path} (shard_id {self.info['shard_id']})")
+            self._tx(self._start)
+        else:
+            self.ingest_id = self.info["shard_id"]
+        if self.write:
+            ip.open_quarantine_manifest(self.conn, self.ingest_id)
+        select = f"SELECT rid, {', '.join(self.cols)} FROM media WHERE rid > ? ORDER BY rid LIMIT ?"
+        try:
+            while True:
+                rows = self.delta.execute(select, (last_rid, self.chunk)).fetchall()
+                if not rows:
+                    break
+                self._tx(lambda: self._merge_chunk(rows))
+                last_rid = rows[-1][0]
+                if progress:
+                    progress(self.counts)
+        except BaseException:
+            if self.write:
+                ip.close_quarantine_manifest(self.ingest_id)   # quarantine moves already happened; keep their events
+                if self.conn.in_transaction:
+                    self.conn.commit()
+            raise
+        self._finish()
+        return self.counts
+
+
+def merge_delta(conn: sqlite3.Connection, delta_path: Path, maps: Sequence[Tuple[str, str]] = (), *,
+                chunk: int = 500, allow_unfinished: bool = False,
+                progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """Fold one delta DB into the master (ip.DRY_RUN: plan only). Raises ValueError if refused."""
+    m = DeltaMerge(conn, delta_path, maps, chunk=chunk, allow_unfinished=allow_unfinished)
+    try:
+        return m.run(progress)
+    finally:
+        m.close()
+
+
+def format_counts(counts: dict) -> str:
+    q = ", ".join(f"{k}={v}" for k, v in sorted(counts.get("q_counts", {}).items()))
+    return (f"rows={counts['rows']} new={counts['new']} merged={counts['merged']} dupes={counts['dupes']} "
+            f"quarantined={counts['quarantined']}{f' ({q})' if q else ''} files_moved={counts['files_moved']} "
+            f"files_missing={counts['files_missing']}")
+
+
+def cmd_info(conn: Optional[sqlite3.Connection], args) -> int:
+    bad = 0
+    for path in args.deltas:
+        path = Path(path).expanduser()
+        try:
+            delta = open_delta(path)
+            info = read_delta_info(delta, path)
+        except ValueError as e:
+            ip.log(str(e))
+            bad += 1
+            continue
+        by_state = ", ".join(f"{s}={n}" for s, n, _b in pixarr_counters.counts(delta, "state")) \
+            if pixarr_counters.available(delta) else "?"
+        batches, unfinished = delta.execute(
+            "SELECT COUNT(*), COUNT(*) - COUNT(finished_at) FROM ingests").fetchone()
+        delta.close()
+        try:
+            merged = conn.execute("SELECT status, last_rid, finished_at FROM shard_merges WHERE shard_id = ?",
+                                  (info["shard_id"],)).fetchone() if conn else None
+        except sqlite3.OperationalError:     # master predates sharded ingest
+            merged = None
+        status = ("not merged" if not merged else f"merged {merged[2]}" if merged[0] == "done"
+                  else f"merge interrupted after rid {merged[1]} (re-run merge to resume)")
+        ip.log(f"{path}: shard {info['shard']} ({info['shard_id'][:8]}) host={info['host']} "
+               f"data_dir={info['data_dir']} created={info['created_at']}")
+        ip.log(f"  media: {by_state}; batches={batches} unfinished={unfinished}; {status}")
+    return 1 if bad else 0
+
+
+def cmd_merge(conn: sqlite3.Connection, args) -> int:
+    maps = parse_maps(args.map)
+    mode = "WRITE" if args.write else "DRY-RUN"
+    bad = 0
+    for path in args.deltas:
+        path = Path(path).expanduser()
+        t0 = time.perf_counter()
+        ip.log(f"Merge {mode}: {path} -> {ip.DB_PATH}")
+        try:
+            counts = merge_delta(conn, path, maps, chunk=args.chunk, allow_unfinished=args.allow_unfinished,
+                                 progress=lambda c: ip.log(f"… {format_counts(c)}", logging.DEBUG))
+        except ValueError as e:
+            ip.log(f"  refused: {e}")
+            bad += 1
+            continue
+        ip.log(f"  {format_counts(counts)} ({time.perf_counter() - t0:.1f}s)")
+    return 1 if bad else 0
+
+
+def main():
+    cfg = ip.load_config(ip.repo_root() / "pixarr.toml")
+    cfg_paths = cfg.get("paths", {})
+    cfg_quar = cfg.get("quarantine", {})
+
+    ap = argparse.ArgumentParser(description="Sharded ingest: inspect per-node delta DBs and merge them into the master")
+    ap.add_argument("--data-dir",
+                    default=str(Path(cfg_paths.get("data_dir", str(ip.repo_root() / "data")))),
+                    help="Master data directory (default: ./data under repo)")
+    ap.add_argument("-v", "--verbose", action="count", default=0)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    spi = sub.add_parser("info", help="Shard, rows by state, batches and merge status of delta DBs")
+    spi.add_argument("deltas", nargs="+", metavar="DELTA")
+    spi.set_defaults(func=cmd_info)
+
+    spm = sub.add_parser("merge", help="Fold delta DBs into the master, in the order given (dry-run unless --write)")
+    spm.add_argument("deltas", nargs="+", metavar="DELTA")
+    spm.add_argument("--map", action="append", metavar="FROM=TO",
+                     help="Node path prefix as the master sees it, e.g. /tank/pixarr=/mnt/node1/pixarr (repeatable)")
+    spm.add_argument("--write", action="store_true", help="Actually merge and move files (default is dry-run)")
+    spm.add_argument("--chunk", type=int, default=500, help="Delta media rows per transaction (default 500)")
+    spm.add_argument("--allow-unfinished", action="store_true",
+                     help="Merge a delta whose batches didn't all finish (crashed and not --resume'd)")
+    spm.set_defaults(func=cmd_merge)
+    args = ap.parse_args()
+
+    base = Path(args.data_dir).resolve()
+    ip.LOGGER = ip.setup_logging(
+        data_dir=base, logs_dir_arg=None,
+        verbose=args.verbose, quiet=False, log_level_arg=None, json_logs=False,
+    )
+    ip.pathize(base)
+    ip.QUAR = ip.build_quarantine_cfg(cfg_quar)
+    ip.QUAR_MANIFEST = bool(cfg_quar.get("manifest", True))
+    ip.QUAR_SIDECARS = bool(cfg_quar.get("sidecars", False))
+    ip.QUAR_MANIFEST_BATCH = int(cfg_quar.get("manifest_batch", 500))
+    ip.DRY_RUN = not getattr(args, "write", False)
+
+    conn = None
+    if args.cmd == "merge":
+        ip.ensure_dirs()
+        if not ip.DB_PATH.exists():
+            ip.ensure_db()           # a master can start out as the merge of its shards
+        conn = ip.open_db()
+        ip.check_schema(conn)
+        ip.ensure_quarantine_events(conn)
+        ip.ensure_ingest_stats(conn)
+        ip.ensure_shard_tables(conn)
+        pixarr_sightings.ensure(conn)
+    elif ip.DB_PATH.exists():
+        conn = ip.open_db("read")
+    try:
+        rc = args.func(conn, args)
+    finally:
+        if conn:
+            conn.close()
+        ip.stop_logging()
+    sys.exit(rc)
+
+
+if __name__ == "__main__":
+    main()
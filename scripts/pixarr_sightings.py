@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pixarr_sightings.py — keep sightings_v2 from growing with every re-scan.
+
+Each time ingest sees a staging file it records a sighting, so a file that
+icloudpd re-exports (or a drive scanned again) adds a row per pass. Compaction
+mode keeps one row per (media_rid, full_path) instead:
+
+  seen_ts        last time the path was seen (as before)
+  first_seen_ts  first time (NULL on rows seen once: same as seen_ts)
+  seen_count     how many times it was seen
+  ingest_id      the batch that saw it last
+
+The mode is on when the unique index idx_sightings_v2_media_path exists. From
+then on ingest's flush_sightings and INSERTs into the `sightings` view upsert
+into the existing row instead of adding one. compact() turns it on: it merges
+the existing duplicates one media_rid range per transaction (ingest can keep
+running in between), then creates the index in a final short transaction.
+
+prune() is the retention policy: sightings of media that have been in state
+'deleted' for more than N days are trimmed to the latest `keep` per media, and
+sightings whose media row is gone (deleted with foreign_keys off) are dropped.
+
+  pixarr_db.py compact-sightings [--chunk 5000]
+  pixarr_db.py prune-sightings --deleted-days 90 [--keep 1]
+
+The columns and view mirror db/schema.sql; ensure() adds them to DBs that
+predate them. Stdlib only (plus pixarr_sqlite), like pixarr_counters.
+"""
+
+import sqlite3
+import time
+from typing import Callable, Dict, Optional
+
+import pixarr_sqlite
+
+UNIQUE_INDEX = "idx_sightings_v2_media_path"
+
+# Merge a re-seen path into its row; the SET expressions all read the old row
+_ON_CONFLICT = """
+  ON CONFLICT(media_rid, full_path) DO UPDATE SET
+    first_seen_ts = MIN(COALESCE(first_seen_ts, seen_ts), COALESCE(excluded.first_seen_ts, excluded.seen_ts)),
+    seen_ts       = MAX(seen_ts, excluded.seen_ts),
+    seen_count    = seen_count + excluded.seen_count,
+    source_root   = excluded.source_root,
+    filename      = excluded.filename,
+    folder_hint   = COALESCE(excluded.folder_hint, folder_hint),
+    ingest_id     = excluded.ingest_id"""
+
+# ingest_pass.flush_sightings: (source_root, full_path, filename, folder_hint, seen_ts, ingest_id, media_id)
+INSERT_SQL = """
+  INSERT INTO sightings_v2
+    (media_rid, source_root, full_path, filename, folder_hint, seen_ts, ingest_id)
+  SELECT rid, ?, ?, ?, ?, ?, ? FROM media WHERE id = ?"""
+UPSERT_SQL = INSERT_SQL + _ON_CONFLICT
+
+# pixarr_shards.py merge: whole rows from a delta DB, media_rid already mapped to the master's
+# (media_rid, source_root, full_path, filename, folder_hint, ingest_id, seen_ts, first_seen_ts, seen_count)
+COPY_SQL = """
+  INSERT INTO sightings_v2
+    (media_rid, source_root, full_path, filename, folder_hint, ingest_id, seen_ts, first_seen_ts, seen_count)
+  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+COPY_UPSERT_SQL = COPY_SQL + _ON_CONFLICT
+
+# Same text as db/schema.sql (tests/test_sightings.py compares what ensure() and schema.sql create)
+VIEW_DDL = [
+    "DROP VIEW IF EXISTS sightings",
+    """CREATE VIEW sightings AS
+SELECT s.id, m.id AS media_id, s.media_rid, s.source_root, s.full_path, s.filename,
+       s.folder_hint, s.ingest_id, s.seen_at, s.seen_ts,
+       COALESCE(s.first_seen_ts, s.seen_ts) AS first_seen_ts,
+       strftime('%Y-%m-%dT%H:%M:%S', COALESCE(s.first_seen_ts, s.seen_ts), 'unixepoch') AS first_seen_at,
+       s.seen_count
+FROM sightings_v2 s JOIN media m ON m.rid = s.media_rid""",
+]
+
+
+def _view_trigger(compact: bool) -> str:
+    """INSTEAD OF INSERT on the view: plain insert, or the upsert once the unique index exists."""
+    return f"""CREATE TRIGGER sightings_insert INSTEAD OF INSERT ON sightings
+BEGIN
+  INSERT INTO sightings_v2 (media_rid, source_root, full_path, filename, folder_hint, ingest_id, seen_ts)
+  VALUES ((SELECT rid FROM media WHERE id = NEW.media_id), NEW.source_root, NEW.full_path, NEW.filename,
+          NEW.folder_hint, NEW.ingest_id,
+          COALESCE(NEW.seen_ts, CAST(strftime('%s', NEW.seen_at) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER))){_ON_CONFLICT if compact else ""};
+END"""
+
+
+def enabled(conn: sqlite3.Connection) -> bool:
+    """True if the DB is in compaction mode (the unique (media_rid, full_path) index exists)."""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name=?",
+                        (UNIQUE_INDEX,)).fetchone() is not None
+
+
+def has_columns(conn: sqlite3.Connection) -> bool:
+    """True if sightings_v2 has first_seen_ts/seen_count (readers on older DBs leave them out)."""
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(sightings_v2)")}
+    return {"first_seen_ts", "seen_count"} <= cols
+
+
+def _install_view(conn: sqlite3.Connection, compact: bool) -> None:
+    for stmt in VIEW_DDL + ["DROP TRIGGER IF EXISTS sightings_insert", _view_trigger(compact)]:
+        conn.execute(stmt)
+
+
+def ensure(conn: sqlite3.Connection) -> bool:
+    """
+    Add first_seen_ts/seen_count (+ the view exposing them) to DBs that predate them,
+    and put back the upsert view trigger if a schema.sql re-run replaced it. True if
+    anything changed.
+    """
+    compact = enabled(conn)
+    trigger = conn.execute("SELECT sql FROM sqlite_master WHERE type='trigger' AND name='sightings_insert'").fetchone()
+    if has_columns(conn) and trigger and ("ON CONFLICT" in trigger[0]) == compact:
+        return False
+
+    def run() -> None:
+        if not has_columns(conn):
+            conn.execute("ALTER TABLE sightings_v2 ADD COLUMN first_seen_ts INTEGER")
+            conn.execute("ALTER TABLE sightings_v2 ADD COLUMN seen_count INTEGER NOT NULL DEFAULT 1")
+        _install_view(conn, compact)
+
+    pixarr_sqlite.immediate(conn, run)
+    return True
+
+
+def _merge(conn: sqlite3.Connection, where: str, params: tuple) -> int:
+    """
+    Collapse duplicate (media_rid, full_path) rows matching `where` into the most
+    recently seen one; caller owns the transaction. Returns rows removed.
+    """
+    groups = conn.execute(f"""
+        SELECT media_rid, full_path, MIN(COALESCE(first_seen_ts, seen_ts)), SUM(seen_count),
+               (SELECT k.id FROM sightings_v2 k WHERE k.media_rid = s.media_rid AND k.full_path = s.full_path
+                ORDER BY k.seen_ts DESC, k.id DESC LIMIT 1)
+        FROM sightings_v2 s WHERE {where}
+        GROUP BY media_rid, full_path HAVING COUNT(*) > 1""", params).fetchall()
+    if not groups:
+        return 0
+    conn.executemany("UPDATE sightings_v2 SET first_seen_ts = ?, seen_count = ? WHERE id = ?",
+                     [(first, n, keep) for _rid, _path, first, n, keep in groups])
+    return conn.executemany("DELETE FROM sightings_v2 WHERE media_rid = ? AND full_path = ? AND id <> ?",
+                            [(rid, path, keep) for rid, path, _first, _n, keep in groups]).rowcount
+
+
+def compact(conn: sqlite3.Connection, chunk: int = 5000,
+            progress: Optional[Callable[[int, int, int], None]] = None) -> Dict[str, int]:
+    """
+    Merge existing duplicate sightings, `chunk` media_rids per transaction, then
+    switch the DB to compaction mode. Safe to re-run and to run next to ingest:
+    duplicates written meanwhile are merged in the last transaction, which also
+    creates the unique index. progress(done_rid, max_rid, removed) after each chunk.
+    """
+    ensure(conn)
+    rows_before = conn.execute("SELECT COUNT(*) FROM sightings_v2").fetchone()[0]
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM sightings_v2").fetchone()[0]
+    max_rid = conn.execute("SELECT COALESCE(MAX(media_rid), 0) FROM sightings_v2").fetchone()[0]
+    removed = 0
+    for lo in range(0, max_rid + 1, chunk):
+        removed += pixarr_sqlite.immediate(conn, lambda: _merge(conn, "media_rid >= ? AND media_rid < ?", (lo, lo + chunk)))
+        if progress:
+            progress(min(lo + chunk, max_rid), max_rid, removed)
+
+    def finish() -> int:
+        n = _merge(conn, "(media_rid, full_path) IN (SELECT media_rid, full_path FROM sightings_v2 WHERE id > ?)",
+                   (last_id,))
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {UNIQUE_INDEX} ON sightings_v2(media_rid, full_path)")
+        _install_view(conn, True)
+        return n
+
+    removed += pixarr_sqlite.immediate(conn, finish)
+    return {"rows_before": rows_before, "removed": removed,
+            "rows_after": conn.execute("SELECT COUNT(*) FROM sightings_v2").fetchone()[0]}
+
+
+def prune(conn: sqlite3.Connection, deleted_days: float, keep: int = 1,
+          now: Optional[int] = None) -> Dict[str, int]:
+    """
+    Retention: keep only the latest `keep` sightings of media deleted more than
+    `deleted_days` ago (deleted_at, else updated_ts), and drop sightings whose
+    media row no longer exists. One write transaction.
+    """
+    cutoff = int(time.time() if now is None else now) - int(deleted_days * 86400)
+
+    def run() -> Dict[str, int]:
+        orphans = conn.execute(
+            "DELETE FROM sightings_v2 WHERE NOT EXISTS (SELECT 1 FROM media m WHERE m.rid = media_rid)").rowcount
+        deleted = conn.execute("""
+            DELETE FROM sightings_v2 WHERE id IN (
+              SELECT id FROM (
+                SELECT s.id, ROW_NUMBER() OVER (PARTITION BY s.media_rid ORDER BY s.seen_ts DESC, s.id DESC) AS rn
+                FROM media m JOIN sightings_v2 s ON s.media_rid = m.rid
+                WHERE m.state = 'deleted'
+                  AND COALESCE(CAST(strftime('%s', m.deleted_at) AS INTEGER), m.updated_ts) < ?)
+              WHERE rn > ?)""", (cutoff, keep)).rowcount
+        return {"orphans": orphans, "deleted_media": deleted}
+
+    return pixarr_sqlite.immediate(conn, run)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pixarr_sqlite.py — one place that opens app.sqlite3 (ingest, CLI tools, API).
+
+Every caller used to run sqlite3.connect() with its own pragmas or none: default
+2 MB page cache, no mmap, no busy timeout. connect() applies a named profile:
+
+  read   API requests and read-only CLI tools: query_only, 256 MB mmap, 64 MB
+         page cache, temp b-trees in memory. Readers never block in WAL mode
+         and can't write by accident.
+  write  the ingest writer and maintenance tools: synchronous=NORMAL, foreign
+         keys, 30 s busy_timeout (waits out a concurrent tool instead of raising
+         "database is locked"), WAL checkpoints every 4000 pages (~16 MB) instead
+         of 1000, so a long batch pauses for checkpoints less often.
+
+Opening a connection costs ~1 ms (schema parse + pragmas), more than most API
+queries take on an open one, so servers use thread_connection(): one cached
+connection per thread, reused across requests (in WAL mode each statement
+still sees the latest commit).
+
+Connections close with PRAGMA optimize (it runs ANALYZE only on tables whose
+query plans would benefit and is usually free). Read connections skip it,
+since query_only forbids the writes it would make.
+
+  conn = pixarr_sqlite.connect(db_path, "write")
+  conn = pixarr_sqlite.connect(db_path, "read", row_factory=sqlite3.Row)
+  conn = pixarr_sqlite.connect(db_path, "write", foreign_keys=0)     # per-pragma override
+  conn = pixarr_sqlite.thread_connection(db_path)                    # per-thread, kept open (API)
+  conn = pixarr_sqlite.connect(db_path, "write", tracer=tracer)      # per-statement timing (pixarr_trace)
+  pixarr_sqlite.immediate(conn, fn)                                  # fn() in BEGIN IMMEDIATE ... COMMIT
+
+With a tracer (pixarr_trace.SqlTracer, or anything with observe() and
+trace_callback) the connection is a TracingConnection: each execute/executemany
+is timed until its cursor is exhausted, closed or dropped, and reported with
+the row count. Without one nothing is wrapped and there is no overhead.
+
+Stdlib only; the API imports it from scripts/ (pixarr-api/app/repositories/db.py).
+`scripts/bench_db.py pragmas` measures the profiles against plain connect().
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+MB = 1024 * 1024
+
+PROFILES = {
+    "read": {
+        "busy_timeout": 5000,
+        "query_only": 1,
+        "mmap_size": 256 * MB,
+        "cache_size": -64 * 1024,      # KiB when negative: 64 MB
+        "temp_store": "MEMORY",
+    },
+    "write": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "foreign_keys": 1,
+        "busy_timeout": 30000,
+        "wal_autocheckpoint": 4000,    # pages (~16 MB at 4 KiB); default 1000
+        "mmap_size": 256 * MB,
+        "cache_size": -32 * 1024,
+        "temp_store": "MEMORY",
+    },
+}
+
+# Pragmas that can't be set inside a transaction or must come first
+_FIRST = ("busy_timeout", "journal_mode")
+
+
+class PixarrConnection(sqlite3.Connection):
+    """sqlite3.Connection that runs PRAGMA optimize on close (unless opened read-only)."""
+
+    profile: str = "write"
+    optimize_on_close: bool = True
+
+    def close(self) -> None:
+        if self.optimize_on_close:
+            try:
+                if self.in_transaction:
+                    self.rollback()         # same as close() would do; optimize needs no open txn
+                self.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass                        # best effort: never fail a close over statistics
+        super().close()
+
+
+class TracingCursor(sqlite3.Cursor):
+    """Cursor that reports (sql, params, seconds, rows) to the connection's tracer once a statement is done."""
+
+    _pending = None                         # [sql, params, seconds, rows] of the statement still being fetched
+
+    def _done(self) -> None:
+        p, self._pending = self._pending, None
+        if p is not None:
+            self.connection.tracer.observe(self.connection, *p)
+
+    def _run(self, method, sql, params, shown):
+        self._done()
+        t0 = time.perf_counter()
+        try:
+            method(self, sql, params)
+        finally:
+            self._pending = [sql, shown, time.perf_counter() - t0, max(self.rowcount, 0)]
+        if self.description is None:        # DML/DDL: nothing to fetch, done now
+            self._done()
+        return self
+
+    def execute(self, sql, params=()):
+        return self._run(sqlite3.Cursor.execute, sql, params, params)
+
+    def executemany(self, sql, seq_of_params):
+        seq = seq_of_params if isinstance(seq_of_params, (list, tuple)) else list(seq_of_params)
+        return self._run(sqlite3.Cursor.executemany, sql, seq, seq[0] if seq else ())   # first row for the plan
+
+    def _timed(self, fetch, *args):
+        t0 = time.perf_counter()
+        try:
+            out = fetch(self, *args)
+        finally:
+            if self._pending is not None:
+                self._pending[2] += time.perf_counter() - t0
+        return out
+
+    def fetchone(self):
+        row = self._timed(sqlite3.Cursor.fetchone)
+        if self._pending is not None:
+            if row is None:
+                self._done()
+            else:
+                self._pending[3] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(sqlite3.Cursor.fetchmany, size)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            if len(rows) < size:
+                self._done()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(sqlite3.Cursor.fetchall)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            self._done()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(sqlite3.Cursor.__next__)
+        except StopIteration:
+            self._done()
+            raise
+        if self._pending is not None:
+            self._pending[3] += 1
+        return row
+
+    def close(self) -> None:
+        self._done()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._done()
+        except Exception:                   # noqa: BLE001 (never raise from a finalizer)
+            pass
+
+
+class TracingConnection(PixarrConnection):
+    """PixarrConnection whose statements are timed by `tracer` (see TracingCursor)."""
+
+    tracer = None
+
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def connect(db_path: Union[str, Path], profile: str = "write", *, row_factory=None,
+            optimize_on_close: Optional[bool] = None, tracer=None, **overrides) -> PixarrConnection:
+    """
+    Open `db_path` with a PROFILES entry applied; keyword overrides replace single
+    pragmas (None drops one). sqlite3.connect() kwargs (isolation_level, timeout,
+    check_same_thread, uri) pass through. With `tracer` every statement is timed
+    (TracingConnection), and tracer.trace_callback (if set) becomes the trace callback.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"unknown SQLite profile {profile!r} (expected one of {', '.join(PROFILES)})")
+    connect_kw = {k: overrides.pop(k) for k in ("isolation_level", "timeout", "check_same_thread", "uri")
+                  if k in overrides}
+    conn = sqlite3.connect(str(db_path), factory=TracingConnection if tracer else PixarrConnection, **connect_kw)
+    if tracer:
+        conn.tracer = tracer
+        if tracer.trace_callback:
+            conn.set_trace_callback(tracer.trace_callback)
+    conn.profile = profile
+    conn.optimize_on_close = (profile != "read") if optimize_on_close is None else optimize_on_close
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    pragmas = {**PROFILES[profile], **overrides}
+    for name in sorted(pragmas, key=lambda n: n not in _FIRST):
+        if pragmas[name] is not None:
+            conn.execute(f"PRAGMA {name}={pragmas[name]}")
+    return conn
+
+
+_local = threading.local()
+
+
+def thread_connection(db_path: Union[str, Path], profile: str = "read", **kw) -> PixarrConnection:
+    """The calling thread's cached connection for (db_path, profile); opened on first use with `kw`."""
+    cache = getattr(_local, "conns", None)
+    if cache is None:
+        cache = _local.conns = {}
+    key = (str(db_path), profile)
+    conn = cache.get(key)
+    if conn is None:
+        conn = cache[key] = connect(db_path, profile, **kw)
+    return conn
+
+
+def immediate(conn: sqlite3.Connection, fn: Callable[[], Any]) -> Any:
+    """
+    Run fn in its own BEGIN IMMEDIATE transaction and return its result. The
+    write lock is taken up front (waiting via busy_timeout) instead of on the
+    first write, so a tool running next to ingest never fails a read-to-write
+    upgrade. An open implicit transaction is committed first; fn's errors roll back.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        out = fn()
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return out
+
+
+def pragma_report(conn: sqlite3.Connection) -> dict:
+    """Current values of the pragmas the profiles set (for logs / bench output)."""
+    names = sorted({n for p in PROFILES.values() for n in p})
+    return {n: conn.execute(f"PRAGMA {n}").fetchone()[0] for n in names}
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pixarr_trace.py — which SQL statements dominate: per-statement timing + slow-query log.
+
+  tracer = pixarr_trace.SqlTracer(slow_ms=50, slow_log=Path("logs/slow-sql.log"))
+  conn = pixarr_sqlite.connect(db_path, "write", tracer=tracer)
+  ...
+  for line in tracer.format_table(top=15):
+      print(line)
+
+Connections opened with a tracer (pixarr_sqlite.TracingConnection) time every
+execute/executemany on the wall clock, including the fetches that follow, and
+report it here once the cursor is exhausted or dropped. Statements are grouped
+by normalized text (literals -> ?, IN lists collapsed, whitespace squeezed)
+with count, total, p95, max and rows. With count_starts=True the sqlite3
+trace callback adds what the wrappers can't see, as counts by verb: every
+statement SQLite starts, including each trigger program (reported as its
+parent statement), the implicit BEGIN and executescript() statements. More
+INSERT starts than timed INSERTs is the media counter triggers at work. It is
+off by default: sqlite3 expands each traced statement's parameters into its
+SQL text, which costs more than the timing (`bench_db.py trace`).
+
+A statement slower than slow_ms is appended to the slow-query log (and kept in
+`slow`, the last SLOW_KEEP entries) with its parameters and, the first time
+per normalized statement, its EXPLAIN QUERY PLAN.
+
+Who turns it on: ingest_pass.py --profile (table in the summary, <log>.sql.json
+and <log>.slow-sql.log next to the log; --sql-starts counts starts), and the
+API with PIXARR_SQL_TRACE=1, or =starts (GET /api/stats/sql; slow log in
+<data_dir>/logs/api-slow-sql.log).
+Stdlib only, like pixarr_sqlite.
+"""
+
+import bisect
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+SLOW_KEEP = 200
+
+_STR = re.compile(r"(?:[xX])?'(?:[^']|'')*'")
+_NUM = re.compile(r"(?<![\w?])-?\d+(?:\.\d+)?(?![\w])")
+_IN_LIST = re.compile(r"\b(IN\s*)\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"(\(\?(?:, \?)*\))(?:\s*,\s*\1)+")
+_WS = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def normalize(sql: str) -> str:
+    """Statement shape: literals become ?, IN (?, ?, …) becomes IN (?…), whitespace squeezed."""
+    s = _STR.sub("?", sql)
+    s = _NUM.sub("?", s)
+    s = _WS.sub(" ", s).strip().rstrip(";")
+    s = _IN_LIST.sub(r"\1(?…)", s)
+    return _VALUES_LIST.sub(r"\1…", s)
+
+
+class Histogram:
+    """
+    Running latency stats: count/total/max plus fixed log-spaced buckets
+    (2^(1/4) steps from 1µs), so p50/p95/p99 cost O(1) memory however many
+    samples arrive. Percentiles are bucket upper bounds (≤19% high), capped at
+    the observed max. `amount` sums what the caller measures alongside each
+    sample (rows per statement here, bytes per stage in ingest's StageHistogram).
+    """
+    BOUNDS = [1e-6 * 2 ** (i / 4) for i in range(0, 137)]   # 1µs … ~21 min
+
+    __slots__ = ("count", "total", "max", "amount", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.amount = 0
+        self.buckets = [0] * (len(self.BOUNDS) + 1)
+
+    def observe(self, seconds: float, amount: int = 0) -> None:
+        self.count += 1
+        self.total += seconds
+        self.amount += amount
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+
+    def merge(self, other: "Histogram") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.amount += other.amount
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(self.BOUNDS[i] if i < len(self.BOUNDS) else self.max, self.max)
+        return self.max
+
+
+class StatementStats(Histogram):
+    """One normalized statement's timings; the amount is rows returned/changed."""
+
+    __slots__ = ()
+
+    @property
+    def rows(self) -> int:
+        return self.amount
+
+
+def _short(value, limit: int = 80) -> str:
+    if isinstance(value, (bytes, bytearray)):
+        return f"x'{bytes(value[:16]).hex()}{'…' if len(value) > 16 else ''}'"
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _show_params(params) -> List[str]:
+    if isinstance(params, dict):                 # named (:sha256 …), like ingest's media upsert
+        return [f"{k}={_short(v)}" for k, v in list(params.items())[:20]]
+    return [_short(p) for p in list(params or ())[:20]]
+
+
+class SqlTracer:
+    """Aggregates statement timings from TracingConnections (thread-safe; one tracer per process)."""
+
+    def __init__(self, slow_ms: Optional[float] = None, slow_log: Optional[Union[str, Path]] = None,
+                 explain: bool = True, count_starts: bool = False):
+        self.slow_s = None if slow_ms is None else slow_ms / 1000
+        self.slow_log = Path(slow_log) if slow_log else None
+        self.explain = explain
+        self.stats: Dict[str, StatementStats] = {}
+        self.starts: Counter = Counter()
+        # pixarr_sqlite.connect installs this as the connection's trace callback (None: not installed)
+        self.trace_callback = self.on_trace if count_starts else None
+        self.slow: deque = deque(maxlen=SLOW_KEEP)
+        self._norm: Dict[str, str] = {}
+        self._explained: set = set()
+        self._lock = threading.Lock()
+
+    # --- called by pixarr_sqlite.TracingConnection / TracingCursor ---
+
+    def key(self, sql: str) -> str:
+        k = self._norm.get(sql)
+        if k is None:
+            k = self._norm[sql] = normalize(sql)
+        return k
+
+    def observe(self, conn: sqlite3.Connection, sql: str, params, seconds: float, rows: int) -> None:
+        key = self.key(sql)
+        with self._lock:
+            st = self.stats.get(key)
+            if st is None:
+                st = self.stats[key] = StatementStats()
+            st.observe(seconds, rows)
+        if self.slow_s is not None and seconds >= self.slow_s:
+            self._log_slow(conn, key, sql, params, seconds, rows)
+
+    def on_trace(self, stmt: str) -> None:
+        """sqlite3 trace callback: count statement starts by verb (the wrappers time the statements)."""
+        verb = stmt.lstrip()[:10].split(None, 1)
+        with self._lock:
+            self.starts[verb[0].upper() if verb else "?"] += 1
+
+    # --- slow-query log ---
+
+    def _plan(self, conn: sqlite3.Connection, sql: str, params) -> List[str]:
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return []
+        try:
+            rows = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()
+        except sqlite3.Error as e:
+            return [f"(no plan: {e})"]
+        return [str(r[-1]) for r in rows]
+
+    def _log_slow(self, conn, key: str, sql: str, params, seconds: float, rows: int) -> None:
+        with self._lock:
+            first = key not in self._explained
+            self._explained.add(key)
+        plan = self._plan(conn, sql, params) if (self.explain and first) else None
+        entry = {"at": time.strftime("%Y-%m-%dT%H:%M:%S"), "ms": round(seconds * 1000, 3), "rows": rows,
+                 "sql": key, "params": _show_params(params), "plan": plan}
+        with self._lock:
+            self.slow.append(entry)
+            if self.slow_log:
+                self.slow_log.parent.mkdir(parents=True, exist_ok=True)
+                with self.slow_log.open("a", encoding="utf-8") as f:
+                    f.write(f"{entry['at']} {entry['ms']:.1f} ms rows={rows} {key}\n")
+                    if entry["params"]:
+                        f.write(f"  params: ({', '.join(entry['params'])})\n")
+                    for line in plan if plan is not None else ["(logged with its first slow run)"]:
+                        f.write(f"  plan: {line}\n")
+
+    # --- reports ---
+
+    def report(self, top: Optional[int] = None) -> List[dict]:
+        """Statements by total time, slowest first."""
+        with self._lock:
+            items = [(k, st) for k, st in self.stats.items() if st.count]
+            out = [{
+                "sql": k,
+                "count": st.count,
+                "total_ms": round(st.total * 1000, 3),
+                "mean_ms": round(st.total * 1000 / st.count, 4),
+                "p95_ms": round(st.percentile(0.95) * 1000, 4),
+                "max_ms": round(st.max * 1000, 3),
+                "rows": st.rows,
+            } for k, st in items]
+        out.sort(key=lambda d: -d["total_ms"])
+        return out[:top] if top else out
+
+    def format_table(self, top: int = 15, width: int = 90) -> List[str]:
+        rows = self.report()
+        total = sum(r["total_ms"] for r in rows) or 1.0
+        lines = [f"  {'count':>9}{'total s':>9}{'%sql':>6}{'p95 ms':>9}{'rows':>10}  statement"]
+        for r in rows[:top]:
+            sql = r["sql"] if len(r["sql"]) <= width else r["sql"][:width - 1] + "…"
+            lines.append(f"  {r['count']:>9}{r['total_ms'] / 1000:>9.2f}{100 * r['total_ms'] / total:>5.1f}%"
+                         f"{r['p95_ms']:>9.3f}{r['rows']:>10}  {sql}")
+        if self.starts:
+            started = ", ".join(f"{verb}={n}" for verb, n in self.starts.most_common(8))
+            lines.append(f"  statements started (incl. trigger programs): {started}")
+        return lines
+
+    def snapshot(self, top: Optional[int] = None, slow: int = SLOW_KEEP) -> dict:
+        """report() plus statement starts and the last `slow` slow-query entries (JSON-ready)."""
+        statements = self.report(top)
+        with self._lock:
+            starts = dict(self.starts.most_common())
+            recent = list(self.slow)[-slow:] if slow else []
+        return {"slow_ms": None if self.slow_s is None else self.slow_s * 1000,
+                "statements": statements, "starts": starts, "slow": recent}
+
+    def write_json(self, path: Union[str, Path], top: Optional[int] = None) -> dict:
+        payload = self.snapshot(top)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        return payload
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: Sequence = ()) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines for one statement (outside any tracer)."""
+    return [str(r[-1]) for r in sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+quarantine_manifest.py — manage quarantine manifests and their DB index.
+
+Ingest now appends quarantine metadata to Quarantine/_manifests/<ingest_id>.jsonl
+(one line per event) and indexes it into the quarantine_events table. Older runs
+(or [quarantine] sidecars = true) left one <name>.quarantine.json per file.
+
+Usage (from repo root):
+  # fold legacy sidecars into per-ingest manifests + index (dry-run prints counts)
+  python scripts/quarantine_manifest.py convert
+  python scripts/quarantine_manifest.py convert --write --remove-sidecars
+
+  # (re)build quarantine_events from every manifest (idempotent)
+  python scripts/quarantine_manifest.py index
+
+  # quick look at what's indexed
+  python scripts/quarantine_manifest.py reasons
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import ingest_pass as ip
+
+LEGACY_MANIFEST = "legacy-sidecars"   # bucket for sidecars without an ingest_id
+
+
+def iter_sidecars(root: Path):
+    """Yield (sidecar_path, payload) for every *.quarantine.json under root."""
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d != ip.MANIFEST_SUBDIR]
+        for name in files:
+            if not name.endswith(".quarantine.json"):
+                continue
+            p = Path(dirpath) / name
+            try:
+                payload = json.loads(p.read_text(encoding="utf-8"))
+            except Exception:
+                print(f"  unreadable sidecar skipped: {p}")
+                continue
+            if isinstance(payload, dict) and payload.get("reason"):
+                yield p, payload
+
+
+def read_manifest(path: Path) -> list:
+    out = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    out.append(json.loads(line))
+                except Exception:
+                    pass   # a torn final line from a crash; ignore it
+    return out
+
+
+def cmd_convert(conn, args) -> None:
+    groups = defaultdict(list)   # manifest name -> [(sidecar, payload)]
+    for sc, payload in iter_sidecars(ip.QUARANTINE_ROOT):
+        groups[payload.get("ingest_id") or LEGACY_MANIFEST].append((sc, payload))
+
+    total = sum(len(v) for v in groups.values())
+    print(f"Found {total} sidecar(s) in {len(groups)} ingest group(s) under {ip.QUARANTINE_ROOT}")
+    if not args.write:
+        for key, items in sorted(groups.items(), key=lambda kv: -len(kv[1]))[:20]:
+            print(f"  {key}: {len(items)}")
+        print("[DRY] re-run with --write to append manifests and index them")
+        return
+
+    written = 0
+    for key, items in groups.items():
+        mpath = ip.manifest_path_for(key)
+        seen = set()
+        if mpath.exists():
+            seen = {(p.get("original_path"), p.get("timestamp")) for p in read_manifest(mpath)}
+        fresh = [pl for _sc, pl in items if (pl.get("original_path"), pl.get("timestamp")) not in seen]
+
+        # reuse the ingest writer: buffered lines, one fsync per batch, executemany index
+        m = ip.QuarantineManifest(conn, key, mpath, batch_size=args.batch)
+        for pl in fresh:
+            m.add(pl)
+        m.flush()
+        # sidecars already in the manifest still need an index row
+        ip.index_quarantine_events(conn, [pl for _sc, pl in items], mpath)
+        conn.commit()
+        written += len(fresh)
+
+        if args.remove_sidecars:
+            for sc, _pl in items:
+                try:
+                    sc.unlink()
+                except Exception as e:
+                    print(f"  could not remove {sc}: {e}")
+    print(f"Appended {written} event(s); indexed {total}. "
+          f"{'Sidecars removed.' if args.remove_sidecars else 'Sidecars kept (use --remove-sidecars).'}")
+
+
+def cmd_index(conn, args) -> None:
+    mdir = ip.QUARANTINE_ROOT / ip.MANIFEST_SUBDIR
+    if not mdir.exists():
+        print(f"No manifests under {mdir}")
+        return
+    n_files = n_events = 0
+    for mpath in sorted(mdir.glob("*.jsonl")):
+        payloads = read_manifest(mpath)
+        for i in range(0, len(payloads), args.batch):
+            ip.index_quarantine_events(conn, payloads[i:i + args.batch], mpath)
+        conn.commit()
+        n_files += 1
+        n_events += len(payloads)
+    print(f"Indexed {n_events} event(s) from {n_files} manifest(s)")
+
+
+def cmd_reasons(conn, args) -> None:
+    rows = conn.execute(
+        "SELECT reason, COUNT(*) FROM quarantine_events GROUP BY reason ORDER BY 2 DESC"
+    ).fetchall()
+    if not rows:
+        print("(no rows)")
+    for reason, cnt in rows:
+        print(f"  {reason:24s} {cnt}")
+
+
+def main():
+    cfg = ip.load_config(ip.repo_root() / "pixarr.toml")
+    cfg_paths = cfg.get("paths", {})
+
+    ap = argparse.ArgumentParser(description="Quarantine manifests: convert sidecars, (re)index, inspect")
+    ap.add_argument("--data-dir",
+                    default=str(Path(cfg_paths.get("data_dir", str(ip.repo_root() / "data")))),
+                    help="Root data directory (default: ./data under repo)")
+    ap.add_argument("--batch", type=int, default=1000, help="Rows per executemany/fsync batch")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("convert", help="Fold *.quarantine.json sidecars into per-ingest manifests")
+    sp.add_argument("--write", action="store_true", help="Actually write manifests/index (default dry-run)")
+    sp.add_argument("--remove-sidecars", action="store_true", help="Delete sidecars once converted")
+    sp.set_defaults(func=cmd_convert)
+
+    sub.add_parser("index", help="Rebuild quarantine_events from manifests").set_defaults(func=cmd_index)
+    sub.add_parser("reasons", help="Event counts by reason").set_defaults(func=cmd_reasons)
+
+    args = ap.parse_args()
+    ip.pathize(Path(args.data_dir).resolve())
+    if not ip.DB_PATH.exists():
+        sys.exit(f"DB not found: {ip.DB_PATH}")
+
+    conn = ip.open_db()
+    try:
+        ip.ensure_quarantine_events(conn)
+        args.func(conn, args)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+requeue.py — rescue missing_datetime quarantines after the date policy changes.
+
+Re-runs resolve_taken_at for every media row with state='quarantine' AND
+quarantine_reason='missing_datetime', using the exiftool tags stored in exif_kv
+and the original filenames recorded in sightings. Newly dated items move
+straight from Quarantine/ to Review/ (canonical name + [review].layout); no
+re-hashing, no re-ingest.
+
+Usage (from repo root):
+  python scripts/requeue.py --allow-filename-dates                 # dry-run: what would move
+  python scripts/requeue.py --allow-filename-dates --write
+  python scripts/requeue.py --allow-file-dates --write --batch 1000
+
+Notes:
+  - Policy flags default to [ingest] allow_file_dates / allow_filename_dates.
+  - Rows without exif_kv tags can only be rescued by filename dates; run
+    `scripts/exif_kv.py backfill --write` first to read their tags once.
+  - Items whose content hash now matches a Review/Library item stay quarantined.
+  - Moves are journaled in review_moves (batch_id 'requeue-…'), same protocol
+    as reshard_review.py; an interrupted run is finished on the next --write.
+"""
+
+import argparse
+import logging
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import ingest_pass as ip
+import reshard_review
+
+BATCH_PREFIX = "requeue-"
+
+
+def load_batch_inputs(conn, ids: list, keys: list) -> tuple:
+    """({media_id: {tag: value}} for date tags, {media_id: [filenames]}) for one batch."""
+    marks = ",".join("?" * len(ids))
+    metas = defaultdict(dict)
+    for mid, tag, value in conn.execute(
+        f"SELECT media_id, tag, value FROM exif_kv WHERE media_id IN ({marks}) "
+        f"AND tag IN ({','.join('?' * len(keys))})",
+        (*ids, *keys),
+    ):
+        metas[mid][tag] = ip.exif_kv_value(value)
+    names = defaultdict(list)
+    for mid, fn in conn.execute(
+        f"SELECT DISTINCT media_id, filename FROM sightings WHERE media_id IN ({marks}) ORDER BY seen_ts",
+        ids,
+    ):
+        names[mid].append(fn)
+    return metas, names
+
+
+def resolve(meta: dict, filenames: list, allow_filename_dates: bool, keys: list):
+    """resolve_taken_at over each recorded filename (EXIF `keys` first, then the first dated name)."""
+    for fn in filenames or [""]:
+        t = ip.resolve_taken_at(meta, fn, allow_filename_dates, keys)
+        if t:
+            return t
+    return None
+
+
+def plan_dest(name: str, claimed: set) -> Path:
+    """plan_nonclobber that also avoids destinations already claimed earlier in this batch."""
+    dest = ip.plan_nonclobber(ip.REVIEW_ROOT, name)
+    rel = Path(name)
+    i = 2
+    while dest in claimed:
+        dest = ip.plan_nonclobber(ip.REVIEW_ROOT, str(rel.with_name(f"{rel.stem}_{i}{rel.suffix}")))
+        i += 1
+    return dest
+
+
+def replay_planned(conn, allow_filename_dates: bool, keys: list) -> int:
+    """Finish requeue moves left 'planned' by an interrupted run."""
+    rows = conn.execute(
+        "SELECT id, media_id, old_path, new_path FROM review_moves "
+        "WHERE status='planned' AND batch_id LIKE ? ORDER BY id",
+        (BATCH_PREFIX + "%",),
+    ).fetchall()
+    if not rows:
+        return 0
+    ip.log(f"Replaying {len(rows)} planned requeue move(s) from an interrupted run …")
+    metas, names = load_batch_inputs(conn, [r[1] for r in rows], keys)
+    now = datetime.utcnow().isoformat()
+    for jid, mid, old, new in rows:
+        old_p, new_p = Path(old), Path(new)
+        if not new_p.exists() and old_p.exists():
+            try:
+                new_p.parent.mkdir(parents=True, exist_ok=True)
+                old_p.rename(new_p)
+            except Exception as e:
+                ip.log(f"  replay failed for {old_p}: {e}")
+        status = "done" if new_p.exists() and not old_p.exists() else "failed"
+        taken = resolve(metas.get(mid, {}), names.get(mid), allow_filename_dates, keys)
+        if status == "done" and taken:
+            conn.execute(
+                "UPDATE media SET state='review', canonical_path=?, taken_at=?, taken_ts=?, quarantine_reason=NULL, "
+                "updated_ts=?, last_verified_at=? WHERE id=?",
+                (str(new_p), taken, ip.iso_to_epoch(taken), ip.epoch_now(), now, mid),
+            )
+        elif status == "done":
+            # policy differs from the interrupted run; keep the DB pointing at the file
+            conn.execute("UPDATE media SET canonical_path=?, updated_ts=? WHERE id=?",
+                         (str(new_p), ip.epoch_now(), mid))
+        conn.execute("UPDATE review_moves SET status=?, finished_at=? WHERE id=?", (status, now, jid))
+    conn.commit()
+    return len(rows)
+
+
+def run_batch(conn, batch: list, *, write: bool) -> tuple:
+    """
+    Move one batch of (media_id, quarantine_path, taken_at, review_dest) to Review.
+    Journal first, rename, then media + journal in one transaction. Returns (moved, failed).
+    """
+    if not write:
+        for _mid, cur, taken, dest in batch:
+            ip.log(f"[DRY] REQUEUE {cur} -> {dest} (taken_at={taken})", logging.DEBUG)
+        return len(batch), 0
+
+    batch_id = BATCH_PREFIX + str(uuid.uuid4())
+    now = datetime.utcnow().isoformat()
+    conn.executemany(
+        "INSERT INTO review_moves (batch_id, media_id, old_path, new_path, status, created_at) "
+        "VALUES (?, ?, ?, ?, 'planned', ?)",
+        [(batch_id, mid, str(cur), str(dest), now) for mid, cur, _t, dest in batch],
+    )
+    conn.commit()
+
+    outcomes = []
+    for mid, cur, taken, dest in batch:
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            cur.rename(dest)
+            outcomes.append((mid, taken, dest, "done"))
+        except Exception as e:
+            ip.log(f"  move failed {cur} -> {dest}: {e}")
+            outcomes.append((mid, taken, dest, "failed"))
+
+    done_at = datetime.utcnow().isoformat()
+    conn.executemany(
+        "UPDATE media SET state='review', canonical_path=?, taken_at=?, taken_ts=?, quarantine_reason=NULL, "
+        "updated_ts=?, last_verified_at=? WHERE id=?",
+        [(str(dest), taken, ip.iso_to_epoch(taken), ip.epoch_now(), done_at, mid)
+         for mid, taken, dest, st in outcomes if st == "done"],
+    )
+    conn.executemany(
+        "UPDATE review_moves SET status=?, finished_at=? WHERE batch_id=? AND media_id=?",
+        [(st, done_at, batch_id, mid) for mid, _t, _d, st in outcomes],
+    )
+    conn.commit()
+    failed = sum(1 for o in outcomes if o[3] == "failed")
+    return len(outcomes) - failed, failed
+
+
+def main():
+    cfg = ip.load_config(ip.repo_root() / "pixarr.toml")
+    cfg_paths = cfg.get("paths", {})
+    cfg_ingest = cfg.get("ingest", {})
+    default_layout = cfg.get("review", {}).get("layout", "flat")
+    if default_layout not in ip.REVIEW_LAYOUTS:
+        default_layout = "flat"
+
+    ap = argparse.ArgumentParser(description="Move missing_datetime quarantines to Review under the current date policy")
+    ap.add_argument("--data-dir",
+                    default=str(Path(cfg_paths.get("data_dir", str(ip.repo_root() / "data")))),
+                    help="Root data directory (default: ./data under repo)")
+    ap.add_argument("--allow-file-dates", action="store_true",
+                    default=bool(cfg_ingest.get("allow_file_dates", False)),
+                    help="Allow ModifyDate/FileModifyDate as capture time fallback")
+    ap.add_argument("--allow-filename-dates", action="store_true",
+                    default=bool(cfg_ingest.get("allow_filename_dates", False)),
+                    help="Allow filename-derived timestamps (from sightings) as fallback")
+    ap.add_argument("--review-layout", choices=list(ip.REVIEW_LAYOUTS), default=default_layout,
+                    help=f"Review layout for moved files (default from config: {default_layout})")
+    ap.add_argument("--write", action="store_true", help="Actually move files (default is dry-run)")
+    ap.add_argument("--batch", type=int, default=500, help="Rows per journaled batch (default 500)")
+    ap.add_argument("-v", "--verbose", action="count", default=0)
+    args = ap.parse_args()
+
+    ip.LOGGER = ip.setup_logging(
+        data_dir=Path(args.data_dir).resolve(), logs_dir_arg=None,
+        verbose=args.verbose, quiet=False, log_level_arg=None, json_logs=False,
+    )
+    ip.pathize(Path(args.data_dir).resolve())
+    if not ip.DB_PATH.exists():
+        sys.exit(f"DB not found: {ip.DB_PATH}")
+    keys = ip.date_keys_for(args.allow_file_dates)
+
+    conn = ip.open_db()
+    ip.check_schema(conn)
+    reshard_review.ensure_journal(conn)
+    if args.write:
+        replay_planned(conn, args.allow_filename_dates, keys)
+
+    ip.log(f"Policy: date keys={keys}, filename dates={args.allow_filename_dates}, "
+           f"layout={args.review_layout}")
+    t0 = time.perf_counter()
+    seen = moved = failed = unresolved = missing = dupes = 0
+    last_rowid = 0
+    try:
+        while True:
+            rows = conn.execute(
+                """
+                SELECT rowid, id, hash_sha256, content_sha256, ext, canonical_path
+                FROM media
+                WHERE state='quarantine' AND quarantine_reason='missing_datetime' AND rowid > ?
+                ORDER BY rowid
+                LIMIT ?
+                """,
+                (last_rowid, args.batch),
+            ).fetchall()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            seen += len(rows)
+            metas, names = load_batch_inputs(conn, [r[1] for r in rows], keys)
+
+            batch, claimed = [], set()
+            for _rowid, mid, h, content, ext, cpath in rows:
+                taken = resolve(metas.get(mid, {}), names.get(mid), args.allow_filename_dates, keys)
+                if not taken:
+                    unresolved += 1
+                    continue
+                cur = Path(cpath) if cpath else None
+                if cur is None or not cur.exists():
+                    missing += 1
+                    ip.log(f"  quarantine file missing on disk, skipped: {cpath} ({mid})")
+                    continue
+                if content and ip._find_canonical_by_contenthash(conn, content):
+                    dupes += 1
+                    ip.log(f"  content duplicate of a Review/Library item, left in quarantine: {cur}",
+                           logging.DEBUG)
+                    continue
+                dest = plan_dest(ip.canonical_name(taken, h, ext or cur.suffix, args.review_layout), claimed)
+                claimed.add(dest)
+                batch.append((mid, cur, taken, dest))
+
+            if batch:
+                m, f = run_batch(conn, batch, write=args.write)
+                moved += m
+                failed += f
+                ip.log(f"… scanned={seen} requeued={moved} failed={failed} unresolved={unresolved}")
+    finally:
+        conn.close()
+
+    mode = "WRITE" if args.write else "DRY-RUN"
+    moved_field = str(moved) if args.write else f"{moved}(dry)"
+    ip.log(f"Requeue {mode}: candidates={seen} requeued={moved_field} failed={failed} "
+           f"still_undated={unresolved} content_dupes={dupes} missing_on_disk={missing} "
+           f"({time.perf_counter() - t0:.1f}s)")
+    ip.stop_logging()
+
+
+if __name__ == "__main__":
+    main()
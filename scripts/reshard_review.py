@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+reshard_review.py — move existing Review/ files into a new folder layout.
+
+Layouts (same as [review].layout in pixarr.toml / ingest --review-layout):
+  flat        Review/<name>
+  hash2       Review/<first 2 hex chars of sha256>/<name>
+  year_month  Review/<YYYY-MM>/<name>
+
+Usage (from repo root):
+  python scripts/reshard_review.py --layout hash2                 # dry-run: print the plan
+  python scripts/reshard_review.py --layout hash2 --write         # move files + update DB
+  python scripts/reshard_review.py --layout flat --write          # undo (back to flat)
+  python scripts/reshard_review.py --layout year_month --write --batch 2000 --pause 0.2
+
+How it stays safe:
+  - Works in batches. Each batch is first written to the review_moves journal
+    (status='planned') and committed, then files are renamed, then
+    media.canonical_path + journal rows are updated in ONE transaction.
+  - If the run dies mid-batch, the next run replays 'planned' rows first:
+    whichever side of the rename exists on disk decides the outcome.
+  - Only rows with state='review' whose canonical_path lives under Review/ are touched.
+"""
+
+import argparse
+import logging
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import ingest_pass as ip
+
+
+def ensure_journal(conn) -> None:
+    """Create review_moves if the DB predates it (mirrors db/schema.sql)."""
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS review_moves (
+          id           INTEGER PRIMARY KEY,
+          batch_id     TEXT NOT NULL,
+          media_id     TEXT NOT NULL,
+          old_path     TEXT NOT NULL,
+          new_path     TEXT NOT NULL,
+          status       TEXT NOT NULL,
+          created_at   TEXT NOT NULL,
+          finished_at  TEXT,
+          CHECK (status IN ('planned','done','failed'))
+        );
+        CREATE INDEX IF NOT EXISTS idx_review_moves_status ON review_moves(status);
+    """)
+
+
+def target_for(current: Path, layout: str) -> Path:
+    """Where a Review file belongs under `layout` (name unchanged)."""
+    shard = ip.review_shard(current.name, layout)
+    return (ip.REVIEW_ROOT / shard / current.name) if shard else (ip.REVIEW_ROOT / current.name)
+
+
+def replay_planned(conn) -> int:
+    """Finish journal rows left 'planned' by an interrupted run. Returns rows resolved."""
+    rows = conn.execute(
+        "SELECT id, media_id, old_path, new_path FROM review_moves "
+        "WHERE status='planned' AND batch_id NOT LIKE 'requeue-%' ORDER BY id"   # requeue.py replays its own
+    ).fetchall()
+    if not rows:
+        return 0
+    ip.log(f"Replaying {len(rows)} planned move(s) from an interrupted run …")
+    now = datetime.utcnow().isoformat()
+    for jid, mid, old, new in rows:
+        old_p, new_p = Path(old), Path(new)
+        status = "done"
+        if not new_p.exists() and old_p.exists():
+            try:
+                new_p.parent.mkdir(parents=True, exist_ok=True)
+                old_p.rename(new_p)
+            except Exception as e:
+                ip.log(f"  replay failed for {old_p}: {e}")
+                status = "failed"
+        elif not new_p.exists():
+            status = "failed"   # neither side on disk; leave media row as-is
+        elif old_p.exists():
+            status = "failed"   # both sides exist; needs a human
+        if status == "done":
+            conn.execute(
+                "UPDATE media SET canonical_path=?, updated_ts=? WHERE id=? AND canonical_path=?",
+                (str(new_p), ip.epoch_now(), mid, str(old_p)),
+            )
+        conn.execute("UPDATE review_moves SET status=?, finished_at=? WHERE id=?", (status, now, jid))
+    conn.commit()
+    return len(rows)
+
+
+def run_batch(conn, batch, *, write: bool) -> tuple[int, int]:
+    """
+    Move one batch of (media_id, current_path, target_path) rows.
+    Returns (moved, failed).
+    """
+    if not write:
+        for _mid, cur, tgt in batch:
+            ip.log(f"[DRY] RESHARD {cur} -> {tgt}", logging.DEBUG)
+        return len(batch), 0
+
+    batch_id = str(uuid.uuid4())
+    now = datetime.utcnow().isoformat()
+    planned = []
+    for mid, cur, tgt in batch:
+        dest = ip.plan_nonclobber(ip.REVIEW_ROOT, str(tgt.relative_to(ip.REVIEW_ROOT)))
+        planned.append((mid, cur, dest))
+
+    # 1) journal first (durable before any rename)
+    conn.executemany(
+        "INSERT INTO review_moves (batch_id, media_id, old_path, new_path, status, created_at) "
+        "VALUES (?, ?, ?, ?, 'planned', ?)",
+        [(batch_id, mid, str(cur), str(dest), now) for mid, cur, dest in planned],
+    )
+    conn.commit()
+
+    # 2) renames (same filesystem → atomic per file)
+    outcomes = []
+    for mid, cur, dest in planned:
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            cur.rename(dest)
+            outcomes.append((mid, cur, dest, "done"))
+        except Exception as e:
+            ip.log(f"  move failed {cur} -> {dest}: {e}")
+            outcomes.append((mid, cur, dest, "failed"))
+
+    # 3) DB + journal in one transaction
+    done_at = datetime.utcnow().isoformat()
+    conn.executemany(
+        "UPDATE media SET canonical_path=?, updated_ts=? WHERE id=?",
+        [(str(dest), ip.epoch_now(), mid) for mid, _cur, dest, st in outcomes if st == "done"],
+    )
+    conn.executemany(
+        "UPDATE review_moves SET status=?, finished_at=? WHERE batch_id=? AND media_id=?",
+        [(st, done_at, batch_id, mid) for mid, _cur, _dest, st in outcomes],
+    )
+    conn.commit()
+    failed = sum(1 for o in outcomes if o[3] == "failed")
+    return len(outcomes) - failed, failed
+
+
+def prune_empty_shards() -> int:
+    """Remove now-empty shard folders directly under Review/."""
+    removed = 0
+    for d in ip.REVIEW_ROOT.iterdir():
+        if d.is_dir():
+            try:
+                d.rmdir()   # only succeeds when empty
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def main():
+    cfg = ip.load_config(ip.repo_root() / "pixarr.toml")
+    cfg_paths = cfg.get("paths", {})
+
+    ap = argparse.ArgumentParser(description="Re-shard Review/ into a new folder layout (journaled).")
+    ap.add_argument("--layout", required=True, choices=list(ip.REVIEW_LAYOUTS),
+                    help="Target layout")
+    ap.add_argument("--data-dir",
+                    default=str(Path(cfg_paths.get("data_dir", str(ip.repo_root() / "data")))),
+                    help="Root data directory (default: ./data under repo)")
+    ap.add_argument("--write", action="store_true", help="Actually move files (default is dry-run)")
+    ap.add_argument("--batch", type=int, default=500, help="Files per journaled batch (default 500)")
+    ap.add_argument("--pause", type=float, default=0.0,
+                    help="Seconds to sleep between batches (be gentle with a live API/ingest)")
+    ap.add_argument("-v", "--verbose", action="count", default=0)
+    args = ap.parse_args()
+
+    ip.LOGGER = ip.setup_logging(
+        data_dir=Path(args.data_dir).resolve(), logs_dir_arg=None,
+        verbose=args.verbose, quiet=False, log_level_arg=None, json_logs=False,
+    )
+    ip.pathize(Path(args.data_dir).resolve())
+    if not ip.DB_PATH.exists():
+        sys.exit(f"DB not found: {ip.DB_PATH}")
+
+    conn = ip.open_db()
+    ip.check_schema(conn)
+    ensure_journal(conn)
+    if args.write:
+        replay_planned(conn)
+
+    review_root = str(ip.REVIEW_ROOT)
+    t0 = time.perf_counter()
+    moved = failed = already = 0
+    last_rowid = 0
+    try:
+        while True:
+            rows = conn.execute(
+                """
+                SELECT rowid, id, canonical_path
+                FROM media
+                WHERE state='review' AND canonical_path IS NOT NULL AND rowid > ?
+                ORDER BY rowid
+                LIMIT ?
+                """,
+                (last_rowid, args.batch),
+            ).fetchall()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+
+            batch = []
+            for _rowid, mid, cpath in rows:
+                cur = Path(cpath)
+                if not cpath.startswith(review_root):
+                    continue
+                tgt = target_for(cur, args.layout)
+                if tgt == cur:
+                    already += 1
+                    continue
+                if not cur.exists():
+                    ip.log(f"  missing on disk, skipped: {cur}")
+                    continue
+                batch.append((mid, cur, tgt))
+
+            if batch:
+                m, f = run_batch(conn, batch, write=args.write)
+                moved += m
+                failed += f
+                ip.log(f"… batch done: moved={moved} failed={failed} already={already}")
+                if args.pause:
+                    time.sleep(args.pause)
+    finally:
+        conn.close()
+
+    # any layout change can empty the old layout's shards (flat: all of them)
+    pruned = prune_empty_shards() if args.write else 0
+
+    mode = "WRITE" if args.write else "DRY-RUN"
+    moved_field = str(moved) if args.write else f"{moved}(dry)"
+    ip.log(f"Reshard {mode} -> {args.layout}: moved={moved_field} failed={failed} "
+           f"already_in_place={already} empty_shards_removed={pruned} ({time.perf_counter() - t0:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
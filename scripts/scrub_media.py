@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+scrub_media.py — verify Review/Library files against their recorded hashes.
+
+Rows with a tree hash (ingest --tree-hash-min-mb) are checked chunk by chunk on
+a thread pool, so a 20 GB video is verified at disk speed instead of one core's
+sha256 speed, and a damaged file reports which byte ranges differ. Other rows
+are checked with sha256.
+
+Usage (from repo root):
+  python scripts/scrub_media.py                               # every review+library file
+  python scripts/scrub_media.py --state library --stale-days 30 --write
+  python scripts/scrub_media.py --media-id 3e7b… --range 4G:4.5G   # just those chunks
+  python scripts/scrub_media.py --min-mb 1024 --backfill-tree --write
+
+Notes:
+  - Read-only on media files. --write only stamps last_verified_at on files that
+    verified in full (and stores backfilled tree hashes).
+  - --range START:END (bytes; K/M/G suffixes) needs stored chunk digests; rows
+    without them are skipped. A range check never stamps last_verified_at, so
+    --stale-days still picks the file up for a full scrub.
+  - --backfill-tree tree-hashes rows >= --min-mb that have none, after checking
+    the file against its sha256 (both hashes run concurrently, one read each).
+  - Exit status 1 if anything is missing or doesn't match.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Tuple
+
+import ingest_pass as ip
+import pixarr_treehash
+
+_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(text: str) -> int:
+    """'4G' / '512M' / '1048576' -> bytes."""
+    text = text.strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in _UNITS else ""
+    return int(float(text[: len(text) - len(unit)]) * _UNITS[unit])
+
+
+def parse_range(text: str) -> Tuple[int, Optional[int]]:
+    """'START:END' (either side may be empty) -> (start, end or None)."""
+    start, sep, end = text.partition(":")
+    if not sep:
+        raise argparse.ArgumentTypeError("expected START:END, e.g. 4G:4.5G or :100M")
+    try:
+        return parse_size(start) if start else 0, parse_size(end) if end else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad byte range: {text}")
+
+
+def fmt_ranges(th: pixarr_treehash.TreeHash, bad: list) -> str:
+    spans = [f"{i * th.chunk_bytes}-{min((i + 1) * th.chunk_bytes, th.size)}" for i in bad[:5]]
+    return ", ".join(spans) + (f" (+{len(bad) - 5} more)" if len(bad) > 5 else "")
+
+
+def scrub_one(conn, mid: str, h: str, size: int, path: Path, args) -> Tuple[str, str]:
+    """(status, detail); status is ok | missing | size_mismatch | hash_mismatch | skipped."""
+    try:
+        actual = path.stat().st_size
+    except OSError as e:
+        return "missing", str(e)
+    if actual != size:
+        return "size_mismatch", f"db={size} disk={actual}"
+
+    th = ip.load_tree_hash(conn, mid)
+    if th is not None:
+        bad = pixarr_treehash.verify_range(path, th, *(args.range or (0, None)), workers=args.workers)
+        return ("hash_mismatch", f"chunks differ at bytes {fmt_ranges(th, bad)}") if bad else ("ok", "tree")
+    if args.range:
+        return "skipped", "no chunk digests for --range"
+
+    if args.backfill_tree and size >= args.min_mb * 1024 * 1024:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            sha = pool.submit(ip.sha256_file, path)
+            th = pixarr_treehash.tree_hash(path, workers=args.workers)
+            got = sha.result()
+        if got != h:
+            return "hash_mismatch", "sha256 differs (tree hash not stored)"
+        if args.write:
+            ip.store_tree_hash(conn, mid, th)
+        return "ok", "sha256+tree"
+    return ("ok", "sha256") if ip.sha256_file(path) == h else ("hash_mismatch", "sha256 differs")
+
+
+def main():
+    cfg = ip.load_config(ip.repo_root() / "pixarr.toml")
+    ap = argparse.ArgumentParser(description="Verify Review/Library files against their recorded hashes.")
+    ap.add_argument("--data-dir", default=str(Path(cfg.get("paths", {}).get("data_dir", ip.repo_root() / "data"))))
+    ap.add_argument("--state", choices=["review", "library", "all"], default="all",
+                    help="Which rows to check (default: review + library)")
+    ap.add_argument("--media-id", action="append", help="Only these media ids (repeatable)")
+    ap.add_argument("--min-mb", type=float, default=0, help="Only files of at least this size")
+    ap.add_argument("--stale-days", type=float, default=None,
+                    help="Only rows not verified within this many days")
+    ap.add_argument("--limit", type=int, default=0, help="Stop after N rows (0 = all)")
+    ap.add_argument("--range", type=parse_range, default=None, metavar="START:END",
+                    help="Verify only this byte range (tree-hashed rows)")
+    ap.add_argument("--backfill-tree", action="store_true",
+                    help="Tree-hash rows >= --min-mb that have no tree hash yet")
+    ap.add_argument("--workers", type=int, default=pixarr_treehash.DEFAULT_WORKERS,
+                    help=f"Tree-hash threads (default {pixarr_treehash.DEFAULT_WORKERS})")
+    ap.add_argument("--write", action="store_true",
+                    help="Stamp last_verified_at on fully verified rows and store backfilled tree hashes")
+    ap.add_argument("-v", "--verbose", action="count", default=0)
+    args = ap.parse_args()
+
+    ip.LOGGER = ip.setup_logging(
+        data_dir=Path(args.data_dir).resolve(), logs_dir_arg=None,
+        verbose=args.verbose, quiet=False, log_level_arg=None, json_logs=False,
+    )
+    ip.pathize(Path(args.data_dir).resolve())
+    if not ip.DB_PATH.exists():
+        sys.exit(f"DB not found: {ip.DB_PATH}")
+    conn = ip.open_db()
+    ip.check_schema(conn)
+
+    where = ["canonical_path IS NOT NULL", "bytes >= ?"]
+    params = [int(args.min_mb * 1024 * 1024)]
+    where.append("state IN ('review','library')" if args.state == "all" else "state = ?")
+    if args.state != "all":
+        params.append(args.state)
+    if args.media_id:
+        where.append(f"id IN ({','.join('?' * len(args.media_id))})")
+        params += args.media_id
+    if args.stale_days is not None:
+        where.append("(last_verified_at IS NULL OR last_verified_at < ?)")
+        params.append((datetime.utcnow() - timedelta(days=args.stale_days)).isoformat())
+    sql = (f"SELECT id, hash_sha256, bytes, canonical_path FROM media WHERE {' AND '.join(where)} "
+           f"ORDER BY rowid" + (f" LIMIT {int(args.limit)}" if args.limit > 0 else ""))
+
+    t0 = time.perf_counter()
+    counts = {"ok": 0, "missing": 0, "size_mismatch": 0, "hash_mismatch": 0, "skipped": 0}
+    nbytes = 0
+    try:
+        for mid, h, size, cpath in conn.execute(sql, params).fetchall():
+            status, detail = scrub_one(conn, mid, h, size, Path(cpath), args)
+            counts[status] += 1
+            if status == "ok":
+                start, end = args.range or (0, None)
+                nbytes += min(size, size if end is None else end) - min(start, size)
+                if args.write and not args.range:      # only a whole-file check counts as verified
+                    now = datetime.utcnow().isoformat()
+                    conn.execute("UPDATE media SET last_verified_at=? WHERE id=?", (now, mid))
+                    conn.commit()
+                ip.log(f"  ok ({detail}): {cpath}", logging.DEBUG)
+            elif status == "skipped":
+                ip.log(f"  skipped ({detail}): {cpath}", logging.DEBUG)
+            else:
+                ip.log(f"  {status.upper()}: {cpath} ({mid}) {detail}", logging.WARNING)
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - t0
+    bad = counts["missing"] + counts["size_mismatch"] + counts["hash_mismatch"]
+    ip.log(f"Scrub {'WRITE' if args.write else 'DRY-RUN'}: " + " ".join(f"{k}={v}" for k, v in counts.items())
+           + f" verified={nbytes / 1e9:.2f} GB ({elapsed:.1f}s)")
+    ip.stop_logging()
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
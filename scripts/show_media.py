@@ -15,6 +15,9 @@ import sqlite3
 from pathlib import Path
 from typing import Iterable, Optional, List, Tuple
 
+import pixarr_sightings
+import pixarr_sqlite
+
 # --- optional TOML support (stdlib on 3.11+, else tomli if installed) ---
 try:
     import tomllib as _toml  # Python 3.11+
@@ -101,29 +104,53 @@ def print_table(title: str, rows: Iterable[sqlite3.Row]) -> None:
     line()
 
 
+def hash_prefix_range(prefix: str) -> Tuple[bytes, bytes]:
+    """
+    Hex prefix -> [lo, hi) bounds on the 32-byte media.sha256 BLOB, so the lookup
+    is a range scan on its UNIQUE index. An odd-length prefix covers the whole
+    byte: 'abc' -> [X'abc0', X'abd0'); an all-'f' prefix ends past any digest.
+    """
+    p = prefix.lower()
+    try:
+        n = int(p, 16)
+    except ValueError:
+        raise SystemExit("--hash-prefix must be hex.")
+    pad = len(p) % 2
+    lo = (n << 4 * pad).to_bytes((len(p) + pad) // 2, "big")
+    top = (n + 1) << 4 * pad
+    hi = top.to_bytes(len(lo), "big") if top < 1 << 8 * len(lo) else b"\xff" * 33
+    return lo, hi
+
+
 def resolve_media_id(conn: sqlite3.Connection, args) -> str:
     """Turn --id/--hash/--hash-prefix/--path into a concrete media.id"""
     if args.id:
         return args.id
 
     if args.hash:
+        try:
+            digest = bytes.fromhex(args.hash)
+        except ValueError:
+            raise SystemExit("--hash must be a hex sha256.")
         row = conn.execute(
-            "SELECT id FROM media WHERE hash_sha256 = ? LIMIT 1",
-            (args.hash,)
+            "SELECT id FROM media WHERE sha256 = ? LIMIT 1",
+            (digest,)
         ).fetchone()
         if not row:
             raise SystemExit("No media found for that --hash.")
         return row["id"]
 
     if args.hash_prefix:
+        lo, hi = hash_prefix_range(args.hash_prefix)
         rows = conn.execute(
             """
             SELECT id, hash_sha256, taken_at, state, canonical_path, updated_at
             FROM media
-            WHERE substr(hash_sha256, 1, ?) = ?
-            ORDER BY updated_at DESC
+            WHERE sha256 >= ? AND sha256 < ?
+            ORDER BY updated_ts DESC
+            LIMIT 20
             """,
-            (len(args.hash_prefix), args.hash_prefix),
+            (lo, hi),
         ).fetchall()
         if not rows:
             raise SystemExit("No media found for that --hash-prefix.")
@@ -138,7 +165,7 @@ def resolve_media_id(conn: sqlite3.Connection, args) -> str:
             SELECT media_id
             FROM sightings
             WHERE full_path = ?
-            ORDER BY seen_at DESC
+            ORDER BY seen_ts DESC, id DESC
             LIMIT 1
             """,
             (args.path,),
@@ -180,8 +207,7 @@ def main() -> None:
         print("  * or define [paths].data_dir in pixarr.toml at repo root")
         raise SystemExit(2)
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    conn = pixarr_sqlite.connect(db_path, "read", row_factory=sqlite3.Row)
 
     media_id = resolve_media_id(conn, args)
 
@@ -196,13 +222,15 @@ def main() -> None:
         (media_id,),
     ))
 
-    # --- sightings
+    # --- sightings (compacted rows: seen_count times, first_seen_at .. seen_at)
+    compacted = pixarr_sightings.has_columns(conn)
     print_table("sightings", conn.execute(
-        """
+        f"""
         SELECT source_root, filename, full_path, folder_hint, ingest_id, seen_at
+               {", first_seen_at, seen_count" if compacted else ""}
         FROM sightings
         WHERE media_id = ?
-        ORDER BY seen_at DESC
+        ORDER BY seen_ts DESC, id DESC
         """,
         (media_id,),
     ))
@@ -223,8 +251,8 @@ def main() -> None:
 
     # --- quick summary: sightings by source
     print_table("sightings_count_by_source", conn.execute(
-        """
-        SELECT source_root, COUNT(*) AS sightings
+        f"""
+        SELECT source_root, {"SUM(seen_count)" if compacted else "COUNT(*)"} AS sightings
         FROM sightings
         WHERE media_id = ?
         GROUP BY source_root
@@ -0,0 +1,47 @@
+# scripts/ on sys.path: tests import the scripts the way they import each other (`import ingest_pass`),
+# so there is one copy of each module and its globals.
+import sys
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
+
+import pytest
+from PIL import Image
+
+import ingest_pass as ip
+
+
+def _dated_jpeg(path, second, date="2024:03:01 10:00"):
+    """Tiny JPEG with DateTimeOriginal `date`:SS; the colour follows `second`, so bytes differ per file."""
+    ex = Image.Exif()
+    ex.get_ifd(0x8769)[36867] = f"{date}:{second:02d}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", (8, 8), (second * 4, 0, 0)).save(path, "JPEG", exif=ex)
+
+
+@pytest.fixture
+def ingest_env(monkeypatch):
+    """
+    setup(data_dir, db=None) -> the Staging/other root: pathize + ensure_db, with writes on,
+    full scan and the fast metadata reader. Pass `db` to ingest into a delta DB instead of app.sqlite3.
+    """
+    def setup(data_dir, db=None):
+        ip.pathize(data_dir)
+        if db:
+            ip.DB_PATH = db
+        ip.ensure_db()
+        monkeypatch.setattr(ip, "DRY_RUN", False)
+        monkeypatch.setattr(ip, "SCAN_LEVEL", "full")
+        monkeypatch.setattr(ip, "FAST_META", True)
+        root = ip.STAGING_SOURCES["Staging/other"]
+        root.mkdir(parents=True, exist_ok=True)
+        return root
+    return setup
+
+
+@pytest.fixture
+def staged(ingest_env, tmp_path):
+    """Empty Staging/other source under a fresh data dir; test modules override it to add files."""
+    return ingest_env(tmp_path)
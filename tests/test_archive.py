@@ -0,0 +1,107 @@
+import io
+import json
+import tarfile
+import zipfile
+
+import pytest
+from PIL import Image
+
+import ingest_pass as ip
+import pixarr_archive as pa
+
+
+def _jpeg(color, taken=None) -> bytes:
+    buf = io.BytesIO()
+    ex = Image.Exif()
+    if taken:
+        ex.get_ifd(0x8769)[36867] = taken
+    Image.new("RGB", (8, 8), color).save(buf, "JPEG", exif=ex)
+    return buf.getvalue()
+
+
+def _takeout(title, ts, lat=0.0, lon=0.0) -> bytes:
+    return json.dumps({"title": title, "photoTakenTime": {"timestamp": str(ts)},
+                       "geoData": {"latitude": lat, "longitude": lon}}).encode()
+
+
+MEMBERS = {
+    "Takeout/Google Photos/Trip/IMG_1.jpg": _jpeg((200, 0, 0), "2021:06:01 12:00:00"),
+    "Takeout/Google Photos/Trip/IMG_2.jpg": _jpeg((0, 200, 0)),                 # dated by sidecar
+    "Takeout/Google Photos/Trip/IMG_2.jpg.supplemental-metadata.json": _takeout("IMG_2.jpg", 1600000000, 48.85, 2.35),
+    "Takeout/Google Photos/Trip/IMG_2(1).jpg": _jpeg((0, 0, 200)),              # numbered copy
+    "Takeout/Google Photos/Trip/IMG_2.jpg(1).json": _takeout("IMG_2.jpg", 1600000100),
+    "Takeout/Google Photos/Trip/IMG_3.jpg": _jpeg((9, 9, 9)),                   # no date anywhere
+    "Takeout/Google Photos/Trip/copy.jpg": _jpeg((200, 0, 0), "2021:06:01 12:00:00"),  # dupe of IMG_1
+    "Takeout/Google Photos/Trip/.DS_Store": b"junk",
+    "Takeout/archive_browser.html": b"<html/>",
+}
+
+
+def _build(path):
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path, "w") as z:
+            for name, data in MEMBERS.items():
+                z.writestr(name, data)
+    else:
+        with tarfile.open(path, "w:gz") as t:
+            for name, data in MEMBERS.items():
+                ti = tarfile.TarInfo(name)
+                ti.size = len(data)
+                t.addfile(ti, io.BytesIO(data))
+    return path
+
+
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+    ip.pathize(tmp_path / "data")
+    ip.ensure_db()
+    monkeypatch.setattr(ip, "DRY_RUN", False)
+    monkeypatch.setattr(ip, "SCAN_LEVEL", "full")
+    monkeypatch.setattr(ip, "TAKEOUT_JSON", True)
+    monkeypatch.setattr(ip, "ALLOW_FILENAME_DATES", False)
+    monkeypatch.setattr(ip, "exiftool_json_stream", lambda f, tags=None: {})
+    return tmp_path
+
+
+@pytest.mark.parametrize("archive_name", ["takeout.zip", "takeout.tgz"])
+def test_archive_ingest_extracts_only_non_dupes(data, archive_name):
+    archive = _build(data / archive_name)
+    conn = ip.open_db()
+    stats = ip.ingest_one_archive(conn, "Custom:takeout", archive, on_review_dupe="quarantine")
+
+    assert (stats["scanned"], stats["moved"], stats["skipped_dupe"]) == (5, 3, 1)
+    assert stats["sidecars"] == 2 and stats["takeout_dates"] == 2
+    assert stats["q_counts"] == {"junk": 1, "unsupported_ext": 1, "missing_datetime": 1, "duplicate_in_review": 1}
+    review = sorted(p.name for p in ip.REVIEW_ROOT.iterdir())
+    assert review[0].startswith("2020-09-13_12-26-40_") and review[1].startswith("2020-09-13_12-28-20_")
+    assert review[2].startswith("2021-06-01_12-00-00_")
+    assert [p.name for p in (ip.QUARANTINE_ROOT / "missing_datetime").iterdir()] == ["IMG_3.jpg"]
+    lat, tz = conn.execute("SELECT gps_lat, tz_offset FROM media WHERE taken_at LIKE '2020-09-13T12:26%'").fetchone()
+    assert (lat, tz) == (48.85, "+00:00")
+    paths = [r[0] for r in conn.execute("SELECT full_path FROM sightings")]
+    assert len(paths) == 5 and all("!/Takeout/" in p for p in paths)
+    conn.close()
+
+
+def test_takeout_sidecar_keys():
+    idx = pa.TakeoutIndex()
+    assert idx.add("a/VERY_LONG_NAME_TRUNCATED_BY_GOOGLE_TAKEOU.json", _takeout("VERY_LONG_NAME_TRUNCATED_BY_GOOGLE_TAKEOUT_0001.jpg", 1))
+    assert not idx.add("a/metadata.json", b'{"title": "Trip"}')     # album metadata, no photoTakenTime
+    assert idx.lookup("a/VERY_LONG_NAME_TRUNCATED_BY_GOOGLE_TAKEOUT_0001.jpg")
+    assert idx.lookup("a/VERY_LONG_NAME_TRUNCATED_BY_GOOGLE_TAKEOUT_0001-edited.jpg")
+    assert pa.takeout_taken_at({"photoTakenTime": {"timestamp": "0"}}) is None
+
+
+def test_archive_quarantine_logs_through_the_batch_logger(data, caplog):
+    archive = _build(data / "takeout.zip")
+    conn = ip.open_db()
+    with caplog.at_level("DEBUG", logger="pixarr"):
+        stats = ip.ingest_one_archive(conn, "Custom:takeout", archive, on_review_dupe="delete")
+    h, = conn.execute("SELECT hash_sha256 FROM media WHERE quarantine_reason='missing_datetime'").fetchone()
+    conn.close()
+    quarantined = [r for r in caplog.records if r.msg.startswith("QUARANTINE ")]
+    assert len(quarantined) == 1 and quarantined[0].getMessage().endswith(
+        str(ip.QUARANTINE_ROOT / "missing_datetime" / "IMG_3.jpg"))
+    assert (quarantined[0].ingest_id, quarantined[0].file_token) == (stats["ingest_id"], h[:8])
+    # a member can't be deleted: the review dupe is counted and left in the archive
+    assert stats["q_counts"]["duplicate_in_review"] == 1 and archive.exists()
@@ -0,0 +1,60 @@
+import random
+
+import ingest_pass as ip
+import pixarr_counters as pc
+
+STATES = ["review", "library", "quarantine", "deleted"]
+REASONS = [None, "missing_datetime", "unsupported_ext"]
+
+
+def test_triggers_keep_counters_exact(tmp_path):
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    conn = ip.open_db()
+    assert pc.available(conn)
+    rnd = random.Random(3)
+    for i in range(300):
+        op = rnd.random()
+        ids = [r[0] for r in conn.execute("SELECT id FROM media")]
+        if op < 0.5 or not ids:
+            st = rnd.choice(STATES)
+            conn.execute("INSERT INTO media (id, sha256, ext, bytes, state, quarantine_reason, added_ts, updated_ts) "
+                         "VALUES (?, randomblob(32), ?, ?, ?, ?, 0, 0)",
+                         (f"m{i}", rnd.choice([".jpg", ".mp4", ".heic"]), rnd.randrange(1, 10**9), st,
+                          rnd.choice(REASONS) if st == "quarantine" else None))
+        elif op < 0.8:
+            st = rnd.choice(STATES)
+            conn.execute("UPDATE media SET state=?, quarantine_reason=?, bytes=bytes+? WHERE id=?",
+                         (st, rnd.choice(REASONS), rnd.randrange(-5, 5), rnd.choice(ids)))
+        elif op < 0.9:
+            conn.execute("UPDATE media SET canonical_path='/x', ext=? WHERE id=?", (rnd.choice([".jpg", ".png"]), rnd.choice(ids)))
+        else:
+            conn.execute("DELETE FROM media WHERE id=?", (rnd.choice(ids),))
+        if i % 50 == 0:
+            conn.rollback() if i % 100 == 0 else conn.commit()      # rolled-back changes leave no trace
+    conn.commit()
+
+    # ingest's upsert path (INSERT … ON CONFLICT DO UPDATE) goes through the same triggers
+    row = {"id": ip.uuid_from_hash("cd" * 32), "hash_sha256": "cd" * 32, "phash": None, "content_sha256": None,
+           "ext": ".jpg", "bytes": 7, "taken_at": None, "tz_offset": None, "gps_lat": None, "gps_lon": None,
+           "state": "quarantine", "canonical_path": None, "xmp_written": 0, "quarantine_reason": "missing_datetime"}
+    ip.upsert_media(conn, row)
+    ip.upsert_media(conn, {**row, "state": "review", "quarantine_reason": None, "taken_at": "2020-01-01T00:00:00"})
+    conn.commit()
+    assert pc.drift(conn) == []
+    total = sum(n for _k, n, _b in pc.counts(conn, "state"))
+    assert total == conn.execute("SELECT COUNT(*) FROM media").fetchone()[0]
+
+    # older DB without counters: ensure() creates and fills them; rebuild() repairs drift
+    for name in ("media_counters_ai", "media_counters_ad", "media_counters_au"):
+        conn.execute(f"DROP TRIGGER {name}")
+    conn.execute("DROP TABLE media_counters")
+    conn.commit()
+    assert not pc.available(conn)
+    assert pc.ensure(conn) and pc.drift(conn) == [] and not pc.ensure(conn)
+    conn.execute("UPDATE media_counters SET n = n + 1 WHERE dim='ext'")
+    assert pc.drift(conn)
+    pc.rebuild(conn)
+    conn.commit()
+    assert pc.drift(conn) == []
+    conn.close()
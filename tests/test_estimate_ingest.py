@@ -0,0 +1,36 @@
+import math
+
+import pytest
+
+import estimate_ingest as est
+
+Z95 = 1.959964
+
+
+def test_wilson_known_intervals():
+    p, lo, hi = est.wilson(8, 10, Z95)
+    assert p == 0.8 and lo == pytest.approx(0.4902, abs=1e-4) and hi == pytest.approx(0.9433, abs=1e-4)
+    # the edges stay inside [0, 1] and don't collapse like the normal approximation
+    assert est.wilson(0, 10, Z95) == pytest.approx((0.0, 0.0, Z95 ** 2 / (10 + Z95 ** 2)))
+    assert est.wilson(10, 10, Z95) == pytest.approx((1.0, 10 / (10 + Z95 ** 2), 1.0))
+    assert est.wilson(0, 0, Z95) == (0.0, 0.0, 0.0)
+
+
+def test_ratio_estimate_mean_per_file_with_fpc():
+    # xs all 1: N * mean, half-width z * N * s / sqrt(n) * sqrt(1 - n/N)
+    e, lo, hi = est.ratio_estimate([2, 4, 6, 8], [1] * 4, 100, 100, Z95)
+    half = Z95 * 100 * math.sqrt(20 / 3 / 4) * math.sqrt(1 - 4 / 100)
+    assert e == 500 and (lo, hi) == pytest.approx((500 - half, 500 + half))
+    # a census (n == N) has no sampling error; no population size means no interval either
+    assert est.ratio_estimate([2, 4, 6, 8], [1] * 4, 4, 4, Z95) == (20, 20, 20)
+    assert est.ratio_estimate([2, 4, 6, 8], [1] * 4, 4, 0, Z95) == (20, 20, 20)
+
+
+def test_ratio_estimate_scales_by_size_and_edge_cases():
+    # time proportional to bytes: exact ratio, zero residual variance
+    assert est.ratio_estimate([10, 20, 30], [1, 2, 3], 1000, 50, Z95) == (10000, 10000, 10000)
+    e, lo, hi = est.ratio_estimate([1, 9], [1, 1], 10, 1000, Z95)
+    assert e == 50 and lo == 0.0 and hi > 100                      # lower bound clamps at 0
+    assert est.ratio_estimate([5], [2], 100, 10, Z95) == (250, 250, 250)          # n < 2: no variance
+    assert est.ratio_estimate([], [], 100, 10, Z95) == (0.0, 0.0, 0.0)
+    assert est.ratio_estimate([0, 0], [0, 0], 100, 10, Z95) == (0.0, 0.0, 0.0)
@@ -0,0 +1,116 @@
+import csv
+
+import pytest
+from PIL import Image
+
+from conftest import _dated_jpeg
+import exif_kv
+import ingest_pass as ip
+
+
+
+def test_rows_filter_and_value_round_trip(monkeypatch):
+    meta = {
+        "DateTimeOriginal": "2024:03:01 10:00:00",
+        "Make": "Canon",
+        "ISO": 200,
+        "FNumber": 2.8,
+        "Flash": False,
+        "Keywords": ["a", "b"],
+        "GPSPosition": {"lat": 1.5},
+        "Title": None,                              # dropped
+        "SourceFile": "/staging/x.jpg",             # deny list
+        "ThumbnailImage": "(Binary data 5120 bytes, use -b option to extract)",
+        "MakerNoteUnknown": "(Binary data 12 bytes)",
+    }
+    rows = ip.exif_kv_rows("m1", meta)
+    stored = {tag: value for _mid, tag, value in rows}
+    assert sorted(stored) == ["DateTimeOriginal", "FNumber", "Flash", "GPSPosition", "ISO", "Keywords", "Make"]
+    assert stored["DateTimeOriginal"] == "2024:03:01 10:00:00" and stored["Keywords"] == '["a","b"]'
+    assert {tag: ip.exif_kv_value(v) for tag, v in stored.items()} == {t: meta[t] for t in stored}
+    assert ip.exif_kv_value(None) is None and ip.exif_kv_value("") == ""
+    assert ip.exif_kv_value("{broken") == "{broken"
+
+    monkeypatch.setattr(ip, "EXIF_KV_ALLOW", ("ISO", "SourceFile"))      # deny still wins
+    assert ip.exif_kv_rows("m1", meta) == [("m1", "ISO", "200")]
+    monkeypatch.setattr(ip, "EXIF_KV_ALLOW", ())
+    monkeypatch.setattr(ip, "EXIF_KV_DENY", ("Make",))
+    assert "SourceFile" in {t for _m, t, _v in ip.exif_kv_rows("m1", meta)}
+    assert "Make" not in {t for _m, t, _v in ip.exif_kv_rows("m1", meta)}
+
+
+@pytest.fixture
+def tagged(tmp_path, ingest_env, monkeypatch):
+    root = ingest_env(tmp_path)
+    monkeypatch.setattr(ip, "exiftool_json", lambda p, tags=None: {})
+    _dated_jpeg(root / "a.jpg", 0)
+    Image.new("RGB", (8, 8), (1, 2, 3)).save(root / "IMG_20240710_200842.jpg", "JPEG")
+    Image.new("RGB", (8, 8), (4, 5, 6)).save(root / "scan.jpg", "JPEG")
+    conn = ip.open_db()
+    ip.ingest_one_source(conn, "Staging/other", root, on_review_dupe="quarantine")
+    ids = {fn: mid for mid, fn in conn.execute("SELECT media_id, filename FROM sightings")}
+    conn.execute("DELETE FROM exif_kv")
+    ip.store_exif_kv(conn, ids["a.jpg"], {"DateTimeOriginal": "2024:03:01 10:00:00"})
+    assert ip.store_exif_kv(conn, ids["scan.jpg"], {"FileModifyDate": "2023:01:02 03:04:05", "ImageWidth": 8}) == 2
+    conn.commit()
+    conn.close()
+    return ids
+
+
+def _line(state, unchanged, changed, gained, lost, no_tags, partial=0):
+    return f"  {state:<12}{unchanged:>10}{changed:>9}{gained:>8}{lost:>6}{no_tags:>9}{partial:>9}"
+
+
+def _reeval(monkeypatch, capsys, *argv):
+    monkeypatch.setattr("sys.argv", ["exif_kv.py", "--data-dir", str(ip.DATA_DIR), "reeval", *argv])
+    exif_kv.main()
+    return capsys.readouterr().out
+
+
+def test_reeval_reports_what_a_policy_change_rescues(tagged, monkeypatch, capsys, tmp_path):
+    out = _reeval(monkeypatch, capsys)
+    assert _line("review", 1, 0, 0, 0, 0) in out
+    assert _line("quarantine", 1, 0, 0, 0, 1) in out       # scan.jpg: tags, no date; IMG_…: no tags
+
+    out = _reeval(monkeypatch, capsys, "--allow-file-dates", "--allow-filename-dates",
+                  "--state", "quarantine", "--csv", str(tmp_path / "r.csv"))
+    assert _line("quarantine", 0, 0, 2, 0, 0) in out and "  review" not in out
+    assert ip._DATE_KEYS == ip.date_keys_for(False)                       # reeval's keys stay local
+    with open(tmp_path / "r.csv", newline="", encoding="utf-8") as fh:
+        got = {r["id"]: (r["quarantine_reason"], r["taken_at_old"], r["taken_at_new"][:19], r["outcome"])
+               for r in csv.DictReader(fh)}
+    assert got == {
+        tagged["scan.jpg"]: ("missing_datetime", "", "2023-01-02T03:04:05", "gained"),
+        tagged["IMG_20240710_200842.jpg"]: ("missing_datetime", "", "2024-07-10T20:08:42", "gained"),
+    }
+    conn = ip.open_db("read")                                             # read-only
+    assert conn.execute("SELECT COUNT(*) FROM media WHERE taken_at IS NULL").fetchone()[0] == 2
+    conn.close()
+
+
+def test_partial_tag_sets_are_marked_reported_and_backfilled(tmp_path, ingest_env, monkeypatch, capsys):
+    root = ingest_env(tmp_path)
+    calls = []
+    monkeypatch.setattr(ip, "exiftool_json", lambda p, tags=None: calls.append(p) or {})
+    _dated_jpeg(root / "a.jpg", 0)                                       # dated by the fast reader
+    conn = ip.open_db()
+    ip.ingest_one_source(conn, "Staging/other", root, on_review_dupe="quarantine")
+    (mid,), = conn.execute("SELECT id FROM media").fetchall()
+    assert not calls
+    assert dict(conn.execute("SELECT tag, value FROM exif_kv WHERE media_id=?", (mid,))) == {
+        "DateTimeOriginal": "2024:03:01 10:00:00", ip.EXIF_KV_PARTIAL_TAG: "fastmeta"}
+    conn.close()
+
+    assert _line("review", 0, 0, 0, 0, 0, partial=1) in _reeval(monkeypatch, capsys, "--allow-file-dates")
+
+    full = {"DateTimeOriginal": "2024:03:01 10:00:00", "FileModifyDate": "2024:05:06 07:08:09", "ImageWidth": 8}
+    monkeypatch.setattr(exif_kv, "_exiftool_many", lambda paths: {str(p): dict(full, SourceFile=str(p)) for p in paths})
+    monkeypatch.setattr(ip, "EXIFTOOL_PATH", "exiftool")
+    monkeypatch.setattr("sys.argv", ["exif_kv.py", "--data-dir", str(ip.DATA_DIR), "backfill", "--write"])
+    exif_kv.main()
+    assert "Stored 3 tag(s) for 1 media row(s)" in capsys.readouterr().out
+    assert _line("review", 1, 0, 0, 0, 0) in _reeval(monkeypatch, capsys)
+
+    monkeypatch.setattr("sys.argv", ["exif_kv.py", "--data-dir", str(ip.DATA_DIR), "backfill"])
+    exif_kv.main()
+    assert "0 media row(s) without exif_kv or with a partial tag set" in capsys.readouterr().out
@@ -0,0 +1,164 @@
+import io
+import json
+import shutil
+import struct
+import subprocess
+from collections import Counter
+
+import pytest
+from PIL import Image
+
+import ingest_pass as ip
+import pixarr_fastmeta as fm
+
+TS = "2024:01:16 15:57:40"
+
+
+def _exif():
+    ex = Image.Exif()
+    ex[0x010F] = "Apple"
+    ex[0x0110] = "iPhone 12"
+    ex[0x0112] = 6
+    sub = ex.get_ifd(0x8769)
+    sub[36867] = TS                     # DateTimeOriginal
+    sub[36868] = "2024:01:16 15:57:41"  # CreateDate
+    gps = ex.get_ifd(0x8825)
+    gps[1], gps[2] = "N", (37.0, 46.0, 29.64)
+    gps[3], gps[4] = "W", (122.0, 25.0, 9.84)
+    return ex
+
+
+@pytest.fixture(scope="module")
+def zoo(tmp_path_factory):
+    """Zoo-style fixtures (cf. scripts/make_test_zoo.sh), plus HEIC/MP4 when the encoders exist."""
+    d = tmp_path_factory.mktemp("zoo")
+    im = Image.new("RGB", (16, 12), (255, 0, 0))
+    im.save(d / "exif_ok.jpg", "JPEG", exif=_exif())
+    im.save(d / "PHOTO-2023-12-01-09-10-11.jpg", "JPEG")          # no EXIF
+    Image.new("RGBA", (4, 4), (0, 255, 0, 128)).save(d / "screenshot1.png")
+    try:
+        import pillow_heif
+        pillow_heif.register_heif_opener()
+        im.save(d / "exif_ok.heic", exif=_exif().tobytes())
+    except Exception:
+        pass
+    try:
+        import imageio_ffmpeg
+        subprocess.run(
+            [imageio_ffmpeg.get_ffmpeg_exe(), "-loglevel", "error",
+             "-f", "lavfi", "-i", "color=c=blue:s=16x16:d=1",
+             "-metadata", "creation_time=2024-07-10T20:08:42Z",
+             "-metadata", "location=+37.7749-122.4194/",
+             "-pix_fmt", "yuv420p", "-y", str(d / "vid_ok.mov")],
+            check=True,
+        )
+    except Exception:
+        pass
+    return d
+
+
+def test_jpeg_dates_orientation_gps(zoo):
+    m = fm.read_meta(zoo / "exif_ok.jpg")
+    assert m["DateTimeOriginal"] == TS
+    assert m["CreateDate"] == "2024:01:16 15:57:41"
+    assert (m["Make"], m["Model"], m["Orientation"]) == ("Apple", "iPhone 12", 6)
+    assert m["GPSLatitude"] == pytest.approx(37.7749)
+    assert m["GPSLongitude"] == pytest.approx(-122.4194)
+
+
+def test_file_objects_and_unsupported(zoo):
+    buf = io.BytesIO((zoo / "exif_ok.jpg").read_bytes())
+    assert fm.read_meta(buf, ".jpg")["DateTimeOriginal"] == TS
+    assert fm.read_meta(zoo / "PHOTO-2023-12-01-09-10-11.jpg") == {}   # parsed, nothing there
+    assert fm.read_meta(zoo / "screenshot1.png") is None               # not handled -> exiftool
+    assert fm.read_meta(io.BytesIO(b"\xff\xd8\xff\xe1\x00"), ".jpg") is None
+
+
+def test_heic_exif_item(zoo):
+    p = zoo / "exif_ok.heic"
+    if not p.exists():
+        pytest.skip("pillow_heif not available")
+    m = fm.read_meta(p)
+    assert m["DateTimeOriginal"] == TS and m["Orientation"] == 6
+
+
+def test_quicktime_dates_and_location(zoo):
+    p = zoo / "vid_ok.mov"
+    if not p.exists():
+        pytest.skip("imageio-ffmpeg not available")
+    m = fm.read_meta(p)
+    assert m["CreateDate"] == m["MediaCreateDate"] == "2024:07:10 20:08:42"
+    assert ip.resolve_taken_at(m, p.name, False) == "2024-07-10T20:08:42"
+    assert m["GPSLatitude"] == pytest.approx(37.7749)
+
+
+def test_read_metadata_falls_back_to_exiftool(zoo, monkeypatch):
+    calls = []
+    monkeypatch.setattr(ip, "exiftool_json",
+                        lambda p, tags=None: calls.append(tags) or {"CreateDate": "2020:01:01 00:00:00"})
+    monkeypatch.setattr(ip, "EXIFTOOL_MODE", "selective")
+    stats = Counter()
+    fast = ip.read_metadata(zoo / "exif_ok.jpg", stats)
+    assert fast["DateTimeOriginal"] == TS and fast[ip.EXIF_KV_PARTIAL_TAG] == "fastmeta"
+    sel = ip.read_metadata(zoo / "PHOTO-2023-12-01-09-10-11.jpg", stats)
+    assert sel["CreateDate"].startswith("2020") and sel[ip.EXIF_KV_PARTIAL_TAG] == "selective"
+    assert (stats["meta_fast"], stats["meta_exiftool"], stats["exif_fast"], stats["exif_deep"]) == (1, 1, 1, 0)
+    assert len(calls) == 1 and "DateTimeOriginal" in calls[0]
+
+
+def test_selective_exiftool_deep_reads_only_undated(zoo, monkeypatch):
+    calls = []
+
+    def fake(p, tags=None):
+        calls.append("fast" if tags else "deep")
+        return {} if tags else {"DateTimeOriginal": "2019:05:05 05:05:05"}
+
+    monkeypatch.setattr(ip, "exiftool_json", fake)
+    monkeypatch.setattr(ip, "EXIFTOOL_MODE", "selective")
+    monkeypatch.setattr(ip, "ALLOW_FILENAME_DATES", True)
+    stats = Counter()
+    ip.read_metadata(zoo / "PHOTO-2023-12-01-09-10-11.jpg", stats)   # filename date suffices
+    assert calls == ["fast"]
+    monkeypatch.setattr(ip, "ALLOW_FILENAME_DATES", False)
+    deep = ip.read_metadata(zoo / "screenshot1.png", stats)
+    assert deep["DateTimeOriginal"].startswith("2019") and ip.EXIF_KV_PARTIAL_TAG not in deep
+    assert calls == ["fast", "fast", "deep"] and stats["exif_deep"] == 1
+
+
+def _bad_exif_jpeg(path, typ, cnt):
+    """JPEG whose IFD0 ExifIFD pointer has the given type/count (a LONG with count 1 is valid)."""
+    tiff = b"II*\0" + struct.pack("<I", 8)
+    tiff += struct.pack("<H", 1) + struct.pack("<HHII", 0x8769, typ, cnt, 26) + struct.pack("<I", 0)
+    tiff += struct.pack("<II", 26, 26)                  # out-of-line value for count > 1
+    app1 = b"Exif\0\0" + tiff
+    path.write_bytes(b"\xff\xd8\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1 + b"\xff\xd9")
+    return path
+
+
+def test_malformed_exif_pointer_falls_back_to_exiftool(tmp_path, monkeypatch):
+    for typ, cnt in ((4, 2), (2, 8)):          # LONG[2], ASCII[8]
+        p = _bad_exif_jpeg(tmp_path / f"bad_{typ}_{cnt}.jpg", typ, cnt)
+        assert fm.read_meta(p) is None, (typ, cnt)
+        assert fm.read_meta(io.BytesIO(p.read_bytes()), ".jpg") is None
+    monkeypatch.setattr(ip, "exiftool_json", lambda p, tags=None: {"DateTimeOriginal": "2020:01:01 00:00:00"})
+    stats = Counter()
+    assert ip.read_metadata(p, stats)["DateTimeOriginal"].startswith("2020")
+    assert stats["meta_exiftool"] == 1 and stats["meta_fast"] == 0
+
+
+@pytest.mark.skipif(shutil.which("exiftool") is None, reason="exiftool not installed")
+def test_agrees_with_exiftool(zoo):
+    for p in sorted(zoo.iterdir()):
+        fast = fm.read_meta(p)
+        if not fast:
+            continue
+        out = subprocess.check_output(["exiftool", "-j", "-n", str(p)])
+        ref = json.loads(out)[0]
+        for k, v in fast.items():
+            if k not in ref:
+                continue
+            if isinstance(v, float):
+                assert ref[k] == pytest.approx(v, abs=1e-6), (p.name, k)
+            else:
+                assert str(ref[k]) == str(v), (p.name, k)
+        assert ip.extract_taken_at_exif_only(fast) == ip.extract_taken_at_exif_only(ref), p.name
@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import _dated_jpeg
+import ingest_pass as ip
+import last_ingests
+
+
+def test_finish_ingest_stores_per_batch_summary(staged, monkeypatch):
+    monkeypatch.setattr(ip, "TIMER", ip.StageTimer(enabled=True))
+    for i in range(3):
+        _dated_jpeg(ip.STAGING_SOURCES["Staging/pc"] / f"{i}.jpg", i)
+    _dated_jpeg(staged / "dupe.jpg", 0)                                  # same bytes as pc/0.jpg
+    (staged / "x.txt").write_text("not media")
+
+    conn = ip.open_db()
+    a = ip.ingest_one_source(conn, "Staging/pc", ip.STAGING_SOURCES["Staging/pc"], on_review_dupe="quarantine")
+    b = ip.ingest_one_source(conn, "Staging/other", staged, on_review_dupe="quarantine")
+
+    rows = {r[0]: r[1:] for r in conn.execute(
+        "SELECT ingest_id, scanned, moved, skipped_dupe, quarantined, q_counts, sightings, bytes_total, stages "
+        "FROM ingest_stats")}
+    assert rows[a["ingest_id"]][:5] == (3, 3, 0, 0, "{}")
+    assert rows[a["ingest_id"]][5] == 3 and rows[a["ingest_id"]][6] == a["bytes_total"] > 0
+    qb = json.loads(rows[b["ingest_id"]][4])
+    assert rows[b["ingest_id"]][:4] == (b["scanned"], 0, 1, b["quarantined"]) and sum(qb.values()) == b["quarantined"]
+
+    # each batch stores its own share of the stage timings; together they are the whole run
+    sa, sb = (json.loads(rows[x["ingest_id"]][7]) for x in (a, b))
+    assert sa["sha256"]["count"] == 3 and sb["sha256"]["count"] == 1
+    assert sa["upsert"]["count"] + sb.get("upsert", {"count": 0})["count"] == ip.TIMER.stages["upsert"].count
+    conn.close()
+
+    # last_ingests renders from ingest_stats (newest first)
+    rd = ip.open_db("read")
+    rd.row_factory = ip.sqlite3.Row
+    out = last_ingests.batch_rows(rd, 5)
+    rd.close()
+    assert [r["id"] for r in out] == [b["ingest_id"], a["ingest_id"]]
+    assert out[1]["scanned"] == 3 and out[1]["reasons"] == "-" and out[1]["duration_s"].endswith("s")
+
+
+def test_lower_scan_levels_need_no_exiftool_and_report_na(staged, tmp_path):
+    for i in range(3):
+        _dated_jpeg(staged / f"{i}.jpg", i)
+    _dated_jpeg(staged / "dupe.jpg", 0)
+    (staged / "x.txt").write_text("not media")
+    script = ip.repo_root() / "scripts" / "ingest_pass.py"
+    env = {**os.environ, "PATH": str(tmp_path / "no-tools")}         # no exiftool to find
+
+    out = {}
+    for level in ("inventory", "hash"):
+        run = subprocess.run([sys.executable, str(script), "--data-dir", str(ip.DATA_DIR), "--scan-level", level,
+                              "other"], env=env, capture_output=True, text=True, timeout=60)
+        assert run.returncode == 0, run.stderr
+        out[level] = run.stdout + run.stderr
+    assert "exiftool not found" not in out["inventory"] + out["hash"]
+    assert "moved=n/a, updated=n/a, skipped_dupe=n/a, quarantined=1" in out["inventory"]
+    assert "moved=n/a, updated=n/a, skipped_dupe=1, quarantined=1" in out["hash"]
+    assert "dupes_within_run=1" in out["hash"]
+
+    rd = ip.open_db("read")
+    rows = rd.execute("SELECT scan_level, dry_run, scanned, moved, updated, skipped_dupe, quarantined "
+                      "FROM ingest_stats ORDER BY scan_level DESC").fetchall()
+    rd.close()
+    assert rows == [("inventory", 1, 4, None, None, None, 1), ("hash", 1, 4, None, None, 1, 1)]
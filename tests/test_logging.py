@@ -0,0 +1,45 @@
+import logging
+import queue
+from collections import Counter
+
+import ingest_pass as ip
+
+
+def _rec(msg, level=logging.DEBUG, created=1000.0, args=()):
+    r = logging.LogRecord("pixarr", level, __file__, 1, msg, args, None)
+    r.created = created
+    return r
+
+
+def test_sampling_keeps_one_in_n_per_prefix(monkeypatch):
+    monkeypatch.setattr(ip, "LOG_DROPPED", Counter())
+    f = ip.SampledEventsFilter(["MOVED", "[DRY] MOVE"], every=3)
+    assert [f.filter(_rec(f"MOVED /s/{i}.jpg")) for i in range(7)] == [True, False, False, True, False, False, True]
+    # each prefix is counted on its own; unmatched DEBUG passes untouched
+    assert [f.filter(_rec(f"[DRY] MOVE /s/{i}.jpg")) for i in range(2)] == [True, False]
+    assert all(f.filter(_rec(f"stat /s/{i}.jpg")) for i in range(5))
+    assert ip.LOG_DROPPED == {"MOVED": 4, "[DRY] MOVE": 1}
+
+
+def test_rate_limit_per_second_and_info_and_up_always_pass(monkeypatch):
+    monkeypatch.setattr(ip, "LOG_DROPPED", Counter())
+    f = ip.SampledEventsFilter(["MOVED"], every=1, max_per_sec=2)
+    got = [f.filter(_rec("MOVED x", created=t)) for t in (100.1, 100.5, 100.9, 101.0, 101.2, 101.3)]
+    assert got == [True, True, False, True, True, False]
+    assert ip.LOG_DROPPED == {"MOVED": 2}
+
+    strict = ip.SampledEventsFilter(["MOVED"], every=1000, max_per_sec=1)
+    for level in (logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL):
+        assert all(strict.filter(_rec("MOVED x", level=level)) for _ in range(5))
+    assert ip.LOG_DROPPED == {"MOVED": 2}
+    assert ip.SampledEventsFilter([], every=1000).filter(_rec("MOVED x"))
+
+
+def test_deferred_queue_handler_leaves_formatting_to_the_listener():
+    q = queue.SimpleQueue()
+    h = ip._DeferredQueueHandler(q)
+    r = _rec("MOVED %s -> %s", args=("a.jpg", "b.jpg"))
+    h.handle(r)
+    got = q.get_nowait()
+    assert got is r and got.msg == "MOVED %s -> %s" and got.args == ("a.jpg", "b.jpg")
+    assert got.getMessage() == "MOVED a.jpg -> b.jpg"
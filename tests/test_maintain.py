@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+import ingest_pass as ip
+import pixarr_maintain as pm
+
+
+def _fill(conn, n, start=0, size=2000):
+    conn.execute("""WITH RECURSIVE k(i) AS (SELECT ? UNION ALL SELECT i + 1 FROM k WHERE i < ?)
+                    INSERT INTO media (id, sha256, ext, bytes, state, canonical_path, added_ts, updated_ts)
+                    SELECT 'm' || i, randomblob(32), '.jpg', i, 'review', hex(randomblob(?)), 0, 0 FROM k""",
+                 (start, start + n - 1, size // 2))
+    conn.commit()
+
+
+def test_backup_while_ingest_writes_then_schedule(tmp_path):
+    ip.pathize(tmp_path / "data")
+    ip.ensure_db()
+    conn = ip.open_db()
+    _fill(conn, 2000)
+    stop, written, errors = threading.Event(), [], []
+
+    def ingest():                                    # upsert + commit per file, like ingest
+        w = ip.open_db()
+        try:
+            while not stop.is_set():
+                _fill(w, 1, start=10_000 + len(written), size=200)
+                written.append(1)
+        except Exception as e:                       # noqa: BLE001 (surface in the main thread)
+            errors.append(e)
+        finally:
+            w.close()
+
+    t = threading.Thread(target=ingest)
+    t.start()
+    try:
+        out = tmp_path / "backups"
+        res = pm.run(conn, ip.DB_PATH, out, force=True, pages=8, throttle=pm.Throttle(budget_ms=20, duty=0.5))
+    finally:
+        stop.set()
+        t.join()
+    assert not errors and written
+    snap = res["backup"]
+    assert snap["integrity"] == "ok" and snap["steps"] > 10      # paged, and not restarted by the writer
+    n = sqlite3.connect(snap["path"]).execute("SELECT COUNT(*) FROM media").fetchone()[0]
+    assert 2000 <= n <= 2000 + len(written)
+    assert res["checkpoint"]["busy"] or res["checkpoint"]["truncate_ms"] < 1000
+
+    # schedule: only the checkpoint is due again; it truncates the WAL once ingest is idle
+    again = pm.run(conn, ip.DB_PATH, out)
+    assert {k: v.get("skipped") for k, v in again.items()} == {
+        "checkpoint": None, "optimize": "not due", "vacuum": "not due", "backup": "not due"}
+    assert again["checkpoint"]["busy"] == 0 and again["checkpoint"]["wal_after"] == 0
+    conn.close()
+
+
+def test_incremental_vacuum_and_snapshot_retention(tmp_path):
+    ip.pathize(tmp_path / "data")
+    ip.ensure_db()
+    conn = ip.open_db()
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2     # schema.sql: INCREMENTAL
+    _fill(conn, 3000)
+    conn.execute("DELETE FROM media WHERE rid % 3 != 0")
+    conn.commit()
+    res = pm.vacuum(conn, pm.Throttle(budget_ms=5, duty=1))
+    assert res["free_before"] > 0.3 * res["pages"] and res["free_after"] == 0 and res["steps"] >= 1
+    assert pm.vacuum(conn, pm.Throttle())["skipped"].startswith("freelist under")
+
+    legacy = sqlite3.connect(tmp_path / "legacy.sqlite3")           # DBs created before auto_vacuum was set
+    legacy.executescript("CREATE TABLE t (x); INSERT INTO t SELECT randomblob(4000) FROM "
+                         "(WITH RECURSIVE k(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM k WHERE i < 200) "
+                         "SELECT i FROM k); DELETE FROM t;")
+    assert "not INCREMENTAL" in pm.vacuum(legacy, pm.Throttle())["skipped"]
+    legacy.close()
+
+    out = tmp_path / "backups"
+    for day in (1, 2, 3):
+        r = pm.backup(ip.DB_PATH, out, pm.Throttle(duty=1), keep=2, now=datetime(2024, 5, day))
+        assert r["integrity"] == "ok"
+    assert [p.name for p in sorted(out.glob("app-*.sqlite3"))] == ["app-20240502-000000.sqlite3",
+                                                                  "app-20240503-000000.sqlite3"]
+    conn.close()
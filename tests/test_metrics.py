@@ -0,0 +1,26 @@
+from collections import defaultdict
+
+import ingest_pass as ip
+
+
+def test_render_counters_and_stage_histogram(monkeypatch):
+    timer = ip.StageTimer(enabled=True)
+    for secs in (0.00005, 0.0003, 0.02, 3.0):
+        timer.observe("sha256", secs, nbytes=100)
+    monkeypatch.setattr(ip, "TIMER", timer)
+
+    m = ip.IngestMetrics()
+    m.track({"label": 'Staging/"odd"', "scanned": 4, "moved": 2, "updated": 0, "skipped_dupe": 1,
+             "bytes_hashed": 400, "finished_at": None, "q_counts": defaultdict(int, {"junk": 3})})
+    text = m.render()
+
+    assert 'pixarr_ingest_scanned_total{source="Staging/\\"odd\\""} 4' in text
+    assert 'pixarr_ingest_quarantined_total{source="Staging/\\"odd\\"",reason="junk"} 3' in text
+    assert 'pixarr_ingest_batch_finished{source="Staging/\\"odd\\""} 0' in text
+
+    buckets = [l for l in text.splitlines() if l.startswith('pixarr_ingest_stage_seconds_bucket{stage="sha256"')]
+    counts = [int(l.rsplit(" ", 1)[1]) for l in buckets]
+    assert counts == sorted(counts)                     # cumulative
+    assert buckets[-1].endswith('le="+Inf"} 4')
+    assert 'pixarr_ingest_stage_seconds_bucket{stage="sha256",le="0.025"} 3' in text
+    assert 'pixarr_ingest_stage_seconds_count{stage="sha256"} 4' in text
@@ -0,0 +1,80 @@
+import sqlite3
+
+from PIL import Image
+
+import ingest_pass as ip
+import migrate_v2 as mv
+
+
+def _v1_snapshot(conn):
+    media = {r[0]: (r[1], r[2], r[3], r[4][:19]) for r in conn.execute(
+        "SELECT id, hash_sha256, state, taken_at, added_at FROM media")}
+    sightings = sorted(conn.execute("SELECT id, media_id, full_path, substr(seen_at, 1, 19) FROM sightings "
+                                    "WHERE media_id IN (SELECT id FROM media)"))
+    exif = sorted(conn.execute("SELECT media_id, tag, value FROM exif_kv"))
+    return media, sightings, exif
+
+
+def test_online_migration_with_concurrent_writes(tmp_path, monkeypatch):
+    ip.pathize(tmp_path)
+    ip.ensure_dirs()
+    mv.synth_v1(ip.DB_PATH, 120)
+
+    writer = sqlite3.connect(ip.DB_PATH)             # another process still on v1 code
+    writer.execute("PRAGMA foreign_keys=ON")
+    ids = [r[0] for r in writer.execute("SELECT id FROM media ORDER BY rowid")]
+    snap = {}
+    calls = []
+
+    def concurrent(tbl, n):
+        i = len(calls)
+        calls.append(tbl)
+        if i >= 40:
+            return
+        h = f"{i:064x}"
+        writer.execute("INSERT INTO media (id, hash_sha256, ext, bytes, taken_at, state, added_at, updated_at) "
+                       "VALUES (?, ?, '.jpg', 1, '2020-01-01T00:00:00', 'review', '2024-05-01T10:00:00.5', "
+                       "'2024-05-01T10:00:00.5')", (f"new-{i}", h))
+        writer.execute("INSERT INTO sightings (media_id, source_root, full_path, filename, seen_at) "
+                       "VALUES (?, 'Staging/pc', ?, 'x.jpg', '2024-05-01T10:00:01')", (f"new-{i}", f"/s/{i}.jpg"))
+        writer.execute("INSERT INTO exif_kv VALUES (?, 'EXIF:Make', 'Acme')", (f"new-{i}",))
+        writer.execute("UPDATE media SET state='library' WHERE id=?", (ids[i],))         # already copied
+        writer.execute("DELETE FROM media WHERE id=?", (ids[-1 - i],))                   # cascades in v1
+        writer.execute("UPDATE exif_kv SET value='changed' WHERE media_id=?", (ids[i + 1],))
+        writer.commit()
+        snap["v1"] = _v1_snapshot(writer)
+
+    conn = mv.connect(ip.DB_PATH)
+    counts = mv.migrate(conn, chunk=25, on_chunk=concurrent)
+    assert len(calls) > 10 and counts["media"][0] == counts["media"][1]
+    conn.close()
+    writer.close()
+
+    conn = ip.open_db()
+    ip.check_schema(conn)
+    media, sightings, exif = snap["v1"]
+    assert {r[0]: r[1:] for r in conn.execute(
+        "SELECT id, hash_sha256, state, taken_at, added_at FROM media")} == media
+    assert sorted(conn.execute("SELECT id, media_id, full_path, seen_at FROM sightings")) == sightings
+    assert sorted(conn.execute("SELECT media_id, tag, value FROM exif_kv")) == exif
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name LIKE 'migrate_v2%' OR name LIKE '%_new'").fetchall() == []
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert conn.execute("SELECT COUNT(*) FROM v_review_queue").fetchone()[0] > 0
+    assert mv.pixarr_counters.drift(conn) == []                   # counters built at the swap
+
+    # ingest (v2 code) on the migrated DB
+    monkeypatch.setattr(ip, "DRY_RUN", False)
+    monkeypatch.setattr(ip, "SCAN_LEVEL", "full")
+    monkeypatch.setattr(ip, "FAST_META", True)
+    ex = Image.Exif()
+    ex.get_ifd(0x8769)[36867] = "2024:03:01 10:00:00"
+    src = ip.STAGING_SOURCES["Staging/other"]
+    src.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", (8, 8), (1, 2, 3)).save(src / "a.jpg", "JPEG", exif=ex)
+    stats = ip.ingest_one_source(conn, "Staging/other", src, on_review_dupe="quarantine")
+    assert stats["moved"] == 1
+    row = conn.execute("SELECT m.taken_ts, s.full_path FROM media m JOIN sightings s ON s.media_id = m.id "
+                       "WHERE m.taken_at LIKE '2024-03-01%'").fetchone()
+    assert row[0] == ip.iso_to_epoch("2024-03-01T10:00:00") and row[1].endswith("a.jpg")
+    conn.close()
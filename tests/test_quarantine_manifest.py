@@ -0,0 +1,95 @@
+import json
+import os
+
+import ingest_pass as ip
+import quarantine_manifest as qm
+
+
+
+def _events(conn):
+    return sorted(conn.execute("SELECT reason, original_path, quarantined_to, manifest FROM quarantine_events"))
+
+
+def test_batched_manifest_and_reindex(tmp_path, ingest_env, monkeypatch, capsys):
+    root = ingest_env(tmp_path)
+    monkeypatch.setattr(ip, "QUAR_MANIFEST", True)
+    monkeypatch.setattr(ip, "QUAR_SIDECARS", False)
+    monkeypatch.setattr(ip, "QUAR_MANIFEST_BATCH", 2)
+    for name in ("a.txt", "b.txt", "c.pdf", "d.doc"):
+        (root / name).write_text(name)
+    (root / "empty.jpg").write_bytes(b"")
+    syncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(ip.os, "fsync", lambda fd: syncs.append(fd) or real_fsync(fd))
+
+    conn = ip.open_db()
+    stats = ip.ingest_one_source(conn, "Staging/other", root, on_review_dupe="quarantine")
+    assert stats["q_counts"] == {"unsupported_ext": 4, "zero_bytes": 1}
+    assert len(syncs) == 3                                # 2 + 2 + the final flush of 1
+
+    manifest = ip.manifest_path_for(stats["ingest_id"])
+    lines = [json.loads(line) for line in manifest.read_text(encoding="utf-8").splitlines()]
+    names = sorted(os.path.basename(p["original_path"]) for p in lines)
+    assert names == ["a.txt", "b.txt", "c.pdf", "d.doc", "empty.jpg"]
+    assert {p["ingest_id"] for p in lines} == {stats["ingest_id"]}
+    assert all(os.path.exists(p["quarantined_to"]) and not os.path.exists(p["original_path"]) for p in lines)
+    assert not list(ip.QUARANTINE_ROOT.rglob("*.quarantine.json"))           # no sidecars
+
+    indexed = _events(conn)
+    assert indexed == sorted((p["reason"], p["original_path"], p["quarantined_to"], str(manifest)) for p in lines)
+    conn.close()
+
+    # index rebuilds from the JSONL without duplicating rows, and refills a lost index
+    def index():
+        monkeypatch.setattr("sys.argv", ["quarantine_manifest.py", "--data-dir", str(ip.DATA_DIR),
+                                         "--batch", "2", "index"])
+        qm.main()
+        return capsys.readouterr().out
+
+    assert "Indexed 5 event(s) from 1 manifest(s)" in index()
+    conn = ip.open_db()
+    assert _events(conn) == indexed
+    conn.execute("DELETE FROM quarantine_events")
+    conn.commit()
+    index()
+    assert _events(conn) == indexed
+    conn.close()
+
+
+
+def test_convert_legacy_sidecars_is_idempotent(tmp_path, ingest_env, monkeypatch, capsys):
+    root = ingest_env(tmp_path)
+    monkeypatch.setattr(ip, "QUAR_MANIFEST", False)                 # an older run: sidecars only
+    monkeypatch.setattr(ip, "QUAR_SIDECARS", True)
+    for name in ("a.txt", "b.txt", "c.pdf"):
+        (root / name).write_text(name)
+    conn = ip.open_db()
+    iid = ip.ingest_one_source(conn, "Staging/other", root, on_review_dupe="quarantine")["ingest_id"]
+    conn.close()
+    sidecars = sorted(ip.QUARANTINE_ROOT.rglob("*.quarantine.json"))
+    legacy = [json.loads(p.read_text(encoding="utf-8")) for p in sidecars]
+    assert len(legacy) == 3
+    # a hand-made sidecar without ingest_id goes to the legacy bucket
+    orphan = dict(legacy[0], ingest_id=None, original_path="/old/x.txt", timestamp="2020-01-01T00:00:00")
+    (ip.QUARANTINE_ROOT / "unsupported_ext" / "x.txt.quarantine.json").write_text(json.dumps(orphan))
+    expected = {(p["original_path"], p["timestamp"]) for p in legacy + [orphan]}
+
+    def convert(*flags):
+        monkeypatch.setattr("sys.argv", ["quarantine_manifest.py", "--data-dir", str(ip.DATA_DIR),
+                                         "convert", *flags])
+        qm.main()
+        return capsys.readouterr().out
+
+    assert "Appended 4 event(s); indexed 4. Sidecars kept" in convert("--write")
+    assert "Appended 0 event(s); indexed 4. Sidecars removed." in convert("--write", "--remove-sidecars")
+    assert "Found 0 sidecar(s)" in convert("--write", "--remove-sidecars")
+    assert not list(ip.QUARANTINE_ROOT.rglob("*.quarantine.json"))
+
+    events = []
+    for key in (iid, qm.LEGACY_MANIFEST):
+        events += [(p["original_path"], p["timestamp"]) for p in qm.read_manifest(ip.manifest_path_for(key))]
+    assert sorted(events) == sorted(expected)                              # each event once
+    conn = ip.open_db()
+    rows = conn.execute("SELECT original_path, ts FROM quarantine_events").fetchall()
+    assert sorted(rows) == sorted(expected)
+    conn.close()
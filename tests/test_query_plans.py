@@ -0,0 +1,158 @@
+"""
+EXPLAIN QUERY PLAN for the lookups and listings the CLI tools and the API run:
+none may scan a whole table. The statements are not copied here: each caller is
+run against a small ingested DB with its connections traced (pixarr_sqlite
+tracer), and whatever it actually executed is explained on a fresh schema.
+Whole-table aggregates (states, pixarr_db run --sql, --where filters) are out
+of scope.
+"""
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import _dated_jpeg
+import ingest_pass as ip
+import last_ingests
+import last_media
+import pixarr_db
+import pixarr_query
+import pixarr_sqlite
+import pixarr_trace
+import show_media
+
+API = Path(__file__).resolve().parents[1] / "pixarr-api"
+
+# paged lists that must come off an index in order, not through a full sort
+NO_SORT = {"last_media", "last_ingests", "ingest summary", "pixarr_query sightings",
+           "pixarr_query sightings --ingest-id", "api review", "api review ?q", "api stats/ingests"}
+
+_FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\S+)$")   # "SCAN t", not "SCAN t USING [COVERING] INDEX …"
+SMALL_TABLES = {"media_counters", "sqlite_master"}         # a few rows by design / schema probes
+
+
+class _Recorder(pixarr_trace.SqlTracer):
+    """Keeps every statement a traced connection runs, with its parameters."""
+
+    def __init__(self):
+        super().__init__(explain=False)
+        self.seen = []
+
+    def observe(self, conn, sql, params, seconds, rows):
+        self.seen.append((sql, tuple(params or ())))
+
+
+def _cli(monkeypatch, mod, *argv):
+    monkeypatch.setattr("sys.argv", [mod.__name__, *argv])
+    mod.main()
+
+
+def _api():
+    """(review, stats) route modules and the db module of pixarr-api, or None without its dependencies."""
+    try:
+        import fastapi  # noqa: F401
+    except ImportError:
+        return None
+    if str(API) not in sys.path:
+        sys.path.insert(0, str(API))
+    from app.api.routes import review, stats
+    from app.repositories import db
+    return review, stats, db
+
+
+@pytest.fixture
+def traced(staged, monkeypatch):
+    """{caller: [(sql, params), …]} for each CLI/API lookup, run against a small ingested DB."""
+    for i in range(3):
+        _dated_jpeg(staged / f"{i}.jpg", i)
+    (staged / "x.txt").write_text("not media")
+    conn = ip.open_db()
+    stats = ip.ingest_one_source(conn, "Staging/other", staged, on_review_dupe="quarantine")
+    iid = stats["ingest_id"]
+    h, = conn.execute("SELECT hash_sha256 FROM media WHERE state='review' LIMIT 1").fetchone()
+    path, = conn.execute("SELECT full_path FROM sightings LIMIT 1").fetchone()
+    conn.close()
+    db = str(ip.DB_PATH)
+
+    rec = _Recorder()
+    real = pixarr_sqlite.connect
+    monkeypatch.setattr(pixarr_sqlite, "connect",
+                        lambda *a, tracer=None, **kw: real(*a, tracer=tracer or rec, **kw))
+
+    def finish():
+        c = ip.open_db()
+        ip.finish_ingest(c, iid, stats)
+        c.close()
+
+    callers = {
+        "show_media --hash": lambda: _cli(monkeypatch, show_media, "--db", db, "--hash", h),
+        "show_media --hash-prefix": lambda: _cli(monkeypatch, show_media, "--db", db, "--hash-prefix", h[:9]),
+        "show_media --path": lambda: _cli(monkeypatch, show_media, "--db", db, "--path", path),
+        "last_media": lambda: _cli(monkeypatch, last_media, "--db", db, "-n", "2"),
+        "last_ingests": lambda: _cli(monkeypatch, last_ingests, "--db", db, "-n", "5"),
+        "finish_ingest": finish,
+        "ingest summary": lambda: ip.log_batches([stats]),
+        "pixarr_query sightings": lambda: _cli(monkeypatch, pixarr_query, "--data-dir", str(ip.DATA_DIR),
+                                               "sightings", "--limit", "50"),
+        "pixarr_query sightings --ingest-id": lambda: _cli(monkeypatch, pixarr_query, "--data-dir",
+                                                           str(ip.DATA_DIR), "sightings", "--ingest-id", iid),
+        "pixarr_query quarantine": lambda: _cli(monkeypatch, pixarr_query, "--data-dir", str(ip.DATA_DIR),
+                                                "quarantine", "--reason", "unsupported_ext"),
+        "pixarr_query reasons": lambda: _cli(monkeypatch, pixarr_query, "--data-dir", str(ip.DATA_DIR), "reasons"),
+        "pixarr_query batches": lambda: _cli(monkeypatch, pixarr_query, "--data-dir", str(ip.DATA_DIR), "batches"),
+        "pixarr_db quarantined": lambda: _cli(monkeypatch, pixarr_db, "--db", db, "quarantined"),
+        "pixarr_db review": lambda: _cli(monkeypatch, pixarr_db, "--db", db, "review"),
+        "pixarr_db batches": lambda: _cli(monkeypatch, pixarr_db, "--db", db, "batches"),
+        "pixarr_db batch-items": lambda: _cli(monkeypatch, pixarr_db, "--db", db, "batch-items", "--id", iid),
+    }
+    api = _api()
+    if api:
+        review, stats_routes, api_db = api
+        monkeypatch.setattr(api_db, "DB_PATH", ip.DB_PATH)
+        # rows live outside the configured REVIEW_DIR, so no URLs (and no request) are built
+        callers.update({
+            "api review": lambda: review.list_review(None),
+            "api review ?q": lambda: review.list_review(None, q="x"),
+            "api stats/media": stats_routes.media_stats,
+            "api stats/ingests": stats_routes.ingest_history,
+        })
+
+    out = {}
+    for name, run in callers.items():
+        rec.seen = []
+        run()
+        out[name] = [(sql, p) for sql, p in rec.seen if not sql.lstrip().upper().startswith("PRAGMA")]
+    return out
+
+
+def test_callers_use_indexes(traced, tmp_path):
+    # plan on a fresh schema: no sqlite_stat1 from a three-file library to steer the planner
+    ip.pathize(tmp_path / "plans")
+    ip.ensure_db()
+    plans = pixarr_sqlite.connect(ip.DB_PATH, "read")
+    bad = []
+    for name, statements in traced.items():
+        assert statements, name
+        for sql, params in statements:
+            plan = pixarr_trace.explain(plans, sql, params)
+            scans = [m.group(1) for m in map(_FULL_SCAN.match, plan) if m]
+            if ([t for t in scans if t not in SMALL_TABLES]
+                    or name in NO_SORT and "USE TEMP B-TREE FOR ORDER BY" in plan):
+                bad.append((name, " ".join(sql.split()), plan))
+    plans.close()
+    assert not bad
+
+
+def test_ensure_lookup_indexes_upgrades_older_db(tmp_path):
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    conn = ip.open_db()
+    for idx in ("idx_media_added", "idx_sightings_v2_ingest_seen", "idx_sightings_v2_path", "idx_ingests_started"):
+        conn.execute(f"DROP INDEX {idx}")
+    conn.execute("CREATE INDEX idx_sightings_v2_ingest ON sightings_v2(ingest_id)")
+    ip.ensure_lookup_indexes(conn)
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert {"idx_media_added", "idx_sightings_v2_path", "idx_ingests_started"} <= names
+    assert "idx_sightings_v2_ingest" not in names
+    conn.close()
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+import ingest_pass as ip
+import requeue
+
+
+NAMED = "IMG_20240710_200842.jpg"     # undated, but the filename carries a date
+
+
+@pytest.fixture
+def quarantined(tmp_path, ingest_env, monkeypatch):
+    root = ingest_env(tmp_path)
+    monkeypatch.setattr(ip, "exiftool_json", lambda p, tags=None: {})    # no tags beyond the fast reader's
+    Image.new("RGB", (8, 8), (1, 2, 3)).save(root / NAMED, "JPEG")
+    Image.new("RGB", (8, 8), (4, 5, 6)).save(root / "scan.jpg", "JPEG")
+    conn = ip.open_db()
+    stats = ip.ingest_one_source(conn, "Staging/other", root, on_review_dupe="quarantine")
+    assert stats["q_counts"] == {"missing_datetime": 2}
+    rows = {}
+    for mid, h, cpath in conn.execute("SELECT id, hash_sha256, canonical_path FROM media"):
+        rows[cpath.rsplit("/", 1)[-1]] = (mid, h, cpath)
+    conn.close()
+    return rows
+
+
+def _requeue(monkeypatch, *argv):
+    monkeypatch.setattr("sys.argv", ["requeue.py", "--data-dir", str(ip.DATA_DIR), *argv])
+    requeue.main()
+
+
+def test_filename_dates_move_quarantine_to_review(quarantined, monkeypatch):
+    mid, h, qpath = quarantined[NAMED]
+    _requeue(monkeypatch, "--allow-filename-dates", "--review-layout", "year_month")     # dry-run
+    rd = ip.open_db("read")
+    assert rd.execute("SELECT COUNT(*) FROM media WHERE state='quarantine'").fetchone()[0] == 2
+    assert rd.execute("SELECT COUNT(*) FROM review_moves").fetchone()[0] == 0
+    rd.close()
+
+    layout, keys = ip.REVIEW_LAYOUT, list(ip._DATE_KEYS)
+    _requeue(monkeypatch, "--allow-filename-dates", "--allow-file-dates", "--review-layout", "year_month",
+             "--write")
+    assert (ip.REVIEW_LAYOUT, ip._DATE_KEYS) == (layout, keys)               # policy passed, not set globally
+    dest = ip.REVIEW_ROOT / "2024-07" / f"2024-07-10_20-08-42_{h[:8]}.jpg"
+    assert dest.exists() and not Path(qpath).exists()
+    conn = ip.open_db("read")
+    assert conn.execute(
+        "SELECT state, canonical_path, taken_at, quarantine_reason FROM media WHERE id=?", (mid,)
+    ).fetchone() == ("review", str(dest), "2024-07-10T20:08:42", None)
+    assert conn.execute("SELECT taken_ts FROM media WHERE id=?", (mid,)).fetchone()[0] == \
+        ip.iso_to_epoch("2024-07-10T20:08:42")
+    moves = conn.execute("SELECT batch_id, media_id, old_path, new_path, status FROM review_moves").fetchall()
+    assert [m[1:] for m in moves] == [(mid, qpath, str(dest), "done")]
+    assert moves[0][0].startswith(requeue.BATCH_PREFIX)
+    # scan.jpg has no date anywhere and stays put
+    assert conn.execute("SELECT state, quarantine_reason FROM media WHERE canonical_path LIKE '%scan.jpg'"
+                        ).fetchone() == ("quarantine", "missing_datetime")
+    conn.close()
+
+
+def test_replay_finishes_planned_moves(quarantined):
+    mid, h, qpath = quarantined[NAMED]
+    dest = ip.REVIEW_ROOT / f"2024-07-10_20-08-42_{h[:8]}.jpg"
+    conn = ip.open_db()
+    requeue.reshard_review.ensure_journal(conn)
+    # an interrupted --write: journaled 'planned', file not moved yet
+    conn.execute("INSERT INTO review_moves (batch_id, media_id, old_path, new_path, status, created_at) "
+                 "VALUES (?, ?, ?, ?, 'planned', '2024-01-01T00:00:00')",
+                 (requeue.BATCH_PREFIX + "interrupted", mid, qpath, str(dest)))
+    conn.commit()
+
+    assert requeue.replay_planned(conn, True, ip.date_keys_for(False)) == 1
+    assert dest.exists() and not Path(qpath).exists()
+    assert conn.execute("SELECT state, canonical_path, taken_at FROM media WHERE id=?", (mid,)
+                        ).fetchone() == ("review", str(dest), "2024-07-10T20:08:42")
+    assert conn.execute("SELECT status FROM review_moves").fetchone()[0] == "done"
+    assert requeue.replay_planned(conn, True, ip.date_keys_for(False)) == 0
+    conn.close()
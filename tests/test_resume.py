@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import _dated_jpeg
+import ingest_pass as ip
+
+
+@pytest.fixture
+def staged(staged):
+    for i, rel in enumerate(["a/1.jpg", "a/2.jpg", "b/3.jpg", "b/c/4.jpg", "b/c/5.jpg", "d/6.jpg"]):
+        _dated_jpeg(staged / rel, i)
+    (staged / "b" / ".DS_Store").write_bytes(b"junk")
+    return staged
+
+
+def test_resume_after_interrupt_finishes_with_full_totals(staged, monkeypatch):
+    real = ip.read_metadata
+    calls = []
+
+    def flaky(p, stats=None, **kw):
+        calls.append(p.name)
+        if len(calls) == 4:          # Ctrl-C while on b/c/4.jpg
+            raise KeyboardInterrupt
+        return real(p, stats, **kw)
+
+    monkeypatch.setattr(ip, "read_metadata", flaky)
+    conn = ip.open_db()
+    with pytest.raises(KeyboardInterrupt):
+        ip.ingest_one_source(conn, "Staging/other", staged, on_review_dupe="quarantine")
+    iid, finished = conn.execute("SELECT id, finished_at FROM ingests").fetchone()
+    assert finished is None
+    assert conn.execute("SELECT COUNT(*) FROM ingest_stats").fetchone()[0] == 0
+    assert conn.execute("SELECT last_dir FROM ingest_checkpoints").fetchone()[0] == "b"
+    assert (staged / "b" / "c" / "4.jpg").exists()
+
+    monkeypatch.setattr(ip, "read_metadata", real)
+    stats = ip.ingest_one_source(conn, "Staging/other", staged, on_review_dupe="quarantine",
+                                 resume=ip.IngestCheckpoint.load(conn, iid))
+    assert stats["ingest_id"] == iid and stats["resumed"]
+    assert (stats["scanned"], stats["moved"], stats["quarantined"]) == (6, 6, 1)
+    assert conn.execute("SELECT COUNT(*) FROM ingests").fetchone()[0] == 1
+    assert conn.execute("SELECT finished_at FROM ingests").fetchone()[0] is not None
+    assert conn.execute("SELECT COUNT(*), COUNT(DISTINCT media_id) FROM sightings").fetchone() == (6, 6)
+    row = conn.execute("SELECT scanned, moved, quarantined, q_counts, sightings, dry_run, duration_s "
+                       "FROM ingest_stats WHERE ingest_id=?", (iid,)).fetchone()
+    assert row[:6] == (6, 6, 1, '{"junk": 1}', 6, 0) and row[6] > 0     # both runs, one summary
+    assert len(list(ip.REVIEW_ROOT.iterdir())) == 6
+    with pytest.raises(ValueError, match="already finished"):
+        ip.IngestCheckpoint.load(conn, iid)
+    conn.close()
+
+
+def test_file_markers_skip_done_files_in_partial_dir(tmp_path):
+    ck = ip.IngestCheckpoint("x", tmp_path, last_dir="b", done=["b/c/4.jpg"])
+    assert ck.dir_done_before(".") and ck.dir_done_before("a") and ck.dir_done_before("b")
+    assert not ck.dir_done_before("b/c") and not ck.dir_done_before("d")
+    assert ck.file_done_before("b/c/4.jpg") and not ck.file_done_before("b/c/5.jpg")
@@ -0,0 +1,67 @@
+import sqlite3
+from pathlib import Path
+
+import ingest_pass as ip
+import reshard_review as rr
+from ingest_pass import canonical_name, plan_nonclobber, review_shard
+
+H = "ab12cd34" + "0" * 56
+
+def test_flat_layout_is_just_the_name():
+    assert canonical_name("2024-07-08T08:00:38", H, ".JPG", layout="flat") == "2024-07-08_08-00-38_ab12cd34.jpg"
+
+def test_hash2_and_year_month_layouts():
+    assert canonical_name("2024-07-08T08:00:38", H, ".jpg", layout="hash2") == "ab/2024-07-08_08-00-38_ab12cd34.jpg"
+    assert canonical_name("2024-07-08T08:00:38", H, ".jpg", layout="year_month") == "2024-07/2024-07-08_08-00-38_ab12cd34.jpg"
+
+def test_shard_is_stable_for_collision_suffixes():
+    # _2/_3 suffixes must not move a file to another shard
+    assert review_shard("2024-07-08_08-00-38_ab12cd34_2.jpg", "hash2") == "ab"
+    assert review_shard("not-canonical.jpg", "hash2") == "_"
+
+def test_plan_nonclobber_inside_shard(tmp_path: Path):
+    rel = canonical_name("2024-07-08T08:00:38", H, ".jpg", layout="hash2")
+    first = plan_nonclobber(tmp_path, rel)
+    first.parent.mkdir(parents=True)
+    first.write_bytes(b"x")
+    second = plan_nonclobber(tmp_path, rel)
+    assert second.parent == first.parent
+    assert second.name == "2024-07-08_08-00-38_ab12cd34_2.jpg"
+
+def test_reshard_batch_moves_and_journals(tmp_path: Path):
+    ip.pathize(tmp_path)
+    ip.REVIEW_ROOT.mkdir(parents=True)
+    conn = sqlite3.connect(":memory:")
+    conn.executescript((ip.repo_root() / "db" / "schema.sql").read_text())
+    src = ip.REVIEW_ROOT / "2024-07-08_08-00-38_ab12cd34.jpg"
+    src.write_bytes(b"x")
+    conn.execute(
+        "INSERT INTO media (id, sha256, ext, bytes, state, canonical_path, added_ts, updated_ts) "
+        "VALUES ('m1', ?, '.jpg', 1, 'review', ?, 0, 0)", (bytes.fromhex(H), str(src)))
+    moved, failed = rr.run_batch(conn, [("m1", src, rr.target_for(src, "hash2"))], write=True)
+    assert (moved, failed) == (1, 0)
+    dest = ip.REVIEW_ROOT / "ab" / src.name
+    assert dest.exists() and not src.exists()
+    assert conn.execute("SELECT canonical_path FROM media").fetchone()[0] == str(dest)
+    assert conn.execute("SELECT status FROM review_moves").fetchone()[0] == "done"
+
+def test_reshard_between_sharded_layouts_prunes_old_shards(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(ip, "LOGGER", ip.LOGGER)                    # main() installs its own
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    conn = ip.open_db()
+    for i, h in enumerate(("ab" + "1" * 62, "cd" + "2" * 62)):
+        src = ip.REVIEW_ROOT / h[:2] / f"2024-07-0{i + 1}_08-00-38_{h[:8]}.jpg"
+        src.parent.mkdir(parents=True)
+        src.write_bytes(b"x")
+        conn.execute(
+            "INSERT INTO media (id, sha256, ext, bytes, state, canonical_path, added_ts, updated_ts) "
+            "VALUES (?, ?, '.jpg', 1, 'review', ?, 0, 0)", (f"m{i}", bytes.fromhex(h), str(src)))
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr("sys.argv", ["reshard_review.py", "--data-dir", str(tmp_path), "--layout", "year_month", "--write"])
+    rr.main()
+    ip.stop_logging()
+    assert sorted(p.relative_to(ip.REVIEW_ROOT).as_posix() for p in ip.REVIEW_ROOT.rglob("*")) == [
+        "2024-07", "2024-07/2024-07-01_08-00-38_ab111111.jpg", "2024-07/2024-07-02_08-00-38_cd222222.jpg"]
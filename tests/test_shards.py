@@ -0,0 +1,128 @@
+import json
+import shutil
+import sqlite3
+
+import pytest
+
+from conftest import _dated_jpeg
+import ingest_pass as ip
+import pixarr_shards as shards
+
+
+
+@pytest.fixture
+def nodes(tmp_path, ingest_env):
+    def ingest(data_dir, files, db=None, shard=None):
+        """Stage copies of `files` under data_dir and ingest them (into a delta DB when db is given)."""
+        root = ingest_env(data_dir, db)
+        for name, src in files.items():
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, root / name)
+        conn = ip.open_db()
+        if shard:
+            ip.ensure_delta_info(conn, shard)
+        ip.ingest_one_source(conn, "Staging/other", root, on_review_dupe="quarantine")
+        conn.close()
+
+    src = {}
+    for i, name in enumerate("abcde"):
+        src[name] = tmp_path / "src" / f"{name}.jpg"
+        _dated_jpeg(src[name], i, date="2024:05:01 09:00")
+    master, n1, n2 = tmp_path / "master", tmp_path / "node1", tmp_path / "node2"
+    ingest(master, {"a.jpg": src["a"], "b.jpg": src["b"]})
+    conn = ip.open_db()
+    conn.execute("UPDATE media SET state='library' WHERE id=?", (ip.uuid_from_hash(ip.sha256_file(src["a"])),))
+    conn.commit()
+    conn.close()
+    # a: in the master's library; b: in its review queue; d: on both nodes
+    d1, d2 = n1 / "db" / "delta.sqlite3", n2 / "db" / "delta.sqlite3"
+    ingest(n1, {"x/a.jpg": src["a"], "c.jpg": src["c"], "d.jpg": src["d"]}, d1, "node1")
+    ingest(n2, {"d.jpg": src["d"], "e.jpg": src["e"], "b.jpg": src["b"]}, d2, "node2")
+    ip.pathize(master)
+    return {"master": master, "deltas": (d1, d2), "src": src, "nodes": (n1, n2)}
+
+
+def test_merge_shards_end_to_end(nodes, monkeypatch):
+    d1, d2 = nodes["deltas"]
+    conn = ip.open_db()
+    sha = {k: ip.sha256_file(p) for k, p in nodes["src"].items()}
+    before = conn.execute("SELECT COUNT(*) FROM media").fetchone()[0]
+
+    monkeypatch.setattr(ip, "DRY_RUN", True)                        # plan: nothing written or moved
+    plan = shards.merge_delta(conn, d1)
+    assert (plan["rows"], plan["new"], plan["dupes"], plan["files_moved"]) == (3, 2, 1, 2)
+    assert conn.execute("SELECT COUNT(*) FROM media").fetchone()[0] == before
+    assert len(list((nodes["nodes"][0] / "media" / "Review").iterdir())) == 3
+    monkeypatch.setattr(ip, "DRY_RUN", False)
+
+    c1 = shards.merge_delta(conn, d1, chunk=2)
+    c2 = shards.merge_delta(conn, d2)
+    assert (c1["new"], c1["dupes"], c1["q_counts"]) == (2, 1, {"duplicate_in_library": 1})
+    # node2's d was merged from node1 a moment ago, b sits in the master's review queue
+    assert (c2["new"], c2["dupes"], c2["q_counts"]) == (1, 2, {"duplicate_in_review": 2})
+
+    states = dict(conn.execute("SELECT hash_sha256, state FROM media"))
+    assert states == {sha["a"]: "library", sha["b"]: "review", sha["c"]: "review",
+                      sha["d"]: "review", sha["e"]: "review"}
+    paths = [r[0] for r in conn.execute("SELECT canonical_path FROM media WHERE state='review'")]
+    assert all(p.startswith(str(ip.REVIEW_ROOT)) and (ip.REVIEW_ROOT / p.split("/")[-1]).exists() for p in paths)
+    for n in nodes["nodes"]:
+        assert not list((n / "media" / "Review").iterdir())        # moved to Review/ or Quarantine/
+    assert len(list((ip.QUARANTINE_ROOT / "duplicate").glob("*.jpg"))) == 3
+
+    # provenance: the dupes' sightings point at the surviving rows, batch -> shard
+    seen = conn.execute("""
+        SELECT m.hash_sha256, sm.shard FROM sightings s JOIN media m ON m.id = s.media_id
+        LEFT JOIN shard_batches b ON b.ingest_id = s.ingest_id LEFT JOIN shard_merges sm ON sm.shard_id = b.shard_id
+        """).fetchall()
+    assert sorted(seen, key=str) == sorted([
+        (sha["a"], None), (sha["a"], "node1"), (sha["b"], None), (sha["b"], "node2"),
+        (sha["c"], "node1"), (sha["d"], "node1"), (sha["d"], "node2"), (sha["e"], "node2")], key=str)
+    events = conn.execute("SELECT reason, extra FROM quarantine_events WHERE extra LIKE '%shard=%' "
+                          "ORDER BY reason").fetchall()
+    assert [r[0] for r in events] == ["duplicate_in_library", "duplicate_in_review", "duplicate_in_review"]
+    assert "basis=file shard=node1 dupe_of=" + ip.uuid_from_hash(sha["a"]) == events[0][1]
+
+    merges = conn.execute("SELECT shard, status, ingest_id, counts FROM shard_merges ORDER BY shard").fetchall()
+    assert [(s, st) for s, st, _i, _c in merges] == [("node1", "done"), ("node2", "done")]
+    row = conn.execute("SELECT scanned, updated, skipped_dupe, quarantined, q_counts FROM ingest_stats "
+                       "WHERE ingest_id=?", (merges[1][2],)).fetchone()
+    assert row == (3, 0, 2, 2, '{"duplicate_in_review": 2}')
+    assert json.loads(merges[0][3])["rows"] == 3
+    assert shards.pixarr_counters.drift(conn) == []
+
+    with pytest.raises(ValueError, match="already merged"):
+        shards.merge_delta(conn, d1)
+    conn.close()
+
+
+def test_merge_resumes_and_refuses_non_deltas(nodes, monkeypatch, tmp_path):
+    d1, _d2 = nodes["deltas"]
+    conn = ip.open_db()
+    with pytest.raises(ValueError, match="is the master DB"):
+        shards.merge_delta(conn, ip.DB_PATH)
+    plain = sqlite3.connect(tmp_path / "plain.sqlite3")
+    conn.backup(plain)
+    plain.close()
+    with pytest.raises(ValueError, match="not a shard delta"):
+        shards.merge_delta(conn, tmp_path / "plain.sqlite3")
+    calls = []
+    real = shards.DeltaMerge._merge_row
+
+    def flaky(self, d):
+        calls.append(d["rid"])
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return real(self, d)
+
+    monkeypatch.setattr(shards.DeltaMerge, "_merge_row", flaky)
+    with pytest.raises(KeyboardInterrupt):
+        shards.merge_delta(conn, d1, chunk=2)
+    assert conn.execute("SELECT status, last_rid FROM shard_merges").fetchone() == ("running", 2)
+    monkeypatch.setattr(shards.DeltaMerge, "_merge_row", real)
+    counts = shards.merge_delta(conn, d1, chunk=2)
+    assert (counts["rows"], counts["new"], counts["dupes"]) == (3, 2, 1)
+    assert conn.execute("SELECT COUNT(*) FROM media").fetchone()[0] == 4
+    assert conn.execute("SELECT COUNT(*) FROM ingests WHERE source='shard-merge:node1'").fetchone()[0] == 1
+    assert shards.pixarr_counters.drift(conn) == []
+    conn.close()
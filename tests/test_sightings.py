@@ -0,0 +1,140 @@
+import pytest
+
+import ingest_pass as ip
+import pixarr_sightings as ps
+
+
+def _media(conn, mid, state="review", deleted_at=None):
+    conn.execute("INSERT INTO media (id, sha256, ext, bytes, state, deleted_at, added_ts, updated_ts) "
+                 "VALUES (?, randomblob(32), '.jpg', 1, ?, ?, 0, 0)", (mid, state, deleted_at))
+
+
+def _sight(conn, mid, path, ts, iid=None):
+    conn.execute("INSERT INTO sightings (media_id, source_root, full_path, filename, ingest_id, seen_ts) "
+                 "VALUES (?, 'Staging/icloud', ?, ?, ?, ?)", (mid, path, path.rsplit("/", 1)[-1], iid, ts))
+
+
+def _rows(conn, mid):
+    return conn.execute("SELECT full_path, first_seen_ts, seen_ts, seen_count, ingest_id FROM sightings "
+                        "WHERE media_id = ? ORDER BY full_path", (mid,)).fetchall()
+
+
+def test_compact_history_then_upsert_on_insert(tmp_path):
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    conn = ip.open_db()
+    a, b = ip.begin_ingest(conn, "a"), ip.begin_ingest(conn, "b")
+    _media(conn, "m1")
+    _media(conn, "m2")
+    for ts in (300, 100, 200):                       # icloudpd re-export seen three times
+        _sight(conn, "m1", "/s/IMG_1.jpg", ts, a if ts < 300 else b)
+    _sight(conn, "m1", "/s/copy/IMG_1.jpg", 150, a)  # other path: kept as its own row
+    _sight(conn, "m2", "/s/IMG_2.jpg", 100, a)
+    conn.commit()
+    assert not ps.enabled(conn)
+
+    res = ps.compact(conn, chunk=1)
+    assert res == {"rows_before": 5, "removed": 2, "rows_after": 3}
+    assert ps.enabled(conn)
+    assert _rows(conn, "m1") == [("/s/IMG_1.jpg", 100, 300, 3, b), ("/s/copy/IMG_1.jpg", 150, 150, 1, a)]
+
+    # compaction mode: ingest's flush and view inserts update the row instead of adding one
+    c = ip.begin_ingest(conn, "c")
+    ip.insert_sighting(conn, "m1", "/s/IMG_1.jpg", "IMG_1.jpg", "Staging/icloud", None, c)
+    ip.insert_sighting(conn, "m2", "/s/new/IMG_2.jpg", "IMG_2.jpg", "Staging/icloud", None, c)
+    ip.timed_commit(conn)
+    _sight(conn, "m2", "/s/IMG_2.jpg", 50, a)        # older than the stored one: widens first_seen only
+    conn.commit()
+    first, last, n, iid = conn.execute("SELECT first_seen_ts, seen_ts, seen_count, ingest_id FROM sightings "
+                                       "WHERE full_path = '/s/IMG_1.jpg'").fetchone()
+    assert (first, n, iid) == (100, 4, c) and last > 300
+    assert _rows(conn, "m2")[0] == ("/s/IMG_2.jpg", 50, 100, 2, a)
+    assert conn.execute("SELECT COUNT(*) FROM sightings_v2").fetchone()[0] == 4
+
+    # a schema.sql re-run puts the plain view trigger back; ensure() restores the upsert
+    conn.executescript(ip.SCHEMA_PATH.read_text(encoding="utf-8"))
+    assert ps.ensure(conn) and not ps.ensure(conn)
+    _sight(conn, "m2", "/s/IMG_2.jpg", 400)
+    assert _rows(conn, "m2")[0][1:4] == (50, 400, 3)
+    conn.close()
+
+
+def test_compact_merges_rows_written_during_the_job(tmp_path):
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    conn = ip.open_db()
+    for i in range(1, 7):
+        _media(conn, f"m{i}")
+        _sight(conn, f"m{i}", f"/s/{i}.jpg", 10)
+        _sight(conn, f"m{i}", f"/s/{i}.jpg", 20)
+    conn.commit()
+    other = ip.open_db()
+
+    def progress(done, total, removed):              # another writer, between chunks, in already-done ranges
+        _sight(other, "m1", "/s/1.jpg", 30 + done)
+        other.commit()
+
+    res = ps.compact(conn, chunk=2, progress=progress)
+    assert res["rows_after"] == 6
+    assert conn.execute("SELECT seen_count, first_seen_ts FROM sightings WHERE media_id = 'm1'").fetchall() == [(2 + 4, 10)]
+    other.close()
+    conn.close()
+
+
+def test_prune_deleted_media_and_orphans(tmp_path):
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    conn = ip.open_db()
+    now = 1_700_000_000
+    _media(conn, "old", "deleted", "2023-01-01T00:00:00")      # deleted ~10 months before `now`
+    _media(conn, "recent", "deleted", "2023-11-10T00:00:00")
+    _media(conn, "kept", "library")
+    for mid in ("old", "recent", "kept"):
+        for i in range(3):
+            _sight(conn, mid, f"/s/{mid}/{i}.jpg", 100 + i)
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys=OFF")
+    conn.execute("DELETE FROM media WHERE id = 'kept'")          # hard delete without the cascade
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys=ON")
+
+    assert ps.prune(conn, deleted_days=90, keep=1, now=now) == {"orphans": 3, "deleted_media": 2}
+    assert [r[0] for r in _rows(conn, "old")] == ["/s/old/2.jpg"]   # latest kept
+    assert len(_rows(conn, "recent")) == 3
+    assert ps.prune(conn, deleted_days=0, keep=0, now=now) == {"orphans": 0, "deleted_media": 4}
+    assert conn.execute("SELECT COUNT(*) FROM sightings_v2").fetchone()[0] == 0
+    conn.close()
+
+
+@pytest.mark.skipif(ip.sqlite3.sqlite_version_info < (3, 35, 0), reason="DROP COLUMN needs SQLite 3.35")
+def test_ensure_upgrades_older_db(tmp_path):
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    conn = ip.open_db()
+    conn.executescript("DROP VIEW sightings; ALTER TABLE sightings_v2 DROP COLUMN first_seen_ts; "
+                       "ALTER TABLE sightings_v2 DROP COLUMN seen_count;")
+    assert not ps.has_columns(conn)
+    _media(conn, "m1")
+    conn.execute("INSERT INTO sightings_v2 (media_rid, source_root, full_path, filename, seen_ts) "
+                 "SELECT rid, 'Staging/pc', '/s/a.jpg', 'a.jpg', 5 FROM media")
+    conn.commit()
+    assert ps.ensure(conn) and ps.has_columns(conn)
+    assert _rows(conn, "m1") == [("/s/a.jpg", 5, 5, 1, None)]
+    conn.close()
+
+
+def test_ensure_installs_the_view_and_trigger_from_schema_sql(tmp_path):
+    # VIEW_DDL/_view_trigger copy db/schema.sql; a change to one without the other fails here
+    def ddl(conn):
+        return {name: " ".join(sql.split()) for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE name IN ('sightings', 'sightings_insert')")}
+
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    conn = ip.open_db()
+    from_schema = ddl(conn)
+    assert set(from_schema) == {"sightings", "sightings_insert"}
+    conn.executescript("DROP TRIGGER sightings_insert; DROP VIEW sightings;")
+    assert ps.ensure(conn)
+    assert ddl(conn) == from_schema
+    conn.close()
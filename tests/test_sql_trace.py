@@ -0,0 +1,71 @@
+import ingest_pass as ip
+import pixarr_trace as pt
+
+pixarr_sqlite = ip.pixarr_sqlite          # the module ingest_pass (and the API) import
+
+
+def test_normalize_and_cursor_accounting(tmp_path):
+    assert pt.normalize("SELECT * FROM media\n  WHERE id IN (?, ?,?) AND bytes > 10 AND ext = '.jpg';") == \
+        "SELECT * FROM media WHERE id IN (?…) AND bytes > ? AND ext = ?"
+    assert pt.normalize("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)") == "INSERT INTO t (a, b) VALUES (?, ?)…"
+
+    log = tmp_path / "slow.log"
+    tracer = pt.SqlTracer(slow_ms=0, slow_log=log, count_starts=True)
+    conn = pixarr_sqlite.connect(tmp_path / "t.sqlite3", "write", tracer=tracer)
+    conn.executescript("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER);"
+                       "CREATE TABLE n (c INTEGER); INSERT INTO n VALUES (0);"
+                       "CREATE TRIGGER t_ai AFTER INSERT ON t BEGIN UPDATE n SET c = c + 1; END;")
+    conn.executemany("INSERT INTO t (v) VALUES (?)", [(i,) for i in range(50)])
+    conn.commit()
+    assert sum(1 for _ in conn.execute("SELECT * FROM t WHERE v < 10")) == 10
+    assert conn.execute("SELECT v FROM t WHERE id = ?", (3,)).fetchone() == (2,)   # cursor dropped unexhausted
+    cur = conn.execute("SELECT * FROM t WHERE v < 25")
+    assert len(cur.fetchmany(20)) == 20 and len(cur.fetchmany(20)) == 5
+    for v in (1, 2):
+        conn.execute("SELECT * FROM t WHERE v = ?", (v,)).fetchall()
+
+    rep = {r["sql"]: r for r in tracer.report()}
+    assert rep["INSERT INTO t (v) VALUES (?)"]["rows"] == 50
+    assert rep["SELECT * FROM t WHERE v < ?"]["count"] == 2 and rep["SELECT * FROM t WHERE v < ?"]["rows"] == 35
+    assert rep["SELECT v FROM t WHERE id = ?"]["rows"] == 1
+    assert rep["SELECT * FROM t WHERE v = ?"]["count"] == 2
+    assert tracer.starts["INSERT"] > 100          # 50 rows + the trigger program each fired (traced as the INSERT)
+    assert not any("EXPLAIN" in k for k in rep)                                   # plans aren't traced themselves
+
+    text = log.read_text(encoding="utf-8")
+    assert "SELECT v FROM t WHERE id = ?" in text and "params: (3)" in text
+    assert "plan: SEARCH t USING INTEGER PRIMARY KEY" in text
+    assert text.count("plan: SCAN t") == 2 and text.count("(logged with its first slow run)") == 2  # once per shape
+    conn.close()
+
+
+def test_ingest_writer_statements_traced(tmp_path, monkeypatch):
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    plain = ip.open_db()
+    assert type(plain) is pixarr_sqlite.PixarrConnection                          # no tracer, nothing wrapped
+    plain.close()
+    tracer = pt.SqlTracer(slow_ms=None)
+    monkeypatch.setattr(ip, "SQL_TRACER", tracer)
+    conn = ip.open_db()
+    iid = ip.begin_ingest(conn, "t")
+    for i in range(20):
+        h = f"{i:064x}"
+        mid, _st, _p = ip.upsert_media(conn, {
+            "id": ip.uuid_from_hash(h), "hash_sha256": h, "phash": None, "content_sha256": h, "ext": ".jpg",
+            "bytes": 1, "taken_at": None, "tz_offset": None, "gps_lat": None, "gps_lon": None, "state": "review",
+            "canonical_path": None, "xmp_written": 0, "quarantine_reason": None})
+        ip.insert_sighting(conn, mid, tmp_path / f"{i}.jpg", f"{i}.jpg", "Staging/pc", None, iid)
+        assert ip._find_canonical_by_filehash(conn, h)[0] == mid
+        assert ip._find_canonical_by_contenthash(conn, h)[0] == mid
+    ip.timed_commit(conn)
+    conn.close()
+
+    rows = tracer.report()
+    by_sql = {r["sql"]: r for r in rows}
+    lookups = [r for k, r in by_sql.items() if "FROM media WHERE sha256 = ?" in k or "WHERE content_bin = ?" in k]
+    assert len(lookups) == 2 and all(r["count"] == 20 and r["rows"] == 20 for r in lookups)
+    assert any(k.startswith("INSERT INTO media") and r["count"] >= 20 for k, r in by_sql.items())
+    assert any(k.startswith("INSERT INTO sightings_v2") and r["rows"] == 20 for k, r in by_sql.items())
+    assert rows == sorted(rows, key=lambda r: -r["total_ms"])
+    assert tracer.format_table(top=3)[0].split()[:2] == ["count", "total"]
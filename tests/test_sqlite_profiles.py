@@ -0,0 +1,78 @@
+import sqlite3
+import threading
+
+import pytest
+
+import ingest_pass as ip
+import pixarr_sqlite
+
+
+def test_profiles_apply_pragmas_and_read_is_query_only(tmp_path):
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+
+    w = pixarr_sqlite.connect(ip.DB_PATH, "write")
+    rep = pixarr_sqlite.pragma_report(w)
+    assert (rep["journal_mode"], rep["foreign_keys"], rep["busy_timeout"]) == ("wal", 1, 30000)
+    assert rep["wal_autocheckpoint"] == 4000 and rep["synchronous"] == 1       # NORMAL
+    w.execute("INSERT INTO ingests (id, source) VALUES ('i1', 't')")
+    w.close()                                                                 # commit-less close: rolled back, optimize runs
+
+    r = pixarr_sqlite.connect(ip.DB_PATH, "read", row_factory=sqlite3.Row)
+    assert r.execute("PRAGMA query_only").fetchone()[0] == 1
+    assert r.execute("SELECT COUNT(*) AS n FROM ingests").fetchone()["n"] == 0
+    with pytest.raises(sqlite3.OperationalError):
+        r.execute("INSERT INTO ingests (id, source) VALUES ('i2', 't')")
+    r.close()
+
+    w = pixarr_sqlite.connect(ip.DB_PATH, "write", foreign_keys=0)
+    assert w.execute("PRAGMA foreign_keys").fetchone()[0] == 0
+    w.close()
+    with pytest.raises(ValueError):
+        pixarr_sqlite.connect(ip.DB_PATH, "bulk")
+
+
+def test_thread_connection_is_per_thread_and_sees_commits(tmp_path):
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    a = pixarr_sqlite.thread_connection(ip.DB_PATH)
+    assert pixarr_sqlite.thread_connection(ip.DB_PATH) is a
+    other = []
+
+    def worker():
+        conn = pixarr_sqlite.thread_connection(ip.DB_PATH)
+        other.append(conn is a)
+        conn.close()
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert other == [False]
+
+    w = ip.open_db()
+    iid = ip.begin_ingest(w, "t")
+    assert a.execute("SELECT id FROM ingests").fetchall() == [(iid,)]         # kept open, still current
+    w.close()
+    a.close()
+
+
+def test_immediate_commits_pending_work_and_rolls_back_on_error(tmp_path):
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    w = pixarr_sqlite.connect(ip.DB_PATH, "write")
+    w.execute("INSERT INTO ingests (id, source) VALUES ('i1', 't')")          # implicit tx: committed first
+
+    def boom():
+        w.execute("INSERT INTO ingests (id, source) VALUES ('i2', 't')")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        pixarr_sqlite.immediate(w, boom)
+    assert not w.in_transaction
+    n = pixarr_sqlite.immediate(w, lambda: w.execute("INSERT INTO ingests (id, source) VALUES ('i3', 't')").rowcount)
+    assert n == 1
+    w.close()
+
+    r = pixarr_sqlite.connect(ip.DB_PATH, "read")
+    assert [i for (i,) in r.execute("SELECT id FROM ingests ORDER BY id")] == ["i1", "i3"]
+    r.close()
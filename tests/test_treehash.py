@@ -0,0 +1,81 @@
+import hashlib
+import shutil
+
+import pytest
+
+from conftest import _dated_jpeg
+import ingest_pass as ip
+import pixarr_treehash as th
+import scrub_media
+
+
+def test_tree_hash_chunks_and_range_verify(tmp_path):
+    p = tmp_path / "big.bin"
+    data = bytes(range(256)) * 41      # 10496 bytes -> 11 chunks of 1000 (last one short)
+    p.write_bytes(data)
+    t = th.tree_hash(p, chunk_bytes=1000, workers=4)
+    assert len(t.chunks) == 11 and t.size == len(data)
+    assert t.chunks[10] == hashlib.sha256(data[10000:]).digest()
+    assert t == th.tree_hash(p, chunk_bytes=1000, workers=1)
+    assert t.root != th.tree_hash(p, chunk_bytes=2000).root
+
+    p.write_bytes(data[:4321] + b"\xff" + data[4322:])
+    assert th.verify_range(p, t) == [4]
+    assert th.verify_range(p, t, 0, 4000) == []
+    assert th.verify_range(p, t, 4500, 4501) == [4]
+    p.write_bytes(data[:-1])
+    assert th.verify_range(p, t, 0, 2000) == [0, 1]
+
+
+@pytest.fixture
+def staged(staged, monkeypatch):
+    monkeypatch.setattr(ip, "TREE_HASH_MIN", 1)
+    monkeypatch.setattr(ip.pixarr_treehash, "CHUNK_BYTES", 256)
+    _dated_jpeg(staged / "a.jpg", 0)
+    return staged
+
+
+def test_ingest_stores_tree_hash_and_reuses_it_for_dupes(staged, monkeypatch):
+    conn = ip.open_db()
+    stats = ip.ingest_one_source(conn, "Staging/other", staged, on_review_dupe="quarantine")
+    assert (stats["moved"], stats["tree_hashed"], stats["tree_hits"]) == (1, 1, 0)
+    (mid, h, size), = conn.execute("SELECT id, hash_sha256, bytes FROM media").fetchall()
+    stored = ip.load_tree_hash(conn, mid)
+    assert stored.chunk_bytes == 256 and len(stored.chunks) == -(-size // 256)
+    assert stored == th.tree_hash(next(ip.REVIEW_ROOT.iterdir()), chunk_bytes=256)
+    assert h == hashlib.sha256(next(ip.REVIEW_ROOT.iterdir()).read_bytes()).hexdigest()
+
+    # the concurrent sha256 pass is stopped on a tree hit and its result isn't used
+    shutil.copy2(next(ip.REVIEW_ROOT.iterdir()), staged / "copy.jpg")
+    stopped = []
+
+    def sha_until_stopped(p, stop=None):
+        stopped.append(stop.wait(5))
+        return None
+
+    monkeypatch.setattr(ip, "sha256_file", sha_until_stopped)
+    stats = ip.ingest_one_source(conn, "Staging/other", staged, on_review_dupe="quarantine")
+    assert (stats["skipped_dupe"], stats["tree_hits"], stopped) == (1, 1, [True])
+    assert stats["q_counts"]["duplicate_in_review"] == 1
+    conn.close()
+
+
+def test_range_scrub_does_not_stamp_last_verified(staged, monkeypatch):
+    conn = ip.open_db()
+    ip.ingest_one_source(conn, "Staging/other", staged, on_review_dupe="quarantine")
+    conn.execute("UPDATE media SET last_verified_at=NULL")        # ingest stamps the move
+    conn.commit()
+    conn.close()
+
+    def scrub(*argv):
+        monkeypatch.setattr("sys.argv", ["scrub_media.py", "--data-dir", str(ip.DATA_DIR), "--write", *argv])
+        with pytest.raises(SystemExit) as e:
+            scrub_media.main()
+        assert e.value.code == 0
+        rd = ip.open_db("read")
+        stamp = rd.execute("SELECT last_verified_at FROM media").fetchone()[0]
+        rd.close()
+        return stamp
+
+    assert scrub("--range", "0:300") is None           # two chunks checked, not the whole file
+    assert scrub() is not None
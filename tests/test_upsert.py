@@ -0,0 +1,46 @@
+import pytest
+
+import ingest_pass as ip
+
+
+def _row(h, **kw):
+    row = {"id": ip.uuid_from_hash(h), "hash_sha256": h, "phash": None, "content_sha256": None, "ext": ".jpg",
+           "bytes": 1, "taken_at": None, "tz_offset": None, "gps_lat": None, "gps_lon": None, "state": "review",
+           "canonical_path": None, "xmp_written": 0, "quarantine_reason": None}
+    row.update(kw)
+    return row
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_upsert_merge_rules_and_buffered_sightings(tmp_path, monkeypatch, returning):
+    if returning and not ip.sqlite3.sqlite_version_info >= (3, 35, 0):
+        pytest.skip("SQLite < 3.35 has no RETURNING")
+    monkeypatch.setattr(ip, "UPSERT_RETURNING", returning)
+    ip.pathize(tmp_path)
+    ip.ensure_db()
+    conn = ip.open_db()
+    iid = ip.begin_ingest(conn, "t")
+    h = "ab" * 32
+
+    mid, st, cpath = ip.upsert_media(conn, _row(h, state="quarantine", quarantine_reason="missing_datetime",
+                                                gps_lat=1.5, canonical_path="/q/a.jpg"))
+    assert (mid, st, cpath) == (ip.uuid_from_hash(h), "quarantine", "/q/a.jpg")
+    ip.insert_sighting(conn, mid, tmp_path / "a.jpg", "a.jpg", "Staging/pc", None, iid)
+    assert conn.execute("SELECT COUNT(*) FROM sightings_v2").fetchone()[0] == 0      # buffered
+    ip.timed_commit(conn)
+    assert conn.execute("SELECT COUNT(*) FROM sightings").fetchone()[0] == 1
+
+    # re-seen with a date: fills gaps, keeps quarantine state/reason, GPS not overwritten
+    assert ip.upsert_media(conn, _row(h, taken_at="2020-01-02T03:04:05", gps_lat=9.0, state="quarantine",
+                                      quarantine_reason="missing_datetime")) == (mid, "quarantine", "/q/a.jpg")
+    conn.execute("UPDATE media SET state='library' WHERE id=?", (mid,))
+    assert ip.upsert_media(conn, _row(h, taken_at="1999-01-01T00:00:00"))[1] == "library"   # never demoted
+    row = conn.execute("SELECT taken_at, taken_ts, gps_lat, quarantine_reason FROM media WHERE id=?", (mid,)).fetchone()
+    assert row == ("2020-01-02T03:04:05", ip.iso_to_epoch("2020-01-02T03:04:05"), 1.5, None)
+
+    ip.insert_sighting(conn, mid, tmp_path / "b.jpg", "b.jpg", "Staging/pc", None, iid)
+    ip.drop_sightings()                                   # interrupted file: rolled back with it
+    conn.rollback()
+    ip.finish_ingest(conn, iid)
+    assert conn.execute("SELECT COUNT(*) FROM sightings").fetchone()[0] == 1
+    conn.close()